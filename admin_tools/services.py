@@ -0,0 +1,445 @@
+"""
+Table access for the database browser and export endpoints.
+
+Table and column names are only taken from database introspection, never
+from the request, so they can be interpolated into SQL safely.
+
+Browsing pages through a table by primary key (keyset pagination) instead
+of ``OFFSET``, so later pages cost as much as the first one. Exports read
+rows from a server-side cursor with ``fetchmany`` and are rendered chunk by
+chunk, so neither the web worker nor the client waits for the whole table.
+"""
+
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - Parquet export is optional
+    pyarrow = None
+
+EXPORT_CHUNK_SIZE = 2000
+
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "prefix"
+MATCH_CONTAINS = "contains"
+MATCH_MODES = (MATCH_EXACT, MATCH_PREFIX, MATCH_CONTAINS)
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED)
+
+TEXT_FIELD_TYPES = {"CharField", "TextField", "SlugField", "EmailField", "URLField"}
+INTEGER_FIELD_TYPES = {
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+}
+
+EXCLUDED_TABLE_PREFIXES = ("django_", "auth_", "social_auth_")
+
+
+class TableNotFoundError(LookupError):
+    """Raised for tables that do not exist."""
+
+
+class TableQueryError(ValueError):
+    """Raised for invalid browse or export parameters."""
+
+
+class TableInfo:
+    """Columns and primary key of a table, as reported by the database."""
+
+    def __init__(self, name, columns, field_types, pk_column):
+        self.name = name
+        self.columns = columns
+        self.field_types = field_types
+        self.pk_column = pk_column
+
+    def project(self, names):
+        """
+        Return the requested columns in table order.
+
+        Raises:
+            TableQueryError: If a name is not a column of the table
+        """
+        if not names:
+            return list(self.columns)
+        unknown = set(names) - set(self.columns)
+        if unknown:
+            raise TableQueryError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        return [column for column in self.columns if column in names]
+
+
+def list_table_names():
+    """Return the names of all tables shown in the database browser."""
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+    return [table for table in tables if not table.startswith(EXCLUDED_TABLE_PREFIXES)]
+
+
+def get_table_info(table_name):
+    """
+    Describe a table.
+
+    Raises:
+        TableNotFoundError: If the table does not exist
+    """
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        if table_name not in introspection.table_names(cursor, include_views=True):
+            raise TableNotFoundError(f"Table {table_name} does not exist")
+        description = introspection.get_table_description(cursor, table_name)
+        pk_column = introspection.get_primary_key_column(cursor, table_name)
+
+    columns = [column.name for column in description]
+    field_types = {}
+    for column in description:
+        try:
+            field_types[column.name] = introspection.get_field_type(
+                column.type_code, column
+            )
+        except KeyError:
+            field_types[column.name] = None
+    return TableInfo(table_name, columns, field_types, pk_column)
+
+
+def _like_pattern(value, match):
+    value = connection.ops.prep_for_like_query(value)
+    return f"{value}%" if match == MATCH_PREFIX else f"%{value}%"
+
+
+def _text_expression(column):
+    """Return a column cast to text for ``contains`` searches."""
+    if connection.vendor == "mysql":
+        return f"CAST({column} AS CHAR)"
+    if connection.vendor == "sqlite":
+        return column
+    return f"CAST({column} AS TEXT)"
+
+
+def _like_operator():
+    return "ILIKE" if connection.vendor == "postgresql" else "LIKE"
+
+
+def _like_escape():
+    # MySQL escapes with a backslash by default and would need it doubled
+    return "" if connection.vendor == "mysql" else " ESCAPE '\\'"
+
+
+def build_where(table, search="", filter_field="", match=MATCH_CONTAINS):
+    """
+    Build the WHERE clause of a search.
+
+    With ``filter_field`` only that column is searched: ``exact`` compares
+    with ``=`` and ``prefix`` uses ``LIKE 'value%'``, both of which can be
+    answered from an index on the column; ``contains`` matches anywhere.
+    Without it, text columns are matched with LIKE and integer columns by
+    equality, so no column needs to be cast.
+
+    Returns:
+        tuple: (SQL starting with ``WHERE`` or an empty string, params)
+
+    Raises:
+        TableQueryError: For unknown columns or match modes
+    """
+    if not search:
+        return "", []
+    if match not in MATCH_MODES:
+        raise TableQueryError(f"match must be one of: {', '.join(MATCH_MODES)}")
+
+    qn = connection.ops.quote_name
+    like = _like_operator()
+
+    if filter_field:
+        if filter_field not in table.columns:
+            raise TableQueryError(f"Unknown column: {filter_field}")
+        column = qn(filter_field)
+        is_text = table.field_types.get(filter_field) in TEXT_FIELD_TYPES
+        if match == MATCH_EXACT:
+            return f"WHERE {column} = %s", [search]
+        if match == MATCH_PREFIX and is_text:
+            return f"WHERE {column} LIKE %s{_like_escape()}", [_like_pattern(search, match)]
+        if not is_text:
+            column = _text_expression(column)
+        return (
+            f"WHERE {column} {like} %s{_like_escape()}",
+            [_like_pattern(search, match)],
+        )
+
+    clauses, params = [], []
+    for name in table.columns:
+        field_type = table.field_types.get(name)
+        if field_type in TEXT_FIELD_TYPES:
+            clauses.append(f"{qn(name)} {like} %s{_like_escape()}")
+            params.append(_like_pattern(search, MATCH_CONTAINS))
+        elif field_type in INTEGER_FIELD_TYPES and search.lstrip("-").isdigit():
+            clauses.append(f"{qn(name)} = %s")
+            params.append(int(search))
+    if not clauses:
+        # Nothing can match, e.g. a word in a table without text columns
+        return "WHERE 1 = 0", []
+    return "WHERE " + " OR ".join(clauses), params
+
+
+def count_rows(table, where="", params=(), mode=COUNT_EXACT):
+    """
+    Count the rows matching a search.
+
+    ``estimated`` answers from the planner statistics on PostgreSQL
+    (``pg_class.reltuples`` without a search, the row estimate of
+    ``EXPLAIN`` with one) instead of scanning the table. Other databases
+    always count exactly.
+
+    Returns:
+        tuple: (row count, whether it is an estimate)
+    """
+    if mode not in COUNT_MODES:
+        raise TableQueryError(f"count must be one of: {', '.join(COUNT_MODES)}")
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if mode == COUNT_ESTIMATED and connection.vendor == "postgresql":
+            if not where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [qn(table.name)],
+                )
+                estimate = cursor.fetchone()[0]
+                # -1 means the table was never analyzed
+                if estimate is not None and estimate >= 0:
+                    return estimate, True
+            else:
+                cursor.execute(
+                    f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {qn(table.name)} {where}",
+                    params,
+                )
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"]), True
+
+        cursor.execute(f"SELECT COUNT(*) FROM {qn(table.name)} {where}", params)
+        return cursor.fetchone()[0], False
+
+
+def fetch_page(table, columns, where="", params=(), limit=100, after=None, offset=0):
+    """
+    Fetch one page of rows.
+
+    Pass the ``next_cursor`` of the previous page as ``after`` to page by
+    primary key; ``offset`` is only used for tables without a primary key
+    or when no cursor is given.
+
+    Returns:
+        tuple: (list of row dicts, cursor for the next page or None)
+    """
+    qn = connection.ops.quote_name
+    pk = table.pk_column
+    params = list(params)
+    select = ", ".join(qn(column) for column in columns)
+
+    if pk:
+        # The key is needed to continue from this page even if not shown
+        select_columns = columns if pk in columns else [*columns, pk]
+        select = ", ".join(qn(column) for column in select_columns)
+        if after is not None:
+            keyset = f"{qn(pk)} > %s"
+            if where:
+                # The search may be an OR over columns, so keep it grouped
+                condition = where.removeprefix("WHERE ")
+                where = f"WHERE ({condition}) AND {keyset}"
+            else:
+                where = f"WHERE {keyset}"
+            params.append(after)
+            offset = 0
+        order = f"ORDER BY {qn(pk)}"
+    else:
+        select_columns = columns
+        order = ""
+
+    query = f"SELECT {select} FROM {qn(table.name)} {where} {order} LIMIT %s"
+    params.append(limit)
+    if offset:
+        query += " OFFSET %s"
+        params.append(offset)
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        rows = [dict(zip(select_columns, row)) for row in cursor.fetchall()]
+
+    next_cursor = None
+    if pk and len(rows) == limit:
+        next_cursor = rows[-1][pk]
+    if pk and pk not in columns:
+        for row in rows:
+            del row[pk]
+    return rows, next_cursor
+
+
+def iter_rows(table, columns, where="", params=(), chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield chunks of row tuples from a server-side cursor.
+
+    On PostgreSQL ``chunked_cursor`` is a named cursor, so only one chunk
+    is held in memory at a time.
+    """
+    qn = connection.ops.quote_name
+    select = ", ".join(qn(column) for column in columns)
+    order = f" ORDER BY {qn(table.pk_column)}" if table.pk_column else ""
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(f"SELECT {select} FROM {qn(table.name)} {where}{order}", params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+class _Buffer(io.StringIO):
+    """A text buffer that hands out and forgets what was written to it."""
+
+    def drain(self):
+        value = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return value
+
+
+def render_csv(columns, chunks):
+    """Yield the rows as CSV, one string per chunk."""
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.drain()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.drain()
+
+
+def render_jsonl(columns, chunks):
+    """Yield the rows as JSON Lines, one string per chunk."""
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+            for row in rows
+        )
+
+
+def render_parquet(columns, chunks):
+    """
+    Yield the rows as a Parquet file, one row group per chunk.
+
+    The schema is inferred from the first chunk; columns that are empty in
+    it are written as strings. Decimals are written as strings to keep
+    their exact values.
+
+    Raises:
+        TableQueryError: If pyarrow is not installed
+    """
+    if pyarrow is None:
+        raise TableQueryError("Parquet export requires pyarrow")
+
+    def generate():
+        sink = _ByteSink()
+        writer = None
+        for rows in chunks:
+            batch = pyarrow.Table.from_pydict(
+                {
+                    column: [_parquet_value(row[i]) for row in rows]
+                    for i, column in enumerate(columns)
+                }
+            )
+            if writer is None:
+                schema = pyarrow.schema(
+                    [
+                        field.with_type(pyarrow.string())
+                        if pyarrow.types.is_null(field.type)
+                        else field
+                        for field in batch.schema
+                    ]
+                )
+                writer = pyarrow.parquet.ParquetWriter(sink, schema)
+            writer.write_table(batch.cast(writer.schema))
+            yield sink.drain()
+        if writer is None:
+            writer = pyarrow.parquet.ParquetWriter(
+                sink, pyarrow.schema([(column, pyarrow.string()) for column in columns])
+            )
+        writer.close()
+        yield sink.drain()
+
+    return generate()
+
+
+def _parquet_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if value is None or isinstance(
+        value, (str, int, float, bool, bytes, datetime.date, datetime.time)
+    ):
+        return value
+    # Types pyarrow cannot infer, e.g. UUIDs
+    return str(value)
+
+
+class _ByteSink:
+    """
+    A write-only file that hands out and forgets what was written to it.
+
+    Parquet stores file offsets in its footer, so the position keeps
+    counting across ``drain`` calls.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        value = b"".join(self._parts)
+        self._parts = []
+        return value
+
+
+EXPORT_FORMATS = {
+    "csv": (render_csv, "text/csv; charset=utf-8", "csv"),
+    "jsonl": (render_jsonl, "application/x-ndjson", "jsonl"),
+    "parquet": (render_parquet, "application/vnd.apache.parquet", "parquet"),
+}
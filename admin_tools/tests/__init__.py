@@ -0,0 +1 @@
+"""Tests for the admin tools app."""
@@ -0,0 +1,140 @@
+"""
+Tests for browsing and exporting database tables.
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from admin_tools import services
+from admin_tools.views import export_table_data, get_table_data
+from pyerp.business_modules.products.models import ProductCategory
+
+User = get_user_model()
+
+TABLE = ProductCategory._meta.db_table
+
+
+@pytest.mark.backend
+@pytest.mark.api
+class TableDataTests(TestCase):
+    """Tests for the table browse and export endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="pw", is_staff=True
+        )
+        cls.categories = ProductCategory.objects.bulk_create(
+            [
+                ProductCategory(code=f"CAT{i:02d}", name=f"Category {i}")
+                for i in range(25)
+            ]
+            + [ProductCategory(code="X_1", name="100% wool")]
+        )
+
+    def _get(self, view, **params):
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, user=self.admin)
+        return view(request, table_name=TABLE)
+
+    def _browse(self, **params):
+        response = self._get(get_table_data, **params)
+        return response.status_code, json.loads(response.content)
+
+    def _export(self, **params):
+        response = self._get(export_table_data, **params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_keyset_pagination(self):
+        """Test that pages continue from the last primary key."""
+        status, first = self._browse(limit=10)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(first["data"]), 10)
+        self.assertIn("code", first["columns"])
+
+        _, second = self._browse(limit=10, after=first["next_cursor"])
+        self.assertEqual(second["data"][0]["id"], first["data"][-1]["id"] + 1)
+
+        _, last = self._browse(limit=10, after=second["next_cursor"])
+        self.assertEqual(len(last["data"]), 6)
+        self.assertIsNone(last["next_cursor"])
+
+    def test_keyset_pagination_with_search_across_columns(self):
+        """Test that the cursor applies to every column of an OR search."""
+        ids, cursor = [], None
+        for _ in range(5):
+            params = {"limit": 10, "search": "cat"}
+            if cursor is not None:
+                params["after"] = cursor
+            status, page = self._browse(**params)
+            self.assertEqual(status, 200)
+            ids.extend(row["id"] for row in page["data"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertIsNone(cursor)
+        self.assertEqual(ids, [category.pk for category in self.categories[:25]])
+
+    def test_column_search_modes(self):
+        """Test exact, prefix and contains searches on one column."""
+        _, exact = self._browse(search="CAT01", filter_field="code", match="exact")
+        self.assertEqual([r["code"] for r in exact["data"]], ["CAT01"])
+
+        _, prefix = self._browse(
+            search="CAT1", filter_field="code", match="prefix", count="exact"
+        )
+        self.assertEqual(prefix["count"], 10)
+        self.assertFalse(prefix["count_estimated"])
+
+        # LIKE wildcards in the search are matched literally
+        _, literal = self._browse(search="X_", filter_field="code", match="prefix")
+        self.assertEqual([r["code"] for r in literal["data"]], ["X_1"])
+        _, percent = self._browse(search="100%", count="estimated")
+        self.assertEqual(percent["count"], 1)
+
+        status, error = self._browse(search="x", filter_field="nope")
+        self.assertEqual(status, 400)
+        self.assertIn("Unknown column", error["detail"])
+
+    def test_search_across_columns_matches_integer_keys(self):
+        """Test that numeric searches compare integer columns exactly."""
+        pk = self.categories[3].pk
+        _, result = self._browse(search=str(pk))
+        self.assertIn(pk, [r["id"] for r in result["data"]])
+
+    def test_export_csv_with_projection(self):
+        """Test the streamed CSV export of selected columns."""
+        content = self._export(columns="code,name", search="CAT2")
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ["code", "name"])
+        self.assertEqual([r[0] for r in rows[1:]], [f"CAT2{i}" for i in range(5)])
+
+    def test_export_jsonl_in_chunks(self):
+        """Test that JSON Lines are produced chunk by chunk."""
+        table = services.get_table_info(TABLE)
+        chunks = list(services.iter_rows(table, ["code"], chunk_size=10))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 6])
+
+        lines = self._export(export_format="jsonl").splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(json.loads(lines[0])["code"], "CAT00")
+
+    def test_export_rejects_bad_parameters(self):
+        """Test validation of the export parameters."""
+        response = self._get(export_table_data, export_format="xlsx")
+        self.assertEqual(response.status_code, 400)
+        response = self._get(export_table_data, columns="code,secret")
+        self.assertEqual(response.status_code, 400)
+
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=self.admin)
+        response = export_table_data(request, table_name="no_such_table")
+        self.assertEqual(response.status_code, 404)
@@ -10,4 +10,9 @@ urlpatterns = [
         views.get_table_data,
         name="get_table_data",
     ),
+    path(
+        "database/table-export/<str:table_name>/",
+        views.export_table_data,
+        name="export_table_data",
+    ),
 ]
@@ -1,9 +1,22 @@
 from django.db import connection
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 
-# Create your views here.
+from admin_tools.services import (
+    EXPORT_FORMATS,
+    MATCH_CONTAINS,
+    TableNotFoundError,
+    TableQueryError,
+    build_where,
+    count_rows,
+    fetch_page,
+    get_table_info,
+    iter_rows,
+)
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
 
 
 @api_view(["GET"])
@@ -45,130 +58,58 @@ def list_tables(request):
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def get_table_data(request, table_name):
-    """API endpoint to get data from a specified table."""
+    """
+    API endpoint to browse a page of rows of a table.
+
+    Query parameters:
+        limit: Rows per page (default 1000, at most MAX_PAGE_SIZE)
+        after: ``next_cursor`` of the previous page, pages by primary key
+        offset: Rows to skip, for tables without a primary key
+        search, filter_field, match: See ``services.build_where``
+        count: ``exact`` or ``estimated`` to include the number of matches
+    """
     try:
-        # Validate table name to prevent SQL injection
-        with connection.cursor() as cursor:
-            # Check if table exists
-            if connection.vendor == "postgresql":
-                cursor.execute(
-                    """
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'public' 
-                        AND table_name = %s
-                    );
-                    """,
-                    [table_name],
-                )
-            elif connection.vendor == "mysql":
-                cursor.execute(
-                    "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s;",
-                    [table_name],
-                )
-            else:  # SQLite
-                cursor.execute(
-                    "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?;",
-                    [table_name],
-                )
-
-            table_exists = cursor.fetchone()[0]
-            if not table_exists:
-                return JsonResponse(
-                    {"success": False, "detail": f"Table {table_name} does not exist"},
-                    status=404,
-                )
+        table = get_table_info(table_name)
+        params = request.query_params
+        limit = min(int(params.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        offset = int(params.get("offset", 0))
+        if limit < 1 or offset < 0:
+            raise TableQueryError("limit must be positive and offset not negative")
+
+        where, where_params = build_where(
+            table,
+            search=params.get("search", ""),
+            filter_field=params.get("filter_field", ""),
+            match=params.get("match", MATCH_CONTAINS),
+        )
+        rows, next_cursor = fetch_page(
+            table,
+            table.columns,
+            where,
+            where_params,
+            limit=limit,
+            after=params.get("after"),
+            offset=offset,
+        )
 
-            # Get column names
-            if connection.vendor == "postgresql":
-                cursor.execute(
-                    """
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_schema = 'public'
-                    AND table_name = %s
-                    ORDER BY ordinal_position;
-                    """,
-                    [table_name],
-                )
-            elif connection.vendor == "mysql":
-                cursor.execute(
-                    """
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_schema = DATABASE()
-                    AND table_name = %s
-                    ORDER BY ordinal_position;
-                    """,
-                    [table_name],
-                )
-            else:  # SQLite
-                cursor.execute(f"PRAGMA table_info({table_name});")
-                columns = [
-                    col[1] for col in cursor.fetchall()
-                ]  # SQLite returns column name at index 1
-
-            if connection.vendor != "sqlite":
-                columns = [col[0] for col in cursor.fetchall()]
-
-            # Fetch data with limit
-            limit = int(request.query_params.get("limit", 1000))
-            offset = int(request.query_params.get("offset", 0))
-
-            # Apply search/filter if provided
-            search = request.query_params.get("search", "")
-            filter_field = request.query_params.get("filter_field", "")
-
-            params = []
-            if search and filter_field and filter_field in columns:
-                # Filter by specific field
-                if connection.vendor == "postgresql":
-                    where_clause = f"WHERE CAST({filter_field} AS TEXT) ILIKE %s"
-                    params = [f"%{search}%"]
-                elif connection.vendor == "mysql":
-                    where_clause = f"WHERE CAST({filter_field} AS CHAR) LIKE %s"
-                    params = [f"%{search}%"]
-                else:  # SQLite
-                    where_clause = f"WHERE {filter_field} LIKE ?"
-                    params = [f"%{search}%"]
-            elif search:
-                # Search across all columns (simplified approach - database specific)
-                where_clauses = []
-                for col in columns:
-                    if connection.vendor == "postgresql":
-                        where_clauses.append(f"CAST({col} AS TEXT) ILIKE %s")
-                    elif connection.vendor == "mysql":
-                        where_clauses.append(f"CAST({col} AS CHAR) LIKE %s")
-                    else:  # SQLite
-                        where_clauses.append(f"{col} LIKE ?")
-                    params.append(f"%{search}%")
-                where_clause = "WHERE " + " OR ".join(where_clauses)
-            else:
-                where_clause = ""
-
-            # Execute the query
-            query = f"SELECT * FROM {table_name} {where_clause} LIMIT {limit} OFFSET {offset};"
-            cursor.execute(query, params)
-
-            # Fetch all rows
-            rows = cursor.fetchall()
-
-            # Convert to list of dictionaries
-            result = []
-            for row in rows:
-                row_dict = {}
-                for i, col in enumerate(columns):
-                    row_dict[col] = row[i]
-                result.append(row_dict)
-
-            return JsonResponse(
-                {
-                    "success": True,
-                    "data": result,
-                    "total_count": len(result),
-                    "columns": columns,
-                }
+        response = {
+            "success": True,
+            "data": rows,
+            "total_count": len(rows),
+            "columns": table.columns,
+            "next_cursor": next_cursor,
+        }
+        if params.get("count"):
+            count, estimated = count_rows(
+                table, where, where_params, mode=params["count"]
             )
+            response["count"] = count
+            response["count_estimated"] = estimated
+        return JsonResponse(response)
+    except TableNotFoundError as e:
+        return JsonResponse({"success": False, "detail": str(e)}, status=404)
+    except (TableQueryError, ValueError) as e:
+        return JsonResponse({"success": False, "detail": str(e)}, status=400)
     except Exception as e:
         import traceback
 
@@ -176,3 +117,45 @@ def get_table_data(request, table_name):
             {"success": False, "detail": str(e), "traceback": traceback.format_exc()},
             status=500,
         )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def export_table_data(request, table_name):
+    """
+    API endpoint to download a whole table, streamed from a server-side cursor.
+
+    Query parameters:
+        export_format: ``csv`` (default), ``jsonl`` or ``parquet`` (needs pyarrow)
+        columns: Comma-separated columns to export, default all
+        search, filter_field, match: See ``services.build_where``
+    """
+    try:
+        table = get_table_info(table_name)
+        params = request.query_params
+        export_format = params.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise TableQueryError(
+                f"export_format must be one of: {', '.join(EXPORT_FORMATS)}"
+            )
+        render, content_type, extension = EXPORT_FORMATS[export_format]
+
+        requested = [c for c in params.get("columns", "").split(",") if c]
+        columns = table.project(requested)
+        where, where_params = build_where(
+            table,
+            search=params.get("search", ""),
+            filter_field=params.get("filter_field", ""),
+            match=params.get("match", MATCH_CONTAINS),
+        )
+        content = render(columns, iter_rows(table, columns, where, where_params))
+    except TableNotFoundError as e:
+        return JsonResponse({"success": False, "detail": str(e)}, status=404)
+    except TableQueryError as e:
+        return JsonResponse({"success": False, "detail": str(e)}, status=400)
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="{table_name}.{extension}"'
+    )
+    return response
@@ -7,7 +7,7 @@ import Link from 'next/link';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
 import { Search, PlusCircle, ChevronLeft, ChevronRight, Loader2, Edit, Save, X, Filter } from 'lucide-react';
-import { productApi } from '@/lib/products/api';
+import { productApi, supplierVocabularyQueryOptions } from '@/lib/products/api';
 import { Product, ApiResponse, Supplier } from '@/components/types/product';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
@@ -152,7 +152,13 @@ export function ProductsView() {
   // Query for the details of the selected product
   const productDetailQuery = useQuery<Product & { suppliers?: Supplier[] }, Error>({
     queryKey: ['product', selectedItemId],
-    queryFn: ({ signal }) => productApi.getProduct(selectedItemId!, signal) as Promise<Product & { suppliers?: Supplier[] }>,
+    queryFn: async ({ signal }) => {
+      const [product, suppliers] = await Promise.all([
+        productApi.getProduct(selectedItemId!, signal),
+        queryClient.fetchQuery(supplierVocabularyQueryOptions),
+      ]);
+      return { ...product, suppliers };
+    },
     enabled: selectedItemId !== null && !isEditingNew,
     staleTime: 15 * 60 * 1000,
   });
@@ -192,7 +198,12 @@ export function ProductsView() {
     } as Omit<Product, "id"> & { parent_id?: string | number | undefined }),
     onSuccess: (data) => {
       queryClient.invalidateQueries({ queryKey: ['products'] });
-      queryClient.setQueryData(['product', data.id], data);
+      queryClient.setQueryData(['product', data.id], {
+        ...data,
+        suppliers: queryClient.getQueryData<Supplier[]>(
+          supplierVocabularyQueryOptions.queryKey
+        ),
+      });
       setSelectedItemId(data.id);
       setIsEditing(false);
       setIsEditingNew(false);
@@ -216,7 +227,12 @@ export function ProductsView() {
     mutationFn: async ({ id, data }) => {
       const updatedProduct = await productApi.updateProduct(String(id), data);
       queryClient.invalidateQueries({ queryKey: ['products'] });
-      queryClient.setQueryData(['product', id], updatedProduct);
+      queryClient.setQueryData(['product', id], {
+        ...updatedProduct,
+        suppliers: queryClient.getQueryData<Supplier[]>(
+          supplierVocabularyQueryOptions.queryKey
+        ),
+      });
 
       // ** Check if a supplier needs to be assigned **
       const supplierToAssign = data.supplier;
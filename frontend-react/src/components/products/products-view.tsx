@@ -13,7 +13,7 @@ import {
   TwoPaneLayout,
   type MaximizedPaneState,
 } from "@/components/ui/TwoPaneLayout";
-import { productApi } from "@/lib/products/api";
+import { productApi, supplierVocabularyQueryOptions } from "@/lib/products/api";
 import {
   Product,
   ApiResponse,
@@ -99,10 +99,13 @@ export function ProductsView() {
     Error
   >({
     queryKey: ["product", selectedItemId],
-    queryFn: ({ signal }) =>
-      productApi.getProduct(selectedItemId!, signal) as Promise<
-        Product & { suppliers?: Supplier[] }
-      >,
+    queryFn: async ({ signal }) => {
+      const [product, suppliers] = await Promise.all([
+        productApi.getProduct(selectedItemId!, signal),
+        queryClient.fetchQuery(supplierVocabularyQueryOptions),
+      ]);
+      return { ...product, suppliers };
+    },
     enabled: selectedItemId !== null && !isEditingNew,
     staleTime: 15 * 60 * 1000,
   });
@@ -175,7 +178,12 @@ export function ProductsView() {
       } as Omit<Product, "id"> & { parent_id?: string | number | undefined }),
     onSuccess: (data) => {
       queryClient.invalidateQueries({ queryKey: ["products"] });
-      queryClient.setQueryData(["product", data.id], data);
+      queryClient.setQueryData(["product", data.id], {
+        ...data,
+        suppliers: queryClient.getQueryData<Supplier[]>(
+          supplierVocabularyQueryOptions.queryKey
+        ),
+      });
       setSelectedItemId(data.id);
       setIsEditingNew(false);
       setIsEditing(false);
@@ -201,7 +209,12 @@ export function ProductsView() {
     mutationFn: async ({ id, data }) => {
       const updatedProduct = await productApi.updateProduct(String(id), data);
       queryClient.invalidateQueries({ queryKey: ["products"] });
-      queryClient.setQueryData(["product", id], updatedProduct);
+      queryClient.setQueryData(["product", id], {
+        ...updatedProduct,
+        suppliers: queryClient.getQueryData<Supplier[]>(
+          supplierVocabularyQueryOptions.queryKey
+        ),
+      });
 
       const supplierToAssign = data.supplier;
       if (supplierToAssign && supplierToAssign.id) {
@@ -5,7 +5,7 @@ import ky, {
   type NormalizedOptions,
 } from "ky";
 import { API_URL, AUTH_CONFIG } from "../config";
-import { Product, ApiResponse } from "@/components/types/product";
+import { Product, ApiResponse, Supplier } from "@/components/types/product";
 import { getServerCookie } from "../auth/serverCookies";
 
 // Cookie storage utility for client-side operations
@@ -221,9 +221,14 @@ export const productApi = {
     }
   },
 
-  getProduct: async (id: string | number, signal?: AbortSignal): Promise<Product> => {
+  getProduct: async (
+    id: string | number,
+    signal?: AbortSignal,
+    include: string[] = []
+  ): Promise<Product> => {
     try {
-      return await api.get(`v1/products/${id}/`, { signal }).json();
+      const searchParams = include.length ? { include: include.join(",") } : undefined;
+      return await api.get(`v1/products/${id}/`, { signal, searchParams }).json();
     } catch (error) {
       console.error(`Error fetching product ${id}:`, error);
       throw error;
@@ -305,6 +310,24 @@ export const productApi = {
     }
   },
 
+  // Supplier ids and names for the supplier select. Product details no
+  // longer embed them; the vocabulary endpoint is cached and answers
+  // revalidations with 304.
+  getSupplierVocabulary: async (signal?: AbortSignal): Promise<Supplier[]> => {
+    try {
+      const response = await api
+        .get("v1/business/suppliers/vocabulary/", { signal })
+        .json<{ results: { id: string; name: string }[] }>();
+      return response.results.map((supplier) => ({
+        id: Number(supplier.id),
+        name: supplier.name,
+      }));
+    } catch (error) {
+      console.error("Error fetching supplier vocabulary:", error);
+      throw error;
+    }
+  },
+
   // Function to assign a supplier to a product
   assignSupplierToProduct: async (productId: string | number, supplierId: string): Promise<void> => {
     try {
@@ -319,6 +342,14 @@ export const productApi = {
   },
 };
 
+// Shared by the product views, so the vocabulary is fetched once per client
+export const supplierVocabularyQueryOptions = {
+  queryKey: ["supplierVocabulary"],
+  queryFn: ({ signal }: { signal?: AbortSignal }) =>
+    productApi.getSupplierVocabulary(signal),
+  staleTime: 30 * 60 * 1000,
+};
+
 // Variant API methods
 // Removed variantApi as getVariants was moved to productApi
 
@@ -0,0 +1,96 @@
+"""Tests for the supplier vocabulary endpoint and the product detail expansion."""
+
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from pyerp.business_modules.business.models import Supplier
+from pyerp.business_modules.products.models import ParentProduct
+
+User = get_user_model()
+
+VOCABULARY_URL = "/api/v1/business/suppliers/vocabulary/"
+
+
+@pytest.mark.unit
+@override_settings(ROOT_URLCONF="pyerp.urls")
+class SupplierVocabularyTests(TestCase):
+    """Test the cached supplier vocabulary endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="vocab_user", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.supplier_a = Supplier.objects.create(name="Alpha")
+        self.supplier_b = Supplier.objects.create(name="Beta")
+
+    def test_full_vocabulary(self):
+        response = self.client.get(VOCABULARY_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["full"])
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual([s["name"] for s in response.data["results"]], ["Alpha", "Beta"])
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(VOCABULARY_URL)["ETag"]
+        response = self.client.get(VOCABULARY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_after_update(self):
+        etag = self.client.get(VOCABULARY_URL)["ETag"]
+        self.supplier_a.name = "Alpha 2"
+        self.supplier_a.save()
+        response = self.client.get(VOCABULARY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Alpha 2", [s["name"] for s in response.data["results"]])
+
+    def test_since_returns_delta(self):
+        Supplier.objects.filter(pk=self.supplier_a.pk).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(VOCABULARY_URL, {"since": since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["full"])
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual([s["name"] for s in response.data["results"]], ["Beta"])
+
+    def test_invalid_since(self):
+        response = self.client.get(VOCABULARY_URL, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@pytest.mark.unit
+@override_settings(ROOT_URLCONF="pyerp.urls")
+class ProductDetailSupplierExpansionTests(TestCase):
+    """Test that suppliers are only embedded on request."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="detail_user", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Supplier.objects.create(name="Alpha")
+        self.product = ParentProduct.objects.create(
+            sku="P001", name="Product", legacy_base_sku="P001"
+        )
+
+    def test_suppliers_not_included_by_default(self):
+        response = self.client.get(f"/api/v1/products/{self.product.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("suppliers", response.data)
+
+    def test_include_suppliers(self):
+        response = self.client.get(
+            f"/api/v1/products/{self.product.pk}/", {"include": "suppliers"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s["name"] for s in response.data["suppliers"]], ["Alpha"])
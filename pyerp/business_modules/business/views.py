@@ -1,5 +1,11 @@
 from django.shortcuts import render
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from rest_framework import viewsets, permissions, filters, generics
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
@@ -58,3 +64,72 @@ class SupplierViewSet(viewsets.ModelViewSet):
     # filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     # filterset_fields = ['field1', 'field2']
     # search_fields = ['name', 'email']
+
+    # Seconds a serialized vocabulary payload stays in the cache. The cache key
+    # contains the table version, so changes never serve stale entries.
+    VOCABULARY_CACHE_TIMEOUT = 60 * 60
+
+    @action(detail=False, methods=['get'], url_path='vocabulary', url_name='supplier_vocabulary')
+    def vocabulary(self, request):
+        """
+        Return the supplier vocabulary (id and name) for selection lists.
+
+        Supports conditional requests via ETag/If-None-Match and
+        Last-Modified/If-Modified-Since. With ``?since=<ISO datetime>`` only
+        suppliers changed after that point are returned; ``total`` lets
+        clients detect deletions and fall back to a full fetch.
+        """
+        since_param = request.query_params.get('since')
+        since = None
+        if since_param:
+            since = parse_datetime(since_param)
+            if since is None:
+                return Response(
+                    {'error': 'since must be an ISO 8601 datetime'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        state = Supplier.objects.aggregate(total=Count('id'), last_modified=Max('updated_at'))
+        last_modified = state['last_modified']
+        version = f"{state['total']}-{last_modified.timestamp() if last_modified else 0}"
+        etag = quote_etag(f"suppliers-{version}-{since.isoformat() if since else 'all'}")
+
+        if self._vocabulary_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f"business:supplier_vocabulary:{etag}"
+            payload = cache.get(cache_key)
+            if payload is None:
+                suppliers = Supplier.objects.order_by('name')
+                if since is not None:
+                    suppliers = suppliers.filter(updated_at__gt=since)
+                results = [
+                    {'id': str(supplier_id), 'name': name}
+                    for supplier_id, name in suppliers.values_list('id', 'name')
+                ]
+                payload = {
+                    'full': since is None,
+                    'total': state['total'],
+                    'count': len(results),
+                    'last_modified': last_modified.isoformat() if last_modified else None,
+                    'results': results,
+                }
+                cache.set(cache_key, payload, self.VOCABULARY_CACHE_TIMEOUT)
+            response = Response(payload)
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @staticmethod
+    def _vocabulary_not_modified(request, etag, last_modified):
+        """Check the conditional request headers against the current version."""
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        if if_modified_since is not None and last_modified is not None:
+            return int(last_modified.timestamp()) <= if_modified_since
+        return False
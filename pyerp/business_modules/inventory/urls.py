@@ -16,6 +16,7 @@ from .models import (
     BoxSlot,
 )
 from .services import InventoryService
+from pyerp.core.api_cache import cached_api_response
 from pyerp.business_modules.sales.models import SalesRecord, SalesRecordItem
 from pyerp.business_modules.products.models import VariantProduct
 
@@ -211,6 +212,11 @@ def boxes_list(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cached_api_response(
+    "inventory.storage_locations",
+    (StorageLocation, ProductStorage, Box),
+    timeout=120,
+)
 def storage_locations_list(request):
     """
     API endpoint to list all storage locations.
@@ -6,10 +6,14 @@ from django.db.models import Count
 from pyerp.business_modules.production.models import Mold, MoldProduct
 from pyerp.business_modules.production.serializers import MoldSerializer, MoldProductSerializer
 from pyerp.business_modules.products.models import ParentProduct
+from pyerp.core.api_cache import CachedResponseMixin
 
 
-class MoldViewSet(viewsets.ModelViewSet):
+class MoldViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """ViewSet for the Mold model."""
+    cache_endpoint = "production.molds"
+    cache_dependencies = (Mold, MoldProduct)
+    cache_timeout = 300
     queryset = Mold.objects.all()
     serializer_class = MoldSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -69,8 +73,11 @@ class MoldViewSet(viewsets.ModelViewSet):
         ])
 
 
-class MoldProductViewSet(viewsets.ModelViewSet):
+class MoldProductViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """ViewSet for the MoldProduct model."""
+    cache_endpoint = "production.mold_products"
+    cache_dependencies = (MoldProduct, Mold, ParentProduct)
+    cache_timeout = 300
     queryset = MoldProduct.objects.all()
     serializer_class = MoldProductSerializer
     permission_classes = [permissions.IsAuthenticated] 
\ No newline at end of file
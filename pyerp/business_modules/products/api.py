@@ -26,10 +26,14 @@ from rest_framework.pagination import PageNumberPagination
 import logging
 from django.db import connection
 
-from pyerp.business_modules.products.models import ProductCategory, ParentProduct, VariantProduct
+from pyerp.business_modules.products.models import ProductCategory, ParentProduct, VariantProduct, ProductImage
+from pyerp.business_modules.products.tag_models import M2MOverride
+from pyerp.core.api_cache import CachedResponseMixin
+from pyerp.core.models import Tag, TaggedItem
 from pyerp.business_modules.products.serializers import ProductCategorySerializer, ParentProductSerializer, VariantProductSerializer
 from pyerp.business_modules.business.models import Supplier
 from pyerp.business_modules.products.serializers import SupplierSerializer
+from pyerp.business_modules.products.services import TagResolver
 
 
 @extend_schema_view(
@@ -139,13 +143,17 @@ from pyerp.business_modules.products.serializers import SupplierSerializer
         tags=["Products", "Categories"],
     ),
 )
-class ProductCategoryViewSet(viewsets.ModelViewSet):
+class ProductCategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing product categories.
     
     This ViewSet provides CRUD operations for ProductCategory objects.
     """
     
+    cache_endpoint = "products.categories"
+    cache_dependencies = (ProductCategory,)
+    cache_timeout = 300
+    cache_actions = ("list", "retrieve", "children", "tree")
     queryset = ProductCategory.objects.all().order_by('name')
     serializer_class = ProductCategorySerializer
     permission_classes = [IsAuthenticated]
@@ -350,7 +358,9 @@ class ProductListAPIView(APIView):
         """Handle GET request for product listing with filtering and pagination."""
         try:
             # Start with the base queryset and annotate with variant count
-            base_queryset = ParentProduct.objects.annotate(variants_count=Count('variants'))
+            base_queryset = ParentProduct.objects.select_related("primary_image").annotate(
+                variants_count=Count('variants')
+            )
             
             # Apply search filter (this is the most important part)
             search_query = request.GET.get("q")
@@ -554,26 +564,56 @@ class ProductListAPIView(APIView):
         tags=["Products"],
     ),
 )
-class ProductDetailViewSet(viewsets.ModelViewSet):
+class ProductDetailViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for retrieving, updating, creating, and deleting product details.
     """
-    queryset = ParentProduct.objects.all()
+    cache_endpoint = "products.detail"
+    cache_dependencies = (
+        ParentProduct, VariantProduct, ProductImage, Supplier, Tag, TaggedItem, M2MOverride,
+    )
+    cache_timeout = 60
+    cache_actions = ("retrieve", "variants")
+    queryset = ParentProduct.objects.select_related("supplier", "primary_image")
     serializer_class = ParentProductSerializer
     permission_classes = [IsAuthenticated]
-    
+
+    @extend_schema(
+        summary="Get product details",
+        description=(
+            "Retrieves a product by ID. Pass `include=suppliers` to embed the "
+            "supplier list; otherwise use the cached supplier vocabulary "
+            "endpoint (`/api/v1/business/suppliers/vocabulary/`)."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="include",
+                description="Comma-separated expansions (supported: suppliers)",
+                required=False,
+                type=str,
+            ),
+        ],
+        responses={200: ParentProductSerializer},
+        tags=["Products"],
+    )
     def retrieve(self, request, pk=None):
         """
-        Retrieve a product by its ID and include a list of all suppliers.
+        Retrieve a product by its ID, optionally including all suppliers.
         """
         product = self.get_object()
         serializer = self.get_serializer(product)
         product_data = serializer.data  # Product data including the linked supplier
 
-        # Fetch all suppliers and add the list to the response
-        all_suppliers = Supplier.objects.all()
-        suppliers_serializer = SupplierSerializer(all_suppliers, many=True)
-        product_data['suppliers'] = suppliers_serializer.data
+        # Only expand the supplier list when explicitly requested
+        include = {
+            value.strip()
+            for value in request.query_params.get("include", "").split(",")
+            if value.strip()
+        }
+        if "suppliers" in include:
+            all_suppliers = Supplier.objects.only("id", "name")
+            suppliers_serializer = SupplierSerializer(all_suppliers, many=True)
+            product_data['suppliers'] = suppliers_serializer.data
 
         return Response(product_data)
     
@@ -601,8 +641,14 @@ class ProductDetailViewSet(viewsets.ModelViewSet):
     def variants(self, request, pk=None):
         """Return a list of variants for the given parent product."""
         parent_product = self.get_object() # This gets the ParentProduct instance based on pk
-        variants_queryset = VariantProduct.objects.filter(parent=parent_product).order_by('variant_code', 'name')
-        serializer = VariantProductSerializer(variants_queryset, many=True)
+        variants = list(
+            VariantProduct.objects.filter(parent=parent_product).order_by('variant_code', 'name')
+        )
+        serializer = VariantProductSerializer(
+            variants,
+            many=True,
+            context={"tag_resolver": TagResolver.for_variants(variants)},
+        )
         return Response(serializer.data)
 
     # create, retrieve, update, partial_update, destroy methods 
@@ -645,7 +691,8 @@ class ProductDetailViewSet(viewsets.ModelViewSet):
                                 "image_type": "Produktfoto"
                             }
                         ],
-                        "inherits_tags": True
+                        "inherits_tags": True,
+                        "tags": ["Bestseller", "Christmas"]
                     },
                 )
             ],
@@ -695,7 +742,7 @@ class VariantDetailAPIView(APIView):
                 {
                     "id": img.id,
                     "url": img.image_url,
-                    "thumbnail_url": getattr(img, "thumbnail_url", img.image_url),
+                    "thumbnail_url": img.display_thumbnail_url,
                     "is_primary": getattr(img, "is_primary", False),
                     "is_front": getattr(img, "is_front", False),
                     "image_type": getattr(img, "image_type", None),
@@ -703,8 +750,9 @@ class VariantDetailAPIView(APIView):
                 for img in variant.images.all()
             ]
             
-        # Add tag inheritance info if available
-        if hasattr(variant, "inherits_tags"):
-            variant_data["inherits_tags"] = variant.inherits_tags()
+        # Add tags and tag inheritance info
+        tag_resolver = TagResolver.for_variants([variant])
+        variant_data["inherits_tags"] = tag_resolver.inherits(variant)
+        variant_data["tags"] = [tag.name for tag in tag_resolver.tags_for(variant)]
             
         return Response(variant_data) 
\ No newline at end of file
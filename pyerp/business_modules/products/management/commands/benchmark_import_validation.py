@@ -0,0 +1,125 @@
+"""
+Management command to benchmark product import validation.
+
+Builds a synthetic fixture of categories and existing products inside a
+transaction, validates the same rows with row-by-row ``validate_row`` and
+with ``validate_batch`` and rolls everything back afterwards.
+"""
+
+import copy
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from pyerp.business_modules.products.models import Product, ProductCategory
+from pyerp.business_modules.products.validators import ProductImportValidator
+
+
+class _Rollback(Exception):
+    """Raised to roll back the benchmark fixture."""
+
+
+class Command(BaseCommand):
+    help = "Benchmark row-by-row against batched product import validation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Number of import rows to validate",
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=100,
+            help="Number of product categories in the fixture",
+        )
+        parser.add_argument(
+            "--existing",
+            type=int,
+            default=1000,
+            help="Number of imported SKUs that already exist",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows per validate_batch call",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Fixture rolled back.")
+
+    def _run(self, options):
+        row_count = options["rows"]
+        category_count = max(1, options["categories"])
+        batch_size = max(1, options["batch_size"])
+
+        self.stdout.write(f"Creating fixture with {category_count} categories...")
+        ProductCategory.objects.bulk_create(
+            [
+                ProductCategory(code=f"BENCHC{i:04d}", name=f"Benchmark category {i}")
+                for i in range(category_count)
+            ]
+        )
+        Product.objects.bulk_create(
+            [
+                Product(sku=f"BENCH{i:06d}", name=f"Benchmark product {i}")
+                for i in range(min(options["existing"], row_count))
+            ]
+        )
+
+        rows = [
+            {
+                "sku": f"BENCH{i:06d}",
+                "name": f"Benchmark product {i}",
+                # Every tenth row points at a category that does not exist
+                "category": f"BENCHC{i % (category_count + category_count // 9 + 1):04d}",
+                "list_price": f"{i % 500}.95",
+                "cost_price": f"{i % 300}.10",
+            }
+            for i in range(row_count)
+        ]
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+        self._report(
+            "validate_row",
+            row_count,
+            lambda validator: [
+                validator.validate_row(row, row_index=index)
+                for index, row in enumerate(copy.deepcopy(rows))
+            ],
+        )
+        self._report(
+            "validate_batch",
+            row_count,
+            lambda validator: [
+                validator.validate_batch(copy.deepcopy(batch), start_index=start)
+                for start, batch in zip(range(0, len(rows), batch_size), batches)
+            ],
+        )
+
+    def _report(self, label, row_count, validate):
+        validator = ProductImportValidator(transform_data=False)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            validate(validator)
+            elapsed = time.perf_counter() - start
+
+        thousands = max(1, row_count) / 1000
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label}: {row_count} rows, "
+                f"{elapsed / thousands * 1000:.2f} ms/1000 rows, "
+                f"{len(queries)} queries"
+            )
+        )
@@ -0,0 +1,154 @@
+"""
+Management command to benchmark tag resolution for variant lists.
+
+Builds a synthetic fixture of parent and variant products with tags inside a
+transaction, compares per-variant ``get_all_tags`` against the batched
+``TagResolver`` and rolls everything back afterwards.
+"""
+
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from pyerp.business_modules.products.models import ParentProduct, VariantProduct
+from pyerp.business_modules.products.services import TagResolver
+from pyerp.business_modules.products.tag_models import M2MOverride
+from pyerp.core.models import Tag, TaggedItem
+
+
+class _Rollback(Exception):
+    """Raised to roll back the benchmark fixture."""
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-variant get_all_tags against the batched TagResolver"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=10000,
+            help="Number of variant products in the fixture",
+        )
+        parser.add_argument(
+            "--variants-per-parent",
+            type=int,
+            default=10,
+            help="Number of variants per parent product",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=100,
+            help="Number of variants to resolve per page",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=5,
+            help="Number of pages to time with the per-variant path",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Fixture rolled back.")
+
+    def _run(self, options):
+        variant_count = options["variants"]
+        per_parent = max(1, options["variants_per_parent"])
+        page_size = options["page_size"]
+
+        self.stdout.write(f"Creating fixture with {variant_count} variants...")
+        tags = Tag.objects.bulk_create(
+            [Tag(name=f"bench-tag-{i}", slug=f"bench-tag-{i}") for i in range(50)]
+        )
+        parents = ParentProduct.objects.bulk_create(
+            [
+                ParentProduct(
+                    sku=f"BENCHP{i:06d}",
+                    name=f"Benchmark parent {i}",
+                    legacy_base_sku=f"BENCHP{i:06d}",
+                )
+                for i in range((variant_count + per_parent - 1) // per_parent)
+            ]
+        )
+        variants = VariantProduct.objects.bulk_create(
+            [
+                VariantProduct(
+                    sku=f"BENCHV{i:06d}",
+                    name=f"Benchmark variant {i}",
+                    legacy_base_sku=f"BENCHV{i:06d}",
+                    parent=parents[i // per_parent],
+                )
+                for i in range(variant_count)
+            ]
+        )
+        parent_ct = ContentType.objects.get_for_model(ParentProduct)
+        variant_ct = ContentType.objects.get_for_model(VariantProduct)
+        TaggedItem.objects.bulk_create(
+            [
+                TaggedItem(tag=tags[i % len(tags)], content_type=parent_ct, object_id=p.pk)
+                for i, p in enumerate(parents)
+            ]
+            + [
+                TaggedItem(
+                    tag=tags[(i + 7) % len(tags)], content_type=variant_ct, object_id=v.pk
+                )
+                for i, v in enumerate(variants)
+                if i % 3 == 0
+            ]
+        )
+        M2MOverride.objects.bulk_create(
+            [
+                M2MOverride(
+                    content_type=variant_ct,
+                    object_id=v.pk,
+                    relationship_name="tags",
+                    inherit=False,
+                )
+                for i, v in enumerate(variants)
+                if i % 5 == 0
+            ]
+        )
+
+        variants = list(VariantProduct.objects.order_by("pk"))
+        pages = [
+            variants[i:i + page_size] for i in range(0, len(variants), page_size)
+        ]
+
+        timed_pages = pages[: options["pages"]]
+        self._report(
+            "get_all_tags (per variant)",
+            timed_pages,
+            lambda page: [list(v.get_all_tags()) for v in page],
+        )
+        self._report("TagResolver.for_variants", pages, self._resolve_batched)
+
+    @staticmethod
+    def _resolve_batched(page):
+        resolver = TagResolver.for_variants(page)
+        return [resolver.tags_for(v) for v in page]
+
+    def _report(self, label, pages, resolve_page):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for page in pages:
+                resolve_page(page)
+            elapsed = time.perf_counter() - start
+
+        page_count = max(1, len(pages))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label}: {len(pages)} pages, "
+                f"{elapsed / page_count * 1000:.2f} ms/page, "
+                f"{len(queries) / page_count:.1f} queries/page"
+            )
+        )
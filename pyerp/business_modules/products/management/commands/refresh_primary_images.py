@@ -0,0 +1,45 @@
+"""
+Management command to recompute the precomputed primary images.
+
+Primary images are maintained by the image loader and by ProductImage
+signals; run this once after deploying the field or after bulk changes
+that bypass both.
+"""
+
+from django.core.management.base import BaseCommand
+
+from pyerp.business_modules.products.models import VariantProduct
+from pyerp.business_modules.products.services import PrimaryImageService
+
+
+class Command(BaseCommand):
+    help = "Recompute the primary image of all variant and parent products"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of variants to process per batch",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        batch_size = max(1, options["batch_size"])
+        variant_ids = list(
+            VariantProduct.objects.order_by("parent_id", "id").values_list("id", flat=True)
+        )
+        variants_updated = parents_updated = 0
+        for start in range(0, len(variant_ids), batch_size):
+            variants, parents = PrimaryImageService.refresh_for_variants(
+                variant_ids[start:start + batch_size]
+            )
+            variants_updated += variants
+            parents_updated += parents
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated primary image of {variants_updated} variants "
+                f"and {parents_updated} parents."
+            )
+        )
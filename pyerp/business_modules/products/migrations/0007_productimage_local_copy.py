@@ -0,0 +1,48 @@
+# Generated by Django 5.1.8 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_parentproduct_supplier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 hash of the downloaded image', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='downloaded_at',
+            field=models.DateTimeField(blank=True, help_text='When the local copy was last downloaded or revalidated', null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='local_image',
+            field=models.FileField(blank=True, help_text='Local copy of the image, stored by content hash', max_length=255, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='local_thumbnail',
+            field=models.FileField(blank=True, help_text='Locally generated thumbnail', max_length=255, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='source_etag',
+            field=models.CharField(blank=True, help_text='ETag returned when the image was downloaded', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='source_last_modified',
+            field=models.CharField(blank=True, help_text='Last-Modified header returned when the image was downloaded', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='source_modified_at',
+            field=models.DateTimeField(blank=True, help_text='Modification timestamp of the file in the source system', null=True),
+        ),
+    ]
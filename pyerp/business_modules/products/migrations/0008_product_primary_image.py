@@ -0,0 +1,24 @@
+# Generated by Django 5.1.8 on 2026-10-18 21:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_productimage_local_copy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parentproduct',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, help_text='Image shown for this product in lists and search results', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productimage'),
+        ),
+        migrations.AddField(
+            model_name='variantproduct',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, help_text='Image shown for this product in lists and search results', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productimage'),
+        ),
+    ]
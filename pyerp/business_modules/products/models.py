@@ -143,6 +143,16 @@ class BaseProduct(models.Model):
         help_text=_("Product category ID"),
     )
 
+    # Precomputed by PrimaryImageService when images are loaded
+    primary_image = models.ForeignKey(
+        "ProductImage",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        help_text=_("Image shown for this product in lists and search results"),
+    )
+
     class Meta:
         abstract = True
 
@@ -395,11 +405,19 @@ class VariantProduct(BaseProduct):
     def inherits_tags(self):
         """
         Check if this variant inherits tags from its parent.
+
+        A missing override row means the default (inherit) applies; this
+        read path never creates one.
         """
-        if not self.parent:
+        if not self.parent_id:
             return False
-        override = self.get_tag_override()
-        return override.inherit
+        content_type = ContentType.objects.get_for_model(self)
+        inherit = M2MOverride.objects.filter(
+            content_type=content_type,
+            object_id=self.id,
+            relationship_name='tags',
+        ).values_list('inherit', flat=True).first()
+        return True if inherit is None else inherit
     
     def set_tags_inheritance(self, inherit):
         """
@@ -416,6 +434,9 @@ class VariantProduct(BaseProduct):
         """
         Get all tags for this variant, either inherited or direct.
         
+        For lists of variants use ``TagResolver.for_variants`` from
+        ``pyerp.business_modules.products.services`` instead.
+
         Returns:
             QuerySet of Tag objects
         """
@@ -425,11 +446,11 @@ class VariantProduct(BaseProduct):
         direct_variant_tags = Tag.objects.filter(tagged_items__content_type=ContentType.objects.get_for_model(self), tagged_items__object_id=self.pk)
         
         # If no parent or not inheriting, return only direct tags
-        if not self.parent or not self.inherits_tags():
+        if not self.parent_id or not self.inherits_tags():
             return direct_variant_tags
         
         # Get tag IDs from parent (also via generic relation)
-        parent_tags = Tag.objects.filter(tagged_items__content_type=ContentType.objects.get_for_model(self.parent), tagged_items__object_id=self.parent.pk)
+        parent_tags = Tag.objects.filter(tagged_items__content_type=ContentType.objects.get_for_model(ParentProduct), tagged_items__object_id=self.parent_id)
         
         # Combine the querysets
         # Using union() is generally efficient, but remove ordering for SQLite compatibility
@@ -703,6 +724,42 @@ class ProductImage(models.Model):
         auto_now=True,
         help_text=_("When this image record was last updated"),
     )
+    source_modified_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("Modification timestamp of the file in the source system"),
+    )
+    local_image = models.FileField(
+        max_length=255,
+        blank=True,
+        help_text=_("Local copy of the image, stored by content hash"),
+    )
+    local_thumbnail = models.FileField(
+        max_length=255,
+        blank=True,
+        help_text=_("Locally generated thumbnail"),
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text=_("SHA-256 hash of the downloaded image"),
+    )
+    source_etag = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("ETag returned when the image was downloaded"),
+    )
+    source_last_modified = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("Last-Modified header returned when the image was downloaded"),
+    )
+    downloaded_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("When the local copy was last downloaded or revalidated"),
+    )
 
     class Meta:
         verbose_name = _("Product Image")
@@ -723,6 +780,13 @@ class ProductImage(models.Model):
         else:
             return f"Image {self.external_id} (unlinked)"
 
+    @property
+    def display_thumbnail_url(self):
+        """Return the local thumbnail URL, falling back to the CMS URLs."""
+        if self.local_thumbnail:
+            return self.local_thumbnail.url
+        return self.thumbnail_url or self.image_url
+
 
 class ImageSyncLog(models.Model):
     """
@@ -3,10 +3,13 @@ Serializers for the products app.
 """
 
 from rest_framework import serializers
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from pyerp.business_modules.products.models import ParentProduct, ProductCategory, VariantProduct, ProductImage
+from pyerp.business_modules.products.services import TagResolver
 from pyerp.business_modules.business.models import Supplier
+from pyerp.core.serializers import TagSerializer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,6 +65,8 @@ class ProductCategorySerializer(serializers.ModelSerializer):
 # New Serializer for ProductImage - moved before ParentProductSerializer
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer for ProductImage model."""
+    thumbnail_url = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
         fields = [
@@ -74,6 +79,12 @@ class ProductImageSerializer(serializers.ModelSerializer):
             'alt_text'
         ]
 
+    def get_thumbnail_url(self, obj):
+        """Prefer the locally generated thumbnail over the CMS URL."""
+        if obj.local_thumbnail:
+            return obj.local_thumbnail.url
+        return obj.thumbnail_url
+
 class ParentProductSerializer(serializers.ModelSerializer):
     """Serializer for the ParentProduct model."""
     legacy_base_sku = serializers.CharField(
@@ -83,7 +94,7 @@ class ParentProductSerializer(serializers.ModelSerializer):
     )
     # Use the simple SupplierSerializer for the related field
     supplier = SupplierSerializer(read_only=True)
-    # Add primary_image field derived from variants
+    # Precomputed at image load time, see PrimaryImageService
     primary_image = ProductImageSerializer(read_only=True)
     # Add a computed field for variants_count
     variants_count = serializers.SerializerMethodField()
@@ -120,7 +131,7 @@ class ParentProductSerializer(serializers.ModelSerializer):
         return 0 # Return 0 if 'variants' related manager doesn't exist
     
     def to_representation(self, instance):
-        """Override to include primary_image derived from variants."""
+        """Override to normalise legacy_base_sku."""
         ret = super().to_representation(instance)
         
         # Debug output for legacy_base_sku remains
@@ -132,91 +143,16 @@ class ParentProductSerializer(serializers.ModelSerializer):
         if legacy_base_sku is not None:
             ret['legacy_base_sku'] = str(legacy_base_sku)
 
-        # --- Start: Logic to find primary_image from variants ---
-        primary_image_obj = None
-        variants = instance.variants.prefetch_related('images').all()
-
-        # 1. Prioritize 'BE' variant's primary/front/Produktfoto image
-        be_variant = next((v for v in variants if v.variant_code == 'BE'), None)
-        if be_variant and be_variant.images.exists():
-            # Try finding primary, front, Produktfoto
-            primary_image_obj = be_variant.images.filter(
-                is_primary=True, 
-                is_front=True, 
-                image_type__iexact="Produktfoto"
-            ).first()
-            if not primary_image_obj:
-                # Try finding primary, Produktfoto
-                primary_image_obj = be_variant.images.filter(
-                    is_primary=True, 
-                    image_type__iexact="Produktfoto"
-                ).first()
-            if not primary_image_obj:
-                # Try finding front, Produktfoto
-                primary_image_obj = be_variant.images.filter(
-                    is_front=True, 
-                    image_type__iexact="Produktfoto"
-                ).first()
-            if not primary_image_obj:
-                # Try finding any Produktfoto
-                primary_image_obj = be_variant.images.filter(
-                    image_type__iexact="Produktfoto"
-                ).first()
-            if not primary_image_obj:
-                # Try finding primary
-                primary_image_obj = be_variant.images.filter(
-                    is_primary=True
-                ).first()
-            if not primary_image_obj:
-                # Fallback to first image of BE variant
-                primary_image_obj = be_variant.images.first()
+        return ret
 
-        # 2. Fallback: Any variant's primary/front/Produktfoto image
-        if not primary_image_obj:
-            for variant in variants:
-                if variant.images.exists():
-                    img = variant.images.filter(
-                        is_primary=True, 
-                        is_front=True, 
-                        image_type__iexact="Produktfoto"
-                    ).first()
-                    if not img:
-                        img = variant.images.filter(
-                            is_primary=True, 
-                            image_type__iexact="Produktfoto"
-                        ).first()
-                    if not img:
-                        img = variant.images.filter(
-                            is_front=True, 
-                            image_type__iexact="Produktfoto"
-                        ).first()
-                    if not img:
-                        img = variant.images.filter(
-                            image_type__iexact="Produktfoto"
-                        ).first()
-                    if not img:
-                        img = variant.images.filter(is_primary=True).first()
-                        
-                    if img:
-                        primary_image_obj = img
-                        break  # Found one, stop searching
+class VariantProductListSerializer(serializers.ListSerializer):
+    """Serialize a list of variants with one TagResolver for the whole list."""
 
-        # 3. Fallback: First image of the first variant that has images
-        if not primary_image_obj:
-            for variant in variants:
-                if variant.images.exists():
-                    primary_image_obj = variant.images.first()
-                    if primary_image_obj:
-                        break  # Found one, stop searching
-
-        # Serialize the found image or set to None
-        if primary_image_obj:
-            ret['primary_image'] = ProductImageSerializer(primary_image_obj).data
-        else:
-            ret['primary_image'] = None
-        # --- End: Logic to find primary_image from variants ---
-        
-        return ret 
+    def to_representation(self, data):
+        variants = list(data.all() if isinstance(data, models.Manager) else data)
+        if "tag_resolver" not in self.context:
+            self.child.page_tag_resolver = TagResolver.for_variants(variants)
+        return super().to_representation(variants)
 
 class VariantProductSerializer(serializers.ModelSerializer):
     """Serializer for the VariantProduct model."""
@@ -228,9 +164,16 @@ class VariantProductSerializer(serializers.ModelSerializer):
     )
     parent = ParentProductSerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
+    tags = serializers.SerializerMethodField()
+    inherits_tags = serializers.SerializerMethodField()
+
+    # Set by VariantProductListSerializer for the variants of a list
+    page_tag_resolver = None
+    _variant_tag_resolver = None
 
     class Meta:
         model = VariantProduct
+        list_serializer_class = VariantProductListSerializer
         fields = [
             "id",
             "sku",
@@ -252,9 +195,35 @@ class VariantProductSerializer(serializers.ModelSerializer):
             "legacy_sku",
             "legacy_base_sku",
             "images",
+            "tags",
+            "inherits_tags",
         ]
         read_only_fields = ["sku"]
 
+    def _get_tag_resolver(self, obj):
+        """
+        Return the TagResolver for this serialization.
+
+        Lists use a resolver built for the whole page, passed via
+        ``context["tag_resolver"]`` or built by the list serializer. A single
+        variant gets a resolver of its own, shared by its tag fields.
+        """
+        resolver = self.context.get("tag_resolver") or self.page_tag_resolver
+        if resolver is not None:
+            return resolver
+        cached = self._variant_tag_resolver
+        if cached is None or cached[0] is not obj:
+            cached = self._variant_tag_resolver = (obj, TagResolver.for_variants([obj]))
+        return cached[1]
+
+    def get_tags(self, obj):
+        """Return direct and inherited tags of the variant."""
+        return TagSerializer(self._get_tag_resolver(obj).tags_for(obj), many=True).data
+
+    def get_inherits_tags(self, obj):
+        """Return whether the variant inherits tags from its parent."""
+        return self._get_tag_resolver(obj).inherits(obj)
+
     def to_representation(self, instance):
         """Customize representation to include nested parent details."""
         representation = super().to_representation(instance)
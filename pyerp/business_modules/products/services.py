@@ -0,0 +1,229 @@
+"""
+Service classes for product business logic.
+
+This module contains helpers that operate on whole collections of products
+so that list views and serializers do not have to issue per-object queries.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from pyerp.business_modules.products.models import (
+    ParentProduct,
+    ProductImage,
+    VariantProduct,
+)
+from pyerp.business_modules.products.tag_models import M2MOverride
+from pyerp.core.api_cache import bump_model_version
+from pyerp.core.models import TaggedItem
+
+logger = logging.getLogger(__name__)
+
+
+class TagResolver:
+    """
+    Resolve tags with parent inheritance for a batch of variants.
+
+    The resolver loads direct variant tags, parent tags and tag inheritance
+    overrides for the whole batch in three queries. A variant without an
+    ``M2MOverride`` row inherits by default; no override rows are created.
+
+    Usage:
+        resolver = TagResolver.for_variants(variants)
+        for variant in variants:
+            tags = resolver.tags_for(variant)
+    """
+
+    RELATIONSHIP_NAME = "tags"
+
+    def __init__(self, variant_tags, parent_tags, inherit_flags, parent_ids):
+        self._variant_tags = variant_tags
+        self._parent_tags = parent_tags
+        self._inherit_flags = inherit_flags
+        self._parent_ids = parent_ids
+
+    @classmethod
+    def for_variants(cls, variants):
+        """
+        Build a resolver for the given variants.
+
+        Args:
+            variants: Iterable of VariantProduct instances (a list or queryset)
+
+        Returns:
+            TagResolver: Resolver holding the tags for all given variants
+        """
+        variants = list(variants)
+        variant_ids = {v.pk for v in variants if v.pk is not None}
+        parent_ids = {v.pk: v.parent_id for v in variants}
+
+        if not variant_ids:
+            return cls({}, {}, {}, parent_ids)
+
+        # get_for_model() is served from the ContentType cache after first use
+        variant_ct = ContentType.objects.get_for_model(VariantProduct)
+        parent_ct = ContentType.objects.get_for_model(ParentProduct)
+
+        variant_tags = cls._load_tags(variant_ct, variant_ids)
+
+        unique_parent_ids = {pid for pid in parent_ids.values() if pid is not None}
+        parent_tags = (
+            cls._load_tags(parent_ct, unique_parent_ids) if unique_parent_ids else {}
+        )
+
+        inherit_flags = dict(
+            M2MOverride.objects.filter(
+                content_type=variant_ct,
+                object_id__in=variant_ids,
+                relationship_name=cls.RELATIONSHIP_NAME,
+            ).values_list("object_id", "inherit")
+        )
+
+        return cls(variant_tags, parent_tags, inherit_flags, parent_ids)
+
+    @staticmethod
+    def _load_tags(content_type, object_ids):
+        """Return a mapping of object id to the list of its directly assigned tags."""
+        tags_by_object = defaultdict(list)
+        tagged_items = TaggedItem.objects.filter(
+            content_type=content_type,
+            object_id__in=object_ids,
+        ).select_related("tag")
+        for item in tagged_items:
+            tags_by_object[item.object_id].append(item.tag)
+        return tags_by_object
+
+    def inherits(self, variant):
+        """
+        Check if the variant inherits tags from its parent.
+
+        Variants without a parent never inherit; variants without an override
+        row inherit by default.
+        """
+        if self._parent_ids.get(variant.pk, variant.parent_id) is None:
+            return False
+        return self._inherit_flags.get(variant.pk, True)
+
+    def direct_tags_for(self, variant):
+        """Return the tags assigned directly to the variant, ordered by name."""
+        return sorted(self._variant_tags.get(variant.pk, []), key=lambda tag: tag.name)
+
+    def tags_for(self, variant):
+        """
+        Return all tags for the variant, either inherited or direct.
+
+        Mirrors ``VariantProduct.get_all_tags`` but returns a list ordered by
+        name instead of a queryset.
+        """
+        tags = {tag.pk: tag for tag in self._variant_tags.get(variant.pk, [])}
+        if self.inherits(variant):
+            parent_id = self._parent_ids.get(variant.pk, variant.parent_id)
+            for tag in self._parent_tags.get(parent_id, []):
+                tags.setdefault(tag.pk, tag)
+        return sorted(tags.values(), key=lambda tag: tag.name)
+
+
+def image_rank(image_type, is_front, is_primary, priority, image_id):
+    """
+    Sort key for primary image selection.
+
+    Produktfoto+Front > Produktfoto > Front > Primary > any image, with ties
+    broken by display priority and id.
+    """
+    is_product_photo = (image_type or "").lower() == "produktfoto"
+    if is_product_photo and is_front:
+        rank = 0
+    elif is_product_photo:
+        rank = 1
+    elif is_front:
+        rank = 2
+    elif is_primary:
+        rank = 3
+    else:
+        rank = 4
+    return (rank, priority, image_id)
+
+
+class PrimaryImageService:
+    """
+    Maintain the precomputed ``primary_image`` of variants and parents.
+
+    A variant's primary image is its best ranked image (see ``image_rank``).
+    A parent uses the primary image of its ``BE`` variant if that has one,
+    otherwise the best ranked image of all its variants.
+    """
+
+    @staticmethod
+    def refresh_for_variants(variant_ids):
+        """
+        Recompute primary images for variants and their parents.
+
+        Uses three queries regardless of the number of variants and only
+        writes rows whose primary image changed.
+
+        Args:
+            variant_ids: Iterable of VariantProduct ids
+
+        Returns:
+            Tuple of (updated variant count, updated parent count)
+        """
+        variant_ids = set(variant_ids)
+        if not variant_ids:
+            return 0, 0
+
+        # Include all siblings, since the parent's choice depends on them
+        variant_rows = list(
+            VariantProduct.objects.filter(
+                Q(id__in=variant_ids)
+                | Q(parent__in=VariantProduct.objects.filter(
+                    id__in=variant_ids, parent__isnull=False
+                ).values("parent_id"))
+            ).values_list("id", "parent_id", "variant_code", "primary_image_id")
+        )
+        parent_ids = {parent_id for _, parent_id, _, _ in variant_rows if parent_id}
+
+        best = {}
+        images = ProductImage.objects.filter(
+            product_id__in=[row[0] for row in variant_rows]
+        ).values_list("id", "product_id", "image_type", "is_front", "is_primary", "priority")
+        for image_id, product_id, image_type, is_front, is_primary, priority in images:
+            key = image_rank(image_type, is_front, is_primary, priority, image_id)
+            if product_id not in best or key < best[product_id][0]:
+                best[product_id] = (key, image_id)
+
+        changed_variants = []
+        parent_candidates = defaultdict(list)
+        for variant_id, parent_id, variant_code, current in variant_rows:
+            key, image_id = best.get(variant_id, (None, None))
+            if image_id != current:
+                changed_variants.append(
+                    VariantProduct(id=variant_id, primary_image_id=image_id)
+                )
+            if parent_id and image_id:
+                preferred = 0 if variant_code == "BE" else 1
+                parent_candidates[parent_id].append(((preferred,) + key, image_id))
+
+        parent_current = dict(
+            ParentProduct.objects.filter(id__in=parent_ids).values_list(
+                "id", "primary_image_id"
+            )
+        )
+        changed_parents = []
+        for parent_id, current in parent_current.items():
+            candidates = parent_candidates.get(parent_id)
+            image_id = min(candidates)[1] if candidates else None
+            if image_id != current:
+                changed_parents.append(
+                    ParentProduct(id=parent_id, primary_image_id=image_id)
+                )
+
+        if changed_variants:
+            VariantProduct.objects.bulk_update(changed_variants, ["primary_image"])
+        if changed_parents:
+            ParentProduct.objects.bulk_update(changed_parents, ["primary_image"])
+        if changed_variants or changed_parents:
+            bump_model_version(VariantProduct, ParentProduct)
+        return len(changed_variants), len(changed_parents)
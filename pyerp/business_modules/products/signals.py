@@ -2,11 +2,11 @@
 Signal handlers for the products app.
 """
 
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from pyerp.business_modules.products.models import VariantProduct
+from pyerp.business_modules.products.models import ProductImage, VariantProduct
 from pyerp.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -36,3 +36,18 @@ def variant_product_pre_save(_sender=None, instance=None, **_kwargs):
 
     # Always update the updated_at timestamp (equivalent to auto_now)
     instance.updated_at = timezone.now()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance, raw=False, **kwargs):
+    """
+    Keep the precomputed primary image in sync with single-image writes.
+
+    Bulk loads call ``PrimaryImageService.refresh_for_variants`` themselves.
+    """
+    if raw or not instance.product_id:
+        return
+    from pyerp.business_modules.products.services import PrimaryImageService
+
+    PrimaryImageService.refresh_for_variants([instance.product_id])
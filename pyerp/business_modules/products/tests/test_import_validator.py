@@ -0,0 +1,119 @@
+"""
+Tests for batch validation in ProductImportValidator.
+"""
+
+import copy
+from decimal import Decimal
+
+import pytest
+from django.test import TestCase
+
+from pyerp.business_modules.products.models import Product, ProductCategory
+from pyerp.business_modules.products.validators import ProductImportValidator
+from pyerp.core.validators import ImportValidator
+
+
+def _rows():
+    return [
+        {"sku": "A100", "name": "Chair", "category": "FURN", "list_price": "49.90"},
+        {"sku": "A101", "name": "Table", "category": "MISSING", "list_price": "-1"},
+        {"alteNummer": "A102", "sku": "", "name": "", "ArtGruppe": "ELEC"},
+        {"sku": "B200-XL", "Bezeichnung": "Lamp", "category": "ELEC", "list_price": "x"},
+        {"sku": "EXISTS1", "name": "Old", "category": "", "cost_price": 3},
+        {"sku": "A100", "name": "Chair again", "category": "FURN"},
+    ]
+
+
+def _normalize(results):
+    return [
+        (
+            is_valid,
+            data,
+            {k: [str(m) for m in v] for k, v in result.errors.items()},
+            {k: [str(m) for m in v] for k, v in result.warnings.items()},
+        )
+        for is_valid, data, result in results
+    ]
+
+
+@pytest.mark.unit
+def test_field_validator_table_is_built_per_class():
+    class FirstValidator(ImportValidator):
+        def validate_a(self, value, row_data, row_index=None):
+            raise NotImplementedError
+
+    class SecondValidator(FirstValidator):
+        def validate_b(self, value, row_data, row_index=None):
+            raise NotImplementedError
+
+    assert FirstValidator._get_field_validator_names() == {"a": "validate_a"}
+    assert SecondValidator._get_field_validator_names() == {
+        "a": "validate_a",
+        "b": "validate_b",
+    }
+    assert FirstValidator._get_field_validator_names() is FirstValidator._get_field_validator_names()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class ProductImportBatchValidationTests(TestCase):
+    """Tests for validate_batch against the row-by-row path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.furniture = ProductCategory.objects.create(code="FURN", name="Furniture")
+        cls.electronics = ProductCategory.objects.create(code="ELEC", name="Electronics")
+        cls.default = ProductCategory.objects.create(code="DEFAULT", name="Default")
+        Product.objects.create(sku="EXISTS1", name="Existing product")
+
+    def _compare(self, **kwargs):
+        rows = _rows()[:-1]  # Unique SKUs only
+        by_row = [
+            ProductImportValidator(**kwargs).validate_row(row, row_index=index)
+            for index, row in enumerate(copy.deepcopy(rows))
+        ]
+        by_batch = ProductImportValidator(**kwargs).validate_batch(copy.deepcopy(rows))
+        self.assertEqual(_normalize(by_batch), _normalize(by_row))
+        return by_batch
+
+    def test_batch_matches_row_by_row(self):
+        """Test that both paths return identical per-row results."""
+        results = self._compare()
+        self.assertEqual(results[0][1]["category"], self.furniture)
+        self.assertEqual(results[0][1]["list_price"], Decimal("49.90"))
+        self.assertFalse(results[1][0])
+
+    def test_batch_matches_row_by_row_without_transform(self):
+        """Test equivalence including the existing-SKU warning."""
+        results = self._compare(transform_data=False, default_category=self.default)
+        self.assertIn("sku", results[4][2].warnings)
+        self.assertEqual(results[1][1]["category"], self.default)
+
+    def test_batch_matches_row_by_row_in_strict_mode(self):
+        """Test equivalence when warnings are treated as errors."""
+        self._compare(strict=True, transform_data=False)
+
+    def test_lookups_are_set_based(self):
+        """Test that the query count does not grow with the batch size."""
+        validator = ProductImportValidator(transform_data=False)
+        rows = [
+            {"sku": f"N{i:05d}", "name": f"Item {i}", "category": "FURN"}
+            for i in range(300)
+        ]
+        with self.assertNumQueries(2):
+            results = validator.validate_batch(rows)
+        self.assertTrue(all(is_valid for is_valid, _, _ in results))
+
+        with self.assertNumQueries(20):
+            for row in rows[:10]:
+                validator.validate_row(dict(row))
+
+    def test_duplicate_skus_in_batch_are_reported(self):
+        """Test that repeated SKUs within a batch are flagged."""
+        results = ProductImportValidator().validate_batch(_rows())
+        warnings = results[-1][2].warnings["sku"]
+        self.assertTrue(any("more than once" in str(w) for w in warnings))
+        self.assertNotIn("sku", results[0][2].warnings)
+
+        results = ProductImportValidator(strict=True).validate_batch(_rows())
+        self.assertFalse(results[-1][0])
@@ -0,0 +1,87 @@
+"""
+Tests for the precomputed primary image of variants and parents.
+"""
+
+import pytest
+from django.test import TestCase
+
+from pyerp.business_modules.products.models import (
+    ParentProduct,
+    ProductImage,
+    VariantProduct,
+)
+from pyerp.business_modules.products.services import PrimaryImageService
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class PrimaryImageServiceTestCase(TestCase):
+    """Test primary image selection and maintenance."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.parent = ParentProduct.objects.create(
+            sku="PARENT001", name="Parent", legacy_base_sku="PARENT001"
+        )
+        self.variant = VariantProduct.objects.create(
+            sku="VAR001", name="Variant", parent=self.parent,
+            legacy_base_sku="VAR001", variant_code="AA",
+        )
+        self.be_variant = VariantProduct.objects.create(
+            sku="VAR002", name="BE variant", parent=self.parent,
+            legacy_base_sku="VAR002", variant_code="BE",
+        )
+
+    def _image(self, product, external_id, **kwargs):
+        return ProductImage.objects.create(
+            product=product,
+            external_id=external_id,
+            image_url=f"https://example.com/{external_id}.jpg",
+            image_type=kwargs.pop("image_type", "Markierung"),
+            **kwargs,
+        )
+
+    def _primary(self, product):
+        product.refresh_from_db()
+        return product.primary_image
+
+    def test_priority(self):
+        """Test Produktfoto+Front > Produktfoto > Front > Primary > any."""
+        any_image = self._image(self.variant, "1")
+        self.assertEqual(self._primary(self.variant), any_image)
+        primary = self._image(self.variant, "2", is_primary=True)
+        self.assertEqual(self._primary(self.variant), primary)
+        front = self._image(self.variant, "3", is_front=True)
+        self.assertEqual(self._primary(self.variant), front)
+        photo = self._image(self.variant, "4", image_type="Produktfoto")
+        self.assertEqual(self._primary(self.variant), photo)
+        photo_front = self._image(self.variant, "5", image_type="produktfoto", is_front=True)
+        self.assertEqual(self._primary(self.variant), photo_front)
+
+        photo_front.delete()
+        self.assertEqual(self._primary(self.variant), photo)
+
+    def test_parent_prefers_be_variant(self):
+        """Test that the BE variant's image wins over better images elsewhere."""
+        self._image(self.variant, "1", image_type="Produktfoto", is_front=True)
+        self.assertEqual(self._primary(self.parent), self._primary(self.variant))
+        be_image = self._image(self.be_variant, "2")
+        self.assertEqual(self._primary(self.parent), be_image)
+
+    def test_refresh_query_count(self):
+        """Test that refreshing is a constant number of queries."""
+        for i in range(10):
+            self._image(self.variant, f"A{i}")
+            self._image(self.be_variant, f"B{i}")
+        VariantProduct.objects.update(primary_image=None)
+        ParentProduct.objects.update(primary_image=None)
+
+        with self.assertNumQueries(5):
+            variants, parents = PrimaryImageService.refresh_for_variants(
+                [self.variant.id, self.be_variant.id]
+            )
+        self.assertEqual((variants, parents), (2, 1))
+        with self.assertNumQueries(3):
+            self.assertEqual(
+                PrimaryImageService.refresh_for_variants([self.variant.id]), (0, 0)
+            )
@@ -0,0 +1,130 @@
+"""
+Tests for the batched TagResolver.
+
+These tests ensure that TagResolver returns the same tags as
+VariantProduct.get_all_tags while using a constant number of queries
+and never creating M2MOverride rows, and that the variant serializer
+builds one resolver per list.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from pyerp.business_modules.products.models import ParentProduct, VariantProduct
+from pyerp.business_modules.products.serializers import VariantProductSerializer
+from pyerp.business_modules.products.services import TagResolver
+from pyerp.business_modules.products.tag_models import M2MOverride
+from pyerp.core.models import Tag, TaggedItem
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class TagResolverTestCase(TestCase):
+    """Test bulk tag resolution for lists of variants."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.tag1 = Tag.objects.create(name="Tag1")
+        self.tag2 = Tag.objects.create(name="Tag2")
+        self.tag3 = Tag.objects.create(name="Tag3")
+
+        self.parent = ParentProduct.objects.create(
+            sku="PARENT001",
+            name="Parent Product",
+            legacy_base_sku="PARENT001",
+        )
+        TaggedItem.objects.create(tag=self.tag1, content_object=self.parent)
+        TaggedItem.objects.create(tag=self.tag2, content_object=self.parent)
+
+        self.inheriting = VariantProduct.objects.create(
+            sku="VAR001", name="Inheriting", parent=self.parent, legacy_base_sku="VAR001"
+        )
+        TaggedItem.objects.create(tag=self.tag3, content_object=self.inheriting)
+
+        self.not_inheriting = VariantProduct.objects.create(
+            sku="VAR002", name="Not inheriting", parent=self.parent, legacy_base_sku="VAR002"
+        )
+        TaggedItem.objects.create(tag=self.tag3, content_object=self.not_inheriting)
+        M2MOverride.objects.create(
+            content_type=ContentType.objects.get_for_model(VariantProduct),
+            object_id=self.not_inheriting.id,
+            relationship_name="tags",
+            inherit=False,
+        )
+
+        self.orphan = VariantProduct.objects.create(
+            sku="VAR003", name="Orphan", parent=None, legacy_base_sku="VAR003"
+        )
+
+        self.variants = [self.inheriting, self.not_inheriting, self.orphan]
+
+    def test_matches_get_all_tags(self):
+        """Test that the resolver returns the same tags as get_all_tags."""
+        resolver = TagResolver.for_variants(self.variants)
+        for variant in self.variants:
+            expected = [tag.name for tag in variant.get_all_tags().order_by("name")]
+            self.assertEqual([tag.name for tag in resolver.tags_for(variant)], expected)
+
+    def test_inheritance_flags(self):
+        """Test that missing overrides default to inheriting."""
+        resolver = TagResolver.for_variants(self.variants)
+        self.assertTrue(resolver.inherits(self.inheriting))
+        self.assertFalse(resolver.inherits(self.not_inheriting))
+        self.assertFalse(resolver.inherits(self.orphan))
+
+    def test_does_not_create_overrides(self):
+        """Test that resolving tags is a read-only operation."""
+        before = M2MOverride.objects.count()
+        resolver = TagResolver.for_variants(self.variants)
+        resolver.tags_for(self.inheriting)
+        self.inheriting.inherits_tags()
+        list(self.inheriting.get_all_tags())
+        self.assertEqual(M2MOverride.objects.count(), before)
+
+    def test_constant_query_count(self):
+        """Test that the number of queries does not depend on the batch size."""
+        for i in range(20):
+            VariantProduct.objects.create(
+                sku=f"EXTRA{i:03d}",
+                name=f"Extra {i}",
+                parent=self.parent,
+                legacy_base_sku=f"EXTRA{i:03d}",
+            )
+        variants = list(VariantProduct.objects.all())
+        # Warm the ContentType cache so only resolver queries are counted
+        ContentType.objects.get_for_model(VariantProduct)
+        ContentType.objects.get_for_model(ParentProduct)
+
+        with self.assertNumQueries(3):
+            resolver = TagResolver.for_variants(variants)
+            for variant in variants:
+                resolver.tags_for(variant)
+
+    def test_empty_batch(self):
+        """Test that an empty batch issues no queries."""
+        with self.assertNumQueries(0):
+            resolver = TagResolver.for_variants([])
+        self.assertEqual(resolver.tags_for(self.orphan), [])
+
+    def test_serializer_builds_one_resolver(self):
+        """Test that variant serializers resolve tags once per list or variant."""
+        with patch.object(
+            TagResolver, "for_variants", wraps=TagResolver.for_variants
+        ) as for_variants:
+            data = VariantProductSerializer(self.variants, many=True).data
+        for_variants.assert_called_once()
+        self.assertEqual(
+            [[tag["name"] for tag in item["tags"]] for item in data],
+            [["Tag1", "Tag2", "Tag3"], ["Tag3"], []],
+        )
+        self.assertEqual([item["inherits_tags"] for item in data], [True, False, False])
+
+        with patch.object(
+            TagResolver, "for_variants", wraps=TagResolver.for_variants
+        ) as for_variants:
+            data = VariantProductSerializer(self.inheriting).data
+        for_variants.assert_called_once()
+        self.assertTrue(data["inherits_tags"])
@@ -32,17 +32,67 @@ class ProductImportValidator(ImportValidator):
     Validator for product data during import from legacy system.
 
     Validates and transforms product data from legacy 4D system during import.
+    Use ``validate_batch`` for large imports: SKU and category lookups then
+    run as one query per batch instead of one per row, and SKUs repeated
+    within the batch are reported.
     """
 
-    def __init_translate(
+    # Maximum number of values per IN clause of the batch lookups
+    LOOKUP_CHUNK_SIZE = 1000
+
+    def __init__(
         self,
         *,  # Make all arguments keyword-only
         strict: bool = False,
         transform_data: bool = True,
         default_category: Optional["ProductCategory"] = None,
     ) -> None:
-        super().__init_translate(strict, transform_data)
+        super().__init__(strict=strict, transform_data=transform_data)
         self.default_category = default_category
+        self._batch_categories = None
+        self._batch_existing_skus = None
+        self._batch_seen_skus = None
+
+    def _prepare_batch(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Look up categories and existing SKUs of all rows at once.
+
+        Args:
+            rows: List of row data dictionaries about to be validated
+        """
+        category_codes = set()
+        skus = set()
+        for row_data in rows:
+            code = row_data.get("category") or row_data.get("ArtGruppe")
+            if isinstance(code, str) and code:
+                category_codes.add(code)
+            for key in ("sku", "alteNummer"):
+                if isinstance(row_data.get(key), str) and row_data[key]:
+                    skus.add(row_data[key])
+
+        self._batch_categories = {}
+        for chunk in self._chunks(category_codes):
+            for category in ProductCategory.objects.filter(code__in=chunk):
+                self._batch_categories[category.code] = category
+
+        self._batch_existing_skus = set()
+        if not self.transform_data:
+            for chunk in self._chunks(skus):
+                self._batch_existing_skus.update(
+                    Product.objects.filter(sku__in=chunk).values_list("sku", flat=True)
+                )
+        self._batch_seen_skus = set()
+
+    def _finish_batch(self) -> None:
+        """Discard the lookups of the last batch."""
+        self._batch_categories = None
+        self._batch_existing_skus = None
+        self._batch_seen_skus = None
+
+    def _chunks(self, values: set) -> list[list]:
+        values = sorted(values)
+        size = self.LOOKUP_CHUNK_SIZE
+        return [values[i:i + size] for i in range(0, len(values), size)]
 
     def _pre_validate_row(
         self,
@@ -93,12 +143,27 @@ class ProductImportValidator(ImportValidator):
             row_index: Optional index of the row being validated
         """
         if not self.transform_data and "sku" in row_data:
-            if Product.objects.filter(sku=row_data["sku"]).exists():
+            if self._batch_existing_skus is not None:
+                exists = row_data["sku"] in self._batch_existing_skus
+            else:
+                exists = Product.objects.filter(sku=row_data["sku"]).exists()
+            if exists:
                 result.add_warning(
                     "sku",
                     translate("Product with this SKU already exists"),
                 )
 
+        # In batch mode, flag SKUs that occur more than once in the batch
+        if self._batch_seen_skus is not None and row_data.get("sku"):
+            if row_data["sku"] in self._batch_seen_skus:
+                result.add_warning(
+                    "sku",
+                    translate("SKU '%(sku)s' occurs more than once in this import")
+                    % {"sku": row_data["sku"]},
+                )
+            else:
+                self._batch_seen_skus.add(row_data["sku"])
+
         # If parent and variant code are both set, validate the combination
         if "is_parent" in row_data and "variant_code" in row_data:
             if row_data["is_parent"] and row_data["variant_code"]:
@@ -442,6 +507,10 @@ class ProductImportValidator(ImportValidator):
         # If category is a string, try to find the category by code
         if isinstance(value, str):
             try:
+                if self._batch_categories is not None:
+                    if value not in self._batch_categories:
+                        raise ProductCategory.DoesNotExist()
+                    return self._batch_categories[value], result
                 category = ProductCategory.objects.get(code=value)
                 return category, result
             except Exception as e:
@@ -30,6 +30,7 @@ from pyerp.business_modules.products.models import (
     VariantProduct,
 )
 from pyerp.core.models import Tag
+from pyerp.business_modules.products.services import TagResolver
 from pyerp.business_modules.products.serializers import (
     ParentProductSerializer,
     ParentProductSummarySerializer,
@@ -222,6 +223,12 @@ class ProductDetailView(LoginRequiredMixin, DetailView):
 
         context["variant_images"] = variant_images
 
+        # Resolve tags for all variants at once to avoid per-variant queries
+        tag_resolver = TagResolver.for_variants(variants)
+        context["variant_tags"] = {
+            variant.id: tag_resolver.tags_for(variant) for variant in variants
+        }
+
         # Fetch all suppliers for the dropdown
         context["suppliers"] = Supplier.objects.all()
 
@@ -423,11 +430,7 @@ class VariantDetailAPIView(ProductAPIView):
                     {
                         "id": image.id,
                         "url": image.image_url,
-                        "thumbnail_url": (
-                            image.thumbnail_url
-                            if hasattr(image, "thumbnail_url")
-                            else image.image_url
-                        ),
+                        "thumbnail_url": image.display_thumbnail_url,
                         "is_primary": image.is_primary,
                         "is_front": getattr(image, "is_front", False),
                         "image_type": getattr(image, "image_type", None),
@@ -445,9 +448,10 @@ class VariantDetailAPIView(ProductAPIView):
                     },
                 )
 
-        # Add information about tags inheritance if applicable
-        if hasattr(variant, "inherits_tags"):
-            variant_data["inherits_tags"] = variant.inherits_tags()
+        # Add tags and information about tags inheritance
+        tag_resolver = TagResolver.for_variants([variant])
+        variant_data["inherits_tags"] = tag_resolver.inherits(variant)
+        variant_data["tags"] = [tag.name for tag in tag_resolver.tags_for(variant)]
 
         # Return JSON response
         return Response(variant_data)
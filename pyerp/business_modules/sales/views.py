@@ -15,6 +15,8 @@ from django.db.models import Prefetch, Count, Sum, Q, Value, DecimalField, Max
 from django.db.models.functions import Coalesce
 from django.shortcuts import render
 
+from pyerp.core.api_cache import CachedResponseMixin
+
 # Create your views here
 
 
@@ -25,11 +27,15 @@ class SalesViewSet(viewsets.ModelViewSet):
     """
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     API viewset for managing customers.
     """
 
+    cache_endpoint = "sales.customers"
+    cache_dependencies = (Customer, Address, SalesRecord)
+    cache_timeout = 60
+
     serializer_class = CustomerSerializer
     filter_backends = [
         DjangoFilterBackend,
@@ -96,11 +102,15 @@ class AddressViewSet(viewsets.ModelViewSet):
     serializer_class = AddressSerializer
 
 
-class SalesRecordViewSet(viewsets.ModelViewSet):
+class SalesRecordViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     API viewset for managing sales records.
     """
 
+    cache_endpoint = "sales.records"
+    cache_dependencies = (SalesRecord, SalesRecordItem, Customer)
+    cache_timeout = 60
+
     queryset = SalesRecord.objects.all().order_by("-record_date")
     serializer_class = SalesRecordSerializer
     filter_backends = [
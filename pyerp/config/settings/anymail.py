@@ -62,6 +62,20 @@ ANYMAIL_TRACK_CLICKS = os.environ.get("ANYMAIL_TRACK_CLICKS", "").lower() == "tr
 # Email template settings
 ANYMAIL_TEMPLATE_CONTEXT = {}
 
+# Acknowledge batch webhooks immediately and ingest them in a Celery task
+EMAIL_WEBHOOK_ASYNC = os.environ.get("EMAIL_WEBHOOK_ASYNC", "").lower() == "true"
+
+# Queued outbound delivery (pyerp.utils.email_system.backends.QueuedEmailBackend)
+EMAIL_QUEUE_ENABLED = os.environ.get("EMAIL_QUEUE_ENABLED", "").lower() == "true"
+# Empty means the EMAIL_BACKEND the queue replaces
+EMAIL_QUEUE_DELIVERY_BACKEND = os.environ.get("EMAIL_QUEUE_DELIVERY_BACKEND", "")
+EMAIL_QUEUE_BATCH_SIZE = int(os.environ.get("EMAIL_QUEUE_BATCH_SIZE", "100"))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get("EMAIL_QUEUE_MAX_ATTEMPTS", "5"))
+EMAIL_QUEUE_RETRY_DELAY = int(os.environ.get("EMAIL_QUEUE_RETRY_DELAY", "60"))
+
+# Email logs older than this are removed by the prune_email_logs command
+EMAIL_LOG_RETENTION_DAYS = int(os.environ.get("EMAIL_LOG_RETENTION_DAYS", "90"))
+
 # Standard Django email settings (used for SMTP and as fallback)
 EMAIL_HOST = os.environ.get("EMAIL_HOST", "")
 EMAIL_PORT = (
@@ -13,6 +13,7 @@ import logging  # Add logging
 
 import environ  # Add this import
 import dj_database_url  # noqa: F401
+from celery.schedules import crontab
 from django.utils.translation import gettext_lazy as _  # Move import to top
 
 # Import 1Password SDK
@@ -140,6 +141,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "pyerp.middleware.performance.PerformanceMonitoringMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -473,11 +475,17 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        # JSONRenderer output, encoded with orjson when it is installed
+        "pyerp.core.renderers.FastJSONRenderer",
         # Add BrowsableAPIRenderer back if needed for development/debugging
         # in browser
         # "rest_framework.renderers.BrowsableAPIRenderer",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "pyerp.core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
@@ -500,6 +508,25 @@ REST_FRAMEWORK = {
     "ALLOWED_VERSIONS": ["v1"],
 }
 
+# Cache backend; development and production settings override this with
+# their own local-memory and Redis configurations.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pyerp-default",
+    }
+}
+
+# Conditional-request (ETag/304) and response caching for read-heavy API
+# endpoints, see pyerp.core.api_cache. TIMEOUTS overrides the storage TTL in
+# seconds per endpoint name; 0 disables storage but keeps ETag handling.
+# Only active with a shared cache backend (e.g. Redis in production), as the
+# ETag versions are bumped by other processes too.
+API_CACHE = {
+    "ENABLED": os.environ.get("API_CACHE_ENABLED", "True").lower() == "true",
+    "TIMEOUTS": {},
+}
+
 # Spectacular API Schema configuration
 SPECTACULAR_SETTINGS = {
     'TITLE': 'pyERP API',
@@ -619,9 +646,112 @@ CELERY_BEAT_SCHEDULE = {
     #     "schedule": crontab(hour=2, minute=15),  # Run at 2:15 AM daily
     #     "options": {"expires": 10800.0},  # Expires after 3 hours
     # },
+    "sync.dispatch_sync_queue": {
+        "task": "sync.dispatch_sync_queue",
+        "schedule": 60.0,  # Picks up syncs held back by concurrency limits
+        "options": {"expires": 55.0},
+    },
+    "sync.reconcile_deletes": {
+        "task": "sync.reconcile_deletes",
+        "schedule": crontab(hour=3, minute=30),  # Nightly, after the full syncs
+        "options": {"expires": 3600.0},
+    },
+    "monitoring.run_due_health_checks": {
+        "task": "monitoring.run_due_health_checks",
+        "schedule": 30.0,  # Each component runs on its own interval
+        "options": {"expires": 25.0},
+    },
     # Add other periodic tasks here if needed (e.g., monitoring, cleanup)
 }
 
+# Sync queue (pyerp.sync.queue): how many syncs per source may run at the
+# same time, and after how long without a heartbeat a running sync counts
+# as lost; running syncs renew their lease at most once per heartbeat
+SYNC_SOURCE_CONCURRENCY = {"legacy_erp": 2}
+SYNC_DEFAULT_CONCURRENCY = 2
+SYNC_REQUEST_LEASE_SECONDS = int(os.environ.get("SYNC_REQUEST_LEASE_SECONDS", "3600"))
+SYNC_REQUEST_HEARTBEAT_SECONDS = 60
+SYNC_REQUEST_RETENTION_DAYS = int(os.environ.get("SYNC_REQUEST_RETENTION_DAYS", "7"))
+
+# Incremental syncs (SyncPipeline): records are fetched from the stored high
+# watermark minus an overlap that tolerates clock skew, and a full sync runs
+# again after the reconcile interval. Both can be overridden per mapping in
+# the "incremental" section of its YAML config.
+SYNC_WATERMARK_OVERLAP_SECONDS = int(
+    os.environ.get("SYNC_WATERMARK_OVERLAP_SECONDS", "300")
+)
+SYNC_FULL_RECONCILE_HOURS = int(os.environ.get("SYNC_FULL_RECONCILE_HOURS", "168"))
+
+# Full loads spill extracted pages to Parquet snapshots (pyerp.sync.spill).
+# Snapshots of failed loads are kept this long so they can be replayed.
+SYNC_SPILL_DIR = os.environ.get("SYNC_SPILL_DIR", "")
+SYNC_SPILL_TTL_HOURS = float(os.environ.get("SYNC_SPILL_TTL_HOURS", "24"))
+# Whether full pipeline syncs spill too; "spill" in the mapping config
+# overrides this per mapping
+SYNC_SPILL_FULL_LOADS = (
+    os.environ.get("SYNC_SPILL_FULL_LOADS", "False").lower() == "true"
+)
+
+# Health checks run in the background and the health API serves the stored
+# results. Seconds between checks per component override the defaults in
+# pyerp.monitoring.services.DEFAULT_CHECK_INTERVALS.
+HEALTH_CHECK_INTERVALS = {}
+HEALTH_CHECK_RETENTION_DAYS = int(os.environ.get("HEALTH_CHECK_RETENTION_DAYS", "30"))
+# The "Database Validation" health check only rescans tables that changed
+# since its last run and samples tables with more rows than this
+DB_VALIDATION_SAMPLE_ROWS = int(
+    os.environ.get("DB_VALIDATION_SAMPLE_ROWS", "5000000")
+)
+DB_VALIDATION_SAMPLE_SIZE = int(
+    os.environ.get("DB_VALIDATION_SAMPLE_SIZE", "500000")
+)
+DB_VALIDATION_EXCLUDE_PREFIXES = ("django_", "auth_")
+
+# PerformanceMonitoringMiddleware writes the duration of every non-static
+# request to the pyerp.performance logger (with slow/very_slow flags); it
+# removes itself if this, request profiling and memory telemetry are all off
+PERFORMANCE_LOGGING_ENABLED = (
+    os.environ.get("PERFORMANCE_LOGGING_ENABLED", "True").lower() == "true"
+)
+
+# Request profiling in PerformanceMonitoringMiddleware (query counts, DB and
+# HTTP time per route); sample a fraction of requests to keep it cheap
+REQUEST_PROFILING_ENABLED = (
+    os.environ.get("REQUEST_PROFILING_ENABLED", "False").lower() == "true"
+)
+REQUEST_PROFILING_SAMPLE_RATE = float(
+    os.environ.get("REQUEST_PROFILING_SAMPLE_RATE", "0.1")
+)
+REQUEST_PROFILING_WINDOW = int(os.environ.get("REQUEST_PROFILING_WINDOW", "500"))
+REQUEST_PROFILING_DUPLICATE_THRESHOLD = int(
+    os.environ.get("REQUEST_PROFILING_DUPLICATE_THRESHOLD", "5")
+)
+
+# Memory telemetry: RSS and peak deltas per Celery task (stored in
+# TaskMemoryUsage) and per HTTP route; tasks growing memory beyond the
+# threshold get a tracemalloc snapshot diff when run with -X tracemalloc
+MEMORY_TELEMETRY_ENABLED = (
+    os.environ.get("MEMORY_TELEMETRY_ENABLED", "False").lower() == "true"
+)
+MEMORY_TELEMETRY_THRESHOLD_MB = int(
+    os.environ.get("MEMORY_TELEMETRY_THRESHOLD_MB", "200")
+)
+MEMORY_TELEMETRY_TOP_GROWERS = 15
+MEMORY_TELEMETRY_RETENTION_DAYS = int(
+    os.environ.get("MEMORY_TELEMETRY_RETENTION_DAYS", "14")
+)
+
+# Audit logging: buffer entries in-process and write them with bulk_create
+AUDIT_LOG_BUFFERED = (
+    os.environ.get("AUDIT_LOG_BUFFERED", "False").lower() == "true"
+)
+AUDIT_BUFFER_SIZE = int(os.environ.get("AUDIT_BUFFER_SIZE", "100"))
+AUDIT_BUFFER_FLUSH_INTERVAL = float(
+    os.environ.get("AUDIT_BUFFER_FLUSH_INTERVAL", "5")
+)  # seconds
+# Used by the archive_audit_logs management command
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get("AUDIT_LOG_RETENTION_DAYS", "365"))
+
 # Ensure logs directory exists
 logs_dir = BASE_DIR / "logs"
 logs_dir.mkdir(exist_ok=True)
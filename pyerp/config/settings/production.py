@@ -140,6 +140,19 @@ else:
 # Import anymail settings
 from .anymail import *  # noqa
 
+if EMAIL_QUEUE_ENABLED:  # noqa: F405
+    # Queue emails and deliver them from a Celery worker through the
+    # backend configured above
+    EMAIL_QUEUE_DELIVERY_BACKEND = (
+        EMAIL_QUEUE_DELIVERY_BACKEND or EMAIL_BACKEND  # noqa: F405
+    )
+    EMAIL_BACKEND = "pyerp.utils.email_system.backends.QueuedEmailBackend"
+    CELERY_BEAT_SCHEDULE["email_system.send_queued_emails"] = {  # noqa: F405
+        "task": "email_system.send_queued_emails",
+        "schedule": 60.0,  # Every minute, picks up retries
+        "options": {"expires": 55.0},
+    }
+
 # Middleware configuration - Extend base middleware
 MIDDLEWARE = BASE_MIDDLEWARE + [
     # Add production-specific middleware here, if any, or ensure they are
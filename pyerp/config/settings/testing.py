@@ -134,6 +134,10 @@ for template in TEMPLATES:
 # Use console email backend for tests
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Test transactions roll back without signals, so cached API responses could
+# outlive their data; tests that need the cache enable it explicitly
+API_CACHE = {"ENABLED": False, "TIMEOUTS": {}}
+
 # Disable logging during tests
 LOGGING = {
     "version": 1,
@@ -0,0 +1,365 @@
+"""
+Conditional-request and response caching for read-heavy API endpoints.
+
+Every model has a version counter in the configured cache backend. The
+counter is bumped by ``post_save``/``post_delete`` signals and by the sync
+pipeline after bulk loads. API responses derive their ETag from the versions
+of the models they depend on, so a matching ``If-None-Match`` can be answered
+with ``304 Not Modified`` before any query runs. Optionally the serialized
+response data is stored in the cache keyed by that ETag.
+
+Usage on a DRF viewset:
+
+    class CustomerViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+        cache_endpoint = "sales.customers"
+        cache_dependencies = (Customer, Address, SalesRecord)
+        cache_timeout = 60
+
+Usage on a function-based DRF view (below ``@api_view``):
+
+    @api_view(["GET"])
+    @cached_api_response("inventory.storage_locations", (StorageLocation,))
+    def storage_locations_list(request):
+        ...
+
+The cached payload is shared by all users of an endpoint unless
+``vary_on_user`` is set, so only use this for views whose output does not
+depend on object-level permissions.
+
+The version counters must be visible to every process that writes data, so
+caching is only active with a shared cache backend such as Redis. With the
+dummy backend versions are never stored, and with the per-process local
+memory backend bumps made by Celery or sync workers never reach the web
+workers; both would answer 304 for changed data. ``API_CACHE["ALLOW_LOCAL_CACHE"]``
+permits the local memory backend for single-process setups such as tests.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+from pyerp.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+VERSION_KEY_PREFIX = "api_cache:version:"
+RESPONSE_KEY_PREFIX = "api_cache:response:"
+STATS_KEY_PREFIX = "api_cache:stats:"
+STAT_OUTCOMES = ("hit", "miss", "not_modified")
+
+# Endpoints seen by this process, used to enumerate stats
+_registered_endpoints = set()
+# Write-heavy models no API response depends on; skipping them saves a cache
+# round-trip per row
+_untracked_models = {
+    "admin.logentry",
+    "core.auditlog",
+    "sessions.session",
+    "sync.synclog",
+    "sync.syncstate",
+}
+
+
+def _get_setting(name, default=None):
+    """Return a key from the ``API_CACHE`` settings dict."""
+    return getattr(settings, "API_CACHE", {}).get(name, default)
+
+
+# Backends whose entries are not shared between processes
+DUMMY_CACHE_BACKEND = "django.core.cache.backends.dummy.DummyCache"
+LOCAL_CACHE_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def has_shared_cache():
+    """Return whether the default cache can hold the model version counters."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend == DUMMY_CACHE_BACKEND:
+        return False
+    if backend == LOCAL_CACHE_BACKEND:
+        return bool(_get_setting("ALLOW_LOCAL_CACHE", False))
+    return True
+
+
+def is_enabled():
+    """Return whether API response caching is enabled and can be trusted."""
+    return bool(_get_setting("ENABLED", True)) and has_shared_cache()
+
+
+def _version_key(model):
+    return f"{VERSION_KEY_PREFIX}{model._meta.label_lower}"
+
+
+def _new_version():
+    # Seed new counters with the current time so that versions never repeat
+    # after a cache flush and stale client ETags cannot match by accident.
+    return time.time_ns()
+
+
+def get_model_versions(models):
+    """
+    Return the current version of each model in a single cache round-trip.
+
+    Args:
+        models: Iterable of model classes
+
+    Returns:
+        tuple: Version numbers in the order of ``models``
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    result = []
+    for key in keys:
+        version = versions.get(key)
+        if version is None:
+            cache.add(key, _new_version(), None)
+            version = cache.get(key)
+        result.append(version)
+    return tuple(result)
+
+
+def bump_model_version(*models):
+    """
+    Invalidate cached API responses that depend on the given models.
+
+    Call this after writes that bypass model signals, e.g. ``bulk_create``,
+    ``bulk_update`` or ``QuerySet.update``.
+    """
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def _bump_on_change(sender, **kwargs):
+    if sender._meta.label_lower not in _untracked_models:
+        bump_model_version(sender)
+
+
+def connect_signals():
+    """
+    Bump model versions on every save and delete.
+
+    Connected for all models from ``CoreConfig.ready`` so that writes in any
+    process (web, Celery, management commands) invalidate cached responses.
+    """
+    post_save.connect(_bump_on_change, weak=False, dispatch_uid="api_cache_post_save")
+    post_delete.connect(_bump_on_change, weak=False, dispatch_uid="api_cache_post_delete")
+
+
+def _record(endpoint, outcome):
+    key = f"{STATS_KEY_PREFIX}{endpoint}:{outcome}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_cache_stats():
+    """
+    Return hit/miss/304 counters and hit rates per endpoint.
+
+    Returns:
+        dict: Mapping of endpoint name to its counters and ``hit_rate``
+    """
+    endpoints = sorted(_registered_endpoints)
+    keys = [
+        f"{STATS_KEY_PREFIX}{endpoint}:{outcome}"
+        for endpoint in endpoints
+        for outcome in STAT_OUTCOMES
+    ]
+    values = cache.get_many(keys)
+    stats = {}
+    for endpoint in endpoints:
+        counters = {
+            outcome: values.get(f"{STATS_KEY_PREFIX}{endpoint}:{outcome}", 0)
+            for outcome in STAT_OUTCOMES
+        }
+        total = sum(counters.values())
+        served = counters["hit"] + counters["not_modified"]
+        counters["hit_rate"] = round(served / total, 4) if total else None
+        stats[endpoint] = counters
+    return stats
+
+
+class ResponseCache:
+    """
+    Conditional-request handling and response storage for one endpoint.
+
+    Args:
+        endpoint: Name used for per-endpoint TTL settings and metrics
+        dependencies: Model classes whose changes invalidate the responses
+        timeout: Seconds to store serialized data; ``None`` only emits ETags
+        vary_on_user: Whether responses differ per authenticated user
+    """
+
+    def __init__(self, endpoint, dependencies, timeout=None, vary_on_user=False):
+        self.endpoint = endpoint
+        self.dependencies = tuple(dependencies)
+        self.default_timeout = timeout
+        self.vary_on_user = vary_on_user
+        _registered_endpoints.add(endpoint)
+
+    @property
+    def timeout(self):
+        """Return the storage TTL, allowing ``API_CACHE["TIMEOUTS"]`` to override it."""
+        return _get_setting("TIMEOUTS", {}).get(self.endpoint, self.default_timeout)
+
+    def get_etag(self, request):
+        """Derive the ETag from model versions and the request URL."""
+        parts = [
+            self.endpoint,
+            ",".join(str(v) for v in get_model_versions(self.dependencies)),
+            request.get_full_path(),
+        ]
+        if self.vary_on_user:
+            parts.append(str(getattr(request.user, "pk", "")))
+        digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+        return f'"{digest}"'
+
+    def lookup(self, request):
+        """
+        Answer the request from the version counters or the cache if possible.
+
+        Returns:
+            tuple: ``(etag, response)`` where ``response`` is ``None`` if the
+            view has to run
+        """
+        etag = self.get_etag(request)
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            _record(self.endpoint, "not_modified")
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            return etag, self._add_headers(response, etag)
+
+        if self.timeout:
+            data = cache.get(f"{RESPONSE_KEY_PREFIX}{etag}")
+            if data is not None:
+                _record(self.endpoint, "hit")
+                response = self._add_headers(Response(data), etag)
+                response["X-Cache"] = "HIT"
+                return etag, response
+
+        _record(self.endpoint, "miss")
+        return etag, None
+
+    def store(self, etag, response):
+        """Store a successful response and add the caching headers."""
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        timeout = self.timeout
+        if timeout and getattr(response, "data", None) is not None:
+            cache.set(f"{RESPONSE_KEY_PREFIX}{etag}", response.data, timeout)
+            response["X-Cache"] = "MISS"
+        return self._add_headers(response, etag)
+
+    @staticmethod
+    def _add_headers(response, etag):
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class _CachedResponse(Exception):
+    """Carries a response that short-circuits the view handler."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class CachedResponseMixin:
+    """
+    Add ETag/304 handling and optional response caching to DRF views.
+
+    Attributes:
+        cache_endpoint: Name used for TTL settings and metrics
+        cache_dependencies: Model classes whose changes invalidate responses
+        cache_timeout: Seconds to store serialized data (``None`` = ETag only)
+        cache_actions: Viewset actions to cache; plain APIViews cache all GETs
+        cache_vary_on_user: Whether responses differ per user
+    """
+
+    cache_endpoint = None
+    cache_dependencies = ()
+    cache_timeout = None
+    cache_actions = ("list", "retrieve")
+    cache_vary_on_user = False
+
+    _response_cache = None
+
+    @classmethod
+    def get_response_cache(cls):
+        """Return the ResponseCache for this view class, creating it on first use."""
+        if cls.__dict__.get("_response_cache") is None:
+            cls._response_cache = ResponseCache(
+                cls.cache_endpoint or f"{cls.__module__}.{cls.__name__}",
+                cls.cache_dependencies,
+                timeout=cls.cache_timeout,
+                vary_on_user=cls.cache_vary_on_user,
+            )
+        return cls._response_cache
+
+    def _is_cacheable(self, request):
+        if request.method != "GET" or not is_enabled() or not self.cache_dependencies:
+            return False
+        action = getattr(self, "action", None)
+        return action is None or action in self.cache_actions
+
+    def initial(self, request, *args, **kwargs):
+        """Run authentication and permissions, then try to answer from the cache."""
+        super().initial(request, *args, **kwargs)
+        self._cache_etag = None
+        if self._is_cacheable(request):
+            etag, response = self.get_response_cache().lookup(request)
+            if response is not None:
+                raise _CachedResponse(response)
+            self._cache_etag = etag
+
+    def handle_exception(self, exc):
+        """Return short-circuited cache responses instead of treating them as errors."""
+        if isinstance(exc, _CachedResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Store the freshly computed response under its ETag."""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "_cache_etag", None)
+        if etag and "ETag" not in response:
+            self.get_response_cache().store(etag, response)
+        return response
+
+
+def cached_api_response(endpoint, dependencies, timeout=None, vary_on_user=False):
+    """
+    Decorate a function-based DRF view with ETag/304 handling and caching.
+
+    Place it below ``@api_view``/``@permission_classes`` so that it runs after
+    authentication.
+    """
+    response_cache = ResponseCache(endpoint, dependencies, timeout, vary_on_user)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET" or not is_enabled():
+                return view_func(request, *args, **kwargs)
+            etag, response = response_cache.lookup(request)
+            if response is not None:
+                return response
+            return response_cache.store(etag, view_func(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -27,6 +27,16 @@ class CoreConfig(AppConfig):
         # Import signals to ensure they are registered
         from . import signals  # noqa
 
+        # Track model versions for conditional API responses
+        from pyerp.core.api_cache import connect_signals
+
+        connect_signals()
+
+        # Flush buffered audit log entries at request and task end
+        from pyerp.core import audit_buffer
+
+        audit_buffer.connect_signals()
+
         # Initialize the centralized logging system
         from pyerp.utils.logging.logging_init import (
             initialize_logging,
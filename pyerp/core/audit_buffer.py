@@ -0,0 +1,187 @@
+"""
+In-process buffer for audit log entries.
+
+With ``AUDIT_LOG_BUFFERED`` enabled, ``AuditService`` hands entries to the
+process-wide ``audit_buffer`` instead of inserting them one by one. The
+buffer writes them with ``bulk_create`` once ``AUDIT_BUFFER_SIZE`` entries
+are pending or the oldest entry is ``AUDIT_BUFFER_FLUSH_INTERVAL`` seconds
+old, when a request or Celery task finishes, and at interpreter exit. If a
+bulk insert fails, entries fall back to being saved one by one, so a
+single bad row cannot drop the whole batch.
+
+The buffer holds entries of every request of the process, so it is never
+written inside the caller's ``transaction.atomic()`` block, where a
+rollback would take the other requests' entries with it. A flush inside
+an atomic block is left to the timer thread, which uses its own
+connection.
+"""
+
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from pyerp.utils.logging import get_category_logger
+
+logger = get_category_logger("security")
+
+DEFAULT_BUFFER_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds
+
+
+def buffering_enabled():
+    """Return whether audit entries should be buffered."""
+    return getattr(settings, "AUDIT_LOG_BUFFERED", False)
+
+
+class AuditBuffer:
+    """
+    Thread-safe buffer that writes ``AuditLog`` entries in batches.
+
+    Args:
+        max_size: Number of pending entries that triggers a flush
+        flush_interval: Maximum age in seconds of a pending entry
+    """
+
+    def __init__(self, max_size=None, flush_interval=None):
+        self._max_size = max_size
+        self._flush_interval = flush_interval
+        self._entries = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, "AUDIT_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, "AUDIT_BUFFER_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        """Queue an unsaved ``AuditLog`` and flush if a threshold is reached."""
+        with self._lock:
+            self._entries.append(entry)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._entries) >= self.max_size
+            if not full:
+                self._start_timer()
+        if full:
+            self.flush()
+
+    def flush_if_due(self):
+        """Flush if the oldest pending entry exceeded the flush interval."""
+        oldest = self._oldest
+        if oldest is not None and time.monotonic() - oldest >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending entries.
+
+        Inside an atomic block nothing is written; the timer thread flushes
+        the entries instead.
+
+        Returns:
+            int: Number of entries written
+        """
+        from .models import AuditLog
+
+        if connections[router.db_for_write(AuditLog)].in_atomic_block:
+            with self._lock:
+                if self._entries:
+                    self._start_timer()
+            return 0
+
+        with self._lock:
+            entries, self._entries = self._entries, []
+            self._oldest = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not entries:
+            return 0
+
+        with self._flush_lock:
+            try:
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create(entries)
+                return len(entries)
+            except Exception as e:
+                logger.error(
+                    f"Bulk insert of {len(entries)} audit entries failed, "
+                    f"writing them individually: {e!s}"
+                )
+            return self._write_individually(entries)
+
+    def _write_individually(self, entries):
+        written = 0
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    entry.pk = None
+                    entry.save(force_insert=True)
+                written += 1
+            except Exception as e:
+                logger.error(f"Error creating audit log: {e!s}")
+        return written
+
+    def _start_timer(self):
+        """Make sure idle processes still flush; caller holds the lock."""
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own database connection
+            connections.close_all()
+
+
+audit_buffer = AuditBuffer()
+
+
+def flush_audit_buffer(**kwargs):
+    """Signal receiver that writes all pending audit entries."""
+    audit_buffer.flush()
+
+
+def flush_audit_buffer_if_due(**kwargs):
+    """Signal receiver that writes pending audit entries once they are due."""
+    audit_buffer.flush_if_due()
+
+
+def connect_signals():
+    """Flush at request end, at Celery task end and at interpreter exit."""
+    from django.core.signals import request_finished
+
+    request_finished.connect(
+        flush_audit_buffer_if_due, dispatch_uid="audit_buffer_request_finished"
+    )
+    try:
+        from celery.signals import task_postrun, worker_process_shutdown
+    except ImportError:
+        pass
+    else:
+        task_postrun.connect(flush_audit_buffer, dispatch_uid="audit_buffer_task_postrun")
+        worker_process_shutdown.connect(
+            flush_audit_buffer, dispatch_uid="audit_buffer_worker_shutdown"
+        )
+    atexit.register(audit_buffer.flush)
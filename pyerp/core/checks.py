@@ -35,3 +35,32 @@ def check_database_connection(app_configs, **kwargs):
         )
 
     return errors
+
+
+@register()
+def check_api_cache_backend(app_configs, **kwargs):
+    """
+    Warn when API response caching is enabled without a shared cache.
+
+    The ETag versions live in the cache, so api_cache turns itself off
+    rather than answer 304 for changed data.
+    """
+    from django.conf import settings
+
+    from pyerp.core.api_cache import has_shared_cache
+
+    if not getattr(settings, "API_CACHE", {}).get("ENABLED", True):
+        return []
+    if has_shared_cache():
+        return []
+    return [
+        Warning(
+            "API response caching is disabled: the default cache backend is "
+            "not shared between processes.",
+            hint=(
+                "Configure a shared cache such as Redis, or set "
+                "API_CACHE['ENABLED'] = False to silence this warning."
+            ),
+            id="pyerp.core.W002",
+        ),
+    ]
@@ -0,0 +1,72 @@
+"""
+Management command to enforce the audit log retention period.
+
+Audit log entries older than the retention period are written to a gzipped
+JSON Lines archive and deleted in primary-key batches, so that the audit
+table only holds recent history while older events remain available.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pyerp.core.models import AuditLog
+from pyerp.core.retention import archive_and_delete
+
+
+class Command(BaseCommand):
+    help = "Archive and delete audit log entries older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "AUDIT_LOG_RETENTION_DAYS", 365),
+            help="Keep audit log entries from within this many days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of entries to delete per transaction",
+        )
+        parser.add_argument(
+            "--archive",
+            help="Append the deleted entries to this .jsonl.gz file",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Delete expired entries without archiving them",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many entries would be archived",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        if options["days"] < 1:
+            raise CommandError("--days must be a positive integer")
+        if not options["archive"] and not options["no_archive"] and not options["dry_run"]:
+            raise CommandError("Pass --archive FILE, or --no-archive to only delete")
+        batch_size = max(1, options["batch_size"])
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = AuditLog.objects.filter(timestamp__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would archive {expired.count()} audit log entries from before "
+                f"{cutoff.isoformat()}."
+            )
+            return
+
+        deleted = archive_and_delete(expired, batch_size, options["archive"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {deleted} audit log entries from before {cutoff.isoformat()}."
+            )
+        )
@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 SNAPSHOT_DIR = Path(os.environ.get("MEMORY_SNAPSHOT_DIR", "/app/data/memory_snapshots"))
 SNAPSHOT_INTERVAL_SECONDS = int(os.environ.get("MEMORY_SNAPSHOT_INTERVAL", "300")) # Default 5 minutes
 TOP_STATS = int(os.environ.get("MEMORY_SNAPSHOT_TOP_STATS", "25"))
+MAX_SNAPSHOT_FILES = int(os.environ.get("MEMORY_SNAPSHOT_MAX_FILES", "20"))  # Per process
 
 _last_snapshot_time = 0
 _process_identifier = "unknown"
@@ -52,6 +53,7 @@ def take_snapshot_if_needed():
 
         snapshot.dump(str(filename))
         logger.info(f"[{_process_identifier}] Memory snapshot saved to {filename}")
+        prune_snapshots()
 
         # Optionally log top stats
         log_top_stats(snapshot)
@@ -59,6 +61,16 @@ def take_snapshot_if_needed():
     except Exception as e:
         logger.error(f"[{_process_identifier}] Error taking memory snapshot: {e}", exc_info=True)
 
+def prune_snapshots():
+    """Delete the oldest snapshot files of this process beyond MAX_SNAPSHOT_FILES."""
+    try:
+        files = sorted(SNAPSHOT_DIR.glob(f"snapshot_{_process_identifier}_*.prof"))
+        for path in files[:-MAX_SNAPSHOT_FILES] if MAX_SNAPSHOT_FILES > 0 else []:
+            path.unlink(missing_ok=True)
+            logger.debug(f"[{_process_identifier}] Removed old memory snapshot {path}")
+    except Exception as e:
+        logger.error(f"[{_process_identifier}] Error pruning memory snapshots: {e}", exc_info=True)
+
 def log_top_stats(snapshot):
     """Logs the top memory allocating lines from a snapshot."""
     try:
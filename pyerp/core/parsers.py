@@ -0,0 +1,29 @@
+"""
+Fast JSON parsing for the REST API.
+
+``FastJSONParser`` decodes UTF-8 request bodies with
+``pyerp.utils.json_utils``, which uses orjson when it is installed, and
+falls back to ``JSONParser`` for other encodings.
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from pyerp.utils import json_utils
+
+
+class FastJSONParser(JSONParser):
+    """Parse JSON request bodies with the fast JSON backend."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON and return the data."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return json_utils.loads(stream.read(), allow_nan=not self.strict)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
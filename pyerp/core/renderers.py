@@ -0,0 +1,51 @@
+"""
+Fast JSON rendering for the REST API.
+
+``FastJSONRenderer`` encodes responses with ``pyerp.utils.json_utils``,
+which uses orjson when it is installed. Values are formatted by DRF's own
+encoder wherever the fast path does not encode them natively, so the
+output matches ``JSONRenderer``.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from pyerp.utils import json_utils
+
+# Escaped like JSONRenderer does, so the output is a strict JavaScript subset
+_LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\u2028"),
+    ("\u2029".encode(), b"\u2029"),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render compact JSON with the fast JSON backend."""
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context) is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            # Formatting only the standard library provides
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = json_utils.dumps(data, default=self._encoder.default)
+        except TypeError:
+            # Types the fast backend cannot hand to the encoder, e.g. lazy
+            # querysets in dict values
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
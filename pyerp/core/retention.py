@@ -0,0 +1,79 @@
+"""
+Archiving and deleting rows that are past their retention period.
+
+Shared by the retention commands, such as ``archive_audit_logs`` and
+``prune_email_logs``. Expired rows are deleted in primary-key batches, one
+transaction per batch, optionally after being appended to a gzipped JSON
+Lines archive.
+"""
+
+import gzip
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.forms.models import model_to_dict
+
+
+def to_record(instance):
+    """
+    Return a JSON-serializable dict of a model instance for the archive.
+
+    Unlike ``model_to_dict`` alone, non-editable fields such as
+    ``auto_now_add`` timestamps are included.
+    """
+    record = model_to_dict(instance)
+    for field in instance._meta.concrete_fields:
+        if not field.editable:
+            record[field.name] = field.value_from_object(instance)
+    return record
+
+
+def archive_and_delete(
+    queryset, batch_size, archive_path=None, records=None, delete=None
+):
+    """
+    Delete the rows of a queryset in primary-key batches.
+
+    Args:
+        queryset: The expired rows
+        batch_size: Number of rows to delete per transaction
+        archive_path: Append the rows to this .jsonl.gz file before deleting
+            them
+        records: Called with the primary keys of a batch, returns the
+            records to archive. Defaults to ``to_record`` of every row.
+        delete: Called with the primary keys of a batch inside its
+            transaction. Defaults to deleting the rows, e.g. to delete
+            related rows first.
+
+    Returns:
+        int: Number of deleted rows
+    """
+    model = queryset.model
+    if records is None:
+        def records(ids):
+            return map(to_record, model.objects.filter(pk__in=ids).order_by("pk"))
+    if delete is None:
+        def delete(ids):
+            model.objects.filter(pk__in=ids).delete()
+
+    archive = gzip.open(archive_path, "at") if archive_path else None
+    deleted = 0
+    try:
+        while True:
+            batch = queryset.order_by("pk").values_list("pk", flat=True)[:batch_size]
+            ids = list(batch)
+            if not ids:
+                break
+            if archive is not None:
+                for record in records(ids):
+                    archive.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+                # Make sure the batch is on disk before it is deleted
+                archive.flush()
+            with transaction.atomic():
+                delete(ids)
+            deleted += len(ids)
+    finally:
+        if archive is not None:
+            archive.close()
+    return deleted
@@ -3,8 +3,10 @@ Core services for the ERP system.
 """
 
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 from pyerp.utils.logging import get_category_logger
+from .audit_buffer import audit_buffer, buffering_enabled
 from .models import AuditLog
 
 # Use category logger for security-related logs
@@ -38,7 +40,8 @@ class AuditService:
             additional_data (dict, optional): Additional data to store with the event  # noqa: E501
 
         Returns:
-            AuditLog: The created audit log entry
+            AuditLog: The created audit log entry. With ``AUDIT_LOG_BUFFERED``
+            enabled the entry is queued and only saved on the next flush.
         """
         try:
             ip_address = None
@@ -60,18 +63,24 @@ class AuditService:
                 content_type = ContentType.objects.get_for_model(obj)
                 object_id = str(obj.pk)
 
+            fields = {
+                "event_type": event_type,
+                "message": message,
+                "user": user,
+                "username": user.username if user else "",
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "content_type": content_type,
+                "object_id": object_id,
+                "additional_data": additional_data,
+            }
+
             # Create the log entry
-            log_entry = AuditLog.objects.create(
-                event_type=event_type,
-                message=message,
-                user=user,
-                username=user.username if user else "",
-                ip_address=ip_address,
-                user_agent=user_agent,
-                content_type=content_type,
-                object_id=object_id,
-                additional_data=additional_data,
-            )
+            if buffering_enabled():
+                log_entry = AuditLog(timestamp=timezone.now(), **fields)
+                audit_buffer.add(log_entry)
+            else:
+                log_entry = AuditLog.objects.create(**fields)
 
             # Also log to the security logger
             logger.info(
@@ -0,0 +1,110 @@
+"""
+Tests for the conditional-request and response caching layer.
+
+This module tests pyerp/core/api_cache.py using the product category API.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from pyerp.business_modules.products.models import ProductCategory
+from pyerp.core.api_cache import bump_model_version, get_cache_stats, get_model_versions
+
+User = get_user_model()
+
+CATEGORIES_URL = "/api/v1/products/categories/"
+
+
+@pytest.mark.unit
+@override_settings(
+    ROOT_URLCONF="pyerp.urls",
+    API_CACHE={"ENABLED": True, "ALLOW_LOCAL_CACHE": True, "TIMEOUTS": {}},
+)
+class ApiCacheTests(TestCase):
+    """Test ETag handling, response storage and invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cache_user", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        ProductCategory.objects.create(code="C1", name="Category 1")
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(CATEGORIES_URL)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(
+            [q for q in queries.captured_queries if "products_productcategory" in q["sql"]]
+        )
+
+    def test_response_served_from_cache(self):
+        first = self.client.get(CATEGORIES_URL)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(CATEGORIES_URL)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertFalse(
+            [q for q in queries.captured_queries if "products_productcategory" in q["sql"]]
+        )
+
+    def test_save_invalidates(self):
+        etag = self.client.get(CATEGORIES_URL)["ETag"]
+        ProductCategory.objects.create(code="C2", name="Category 2")
+
+        response = self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_bump_model_version(self):
+        (before,) = get_model_versions([ProductCategory])
+        bump_model_version(ProductCategory)
+        (after,) = get_model_versions([ProductCategory])
+        self.assertEqual(after, before + 1)
+
+    def test_stats(self):
+        etag = self.client.get(CATEGORIES_URL)["ETag"]
+        self.client.get(CATEGORIES_URL)
+        self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        stats = get_cache_stats()["products.categories"]
+        self.assertEqual(stats["miss"], 1)
+        self.assertEqual(stats["hit"], 1)
+        self.assertEqual(stats["not_modified"], 1)
+
+    @override_settings(API_CACHE={"ENABLED": False})
+    def test_disabled(self):
+        response = self.client.get(CATEGORIES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    )
+    def test_disabled_with_dummy_cache(self):
+        response = self.client.get(CATEGORIES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+        ProductCategory.objects.create(code="C2", name="Category 2")
+        response = self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    @override_settings(API_CACHE={"ENABLED": True, "TIMEOUTS": {}})
+    def test_disabled_with_local_cache(self):
+        response = self.client.get(CATEGORIES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
@@ -0,0 +1,136 @@
+"""
+Tests for buffered audit logging and audit log archival.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from pyerp.core.audit_buffer import AuditBuffer
+from pyerp.core.models import AuditLog
+from pyerp.core.services import AuditService
+
+User = get_user_model()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(AUDIT_LOG_BUFFERED=True)
+class AuditBufferTests(TransactionTestCase):
+    """Tests for the in-process audit log buffer."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="auditor", password="pw")
+        # A long interval keeps the timer thread from flushing during tests
+        self.buffer = AuditBuffer(max_size=3, flush_interval=3600)
+        patcher = patch("pyerp.core.services.audit_buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.buffer.flush)
+
+    def test_entries_are_written_in_one_batch(self):
+        """Test that entries are queued until the size threshold is reached."""
+        with self.assertNumQueries(0):
+            first = AuditService.log_event(
+                AuditLog.EventType.LOGIN, "Login", user=self.user
+            )
+            AuditService.log_event(AuditLog.EventType.LOGOUT, "Logout", user=self.user)
+        self.assertEqual(first.username, "auditor")
+        self.assertIsNotNone(first.timestamp)
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+        # Savepoint around the bulk insert
+        with self.assertNumQueries(3):
+            AuditService.log_event(AuditLog.EventType.OTHER, "Other")
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(AuditLog.objects.count(), 3)
+        saved = AuditLog.objects.get(message="Login")
+        self.assertEqual(saved.timestamp, first.timestamp)
+
+    def test_flush_if_due_respects_interval(self):
+        """Test that a request end only flushes entries older than the interval."""
+        AuditService.log_event(AuditLog.EventType.LOGIN, "Login", user=self.user)
+        self.buffer.flush_if_due()
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+        self.buffer._flush_interval = 0
+        self.buffer.flush_if_due()
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_bulk_failure_falls_back_to_single_inserts(self):
+        """Test that a failing bulk insert still writes every entry."""
+        AuditService.log_event(AuditLog.EventType.LOGIN, "Login", user=self.user)
+        AuditService.log_event(AuditLog.EventType.LOGOUT, "Logout", user=self.user)
+        with patch.object(
+            AuditLog.objects, "bulk_create", side_effect=RuntimeError("boom")
+        ):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+    def test_no_flush_inside_a_transaction(self):
+        """Test that a rolled back transaction keeps the buffered entries."""
+        AuditService.log_event(AuditLog.EventType.LOGIN, "Login", user=self.user)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                AuditService.log_event(AuditLog.EventType.LOGOUT, "Logout")
+                # Reaches the size threshold
+                AuditService.log_event(AuditLog.EventType.OTHER, "Other")
+                self.assertEqual(self.buffer.flush(), 0)
+                raise RuntimeError("rollback")
+
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(len(self.buffer), 3)
+        self.assertIsNotNone(self.buffer._timer)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class ArchiveAuditLogsCommandTests(TestCase):
+    """Tests for the archive_audit_logs management command."""
+
+    def setUp(self):
+        now = timezone.now()
+        AuditLog.objects.bulk_create(
+            [
+                AuditLog(
+                    event_type=AuditLog.EventType.LOGIN,
+                    message=f"Old {i}",
+                    timestamp=now - timedelta(days=400),
+                )
+                for i in range(3)
+            ]
+            + [AuditLog(event_type=AuditLog.EventType.LOGIN, message="Recent")]
+        )
+
+    def test_archives_and_deletes_expired_entries(self):
+        """Test that expired entries end up in the archive and not in the table."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.jsonl.gz")
+            call_command(
+                "archive_audit_logs", days=365, batch_size=2, archive=path, stdout=None
+            )
+            with gzip.open(path, "rt") as archive:
+                records = [json.loads(line) for line in archive]
+
+        self.assertEqual(sorted(r["message"] for r in records), ["Old 0", "Old 1", "Old 2"])
+        self.assertTrue(all(r["timestamp"] for r in records))
+        self.assertEqual(
+            list(AuditLog.objects.values_list("message", flat=True)), ["Recent"]
+        )
+
+    def test_dry_run_keeps_entries(self):
+        """Test that a dry run does not delete anything."""
+        call_command("archive_audit_logs", dry_run=True, stdout=None)
+        self.assertEqual(AuditLog.objects.count(), 4)
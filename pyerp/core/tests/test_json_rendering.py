@@ -0,0 +1,73 @@
+"""
+Tests for the fast JSON renderer and parser.
+"""
+
+import io
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from pyerp.core.parsers import FastJSONParser
+from pyerp.core.renderers import FastJSONRenderer
+
+DATA = {
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "modified": datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc),
+    "total": Decimal("10.50"),
+    "tags": {"a"},
+    "names": ["Grüße", "line\u2028break"],
+    "count": 3,
+    "empty": None,
+}
+
+
+@pytest.mark.unit
+class TestFastJSONRenderer:
+    """Tests for FastJSONRenderer."""
+
+    def test_matches_json_renderer(self):
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+    def test_none(self):
+        assert FastJSONRenderer().render(None) == b""
+
+    def test_indent_uses_json_renderer(self):
+        context = {"indent": 2}
+        assert FastJSONRenderer().render(
+            DATA, renderer_context=context
+        ) == JSONRenderer().render(DATA, renderer_context=context)
+
+    def test_falls_back_for_unsupported_values(self):
+        data = {"big": 2**70}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.unit
+class TestFastJSONParser:
+    """Tests for FastJSONParser."""
+
+    def _parse(self, body, parser_class=FastJSONParser, encoding="utf-8"):
+        return parser_class().parse(
+            io.BytesIO(body), parser_context={"encoding": encoding}
+        )
+
+    def test_matches_json_parser(self):
+        body = '{"a": [1, 2.5, "Grüße"], "b": null}'.encode()
+        assert self._parse(body) == self._parse(body, JSONParser)
+
+    def test_other_encoding(self):
+        body = '{"a": "Grüße"}'.encode("latin-1")
+        assert self._parse(body, encoding="latin-1") == {"a": "Grüße"}
+
+    def test_invalid(self):
+        with pytest.raises(ParseError):
+            self._parse(b'{"a": ')
+
+    def test_rejects_nan(self):
+        with pytest.raises(ParseError):
+            self._parse(b'{"a": NaN}')
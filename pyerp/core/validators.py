@@ -566,13 +566,82 @@ class ImportValidator:
         Returns:
             Tuple of (is_valid, validated_data, result)
         """
+        return self._validate_row(
+            row_data,
+            row_index,
+            lambda field_name: getattr(self, f"validate_{field_name}", None),
+        )
+
+    def validate_batch(self, rows, start_index=0):
+        """
+        Validate a batch of rows.
+
+        Returns the same per-row results as calling ``validate_row`` for each
+        row, but looks up the field validators once per batch and lets
+        subclasses replace per-row database lookups with set-based queries
+        in ``_prepare_batch``.
+
+        Args:
+            rows: List of row data dictionaries
+            start_index: Row index of the first row, for context
+
+        Returns:
+            List of (is_valid, validated_data, result) tuples, one per row
+        """
+        rows = list(rows)
+        field_validators = {
+            field_name: getattr(self, method_name)
+            for field_name, method_name in self._get_field_validator_names().items()
+        }
+        self._prepare_batch(rows)
+        try:
+            return [
+                self._validate_row(row_data, start_index + offset, field_validators.get)
+                for offset, row_data in enumerate(rows)
+            ]
+        finally:
+            self._finish_batch()
+
+    @classmethod
+    def _get_field_validator_names(cls):
+        """
+        Map field names to their ``validate_<field>`` method names.
+
+        The table is built once per class and cached on it.
+        """
+        table = cls.__dict__.get("_field_validator_names")
+        if table is None:
+            table = {
+                name[len("validate_"):]: name
+                for name in dir(cls)
+                if name.startswith("validate_")
+                and name not in ("validate_row", "validate_batch")
+                and callable(getattr(cls, name))
+            }
+            cls._field_validator_names = table
+        return table
+
+    def _prepare_batch(self, rows):
+        """
+        Prefetch data needed to validate a batch of rows.
+
+        Override this method to run database lookups for all rows at once.
+
+        Args:
+            rows: List of row data dictionaries about to be validated
+        """
+
+    def _finish_batch(self):
+        """Discard data prefetched by ``_prepare_batch``."""
+
+    def _validate_row(self, row_data, row_index, get_validator):
         validated_data = {}
         result = ValidationResult()
 
-        # Process each field in the row
-        for field_name, value in row_data.items():
-            validator_method_name = f"validate_{field_name}"
-            validator_method = getattr(self, validator_method_name, None)
+        # Process each field in the row; iterate over a copy because field
+        # validators may add derived fields to row_data
+        for field_name, value in list(row_data.items()):
+            validator_method = get_validator(field_name)
 
             if validator_method:
                 try:
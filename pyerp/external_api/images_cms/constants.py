@@ -15,3 +15,11 @@ MAX_RETRIES = 3
 BACKOFF_FACTOR = 0.5
 RETRY_STATUS_CODES = [500, 502, 503, 504]
 HTTP_OK = 200
+
+# Image download constants
+DEFAULT_DOWNLOAD_WORKERS = 8
+DEFAULT_THUMBNAIL_WORKERS = 2
+DEFAULT_DOWNLOAD_BATCH_SIZE = 100
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+IMAGE_STORAGE_PREFIX = "product_images"
+THUMBNAIL_STORAGE_PREFIX = "product_images/thumbnails"
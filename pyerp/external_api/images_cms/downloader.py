@@ -0,0 +1,344 @@
+"""
+Download product images from the external CMS into local storage.
+
+Images are fetched with a bounded thread pool sharing one pooled HTTP
+session, stored content-addressed by their SHA-256 hash so that the same file
+linked to several variants is only stored once, and revalidated with
+``If-None-Match``/``If-Modified-Since`` on later runs. Thumbnails are
+generated locally in a process pool so that list and search views can serve
+small images without hitting the CMS.
+"""
+
+import hashlib
+import io
+import mimetypes
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from pyerp.business_modules.products.models import ProductImage
+from pyerp.core.api_cache import bump_model_version
+from pyerp.utils.logging import get_logger
+
+from .constants import (
+    BACKOFF_FACTOR,
+    DEFAULT_DOWNLOAD_BATCH_SIZE,
+    DEFAULT_DOWNLOAD_WORKERS,
+    DEFAULT_THUMBNAIL_WORKERS,
+    DOWNLOAD_CHUNK_SIZE,
+    HTTP_OK,
+    IMAGE_STORAGE_PREFIX,
+    MAX_RETRIES,
+    MAX_THUMBNAIL_RESOLUTION,
+    RETRY_STATUS_CODES,
+    THUMBNAIL_STORAGE_PREFIX,
+)
+
+logger = get_logger(__name__)
+
+HTTP_NOT_MODIFIED = 304
+KNOWN_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".psd", ".gif", ".webp"}
+UPDATE_FIELDS = [
+    "local_image",
+    "local_thumbnail",
+    "content_hash",
+    "source_etag",
+    "source_last_modified",
+    "downloaded_at",
+]
+
+
+def generate_thumbnail(content: bytes, size: int) -> Optional[bytes]:
+    """
+    Render a JPEG thumbnail that fits into a ``size`` x ``size`` box.
+
+    Runs in a worker process, so it only takes and returns plain bytes.
+
+    Args:
+        content: Raw image file content
+        size: Maximum width and height in pixels
+
+    Returns:
+        JPEG bytes, or None if the image could not be decoded
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image.thumbnail((size, size))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=85, optimize=True)
+            return output.getvalue()
+    except Exception:
+        return None
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching a single image URL."""
+
+    image_id: int
+    status_code: Optional[int] = None
+    content: Optional[bytes] = None
+    content_hash: str = ""
+    content_type: str = ""
+    etag: str = ""
+    last_modified: str = ""
+    error: Optional[str] = None
+
+
+class ImageDownloader:
+    """
+    Concurrent, content-addressed downloader for ``ProductImage`` records.
+
+    Args:
+        max_workers: Number of concurrent downloads
+        thumbnail_workers: Number of thumbnail processes; 0 renders inline
+        thumbnail_size: Maximum thumbnail width and height in pixels
+        batch_size: Number of images fetched and saved per batch
+        timeout: HTTP timeout in seconds
+        default_extension: File extension used if none can be derived
+        force: Download even if the source reports no changes
+        storage: Django storage backend, defaults to ``default_storage``
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+        thumbnail_workers: int = DEFAULT_THUMBNAIL_WORKERS,
+        thumbnail_size: int = MAX_THUMBNAIL_RESOLUTION,
+        batch_size: int = DEFAULT_DOWNLOAD_BATCH_SIZE,
+        timeout: int = 30,
+        default_extension: str = ".jpg",
+        force: bool = False,
+        storage=None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.thumbnail_workers = max(0, thumbnail_workers)
+        self.thumbnail_size = thumbnail_size
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.default_extension = default_extension
+        self.force = force
+        self.storage = storage or default_storage
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_workers,
+            max_retries=Retry(
+                total=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS_CODES,
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.verify = getattr(settings, "IMAGE_API_VERIFY_SSL", True)
+        return session
+
+    def close(self) -> None:
+        """Close pooled HTTP connections."""
+        self.session.close()
+
+    def download(self, images: Iterable[ProductImage]) -> Dict[str, int]:
+        """
+        Download, deduplicate and thumbnail the given images.
+
+        Args:
+            images: ProductImage instances or a queryset
+
+        Returns:
+            Dictionary of counters
+        """
+        stats = {
+            "downloaded": 0,
+            "not_modified": 0,
+            "skipped": 0,
+            "deduplicated": 0,
+            "thumbnails": 0,
+            "errors": 0,
+        }
+        images = list(images)
+        executor = (
+            ProcessPoolExecutor(max_workers=self.thumbnail_workers)
+            if self.thumbnail_workers
+            else None
+        )
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for start in range(0, len(images), self.batch_size):
+                    batch = images[start:start + self.batch_size]
+                    self._process_batch(batch, pool, executor, stats)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        logger.info(
+            "Image download completed: %(downloaded)s downloaded, "
+            "%(not_modified)s not modified, %(skipped)s skipped, "
+            "%(deduplicated)s deduplicated, %(thumbnails)s thumbnails, "
+            "%(errors)s errors",
+            stats,
+        )
+        return stats
+
+    def needs_request(self, image: ProductImage) -> bool:
+        """Return whether the image has to be fetched or revalidated."""
+        if self.force or not image.local_image or not image.content_hash:
+            return True
+        if image.source_modified_at and image.downloaded_at:
+            return image.source_modified_at > image.downloaded_at
+        return True
+
+    def _process_batch(self, batch, pool, executor, stats) -> None:
+        now = timezone.now()
+        to_fetch = [image for image in batch if self.needs_request(image)]
+        stats["skipped"] += len(batch) - len(to_fetch)
+
+        results = pool.map(self._fetch, to_fetch)
+        by_id = {image.pk: image for image in batch}
+        contents = {}
+        changed = {}
+        for result in results:
+            image = by_id[result.image_id]
+            if result.error:
+                logger.warning("Failed to download image %s: %s", image.external_id, result.error)
+                stats["errors"] += 1
+                continue
+            if result.status_code == HTTP_NOT_MODIFIED:
+                stats["not_modified"] += 1
+            else:
+                path = self._store(image, result, stats)
+                if path != image.local_image.name:
+                    image.local_thumbnail = ""
+                image.local_image = path
+                image.content_hash = result.content_hash
+                image.source_etag = result.etag
+                image.source_last_modified = result.last_modified
+                contents[result.content_hash] = result.content
+                stats["downloaded"] += 1
+            image.downloaded_at = now
+            changed[image.pk] = image
+
+        for image in self._attach_thumbnails(batch, contents, executor, stats):
+            changed[image.pk] = image
+
+        if changed:
+            ProductImage.objects.bulk_update(changed.values(), UPDATE_FIELDS)
+            bump_model_version(ProductImage)
+
+    def _fetch(self, image: ProductImage) -> FetchResult:
+        """Fetch one image; runs in a worker thread."""
+        headers = {}
+        if image.local_image and not self.force:
+            if image.source_etag:
+                headers["If-None-Match"] = image.source_etag
+            if image.source_last_modified:
+                headers["If-Modified-Since"] = image.source_last_modified
+
+        result = FetchResult(image_id=image.pk)
+        try:
+            with self.session.get(
+                image.image_url, headers=headers, stream=True, timeout=self.timeout
+            ) as response:
+                result.status_code = response.status_code
+                if response.status_code == HTTP_NOT_MODIFIED:
+                    return result
+                if response.status_code != HTTP_OK:
+                    result.error = f"HTTP {response.status_code}"
+                    return result
+
+                digest = hashlib.sha256()
+                buffer = io.BytesIO()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    buffer.write(chunk)
+                result.content = buffer.getvalue()
+                result.content_hash = digest.hexdigest()
+                result.content_type = response.headers.get("Content-Type", "")
+                result.etag = response.headers.get("ETag", "")
+                result.last_modified = response.headers.get("Last-Modified", "")
+        except requests.RequestException as e:
+            result.error = str(e)
+        return result
+
+    def _extension(self, url: str, content_type: str) -> str:
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        if extension in KNOWN_EXTENSIONS:
+            return extension
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        return guessed or self.default_extension
+
+    def _store(self, image: ProductImage, result: FetchResult, stats) -> str:
+        """Save the content under its hash unless an identical file exists."""
+        digest = result.content_hash
+        extension = self._extension(image.image_url, result.content_type)
+        path = f"{IMAGE_STORAGE_PREFIX}/{digest[:2]}/{digest}{extension}"
+        if self.storage.exists(path):
+            stats["deduplicated"] += 1
+            return path
+        return self.storage.save(path, ContentFile(result.content))
+
+    def _thumbnail_path(self, digest: str) -> str:
+        return f"{THUMBNAIL_STORAGE_PREFIX}/{digest[:2]}/{digest}_{self.thumbnail_size}.jpg"
+
+    def _attach_thumbnails(self, batch, contents, executor, stats) -> List[ProductImage]:
+        """Generate missing thumbnails, once per distinct image content."""
+        pending = {}
+        updated = []
+        for image in batch:
+            if not image.content_hash or image.local_thumbnail:
+                continue
+            path = self._thumbnail_path(image.content_hash)
+            if self.storage.exists(path):
+                image.local_thumbnail = path
+                updated.append(image)
+            else:
+                pending.setdefault(path, []).append(image)
+
+        if not pending:
+            return updated
+
+        sources = []
+        for images in pending.values():
+            content = contents.get(images[0].content_hash)
+            if content is not None:
+                sources.append(content)
+                continue
+            try:
+                with self.storage.open(images[0].local_image.name, "rb") as f:
+                    sources.append(f.read())
+            except OSError as e:
+                logger.warning("Cannot read %s: %s", images[0].local_image.name, e)
+                sources.append(b"")
+
+        sizes = [self.thumbnail_size] * len(sources)
+        if executor is not None:
+            thumbnails = executor.map(generate_thumbnail, sources, sizes)
+        else:
+            thumbnails = map(generate_thumbnail, sources, sizes)
+
+        for (path, images), thumbnail in zip(pending.items(), thumbnails):
+            if thumbnail is None:
+                stats["errors"] += 1
+                continue
+            saved_path = self.storage.save(path, ContentFile(thumbnail))
+            stats["thumbnails"] += 1
+            for image in images:
+                image.local_thumbnail = saved_path
+                updated.append(image)
+        return updated
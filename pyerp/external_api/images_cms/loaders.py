@@ -2,20 +2,33 @@
 Loaders for image data from the external CMS.
 """
 
+from collections import defaultdict
 from typing import Any, Dict, List, Optional, Tuple, Set
-from django.db import transaction
+from django.db import DatabaseError, transaction
 from django.utils import timezone
 
 from pyerp.sync.loaders.base import BaseLoader
 from pyerp.utils.logging import get_logger
 from pyerp.business_modules.products.models import ProductImage, VariantProduct, ImageSyncLog
+from pyerp.business_modules.products.services import PrimaryImageService
+from pyerp.core.api_cache import bump_model_version
 
 
 logger = get_logger(__name__)
 
 
 class ProductImageLoader(BaseLoader):
-    """Loader for product image data into ProductImage model."""
+    """Loader for product image data into ProductImage model.
+
+    ``load`` processes a whole page at once: SKUs and existing images are
+    resolved with one query each, only new or changed rows are written with
+    bulk operations, and the precomputed primary image of the affected
+    variants and parents is refreshed afterwards.
+    """
+
+    # Fields set by bulk loads; last_synced is maintained separately
+    IGNORED_FIELDS = {"id", "pk", "last_synced"}
+    BULK_BATCH_SIZE = 500
 
     def get_required_config_fields(self) -> List[str]:
         """Get required configuration fields.
@@ -25,13 +38,39 @@ class ProductImageLoader(BaseLoader):
         """
         return []  # No required fields, using Django models directly
 
+    @staticmethod
+    def _record_skus(record: Dict[str, Any]) -> List[str]:
+        articles = record.get('metadata', {}).get('articles', [])
+        return [article.get('sku') for article in articles if article.get('sku')]
+
+    def resolve_products(self, records: List[Dict[str, Any]]) -> Dict[str, Tuple[int, int]]:
+        """Resolve the article SKUs of all records with a single query.
+
+        Args:
+            records: Transformed image records
+
+        Returns:
+            Dictionary mapping SKU to (position in default ordering, variant id)
+        """
+        skus = {sku for record in records for sku in self._record_skus(record)}
+        if not skus:
+            return {}
+        products = {}
+        rows = VariantProduct.objects.filter(sku__in=skus).values_list('sku', 'id')
+        for position, (sku, product_id) in enumerate(rows):
+            products.setdefault(sku, (position, product_id))
+        return products
+
     def prepare_record(
-        self, record: Dict[str, Any]
+        self,
+        record: Dict[str, Any],
+        products: Optional[Dict[str, Tuple[int, int]]] = None,
     ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """Prepare a record for loading.
 
         Args:
             record: Transformed image record to prepare
+            products: Optional SKU lookup from ``resolve_products``
 
         Returns:
             Tuple of (lookup criteria, prepared record)
@@ -40,27 +79,32 @@ class ProductImageLoader(BaseLoader):
         lookup_criteria = {
             'external_id': record.get('external_id')
         }
-        
+
         # Return a copy of the record to avoid modifying the original
-        prepared_record = record.copy()
-        
-        # Extract article information from metadata to find product
-        articles = prepared_record.get('metadata', {}).get('articles', [])
-        
-        # Try to find a matching product
-        product = None
-        if articles:
-            # First try: Direct SKU match with any article
-            skus = [article.get('sku') for article in articles if article.get('sku')]
-            if skus:
-                product = VariantProduct.objects.filter(sku__in=skus).first()
-                
-                if product:
-                    logger.info(f"Found product match by direct SKU: {product.sku}")
-                    prepared_record['product'] = product
-        
+        prepared_record = {
+            key: value for key, value in record.items()
+            if key not in self.IGNORED_FIELDS
+        }
+
+        # Match the first variant (in default ordering) with any article SKU
+        if products is None:
+            products = self.resolve_products([record])
+        matches = [products[sku] for sku in self._record_skus(record) if sku in products]
+        if matches:
+            prepared_record['product_id'] = min(matches)[1]
+
         return lookup_criteria, prepared_record
 
+    @staticmethod
+    def apply_changes(image: ProductImage, record: Dict[str, Any]) -> Set[str]:
+        """Copy record values onto an image and return the changed field names."""
+        changed = set()
+        for key, value in record.items():
+            if getattr(image, key) != value:
+                setattr(image, key, value)
+                changed.add(key)
+        return changed
+
     def load_record(
         self,
         lookup_criteria: Dict[str, Any],
@@ -81,39 +125,103 @@ class ProductImageLoader(BaseLoader):
             ValueError: If record is invalid
         """
         try:
-            # Remove non-model fields before creating or updating
-            record_copy = record.copy()
-            
-            # Try to find existing record
             try:
                 existing_record = ProductImage.objects.get(**lookup_criteria)
-                
-                # If we're not updating existing records, skip
-                if not update_existing:
-                    logger.info(f"Skipping existing image with ID {existing_record.id}")
-                    return None
-                
-                # Update existing record
-                for key, value in record_copy.items():
-                    if key not in ['id', 'pk']:
-                        setattr(existing_record, key, value)
-                
-                existing_record.save()
-                logger.info(f"Updated ProductImage record with ID {existing_record.id}")
-                return existing_record
-                
             except ProductImage.DoesNotExist:
-                # Create new record
-                new_record = ProductImage(**record_copy)
+                new_record = ProductImage(**record)
                 new_record.save()
                 logger.info(f"Created new ProductImage record with ID {new_record.id}")
                 return new_record
-                
+
+            if not update_existing or not self.apply_changes(existing_record, record):
+                return None
+            existing_record.save()
+            logger.info(f"Updated ProductImage record with ID {existing_record.id}")
+            return existing_record
+
         except Exception as e:
             error_msg = f"Error loading image record: {e}"
             logger.error(error_msg)
             raise ValueError(error_msg)
 
+    def _plan(
+        self, records: List[Dict[str, Any]], update_existing: bool, stats: Dict[str, int]
+    ) -> Tuple[List[ProductImage], List[ProductImage], Set[str], Set[int]]:
+        """Split a page into new and changed images without writing anything."""
+        products = self.resolve_products(records)
+        prepared = [self.prepare_record(record, products) for record in records]
+
+        existing = defaultdict(list)
+        external_ids = {lookup['external_id'] for lookup, _ in prepared}
+        for image in ProductImage.objects.filter(external_id__in=external_ids):
+            existing[image.external_id].append(image)
+
+        to_create = []
+        to_update = {}
+        update_fields = set()
+        affected_products = set()
+        for lookup, data in prepared:
+            external_id = lookup['external_id']
+            matches = existing.get(external_id, [])
+            if len(matches) > 1:
+                logger.error(f"Multiple ProductImage records with external ID {external_id}")
+                stats['errors'] += 1
+                continue
+
+            if not matches:
+                image = ProductImage(**data)
+                existing[external_id] = [image]
+                to_create.append(image)
+                stats['created'] += 1
+                affected_products.add(image.product_id)
+                continue
+
+            image = matches[0]
+            if image.pk is None:
+                # Repeated within the page: merge into the pending insert
+                self.apply_changes(image, data)
+                affected_products.add(image.product_id)
+                stats['skipped'] += 1
+                continue
+            if not update_existing:
+                stats['skipped'] += 1
+                continue
+            old_product_id = image.product_id
+            changed = self.apply_changes(image, data)
+            if not changed:
+                stats['skipped'] += 1
+                continue
+            affected_products.update((old_product_id, image.product_id))
+            if image.pk not in to_update:
+                stats['updated'] += 1
+            to_update[image.pk] = image
+            update_fields |= changed
+
+        affected_products.discard(None)
+        return to_create, list(to_update.values()), update_fields, affected_products
+
+    def _load_individually(
+        self, records: List[Dict[str, Any]], update_existing: bool, stats: Dict[str, int]
+    ) -> Set[int]:
+        """Fallback that loads records one by one so a bad row does not fail the page."""
+        affected_products = set()
+        for record in records:
+            try:
+                with transaction.atomic():
+                    lookup_criteria, prepared_record = self.prepare_record(record)
+                    existed = ProductImage.objects.filter(**lookup_criteria).exists()
+                    result = self.load_record(lookup_criteria, prepared_record, update_existing)
+                if result is None:
+                    stats['skipped'] += 1
+                    continue
+                stats['updated' if existed else 'created'] += 1
+                if result.product_id:
+                    affected_products.add(result.product_id)
+            except Exception as e:
+                logger.error(f"Error loading record: {e}", exc_info=True)
+                stats['errors'] += 1
+        return affected_products
+
     def load(
         self, records: List[Dict[str, Any]], update_existing: bool = True
     ) -> Dict[str, Any]:
@@ -131,40 +239,39 @@ class ProductImageLoader(BaseLoader):
             status="in_progress",
             started_at=timezone.now()
         )
-        
-        created_count = 0
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-        affected_products = set()
-        
+
+        stats = {"created": 0, "updated": 0, "skipped": 0, "errors": 0}
+
         try:
-            # Process each record in a separate transaction
-            for record in records:
-                try:
-                    with transaction.atomic():
-                        # Prepare record
-                        lookup_criteria, prepared_record = self.prepare_record(record)
-                        
-                        # Load record
-                        result = self.load_record(lookup_criteria, prepared_record, update_existing)
-                        
-                        # Update counters
-                        if result is None:
-                            skipped_count += 1
-                        elif getattr(result, '_state', None).adding:
-                            created_count += 1
-                        else:
-                            updated_count += 1
-                            
-                        # Track affected products
-                        if result and result.product:
-                            affected_products.add(result.product.id)
-                            
-                except Exception as e:
-                    logger.error(f"Error loading record: {e}", exc_info=True)
-                    error_count += 1
-            
+            to_create, to_update, update_fields, affected_products = self._plan(
+                records, update_existing, stats
+            )
+            try:
+                with transaction.atomic():
+                    ProductImage.objects.bulk_create(to_create, batch_size=self.BULK_BATCH_SIZE)
+                    if to_update:
+                        now = timezone.now()
+                        for image in to_update:
+                            image.last_synced = now
+                        ProductImage.objects.bulk_update(
+                            to_update,
+                            sorted(update_fields | {"last_synced"}),
+                            batch_size=self.BULK_BATCH_SIZE,
+                        )
+            except DatabaseError as e:
+                logger.warning(f"Bulk image load failed, loading records individually: {e}")
+                stats = {"created": 0, "updated": 0, "skipped": 0, "errors": 0}
+                affected_products = self._load_individually(records, update_existing, stats)
+
+            if affected_products:
+                PrimaryImageService.refresh_for_variants(affected_products)
+            bump_model_version(ProductImage)
+
+            created_count = stats["created"]
+            updated_count = stats["updated"]
+            skipped_count = stats["skipped"]
+            error_count = stats["errors"]
+
             # Update sync log with results
             sync_log.status = "completed"
             sync_log.completed_at = timezone.now()
@@ -173,13 +280,13 @@ class ProductImageLoader(BaseLoader):
             sync_log.images_deleted = 0  # No deletion in this implementation
             sync_log.products_affected = len(affected_products)
             sync_log.save()
-            
+
             logger.info(
                 f"Image sync completed: {created_count} created, "
                 f"{updated_count} updated, {skipped_count} skipped, "
                 f"{error_count} errors, {len(affected_products)} products affected"
             )
-            
+
             return {
                 "created": created_count,
                 "updated": updated_count,
@@ -188,14 +295,14 @@ class ProductImageLoader(BaseLoader):
                 "products_affected": len(affected_products),
                 "sync_log_id": sync_log.id
             }
-            
+
         except Exception as e:
             # Update sync log with error
             sync_log.status = "failed"
             sync_log.completed_at = timezone.now()
             sync_log.error_message = str(e)
             sync_log.save()
-            
+
             logger.error(f"Error during image sync: {e}", exc_info=True)
-            
-            raise 
\ No newline at end of file
+
+            raise
@@ -2,8 +2,10 @@
 Transformers for image data from the external CMS.
 """
 
+from datetime import datetime
 from typing import Any, Dict, List, Optional
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from pyerp.sync.transformers.base import BaseTransformer
 from pyerp.utils.logging import get_logger
@@ -13,6 +15,7 @@ logger = get_logger(__name__)
 
 OLD_IMAGE_BASE_URL = "https://webapp.zinnfiguren.de/"
 NEW_IMAGE_BASE_URL = "https://db07.wsz.local/"
+MODIFIED_FIELDS = ("modified", "modified_at", "last_modified", "changed")
 
 
 class ImageTransformer(BaseTransformer):
@@ -24,6 +27,19 @@ class ImageTransformer(BaseTransformer):
             return url.replace(OLD_IMAGE_BASE_URL, NEW_IMAGE_BASE_URL, 1)
         return url
 
+    def _parse_modified(self, file_data: Dict[str, Any]) -> Optional[datetime]:
+        """Return the file modification timestamp if the CMS provides one."""
+        for key in MODIFIED_FIELDS:
+            value = file_data.get(key)
+            if not value:
+                continue
+            parsed = parse_datetime(str(value))
+            if parsed:
+                if timezone.is_naive(parsed):
+                    parsed = timezone.make_aware(parsed)
+                return parsed
+        return None
+
     def transform(self, source_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform image data to format expected by Django models.
 
@@ -55,6 +71,12 @@ class ImageTransformer(BaseTransformer):
                     if image_type:
                         transformed['image_type'] = image_type
                     
+                    # Record the source modification time so unchanged
+                    # files are not downloaded again
+                    modified = self._parse_modified(original_file)
+                    if modified:
+                        transformed['source_modified_at'] = modified
+
                     # Extract image URL
                     file_url = original_file.get('file_url')
                     if file_url:
@@ -8,21 +8,33 @@ with the legacy ERP system.
 import os
 import json
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
 import time
 import urllib.parse
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from pyerp.external_api.legacy_erp.paging import (
+    AdaptivePager,
+    new_fetch_stats,
+)
 from pyerp.external_api.legacy_erp.settings import (
     API_ENVIRONMENTS,
+    API_MAX_RETRIES,
+    API_POOL_MAXSIZE,
     API_REQUEST_TIMEOUT,
     API_REST_ENDPOINT,
+    API_RETRY_BACKOFF_FACTOR,
+    API_RETRY_STATUS_CODES,
 )
 from pyerp.external_api.legacy_erp.auth import (
     read_cookie_file_safe,
     write_cookie_file_safe,
 )
+from pyerp.utils import json_utils
 from pyerp.utils.logging import (
     get_logger,
     log_api_request,
@@ -42,6 +54,9 @@ COOKIE_FILE_PATH = os.path.join(
 class BaseAPIClient:
     """Base class for legacy ERP API clients."""
 
+    # Page size tuning per (environment, table), shared by all clients
+    _pagers: Dict[tuple, AdaptivePager] = {}
+
     def __init__(self, environment: str = "live", timeout: int = None):
         """
         Initialize a new client instance.
@@ -52,8 +67,12 @@ class BaseAPIClient:
         """
         self.environment = environment
         self.timeout = timeout or API_REQUEST_TIMEOUT
-        self.session = requests.Session()
+        self.session = self._build_session()
         self.session_id = None
+        # Columns of the tables seen so far, see get_table_columns
+        self._table_columns = {}
+        # Fetch statistics per table, see get_fetch_stats
+        self.fetch_stats = {}
 
         # Validate environment configuration
         if environment not in API_ENVIRONMENTS:
@@ -83,6 +102,77 @@ class BaseAPIClient:
             environment,
         )
 
+    def _build_session(self) -> requests.Session:
+        """Create the HTTP session with pooled keep-alive connections.
+
+        Idempotent requests are retried with backoff on connection errors
+        and on the statuses in ``API_RETRY_STATUS_CODES``. Read timeouts are
+        not retried, as a page that timed out is fetched again with a
+        smaller page size instead.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=API_POOL_MAXSIZE,
+            pool_maxsize=API_POOL_MAXSIZE,
+            max_retries=Retry(
+                total=API_MAX_RETRIES,
+                read=0,
+                backoff_factor=API_RETRY_BACKOFF_FACTOR,
+                status_forcelist=API_RETRY_STATUS_CODES,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                raise_on_status=False,
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        return session
+
+    def get_pager(
+        self, table_name: str, page_size: Optional[int] = None
+    ) -> AdaptivePager:
+        """
+        Return the page size tuning of a table.
+
+        Args:
+            table_name: Name of the table
+            page_size: Page size to start with if the table has no pager yet
+        """
+        key = (self.environment, table_name)
+        if key not in self._pagers:
+            self._pagers[key] = (
+                AdaptivePager(page_size=page_size) if page_size else AdaptivePager()
+            )
+        return self._pagers[key]
+
+    def _record_page(
+        self, table_name: str, rows: int, nbytes: int, seconds: float
+    ) -> None:
+        """Add a fetched page to the statistics and page size tuning."""
+        stats = self.fetch_stats.setdefault(table_name, new_fetch_stats())
+        stats["requests"] += 1
+        stats["rows"] += rows
+        stats["bytes"] += nbytes
+        stats["seconds"] += seconds
+        stats["page_size"] = self.get_pager(table_name).observe(rows, nbytes, seconds)
+
+    def get_fetch_stats(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the fetch statistics of a table for this client.
+
+        Returns:
+            Dict with the number of requests, rows, bytes, seconds and
+            timeouts and the current page size, or None if nothing was
+            fetched
+        """
+        stats = self.fetch_stats.get(table_name)
+        if stats is None:
+            return None
+        stats = dict(stats, seconds=round(stats["seconds"], 3))
+        if stats["seconds"]:
+            stats["rows_per_second"] = int(stats["rows"] / stats["seconds"])
+        return stats
+
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Make an HTTP request to the API with logging and timing."""
         # Always prefix with REST endpoint
@@ -596,6 +686,99 @@ class BaseAPIClient:
 
         return transformed
 
+    def _build_filter_param(
+        self, filter_query, fail_on_filter_error: bool = False
+    ) -> Optional[str]:
+        """Build the ``$filter`` parameter from a filter query.
+
+        Args:
+            filter_query: [['field', 'operator', 'value']], conditions on the
+                same field are combined with OR, different fields with AND;
+                a string is used as is
+            fail_on_filter_error: Whether to raise an error on filter issues
+
+        Returns:
+            The filter string, or None if there is no valid condition
+        """
+        filter_param = None
+        if filter_query:
+            if isinstance(filter_query, list):
+                
+                # Group filters by field name
+                grouped_filters = {}
+                for filter_item in filter_query:
+                    try:
+                        if len(filter_item) != 3:
+                            logger.warning(
+                                f"Invalid filter item format: {filter_item}. "
+                                "Expected [field, operator, value]."
+                            )
+                            continue
+                        field, operator, value = filter_item
+                        
+                        # Format value appropriately
+                        if isinstance(value, str):
+                            formatted_value = f'\"{value}\"' # Wrap strings in escaped quotes
+                        elif hasattr(value, "strftime"):
+                            # Ensure datetime is formatted as YYYY-MM-DD
+                            formatted_value = f'\"{value.strftime("%Y-%m-%d")}\"' 
+                        else:
+                            formatted_value = value # Assume numeric or other non-string
+
+                        # Construct the single condition string (without outer quotes yet)
+                        condition_str = f"{field} {operator} {formatted_value}"
+
+                        if field not in grouped_filters:
+                            grouped_filters[field] = []
+                        grouped_filters[field].append(condition_str)
+                        
+                    except Exception as e:
+                        error_msg = f"Error processing filter item {filter_item}: {str(e)}"
+                        logger.error(error_msg)
+                        if fail_on_filter_error:
+                            raise RuntimeError(error_msg) from e
+
+                # Combine grouped filters
+                final_filter_parts = []
+                is_or_group = {}
+                for field, conditions in grouped_filters.items():
+                    part_id = len(final_filter_parts) # Get index before appending
+                    if len(conditions) > 1:
+                        # Multiple conditions for the same field: join with OR
+                        or_group_content = " or ".join(f"'{c}'" for c in conditions)
+                        final_filter_parts.append(or_group_content)
+                        is_or_group[part_id] = True # Mark this part as an OR group
+                    elif conditions:
+                        # Single condition for a field
+                        final_filter_parts.append(f"'{conditions[0]}'")
+                        is_or_group[part_id] = False # Mark as not an OR group
+                
+                if final_filter_parts:
+                    if len(final_filter_parts) > 1:
+                        # Multiple parts/groups: Join with AND. Wrap OR groups in parentheses.
+                        processed_parts = []
+                        for i, part in enumerate(final_filter_parts):
+                            if is_or_group[i]:
+                                processed_parts.append(f"({part})") # Add parentheses for OR groups
+                            else:
+                                processed_parts.append(part)
+                        filter_param = " and ".join(processed_parts)
+                    else:
+                        # Single part: Use directly (parentheses already omitted)
+                        filter_param = final_filter_parts[0]
+
+                    logger.info(f"Constructed filter string: {filter_param}")
+                else:
+                    logger.warning("No valid filter parts found after grouping")
+
+            elif isinstance(filter_query, str):
+                # Assumes filter_query is already a correctly formatted string
+                filter_param = filter_query
+            else:
+                 logger.warning(f"Unsupported filter_query type: {type(filter_query)}")
+
+        return filter_param
+
     def fetch_table(
         self,
         table_name: str,
@@ -606,6 +789,7 @@ class BaseAPIClient:
         new_data_only: bool = True,
         date_created_start: Optional[str] = None,
         fail_on_filter_error: bool = False,
+        attributes: Optional[List[str]] = None,
     ) -> pd.DataFrame:
         """
         Fetch records from a table in the legacy ERP system, handling pagination
@@ -614,13 +798,17 @@ class BaseAPIClient:
         Args:
             table_name: Name of the table to fetch from
             top: Max number of records to fetch per request if not fetching all.
-                 When all_records=True, this acts as the page size (defaulting to 100).
+                 When all_records=True, this acts as the page size; without it
+                 the page size is tuned per table, see ``AdaptivePager``.
             skip: Initial number of records to skip.
             filter_query: Filter criteria (list of lists or string).
             all_records: If True, fetch all records using pagination.
             new_data_only: Currently unused in this base method.
             date_created_start: Currently unused.
             fail_on_filter_error: Whether to raise an error on filter issues.
+            attributes: Optional list of the columns to fetch. Only these are
+                requested (``$attributes``) and kept, names the table does
+                not have are dropped, see ``project_attributes``.
 
         Returns:
             DataFrame containing the fetched records.
@@ -640,102 +828,56 @@ class BaseAPIClient:
 
             all_fetched_records = []
             current_skip = skip
-            page_size = top if top is not None else 10000  # Use top as page size or default to 10000
+            # Without an explicit top, pages are sized by the table's pager
+            pager = self.get_pager(table_name) if all_records and top is None else None
+            page_size = top
+
+            attributes = self.project_attributes(table_name, attributes)
+            attributes_param = None
+            if attributes:
+                # Metadata such as __KEY and __TIMESTAMP is always returned
+                attributes_param = ",".join(
+                    name for name in attributes if not name.startswith("__")
+                )
 
             while True:
                 params = {"$skip": current_skip}
-                request_top = page_size if all_records else top
+                if pager:
+                    page_size = pager.page_size
+                request_top = page_size
                 if request_top is not None:
                     params["$top"] = request_top
 
-                # --- Filter Query Processing (REVERTED AND FIXED) ---
-                if filter_query:
-                    if isinstance(filter_query, list):
-                        
-                        # Group filters by field name
-                        grouped_filters = {}
-                        for filter_item in filter_query:
-                            try:
-                                if len(filter_item) != 3:
-                                    logger.warning(
-                                        f"Invalid filter item format: {filter_item}. "
-                                        "Expected [field, operator, value]."
-                                    )
-                                    continue
-                                field, operator, value = filter_item
-                                
-                                # Format value appropriately
-                                if isinstance(value, str):
-                                    formatted_value = f'\"{value}\"' # Wrap strings in escaped quotes
-                                elif hasattr(value, "strftime"):
-                                    # Ensure datetime is formatted as YYYY-MM-DD
-                                    formatted_value = f'\"{value.strftime("%Y-%m-%d")}\"' 
-                                else:
-                                    formatted_value = value # Assume numeric or other non-string
-
-                                # Construct the single condition string (without outer quotes yet)
-                                condition_str = f"{field} {operator} {formatted_value}"
-
-                                if field not in grouped_filters:
-                                    grouped_filters[field] = []
-                                grouped_filters[field].append(condition_str)
-                                
-                            except Exception as e:
-                                error_msg = f"Error processing filter item {filter_item}: {str(e)}"
-                                logger.error(error_msg)
-                                if fail_on_filter_error:
-                                    raise RuntimeError(error_msg) from e
-
-                        # Combine grouped filters
-                        final_filter_parts = []
-                        is_or_group = {}
-                        for field, conditions in grouped_filters.items():
-                            part_id = len(final_filter_parts) # Get index before appending
-                            if len(conditions) > 1:
-                                # Multiple conditions for the same field: join with OR
-                                or_group_content = " or ".join(f"'{c}'" for c in conditions)
-                                final_filter_parts.append(or_group_content)
-                                is_or_group[part_id] = True # Mark this part as an OR group
-                            elif conditions:
-                                # Single condition for a field
-                                final_filter_parts.append(f"'{conditions[0]}'")
-                                is_or_group[part_id] = False # Mark as not an OR group
-                        
-                        if final_filter_parts:
-                            if len(final_filter_parts) > 1:
-                                # Multiple parts/groups: Join with AND. Wrap OR groups in parentheses.
-                                processed_parts = []
-                                for i, part in enumerate(final_filter_parts):
-                                    if is_or_group[i]:
-                                        processed_parts.append(f"({part})") # Add parentheses for OR groups
-                                    else:
-                                        processed_parts.append(part)
-                                params["$filter"] = " and ".join(processed_parts)
-                            else:
-                                # Single part: Use directly (parentheses already omitted)
-                                params["$filter"] = final_filter_parts[0]
-
-                            logger.info(f"Constructed filter string: {params['$filter']}")
-                        else:
-                            logger.warning("No valid filter parts found after grouping")
-
-                    elif isinstance(filter_query, str):
-                        # Assumes filter_query is already a correctly formatted string
-                        params["$filter"] = filter_query
-                    else:
-                         logger.warning(f"Unsupported filter_query type: {type(filter_query)}")
-                # --- End Filter Query Processing ---
+                filter_param = self._build_filter_param(
+                    filter_query, fail_on_filter_error
+                )
+                if filter_param:
+                    params["$filter"] = filter_param
+                if attributes_param:
+                    params["$attributes"] = attributes_param
 
                 logger.debug(
                     f"Fetching page for {table_name}: skip={current_skip}, "
                     f"top={params.get('$top')}"
                 )
-                response = self._make_request(
-                    "GET",
-                    table_name,
-                    params=params,
-                    timeout=self.timeout,
-                )
+                page_started = time.monotonic()
+                try:
+                    response = self._make_request(
+                        "GET",
+                        table_name,
+                        params=params,
+                        timeout=self.timeout,
+                    )
+                except requests.Timeout:
+                    stats = self.fetch_stats.setdefault(table_name, new_fetch_stats())
+                    stats["timeouts"] += 1
+                    if pager and pager.shrink():
+                        logger.warning(
+                            f"Page of {table_name} timed out, retrying with "
+                            f"{pager.page_size} records"
+                        )
+                        continue
+                    raise
 
                 if response.status_code != 200:
                     error_msg = (
@@ -747,7 +889,7 @@ class BaseAPIClient:
                     raise RuntimeError(error_msg)
 
                 try:
-                    data = response.json()
+                    data = json_utils.loads(response.content)
                 except json.JSONDecodeError as e:
                     error_msg = f"Failed to parse JSON response (page starting at {current_skip}): {str(e)}"
                     logger.error(error_msg)
@@ -756,6 +898,20 @@ class BaseAPIClient:
                 records = data.get("__ENTITIES", [])
                 num_fetched = len(records)
                 logger.debug(f"Fetched {num_fetched} records for this page.")
+                self._record_page(
+                    table_name,
+                    num_fetched,
+                    len(response.content),
+                    time.monotonic() - page_started,
+                )
+
+                if num_fetched > 0 and attributes:
+                    # Drop the columns that were not asked for, in case the
+                    # server ignored the projection
+                    records = [
+                        {name: record[name] for name in attributes if name in record}
+                        for record in records
+                    ]
 
                 if num_fetched > 0:
                     # Transform dates before adding
@@ -768,7 +924,7 @@ class BaseAPIClient:
                 if not all_records:
                     break
 
-                if num_fetched < page_size:
+                if page_size is None or num_fetched < page_size:
                     logger.info(f"Last page reached for {table_name}, fetched {num_fetched} records.")
                     break
 
@@ -799,3 +955,123 @@ class BaseAPIClient:
             error_msg = f"Error fetching table {table_name}: {str(e)}"
             logger.exception(error_msg)  # Use exception to log traceback
             raise RuntimeError(error_msg) from e
+
+    def get_table_columns(self, table_name: str) -> Optional[List[str]]:
+        """
+        Return the column names of a table, from one sample record.
+
+        The result is cached per client, so each table is sampled once.
+
+        Returns:
+            The column names, or None if the table has no records
+        """
+        if table_name not in self._table_columns:
+            if not self.ensure_session():
+                raise RuntimeError("Failed to establish a valid session")
+            response = self._make_request(
+                "GET", table_name, params={"$top": 1}, timeout=self.timeout
+            )
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"Failed to sample table {table_name}: "
+                    f"Status {response.status_code}"
+                )
+            records = json_utils.loads(response.content).get("__ENTITIES", [])
+            self._table_columns[table_name] = list(records[0]) if records else None
+        return self._table_columns[table_name]
+
+    def project_attributes(
+        self, table_name: str, attributes: Optional[List[str]]
+    ) -> Optional[List[str]]:
+        """
+        Return the requested columns a table actually has.
+
+        Requesting an unknown attribute fails the whole request, so names
+        that are not columns of the table are dropped. Lists derived from
+        transformer configs rely on this, as they also contain target field
+        names.
+
+        Returns:
+            The columns to fetch, or None to fetch all columns
+        """
+        if not attributes:
+            return None
+        columns = self.get_table_columns(table_name)
+        if columns is None:
+            return None
+        known = set(columns)
+        unknown = sorted(set(attributes) - known)
+        if unknown:
+            logger.debug(
+                f"Not fetching unknown columns of {table_name}: {', '.join(unknown)}"
+            )
+        projected = list(dict.fromkeys(name for name in attributes if name in known))
+        return projected or None
+
+    def fetch_keys(
+        self,
+        table_name: str,
+        key_field: str = "__KEY",
+        page_size: int = 50000,
+        filter_query=None,
+    ) -> Iterator[List[Any]]:
+        """
+        Fetch only the key column of a table, page by page.
+
+        Only ``key_field`` is requested (``$attributes``) and the rows are
+        not turned into a DataFrame, so even large tables can be listed
+        cheaply, e.g. to find records that were deleted in the legacy ERP.
+        Metadata keys such as __KEY cannot be requested, they are returned
+        with every record; for those a single other column is requested.
+
+        Args:
+            table_name: Name of the table to fetch from
+            key_field: Field holding the record key, e.g. __KEY or AbsNr
+            page_size: Number of keys to fetch per request
+            filter_query: Optional filter, see ``_build_filter_param``
+
+        Yields:
+            Lists with the keys of each page
+        """
+        if not self.ensure_session():
+            raise RuntimeError("Failed to establish a valid session")
+
+        filter_param = self._build_filter_param(
+            filter_query, fail_on_filter_error=True
+        )
+        attributes_param = key_field
+        if key_field.startswith("__"):
+            columns = [
+                name
+                for name in self.get_table_columns(table_name) or []
+                if not name.startswith("__")
+            ]
+            attributes_param = columns[0] if columns else None
+
+        skip = 0
+        while True:
+            params = {"$skip": skip, "$top": page_size}
+            if attributes_param:
+                params["$attributes"] = attributes_param
+            if filter_param:
+                params["$filter"] = filter_param
+            response = self._make_request(
+                "GET", table_name, params=params, timeout=self.timeout
+            )
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"Failed to fetch keys of {table_name} (page starting at "
+                    f"{skip}): Status {response.status_code}"
+                )
+
+            records = json_utils.loads(response.content).get("__ENTITIES", [])
+            keys = [
+                record[key_field]
+                for record in records
+                if record.get(key_field) is not None
+            ]
+            if keys:
+                yield keys
+            if len(records) < page_size:
+                break
+            skip += len(records)
@@ -5,7 +5,7 @@ This module provides the LegacyERPClient class which handles all interactions
 with the legacy API, including data retrieval and updates.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 
@@ -72,6 +72,7 @@ class LegacyERPClient(BaseAPIClient):
         new_data_only: bool = True,
         date_created_start: Optional[str] = None,
         fail_on_filter_error: bool = False,
+        attributes: Optional[List[str]] = None,
     ) -> pd.DataFrame:
         """
         Fetch records from a table in the legacy ERP system.
@@ -87,6 +88,7 @@ class LegacyERPClient(BaseAPIClient):
             new_data_only: Only fetch records newer than last sync
             date_created_start: Optional start date for filtering
             fail_on_filter_error: Whether to raise an error on filter issues
+            attributes: Optional list of the columns to fetch
 
         Returns:
             DataFrame containing the fetched records
@@ -104,9 +106,10 @@ class LegacyERPClient(BaseAPIClient):
                 new_data_only=new_data_only,
                 date_created_start=date_created_start,
                 fail_on_filter_error=fail_on_filter_error,
+                attributes=attributes,
             )
         except Exception as e:
-            raise LegacyERPError(f"Failed to fetch table: {e}")
+            raise LegacyERPError(f"Failed to fetch table: {e}") from e
 
     def fetch_product(self, product_sku: str) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,121 @@
+"""
+Adaptive page sizing for fetching legacy ERP tables.
+
+A fixed ``$top`` is either too large for wide tables, which then hit the 4D
+timeout, or too small for narrow ones, which then take more round-trips
+than needed. ``AdaptivePager`` tunes the page size of a table from the time
+and payload size of the pages fetched so far, within configured bounds.
+Pagers are kept per environment and table for the lifetime of the process,
+so later syncs of a table start from the size learned before.
+"""
+
+from typing import Any, Dict, Optional
+
+import requests
+
+from pyerp.external_api.legacy_erp.settings import (
+    API_PAGE_MAX_BYTES,
+    API_PAGE_SIZE,
+    API_PAGE_SIZE_MAX,
+    API_PAGE_SIZE_MIN,
+    API_PAGE_TARGET_SECONDS,
+)
+
+
+class AdaptivePager:
+    """Tune the page size of a table from observed fetches."""
+
+    def __init__(
+        self,
+        page_size: int = API_PAGE_SIZE,
+        min_size: int = API_PAGE_SIZE_MIN,
+        max_size: int = API_PAGE_SIZE_MAX,
+        target_seconds: float = API_PAGE_TARGET_SECONDS,
+        max_bytes: int = API_PAGE_MAX_BYTES,
+    ):
+        """
+        Initialize the pager.
+
+        Args:
+            page_size: Page size to start with
+            min_size: Smallest page size to use
+            max_size: Largest page size to use
+            target_seconds: Time a page should take to fetch
+            max_bytes: Largest payload a page should have
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.page_size = self._clamp(page_size)
+
+    def _clamp(self, size: float) -> int:
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    def observe(self, rows: int, nbytes: int, seconds: float) -> int:
+        """
+        Adjust the page size after a page was fetched.
+
+        The time and size per row of the page give the page size that meets
+        both the target time and the payload limit. The size changes by at
+        most a factor of two per page, so one slow response does not
+        collapse it. Pages with fewer rows than ``min_size`` are ignored,
+        their time is mostly the overhead of the request.
+
+        Args:
+            rows: Number of rows in the page
+            nbytes: Size of the decoded response body
+            seconds: Time taken to fetch and decode the page
+
+        Returns:
+            The page size to use for the next page
+        """
+        if rows < max(self.min_size, 1):
+            return self.page_size
+        wanted = self.max_size
+        if seconds > 0:
+            wanted = min(wanted, self.target_seconds * rows / seconds)
+        if nbytes > 0:
+            wanted = min(wanted, self.max_bytes * rows / nbytes)
+        wanted = max(self.page_size / 2, min(self.page_size * 2, wanted))
+        self.page_size = self._clamp(wanted)
+        return self.page_size
+
+    def shrink(self) -> bool:
+        """
+        Halve the page size after a page timed out.
+
+        Returns:
+            False if the page size is already at its minimum
+        """
+        if self.page_size <= self.min_size:
+            return False
+        self.page_size = self._clamp(self.page_size // 2)
+        return True
+
+
+def is_timeout(error: Optional[BaseException]) -> bool:
+    """Return whether an error was caused by a request timing out.
+
+    Follows both explicit (``raise ... from``) and implicit exception
+    chaining.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, requests.Timeout):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def new_fetch_stats() -> Dict[str, Any]:
+    """Return empty fetch statistics of a table."""
+    return {
+        "requests": 0,
+        "rows": 0,
+        "bytes": 0,
+        "seconds": 0.0,
+        "timeouts": 0,
+        "page_size": None,
+    }
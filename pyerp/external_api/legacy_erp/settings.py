@@ -90,6 +90,38 @@ API_RETRY_BACKOFF_FACTOR = getattr(
     0.5,
 )
 
+# Statuses retried with backoff; read timeouts are not retried at the same
+# page size, the pager shrinks the page instead
+API_RETRY_STATUS_CODES = getattr(
+    settings,
+    "LEGACY_API_RETRY_STATUS_CODES",
+    (429, 502, 503, 504),
+)
+
+# Keep-alive connections per client, matched to how many syncs of a source
+# may run at once
+API_POOL_MAXSIZE = getattr(
+    settings,
+    "LEGACY_API_POOL_MAXSIZE",
+    max(
+        [getattr(settings, "SYNC_DEFAULT_CONCURRENCY", 2)]
+        + list(getattr(settings, "SYNC_SOURCE_CONCURRENCY", {}).values())
+    ),
+)
+
+# Adaptive paging: the page size ($top) of each table is tuned within these
+# bounds so that a page takes about API_PAGE_TARGET_SECONDS to fetch and
+# stays below API_PAGE_MAX_BYTES
+API_PAGE_SIZE = getattr(settings, "LEGACY_API_PAGE_SIZE", 10000)
+API_PAGE_SIZE_MIN = getattr(settings, "LEGACY_API_PAGE_SIZE_MIN", 500)
+API_PAGE_SIZE_MAX = getattr(settings, "LEGACY_API_PAGE_SIZE_MAX", 50000)
+API_PAGE_TARGET_SECONDS = getattr(settings, "LEGACY_API_PAGE_TARGET_SECONDS", 10)
+API_PAGE_MAX_BYTES = getattr(
+    settings,
+    "LEGACY_API_PAGE_MAX_BYTES",
+    50 * 1024 * 1024,
+)
+
 # Session settings
 API_SESSION_EXPIRY = getattr(
     settings,
@@ -9,11 +9,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from django.db.models import Q, Prefetch
+from django.db.models import Q
 
 from pyerp.business_modules.sales.models import Customer, SalesRecord
 from pyerp.business_modules.products.models import (
-    ParentProduct, VariantProduct, ProductImage
+    ParentProduct, VariantProduct
 )
 from pyerp.business_modules.inventory.models import BoxSlot, StorageLocation
 
@@ -25,58 +25,15 @@ class GlobalSearchViewSet(viewsets.ViewSet):
     """
 
     def _get_primary_image_url(self, product_instance):
-        """Helper: Get primary thumbnail URL for a product (Parent/Variant)."""
-        primary_image = None
-        # Check type and access images appropriately
-        images_relation = None
-        if isinstance(product_instance, ParentProduct):
-            # Parent: Try finding image via prefetched variants or query fallback
-            # Note: Query fallback might be inefficient.
-            if hasattr(product_instance, 'prefetched_variants_with_images'):
-                # Use prefetched data if available
-                for variant in product_instance.prefetched_variants_with_images:
-                    if hasattr(variant, 'images_prefetched'):
-                        images_relation = variant.images_prefetched
-                        if images_relation:
-                            break  # Stop at the first variant with images
-            else:  # Fallback to querying (less efficient)
-                first_variant = product_instance.variants.prefetch_related(
-                    'images'
-                ).first()
-                if first_variant:
-                    images_relation = first_variant.images.all()
-        elif isinstance(product_instance, VariantProduct):
-            # Variant: Use prefetched images or query fallback
-            if hasattr(product_instance, 'images_prefetched'):
-                images_relation = product_instance.images_prefetched
-            else:  # Fallback to querying
-                images_relation = product_instance.images.all()
-
-        if images_relation:
-            # Prioritize: Produktfoto+Front > Produktfoto > Front > Primary > Any
-            candidates = list(images_relation)  # Evaluate queryset
-            primary_image = next((
-                img for img in candidates
-                if img.image_type == "Produktfoto" and img.is_front
-            ), None)
-            if not primary_image:
-                primary_image = next((
-                    img for img in candidates if img.image_type == "Produktfoto"
-                ), None)
-            if not primary_image:
-                primary_image = next((
-                    img for img in candidates if img.is_front
-                ), None)
-            if not primary_image:
-                primary_image = next((
-                    img for img in candidates if img.is_primary
-                ), None)
-            if not primary_image and candidates:
-                primary_image = candidates[0]
-
-        # Return thumbnail URL > full URL > None
+        """Helper: Get primary thumbnail URL for a product (Parent/Variant).
+
+        Uses the primary image precomputed at load time; select
+        ``primary_image`` with the product to avoid extra queries.
+        """
+        primary_image = product_instance.primary_image
+        # Return local thumbnail > CMS thumbnail > full URL > None
         if primary_image:
-            return primary_image.thumbnail_url or primary_image.image_url
+            return primary_image.display_thumbnail_url
         return None
 
     @action(detail=False, methods=["get"])
@@ -150,25 +107,9 @@ class GlobalSearchViewSet(viewsets.ViewSet):
 
     def _search_parent_products(self, query):
         """Search parent products by sku and name, include primary image."""
-        # Prefetch variants and their images for efficiency
-        prefetch_images = Prefetch(
-            'variants__images',
-            queryset=ProductImage.objects.order_by(
-                '-is_primary', '-is_front', 'priority'
-            ),
-            to_attr='images_prefetched'
-        )
-        prefetch_variants_with_images = Prefetch(
-            'variants',
-            queryset=VariantProduct.objects.prefetch_related(
-                prefetch_images
-            ).order_by('id')[:1],  # Only need first variant for image
-            to_attr='prefetched_variants_with_images'
-        )
-
         products = ParentProduct.objects.filter(
             Q(sku__icontains=query) | Q(name__icontains=query)
-        ).prefetch_related(prefetch_variants_with_images)[:10]  # Limit results
+        ).select_related('primary_image')[:10]  # Limit results
 
         return [
             {
@@ -176,28 +117,20 @@ class GlobalSearchViewSet(viewsets.ViewSet):
                 "sku": product.sku,
                 "name": product.name,
                 "type": "parent_product",
-                # "primary_image_thumbnail_url": self._get_primary_image_url(
-                #     product
-                # ),
+                "primary_image_thumbnail_url": self._get_primary_image_url(
+                    product
+                ),
             }
             for product in products
         ]
 
     def _search_variant_products(self, query):
         """Search variant products by sku, name, legacy_sku; include image."""
-        # Prefetch images for variants
-        prefetch_images = Prefetch(
-            'images',
-            queryset=ProductImage.objects.order_by(
-                '-is_primary', '-is_front', 'priority'
-            ),
-            to_attr='images_prefetched'
-        )
         products = VariantProduct.objects.filter(
             Q(sku__icontains=query)
             | Q(name__icontains=query)
             | Q(legacy_sku__icontains=query)
-        ).prefetch_related(prefetch_images)[:10]  # Limit results
+        ).select_related('primary_image')[:10]  # Limit results
 
         return [
             {
@@ -209,9 +142,9 @@ class GlobalSearchViewSet(viewsets.ViewSet):
                 "retail_price": product.retail_price,
                 "wholesale_price": product.wholesale_price,
                 "variant_code": product.variant_code,
-                # "primary_image_thumbnail_url": self._get_primary_image_url(
-                #     product
-                # ),
+                "primary_image_thumbnail_url": self._get_primary_image_url(
+                    product
+                ),
             }
             for product in products
         ]
@@ -0,0 +1,130 @@
+"""
+Tests for the concurrent, content-addressed image downloader.
+"""
+
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+import pytest
+import requests_mock
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+from django.utils import timezone
+from PIL import Image
+
+from pyerp.business_modules.products.models import ProductImage, VariantProduct
+from pyerp.external_api.images_cms.downloader import ImageDownloader, generate_thumbnail
+
+
+def _png_bytes(color="red", size=(800, 600)):
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, format="PNG")
+    return output.getvalue()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class ImageDownloaderTestCase(TestCase):
+    """Test downloading, deduplication, revalidation and thumbnails."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.media_root, base_url="/media/")
+        self.variant_a = VariantProduct.objects.create(sku="VAR001", name="A", legacy_base_sku="VAR001")
+        self.variant_b = VariantProduct.objects.create(sku="VAR002", name="B", legacy_base_sku="VAR002")
+        self.image_a = ProductImage.objects.create(
+            product=self.variant_a,
+            external_id="1",
+            image_url="https://cms.example.com/files/1.png",
+            image_type="Produktfoto",
+        )
+        self.image_b = ProductImage.objects.create(
+            product=self.variant_b,
+            external_id="2",
+            image_url="https://cms.example.com/files/2.png",
+            image_type="Produktfoto",
+        )
+        self.content = _png_bytes()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _downloader(self, **kwargs):
+        return ImageDownloader(
+            max_workers=2, thumbnail_workers=0, storage=self.storage, **kwargs
+        )
+
+    def _mock_files(self, mocker, **kwargs):
+        for image in (self.image_a, self.image_b):
+            mocker.get(
+                image.image_url,
+                content=self.content,
+                headers={"ETag": '"abc"', "Content-Type": "image/png"},
+                **kwargs,
+            )
+
+    def test_identical_images_stored_once(self):
+        """Test that identical content is stored under a single path."""
+        with requests_mock.Mocker() as mocker:
+            self._mock_files(mocker)
+            stats = self._downloader().download(ProductImage.objects.order_by("id"))
+
+        self.assertEqual(stats["downloaded"], 2)
+        self.assertEqual(stats["deduplicated"], 1)
+        self.assertEqual(stats["thumbnails"], 1)
+        self.image_a.refresh_from_db()
+        self.image_b.refresh_from_db()
+        self.assertEqual(self.image_a.local_image.name, self.image_b.local_image.name)
+        self.assertEqual(self.image_a.local_thumbnail.name, self.image_b.local_thumbnail.name)
+        self.assertTrue(self.image_a.local_image.name.endswith(f"{self.image_a.content_hash}.png"))
+        self.assertEqual(self.image_a.source_etag, '"abc"')
+        self.assertTrue(self.storage.exists(self.image_a.local_thumbnail.name))
+
+    def test_revalidates_with_etag(self):
+        """Test that a second run sends If-None-Match and keeps the file on 304."""
+        with requests_mock.Mocker() as mocker:
+            self._mock_files(mocker)
+            self._downloader().download(ProductImage.objects.all())
+
+        with requests_mock.Mocker() as mocker:
+            self._mock_files(mocker, status_code=304)
+            stats = self._downloader().download(ProductImage.objects.all())
+            self.assertEqual(mocker.last_request.headers["If-None-Match"], '"abc"')
+
+        self.assertEqual(stats["not_modified"], 2)
+        self.assertEqual(stats["downloaded"], 0)
+
+    def test_skips_unchanged_cms_timestamp(self):
+        """Test that images unchanged in the CMS are not requested at all."""
+        with requests_mock.Mocker() as mocker:
+            self._mock_files(mocker)
+            self._downloader().download(ProductImage.objects.all())
+
+        ProductImage.objects.update(source_modified_at=timezone.now() - timedelta(days=1))
+        with requests_mock.Mocker() as mocker:
+            stats = self._downloader().download(ProductImage.objects.all())
+            self.assertEqual(mocker.call_count, 0)
+        self.assertEqual(stats["skipped"], 2)
+
+    def test_errors_are_counted(self):
+        """Test that failed downloads do not abort the batch."""
+        with requests_mock.Mocker() as mocker:
+            mocker.get(self.image_a.image_url, status_code=404)
+            mocker.get(self.image_b.image_url, content=self.content)
+            stats = self._downloader().download(ProductImage.objects.all())
+
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["downloaded"], 1)
+        self.image_b.refresh_from_db()
+        self.assertEqual(self.image_b.display_thumbnail_url, self.image_b.local_thumbnail.url)
+
+    def test_generate_thumbnail(self):
+        """Test that thumbnails fit into the requested size."""
+        thumbnail = generate_thumbnail(self.content, 100)
+        with Image.open(io.BytesIO(thumbnail)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertLessEqual(max(image.size), 100)
+        self.assertIsNone(generate_thumbnail(b"not an image", 100))
@@ -0,0 +1,62 @@
+"""
+Tests for fetching only some columns of legacy ERP tables.
+"""
+
+import json
+from unittest import mock
+
+import pytest
+
+from pyerp.external_api.legacy_erp.base import BaseAPIClient
+
+
+def _response(entities):
+    response = mock.MagicMock(status_code=200)
+    response.content = json.dumps({"__ENTITIES": entities}).encode()
+    return response
+
+
+@pytest.fixture
+def client():
+    with mock.patch.object(BaseAPIClient, "ensure_session", return_value=True):
+        yield BaseAPIClient(environment="live")
+
+
+SAMPLE = {"__KEY": "1", "AbsNr": 1, "Netto": 10.0, "Text": "long", "Bild": "..."}
+
+
+@pytest.mark.unit
+def test_project_attributes_drops_unknown_columns(client):
+    with mock.patch.object(
+        client, "_make_request", return_value=_response([SAMPLE])
+    ) as request:
+        assert client.project_attributes(
+            "Belege", ["AbsNr", "legacy_id", "Netto", "AbsNr"]
+        ) == ["AbsNr", "Netto"]
+        assert client.project_attributes("Belege", ["legacy_id"]) is None
+        assert client.project_attributes("Belege", None) is None
+
+    # The table is sampled once
+    request.assert_called_once()
+    assert request.call_args.kwargs["params"] == {"$top": 1}
+
+
+@pytest.mark.unit
+def test_project_attributes_of_empty_table(client):
+    with mock.patch.object(client, "_make_request", return_value=_response([])):
+        assert client.project_attributes("Belege", ["AbsNr"]) is None
+
+
+@pytest.mark.unit
+def test_fetch_table_with_attributes(client):
+    pages = [_response([SAMPLE]), _response([SAMPLE, SAMPLE])]
+    with mock.patch.object(client, "_make_request", side_effect=pages) as request:
+        df = client.fetch_table(
+            "Belege", top=5, attributes=["__KEY", "AbsNr", "Netto", "legacy_id"]
+        )
+
+    params = request.call_args.kwargs["params"]
+    assert params["$attributes"] == "AbsNr,Netto"
+    # Columns the server sent anyway are dropped before building the frame
+    assert list(df.columns) == ["__KEY", "AbsNr", "Netto"]
+    assert len(df) == 2
@@ -0,0 +1,80 @@
+"""
+Tests for listing the keys of legacy ERP tables.
+"""
+
+import json
+from unittest import mock
+
+import pytest
+
+from pyerp.external_api.legacy_erp.base import BaseAPIClient
+
+
+def _response(entities):
+    response = mock.MagicMock(status_code=200)
+    response.content = json.dumps({"__ENTITIES": entities}).encode()
+    return response
+
+
+@pytest.fixture
+def client():
+    with mock.patch.object(BaseAPIClient, "ensure_session", return_value=True):
+        yield BaseAPIClient(environment="live")
+
+
+@pytest.mark.unit
+def test_build_filter_param(client):
+    assert client._build_filter_param(None) is None
+    assert client._build_filter_param("a = 1") == "a = 1"
+    assert client._build_filter_param([["AbsNr", "=", 1], ["AbsNr", "=", 2]]) == (
+        "'AbsNr = 1' or 'AbsNr = 2'"
+    )
+    assert client._build_filter_param(
+        [["AbsNr", "=", 1], ["AbsNr", "=", 2], ["Datum", ">=", "2025-01-01"]]
+    ) == "('AbsNr = 1' or 'AbsNr = 2') and 'Datum >= \"2025-01-01\"'"
+
+
+@pytest.mark.unit
+def test_fetch_keys_pages_with_projection(client):
+    pages = [
+        _response([{"__KEY": "1"}, {"__KEY": "2"}]),
+        _response([{"__KEY": "3"}, {"__KEY": None}]),
+        _response([{"__KEY": "5"}]),
+    ]
+    with mock.patch.object(
+        client, "get_table_columns", return_value=["__KEY", "__STAMP", "Nummer", "Bez"]
+    ), mock.patch.object(client, "_make_request", side_effect=pages) as request:
+        keys = list(client.fetch_keys("Artikel_Variante", page_size=2))
+
+    assert keys == [["1", "2"], ["3"], ["5"]]
+    params = [call.kwargs["params"] for call in request.call_args_list]
+    # __KEY is metadata, returned with the smallest projection possible
+    assert params[0] == {"$skip": 0, "$top": 2, "$attributes": "Nummer"}
+    assert [p["$skip"] for p in params] == [0, 2, 4]
+
+
+@pytest.mark.unit
+def test_fetch_keys_of_empty_table_without_projection(client):
+    with mock.patch.object(
+        client, "get_table_columns", return_value=None
+    ), mock.patch.object(client, "_make_request", return_value=_response([])) as request:
+        assert list(client.fetch_keys("Artikel_Variante")) == []
+
+    assert "$attributes" not in request.call_args.kwargs["params"]
+
+
+@pytest.mark.unit
+def test_fetch_keys_with_filter(client):
+    with mock.patch.object(
+        client, "_make_request", return_value=_response([{"AbsNr": 7}])
+    ) as request:
+        keys = list(
+            client.fetch_keys(
+                "Belege", key_field="AbsNr", filter_query=[["AbsNr", "=", 7]]
+            )
+        )
+
+    assert keys == [[7]]
+    params = request.call_args.kwargs["params"]
+    assert params["$attributes"] == "AbsNr"
+    assert params["$filter"] == "'AbsNr = 7'"
@@ -0,0 +1,133 @@
+"""
+Tests for the adaptive paging and connection setup of the legacy ERP client.
+"""
+
+import json
+from unittest import mock
+
+import pytest
+import requests
+
+from pyerp.external_api.legacy_erp.base import BaseAPIClient
+from pyerp.external_api.legacy_erp.client import LegacyERPClient
+from pyerp.external_api.legacy_erp.exceptions import LegacyERPError
+from pyerp.external_api.legacy_erp.paging import AdaptivePager, is_timeout
+
+
+def _response(entities):
+    response = mock.MagicMock(status_code=200)
+    response.content = json.dumps({"__ENTITIES": entities}).encode()
+    return response
+
+
+@pytest.fixture
+def client():
+    BaseAPIClient._pagers.clear()
+    with mock.patch.object(BaseAPIClient, "ensure_session", return_value=True):
+        yield BaseAPIClient(environment="live")
+    BaseAPIClient._pagers.clear()
+
+
+@pytest.mark.unit
+def test_pager_tunes_towards_target_time():
+    pager = AdaptivePager(
+        page_size=1000, min_size=100, max_size=10000, target_seconds=10,
+        max_bytes=10**9,
+    )
+    # Fast pages grow the size, by at most a factor of two per page
+    assert pager.observe(1000, 10**5, 1.0) == 2000
+    assert pager.observe(2000, 10**5, 5.0) == 4000
+    # A slow page shrinks it to what meets the target
+    assert pager.observe(4000, 10**5, 16.0) == 2500
+    # Bounded by max_size
+    for _ in range(5):
+        pager.observe(pager.page_size, 10**5, 0.1)
+    assert pager.page_size == 10000
+
+
+@pytest.mark.unit
+def test_pager_limits_payload_and_ignores_small_pages():
+    pager = AdaptivePager(
+        page_size=1000, min_size=100, max_size=10000, target_seconds=10,
+        max_bytes=50000,
+    )
+    assert pager.observe(1000, 100000, 0.1) == 500
+    # Few rows say little about the cost per row
+    assert pager.observe(1, 100, 5.0) == 500
+
+
+@pytest.mark.unit
+def test_pager_shrink():
+    pager = AdaptivePager(page_size=800, min_size=300, max_size=1000)
+    assert pager.shrink() and pager.page_size == 400
+    assert pager.shrink() and pager.page_size == 300
+    assert not pager.shrink()
+
+
+@pytest.mark.unit
+def test_is_timeout():
+    try:
+        try:
+            raise requests.ReadTimeout("slow")
+        except requests.ReadTimeout as e:
+            raise RuntimeError("Error fetching table") from e
+    except RuntimeError as error:
+        assert is_timeout(error)
+    assert not is_timeout(RuntimeError("Status 500"))
+
+    # Errors raised while handling a timeout, without "from"
+    try:
+        try:
+            raise requests.ReadTimeout("slow")
+        except requests.ReadTimeout:
+            raise RuntimeError("Error fetching table")
+    except RuntimeError as error:
+        assert is_timeout(error)
+
+
+@pytest.mark.unit
+def test_legacy_client_keeps_the_timeout_cause():
+    with mock.patch.object(LegacyERPClient, "ensure_session", return_value=True):
+        client = LegacyERPClient(environment="live")
+        with mock.patch.object(
+            client, "_make_request", side_effect=requests.ReadTimeout("slow")
+        ), pytest.raises(LegacyERPError) as excinfo:
+            client.fetch_table("Belege", top=10)
+
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+    assert is_timeout(excinfo.value)
+
+
+@pytest.mark.unit
+def test_session_retries_and_pools(client):
+    adapter = client.session.get_adapter("http://erp.local")
+    retry = adapter.max_retries
+    assert retry.read == 0
+    assert 503 in retry.status_forcelist
+    assert "POST" not in retry.allowed_methods
+    assert client.session.headers["Accept-Encoding"] == "gzip, deflate"
+
+
+@pytest.mark.unit
+def test_fetch_table_adapts_and_retries_timeouts(client):
+    pager = client.get_pager("Belege")
+    pager.min_size, pager.page_size = 1, 4
+    pages = [
+        _response([{"AbsNr": i} for i in range(4)]),
+        requests.ReadTimeout("slow"),
+        _response([{"AbsNr": 4}]),
+    ]
+    with mock.patch.object(client, "_make_request", side_effect=pages) as request, \
+            mock.patch.object(pager, "observe", return_value=4):
+        df = client.fetch_table("Belege", all_records=True)
+
+    assert len(df) == 5
+    params = [call.kwargs["params"] for call in request.call_args_list]
+    assert [(p["$skip"], p["$top"]) for p in params] == [(0, 4), (4, 4), (4, 2)]
+    stats = client.get_fetch_stats("Belege")
+    assert stats["requests"] == 2
+    assert stats["rows"] == 5
+    assert stats["bytes"] == sum(
+        len(page.content) for page in pages if not isinstance(page, Exception)
+    )
+    assert stats["timeouts"] == 1
@@ -0,0 +1,106 @@
+"""
+Tests for the bulk ProductImageLoader.
+"""
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from pyerp.business_modules.products.models import (
+    ParentProduct,
+    ProductImage,
+    VariantProduct,
+)
+from pyerp.external_api.images_cms.loaders import ProductImageLoader
+
+
+def _record(external_id, skus, **kwargs):
+    record = {
+        "external_id": str(external_id),
+        "image_url": f"https://example.com/{external_id}.jpg",
+        "image_type": "Produktfoto",
+        "metadata": {"articles": [{"sku": sku, "is_front": False} for sku in skus]},
+        "is_front": False,
+        "is_primary": False,
+        "alt_text": "",
+        "priority": 0,
+    }
+    record.update(kwargs)
+    return record
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class ProductImageLoaderTestCase(TestCase):
+    """Test page-wise loading of image records."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.parent = ParentProduct.objects.create(
+            sku="PARENT001", name="Parent", legacy_base_sku="PARENT001"
+        )
+        self.variants = [
+            VariantProduct.objects.create(
+                sku=f"VAR{i:03d}", name=f"Variant {i}", parent=self.parent,
+                legacy_base_sku=f"VAR{i:03d}", variant_code=f"V{i}",
+            )
+            for i in range(10)
+        ]
+        self.loader = ProductImageLoader(config={})
+
+    def _records(self, **kwargs):
+        return [_record(i, [variant.sku], **kwargs) for i, variant in enumerate(self.variants)]
+
+    def test_creates_and_links_images(self):
+        """Test that new images are created and linked to variants."""
+        result = self.loader.load(self._records())
+        self.assertEqual(result["created"], 10)
+        self.assertEqual(result["errors"], 0)
+        image = ProductImage.objects.get(external_id="3")
+        self.assertEqual(image.product, self.variants[3])
+
+    def test_unchanged_records_are_skipped(self):
+        """Test that a second identical load writes nothing to ProductImage."""
+        self.loader.load(self._records())
+        with CaptureQueriesContext(connection) as queries:
+            result = self.loader.load(self._records())
+        self.assertEqual(result["skipped"], 10)
+        self.assertEqual(result["updated"], 0)
+        writes = [
+            q["sql"] for q in queries.captured_queries
+            if "products_productimage" in q["sql"]
+            and q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_changed_records_are_updated(self):
+        """Test that only changed rows are updated."""
+        self.loader.load(self._records())
+        records = self._records()
+        records[0]["image_url"] = "https://example.com/new.jpg"
+        result = self.loader.load(records)
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(result["skipped"], 9)
+        self.assertEqual(
+            ProductImage.objects.get(external_id="0").image_url, "https://example.com/new.jpg"
+        )
+
+    def test_query_count_independent_of_page_size(self):
+        """Test that the page is resolved with a constant number of queries."""
+        with CaptureQueriesContext(connection) as small:
+            self.loader.load(self._records()[:2])
+        ProductImage.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self.loader.load(self._records())
+        self.assertEqual(len(small), len(large))
+
+    def test_primary_image_precomputed(self):
+        """Test that variants and parent get a primary image at load time."""
+        records = self._records()
+        records[5]["is_front"] = True
+        self.loader.load(records)
+        self.variants[5].refresh_from_db()
+        self.parent.refresh_from_db()
+        self.assertEqual(self.variants[5].primary_image.external_id, "5")
+        self.assertEqual(self.parent.primary_image.external_id, "5")
@@ -3,11 +3,20 @@ Performance monitoring middleware for measuring request duration and logging per
 """
 import time
 import logging
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from pyerp.middleware import profiling
 from pyerp.middleware.request_id import get_request_id
+from pyerp.monitoring import memory_telemetry
 
 # Set up a dedicated logger for performance metrics
 logger = logging.getLogger('pyerp.performance')
 
+
+def performance_logging_enabled():
+    """Return whether a performance log line is written per request."""
+    return getattr(settings, "PERFORMANCE_LOGGING_ENABLED", True)
+
 class PerformanceMonitoringMiddleware:
     """
     Middleware that measures request duration and logs performance metrics.
@@ -15,20 +24,57 @@ class PerformanceMonitoringMiddleware:
     """
     
     def __init__(self, get_response):
+        # Drop out of the middleware chain when there is nothing to collect
+        if not (
+            performance_logging_enabled()
+            or profiling.profiling_enabled()
+            or memory_telemetry.telemetry_enabled()
+        ):
+            raise MiddlewareNotUsed
         self.get_response = get_response
     
     def __call__(self, request):
+        # Profile queries and HTTP calls for a sample of requests
+        profile = None
+        if (
+            profiling.profiling_enabled()
+            and not self._is_static_request(request.path)
+            and profiling.should_sample()
+        ):
+            profile = profiling.RequestProfile()
+
+        # Cheap RSS readings per request for the memory telemetry
+        memory_sample = None
+        if memory_telemetry.telemetry_enabled() and not self._is_static_request(request.path):
+            memory_sample = memory_telemetry.MemorySample()
+
         # Start timer
         start_time = time.time()
         
         # Process the request
-        response = self.get_response(request)
+        if profile is not None:
+            with profile.activate():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
         
         # Calculate duration
         duration_ms = (time.time() - start_time) * 1000  # Convert to milliseconds
         
-        # Only log performance for non-static URLs
-        if not self._is_static_request(request.path):
+        if profile is not None:
+            profiling.route_stats.record(
+                profiling.get_route_key(request), duration_ms, profile
+            )
+        if memory_sample is not None:
+            memory_telemetry.route_memory_stats.record(
+                profiling.get_route_key(request), memory_sample.finish()
+            )
+        
+        # Only log performance for non-static URLs, and for requests that
+        # were profiled unless per-request logging is switched on
+        if not self._is_static_request(request.path) and (
+            profile is not None or performance_logging_enabled()
+        ):
             # Get request path and method
             path = request.path
             method = request.method
@@ -42,7 +88,8 @@ class PerformanceMonitoringMiddleware:
                 method=method, 
                 duration_ms=duration_ms, 
                 status_code=response.status_code,
-                request_id=request_id
+                request_id=request_id,
+                profile=profile,
             )
         
         return response
@@ -64,7 +111,9 @@ class PerformanceMonitoringMiddleware:
         ]
         return any(path.startswith(prefix) for prefix in static_prefixes)
     
-    def _log_performance(self, path, method, duration_ms, status_code, request_id=None):
+    def _log_performance(
+        self, path, method, duration_ms, status_code, request_id=None, profile=None
+    ):
         """
         Log performance data for a request.
         
@@ -74,6 +123,7 @@ class PerformanceMonitoringMiddleware:
             duration_ms: The request duration in milliseconds
             status_code: The HTTP status code
             request_id: The request ID for correlation
+            profile: The RequestProfile if the request was sampled
         """
         # Categorize response time
         category = 'normal'
@@ -95,6 +145,23 @@ class PerformanceMonitoringMiddleware:
         if request_id:
             log_data['request_id'] = request_id
         
+        # Add query and HTTP metrics of profiled requests
+        if profile is not None:
+            duplicates = profile.duplicate_queries()
+            log_data.update(
+                query_count=profile.query_count,
+                db_time_ms=round(profile.db_time_ms, 2),
+                duplicate_queries=duplicates,
+                http_calls=len(profile.http_calls),
+                http_time_ms=round(profile.http_time_ms, 2),
+            )
+            if duplicates:
+                logger.warning(
+                    f"Repeated queries in {method} {path}: "
+                    f"{duplicates[0]['count']}x {duplicates[0]['sql'][:200]}",
+                    extra=log_data,
+                )
+        
         if category == 'very_slow':
             logger.warning(f"Very slow request: {path}", extra=log_data)
         elif category == 'slow':
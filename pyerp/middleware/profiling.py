@@ -0,0 +1,277 @@
+"""
+Per-request query and latency profiling.
+
+``PerformanceMonitoringMiddleware`` uses this module to capture, for a
+sample of requests, the number of SQL queries, the time spent in the
+database, repeated query shapes (the usual sign of an N+1 pattern) and
+outgoing HTTP calls made through ``requests``. Results are aggregated per
+route into bounded in-process sample windows from which p50/p95/p99 are
+computed on demand.
+
+Settings:
+    REQUEST_PROFILING_ENABLED: Turn profiling on (default False)
+    REQUEST_PROFILING_SAMPLE_RATE: Fraction of requests to profile
+    REQUEST_PROFILING_WINDOW: Samples kept per route
+    REQUEST_PROFILING_DUPLICATE_THRESHOLD: Repetitions of one query shape
+        that are reported as duplicates
+"""
+
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_WINDOW = 500
+DEFAULT_DUPLICATE_THRESHOLD = 5
+PERCENTILES = (50, 95, 99)
+
+# Thread local storage for the profile of the current request
+_current = threading.local()
+
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def profiling_enabled():
+    """Return whether request profiling is switched on."""
+    return getattr(settings, "REQUEST_PROFILING_ENABLED", False)
+
+
+def should_sample():
+    """Decide whether the current request is profiled."""
+    rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+    return rate >= 1 or random.random() < rate
+
+
+def normalize_sql(sql):
+    """
+    Reduce a SQL statement to its shape.
+
+    Parameters are already placeholders, so only ``IN`` lists of varying
+    length and whitespace have to be collapsed.
+    """
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def get_current_profile():
+    """Return the profile of the request running in this thread, if any."""
+    return getattr(_current, "profile", None)
+
+
+class RequestProfile:
+    """Collects database and HTTP timings for one request."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        self.query_shapes = Counter()
+        self.http_calls = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time_ms += (time.perf_counter() - start) * 1000
+            self.query_count += 1
+            self.query_shapes[normalize_sql(sql)] += 1
+
+    def record_http_call(self, method, url, duration_ms, status_code=None):
+        self.http_calls.append(
+            {
+                "method": method,
+                "url": url,
+                "duration_ms": round(duration_ms, 2),
+                "status_code": status_code,
+            }
+        )
+
+    @property
+    def http_time_ms(self):
+        return sum(call["duration_ms"] for call in self.http_calls)
+
+    def duplicate_queries(self, threshold=None):
+        """
+        Return query shapes executed at least ``threshold`` times.
+
+        Returns:
+            list: ``{"sql": ..., "count": ...}`` dicts, most repeated first
+        """
+        if threshold is None:
+            threshold = getattr(
+                settings,
+                "REQUEST_PROFILING_DUPLICATE_THRESHOLD",
+                DEFAULT_DUPLICATE_THRESHOLD,
+            )
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in self.query_shapes.most_common()
+            if count >= threshold
+        ]
+
+    def activate(self):
+        """
+        Start capturing on all database connections of this thread.
+
+        Returns:
+            ExitStack: Close it to stop capturing
+        """
+        _install_http_hook()
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        _current.profile = self
+        stack.callback(self._deactivate)
+        return stack
+
+    def _deactivate(self):
+        if getattr(_current, "profile", None) is self:
+            del _current.profile
+
+
+_http_hook_lock = threading.Lock()
+_http_hook_installed = False
+
+
+def _install_http_hook():
+    """Time ``requests`` calls made while a request is being profiled."""
+    global _http_hook_installed
+    if _http_hook_installed:
+        return
+    with _http_hook_lock:
+        if _http_hook_installed:
+            return
+        try:
+            from requests.adapters import HTTPAdapter
+        except ImportError:
+            _http_hook_installed = True
+            return
+
+        original_send = HTTPAdapter.send
+
+        def send(adapter, request, *args, **kwargs):
+            profile = get_current_profile()
+            if profile is None:
+                return original_send(adapter, request, *args, **kwargs)
+            start = time.perf_counter()
+            status_code = None
+            try:
+                response = original_send(adapter, request, *args, **kwargs)
+                status_code = response.status_code
+                return response
+            finally:
+                profile.record_http_call(
+                    request.method,
+                    request.url.split("?", 1)[0],
+                    (time.perf_counter() - start) * 1000,
+                    status_code,
+                )
+
+        HTTPAdapter.send = send
+        _http_hook_installed = True
+
+
+def _percentiles(values):
+    """Nearest-rank percentiles of a list of numbers."""
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    ordered = sorted(values)
+    result = {}
+    for p in PERCENTILES:
+        index = max(0, -(-p * len(ordered) // 100) - 1)
+        result[f"p{p}"] = round(ordered[index], 2)
+    return result
+
+
+class RouteStats:
+    """
+    Thread-safe per-route aggregation of request profiles.
+
+    Each route keeps its last ``window`` samples, so percentiles follow
+    the current behaviour of the endpoint while memory stays bounded.
+    """
+
+    METRICS = ("duration_ms", "query_count", "db_time_ms", "http_time_ms")
+
+    def __init__(self, window=None):
+        self._window = window
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def window(self):
+        if self._window is not None:
+            return self._window
+        return getattr(settings, "REQUEST_PROFILING_WINDOW", DEFAULT_WINDOW)
+
+    def record(self, route, duration_ms, profile):
+        sample = (
+            duration_ms,
+            profile.query_count,
+            profile.db_time_ms,
+            profile.http_time_ms,
+        )
+        duplicates = len(profile.duplicate_queries())
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "requests": 0,
+                    "with_duplicates": 0,
+                    "samples": deque(maxlen=self.window),
+                }
+            stats["requests"] += 1
+            if duplicates:
+                stats["with_duplicates"] += 1
+            stats["samples"].append(sample)
+
+    def snapshot(self):
+        """
+        Return percentiles per route.
+
+        Returns:
+            dict: Mapping of route to its request counters and the
+            p50/p95/p99 of every metric
+        """
+        with self._lock:
+            routes = {
+                route: (stats["requests"], stats["with_duplicates"], list(stats["samples"]))
+                for route, stats in self._routes.items()
+            }
+        result = {}
+        for route, (requests, with_duplicates, samples) in sorted(routes.items()):
+            entry = {
+                "requests": requests,
+                "requests_with_duplicate_queries": with_duplicates,
+                "samples": len(samples),
+            }
+            for index, metric in enumerate(self.METRICS):
+                entry[metric] = _percentiles([sample[index] for sample in samples])
+            result[route] = entry
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def get_route_key(request):
+    """Identify a request by method and URL pattern rather than path."""
+    match = getattr(request, "resolver_match", None)
+    route = getattr(match, "route", None) if match else None
+    if not route:
+        route = "<unresolved>"
+    elif not route.startswith("/"):
+        route = f"/{route}"
+    return f"{request.method} {route}"
@@ -10,8 +10,16 @@ from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils.translation import gettext_lazy as _
 
-from pyerp.monitoring.models import HealthCheckResult
-from pyerp.monitoring.services import run_all_health_checks, validate_database
+from pyerp.monitoring.models import (
+    HealthCheckResult,
+    TableValidationResult,
+    TaskMemoryUsage,
+)
+from pyerp.monitoring.services import (
+    COMPONENT_DATABASE_VALIDATION,
+    run_all_health_checks,
+    run_health_check,
+)
 
 
 class HealthCheckResultAdmin(admin.ModelAdmin):
@@ -116,9 +124,9 @@ class HealthCheckResultAdmin(admin.ModelAdmin):
         )
 
     def refresh_health_checks(self, request):
-        """Run health checks and return the results as JSON."""
+        """Run health checks, store and return the results as JSON."""
         try:
-            results = run_all_health_checks()
+            results = run_all_health_checks(store=True)
             return JsonResponse(
                 {
                     "success": True,
@@ -137,7 +145,7 @@ class HealthCheckResultAdmin(admin.ModelAdmin):
     def validate_database(self, request):
         """Run comprehensive database validation and return the results as JSON."""
         try:
-            results = validate_database()
+            results = run_health_check(COMPONENT_DATABASE_VALIDATION)
             return JsonResponse(
                 {
                     "success": True,
@@ -156,3 +164,71 @@ class HealthCheckResultAdmin(admin.ModelAdmin):
 
 # Register the admin class with a better name to avoid duplicates in the admin sidebar
 admin.site.register(HealthCheckResult, HealthCheckResultAdmin)
+
+
+class TaskMemoryUsageAdmin(admin.ModelAdmin):
+    """Read-only admin for recorded task memory usage."""
+
+    list_display = (
+        "name",
+        "started_at",
+        "duration_ms",
+        "rss_delta_mib",
+        "peak_delta_mib",
+        "state",
+        "hostname",
+        "pid",
+    )
+    list_filter = ("name", "state", "started_at")
+    search_fields = ("name", "task_id", "hostname")
+    date_hierarchy = "started_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def rss_delta_mib(self, obj):
+        """Format the RSS delta in MiB."""
+        if obj.rss_delta is None:
+            return "-"
+        return f"{obj.rss_delta / 1024 / 1024:.1f}"
+
+    rss_delta_mib.short_description = _("RSS Delta (MiB)")
+
+    def peak_delta_mib(self, obj):
+        """Format the peak delta in MiB."""
+        if obj.peak_delta is None:
+            return "-"
+        return f"{obj.peak_delta / 1024 / 1024:.1f}"
+
+    peak_delta_mib.short_description = _("Peak Delta (MiB)")
+
+
+admin.site.register(TaskMemoryUsage, TaskMemoryUsageAdmin)
+
+
+class TableValidationResultAdmin(admin.ModelAdmin):
+    """Read-only admin for the per-table database validation results."""
+
+    list_display = (
+        "table_name",
+        "status",
+        "row_count",
+        "sampled",
+        "duration_ms",
+        "checked_at",
+        "confirmed_at",
+    )
+    list_filter = ("status", "sampled")
+    search_fields = ("table_name", "model_label")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(TableValidationResult, TableValidationResultAdmin)
@@ -21,3 +21,8 @@ class MonitoringAppConfig(AppConfig):
             import pyerp.monitoring.signals  # noqa: F401
         except ImportError:
             pass
+
+        # Record memory usage of Celery tasks if enabled
+        from pyerp.monitoring import memory_telemetry
+
+        memory_telemetry.connect_signals()
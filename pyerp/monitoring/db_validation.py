@@ -0,0 +1,375 @@
+"""
+In-process, incremental database validation.
+
+Every table of an installed model is checked for NULLs in NOT NULL
+columns, foreign keys pointing at missing rows and extreme decimal values.
+All checks of a table are combined into a single scan with one LEFT JOIN
+per foreign key, instead of one query per column and constraint.
+
+Tables are only scanned again when they changed since the last run: on
+PostgreSQL the insert/update/delete counters of ``pg_stat_user_tables``
+serve as a fingerprint, elsewhere the row count and highest primary key.
+The fingerprint of a table includes those of the tables it references, so
+deleting a referenced row triggers a new scan as well. Tables larger than
+``DB_VALIDATION_SAMPLE_ROWS`` are scanned in sampled mode.
+
+Results are stored per table in ``TableValidationResult``; the health check
+``validate_database`` runs the engine on the health check schedule and the
+health API only reads what was stored.
+
+Settings:
+    DB_VALIDATION_SAMPLE_ROWS: Row count above which tables are sampled
+    DB_VALIDATION_SAMPLE_SIZE: Approximate number of rows per sample
+    DB_VALIDATION_EXCLUDE_PREFIXES: Table name prefixes that are skipped
+"""
+
+import hashlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models
+from django.utils import timezone
+
+from pyerp.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SAMPLE_ROWS = 5_000_000
+DEFAULT_SAMPLE_SIZE = 500_000
+DEFAULT_EXCLUDE_PREFIXES = ("django_", "auth_")
+# Absolute values beyond this are reported for decimal columns
+EXTREME_VALUE = 1e9
+
+STATUS_SUCCESS = "success"
+STATUS_WARNING = "warning"
+STATUS_ERROR = "error"
+_STATUS_ORDER = {STATUS_SUCCESS: 0, STATUS_WARNING: 1, STATUS_ERROR: 2}
+
+
+def worst_status(statuses):
+    """Return the most severe of the given statuses."""
+    return max(statuses, key=_STATUS_ORDER.__getitem__, default=STATUS_SUCCESS)
+
+
+class TableSpec:
+    """The checks to run against one table, derived from its model."""
+
+    def __init__(self, model):
+        opts = model._meta
+        self.model_label = opts.label
+        self.table = opts.db_table
+        self.pk_column = opts.pk.column
+        self.not_null_columns = []
+        self.foreign_keys = []
+        self.decimal_columns = []
+
+        for field in opts.local_concrete_fields:
+            if field.primary_key or not field.column:
+                continue
+            if not field.null:
+                self.not_null_columns.append(field.column)
+            if field.is_relation and (field.many_to_one or field.one_to_one):
+                target = field.target_field
+                self.foreign_keys.append(
+                    (field.column, target.model._meta.db_table, target.column)
+                )
+            elif isinstance(field, models.DecimalField):
+                self.decimal_columns.append(field.column)
+
+    @property
+    def referenced_tables(self):
+        return sorted({table for _, table, _ in self.foreign_keys} - {self.table})
+
+    def build_query(self, connection, sample=None):
+        """
+        Build the single scan that runs every check of this table.
+
+        Args:
+            connection: Database connection the query is built for
+            sample: Scan a sample instead of the whole table; a percentage
+                of pages on PostgreSQL, a number of newest rows elsewhere
+
+        Returns:
+            str: SQL returning the row count followed by one value per check
+        """
+        qn = connection.ops.quote_name
+        table = qn(self.table)
+        selects = ["COUNT(*)"]
+        joins = []
+
+        for column in self.not_null_columns:
+            selects.append(f"SUM(CASE WHEN t.{qn(column)} IS NULL THEN 1 ELSE 0 END)")
+        for index, (column, target_table, target_column) in enumerate(self.foreign_keys):
+            alias = f"r{index}"
+            joins.append(
+                f"LEFT JOIN {qn(target_table)} {alias} "
+                f"ON {alias}.{qn(target_column)} = t.{qn(column)}"
+            )
+            selects.append(
+                f"SUM(CASE WHEN t.{qn(column)} IS NOT NULL "
+                f"AND {alias}.{qn(target_column)} IS NULL THEN 1 ELSE 0 END)"
+            )
+        for column in self.decimal_columns:
+            selects.append(f"MIN(t.{qn(column)})")
+            selects.append(f"MAX(t.{qn(column)})")
+
+        if sample is None:
+            source = f"{table} t"
+        elif connection.vendor == "postgresql":
+            source = f"{table} t TABLESAMPLE SYSTEM ({float(sample):.4f})"
+        else:
+            # Without TABLESAMPLE, check the most recently inserted rows
+            source = (
+                f"(SELECT * FROM {table} ORDER BY {qn(self.pk_column)} DESC "
+                f"LIMIT {int(sample)}) t"
+            )
+
+        return f"SELECT {', '.join(selects)} FROM {source} {' '.join(joins)}"
+
+    def interpret(self, row, sampled=False):
+        """
+        Turn the result row of ``build_query`` into issues.
+
+        Returns:
+            tuple: (row count, list of issue dicts with level and message)
+        """
+        values = iter(row)
+        row_count = next(values) or 0
+        issues = []
+        prefix = "At least " if sampled else ""
+
+        for column in self.not_null_columns:
+            count = next(values) or 0
+            if count:
+                issues.append(
+                    {
+                        "level": STATUS_ERROR,
+                        "message": f"{prefix}{count} NULL values in NOT NULL column "
+                        f"{self.table}.{column}",
+                    }
+                )
+        for column, target_table, target_column in self.foreign_keys:
+            count = next(values) or 0
+            if count:
+                issues.append(
+                    {
+                        "level": STATUS_ERROR,
+                        "message": f"{prefix}{count} broken foreign key references: "
+                        f"{self.table}.{column} -> {target_table}.{target_column}",
+                    }
+                )
+        for column in self.decimal_columns:
+            low, high = next(values), next(values)
+            if low is not None and max(abs(low), abs(high)) > EXTREME_VALUE:
+                issues.append(
+                    {
+                        "level": STATUS_WARNING,
+                        "message": f"Extreme values in {self.table}.{column}: "
+                        f"range [{low}, {high}]",
+                    }
+                )
+        return row_count, issues
+
+
+def get_table_specs(using="default"):
+    """
+    Return the specs of all model tables that exist in the database.
+
+    Returns:
+        dict: TableSpec by table name
+    """
+    from pyerp.monitoring.models import TableValidationResult
+
+    connection = connections[using]
+    prefixes = tuple(
+        getattr(settings, "DB_VALIDATION_EXCLUDE_PREFIXES", DEFAULT_EXCLUDE_PREFIXES)
+    )
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.table_names(cursor))
+
+    specs = {}
+    for model in apps.get_models():
+        opts = model._meta
+        if opts.proxy or opts.db_table in specs or opts.db_table not in existing:
+            continue
+        # The results table changes on every run and would always be rescanned
+        if opts.db_table.startswith(prefixes) or model is TableValidationResult:
+            continue
+        specs[opts.db_table] = TableSpec(model)
+    return specs
+
+
+def get_table_statistics(specs, using="default"):
+    """
+    Return change counters and estimated row counts of the given tables.
+
+    PostgreSQL answers from ``pg_stat_user_tables`` in one query. Other
+    databases count rows and read the highest primary key, which is cheap
+    on an index but misses updates in place.
+
+    Returns:
+        dict: ``(counters, estimated_rows)`` by table name
+    """
+    connection = connections[using]
+    stats = {}
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                """
+                SELECT relname, n_tup_ins, n_tup_upd, n_tup_del, n_live_tup
+                FROM pg_stat_user_tables
+                WHERE schemaname = current_schema()
+                """
+            )
+            for table, inserted, updated, deleted, live in cursor.fetchall():
+                if table in specs:
+                    stats[table] = (f"{inserted}:{updated}:{deleted}", live)
+        else:
+            qn = connection.ops.quote_name
+            for table, spec in specs.items():
+                cursor.execute(
+                    f"SELECT COUNT(*), MAX({qn(spec.pk_column)}) FROM {qn(table)}"
+                )
+                count, max_pk = cursor.fetchone()
+                stats[table] = (f"{count}:{max_pk}", count)
+    return stats
+
+
+def compute_fingerprints(specs, stats):
+    """
+    Combine the counters of each table with those of the tables it references.
+
+    Returns:
+        dict: Fingerprint by table name
+    """
+    fingerprints = {}
+    for table, spec in specs.items():
+        parts = [f"{table}={stats.get(table, (None,))[0]}"]
+        parts.extend(
+            f"{target}={stats.get(target, (None,))[0]}"
+            for target in spec.referenced_tables
+        )
+        fingerprints[table] = hashlib.sha256("|".join(parts).encode()).hexdigest()
+    return fingerprints
+
+
+def _sample_for(estimated_rows, vendor):
+    """Return the sample argument of ``build_query`` for a table, or None."""
+    threshold = getattr(settings, "DB_VALIDATION_SAMPLE_ROWS", DEFAULT_SAMPLE_ROWS)
+    size = getattr(settings, "DB_VALIDATION_SAMPLE_SIZE", DEFAULT_SAMPLE_SIZE)
+    if not threshold or not estimated_rows or estimated_rows <= threshold:
+        return None
+    if vendor == "postgresql":
+        # TABLESAMPLE takes a percentage of the table's pages
+        return max(0.01, min(100.0, size / estimated_rows * 100))
+    return size
+
+
+def validate_table(spec, sample=None, using="default"):
+    """
+    Scan one table.
+
+    Returns:
+        dict: ``status``, ``issues``, ``row_count``, ``sampled`` and
+        ``duration_ms``
+    """
+    connection = connections[using]
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(spec.build_query(connection, sample=sample))
+            row_count, issues = spec.interpret(
+                cursor.fetchone(), sampled=sample is not None
+            )
+    except Exception as e:
+        logger.error(f"Could not validate table {spec.table}: {e!s}")
+        row_count = None
+        issues = [
+            {"level": STATUS_ERROR, "message": f"Could not validate {spec.table}: {e!s}"}
+        ]
+    return {
+        "status": worst_status(issue["level"] for issue in issues),
+        "issues": issues,
+        "row_count": row_count,
+        "sampled": sample is not None,
+        "duration_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def validate_tables(force=False, full=False, using="default"):
+    """
+    Validate every table that changed since its last scan and store the results.
+
+    Args:
+        force: Scan all tables, even unchanged ones
+        full: Never sample, scan large tables completely
+        using: Database alias to validate
+
+    Returns:
+        dict: Summary with ``tables``, ``checked``, ``skipped``, ``sampled``,
+        ``status``, ``errors``, ``warnings`` and ``duration_ms``
+    """
+    from pyerp.monitoring.models import TableValidationResult
+
+    start = time.perf_counter()
+    now = timezone.now()
+    connection = connections[using]
+
+    specs = get_table_specs(using)
+    stats = get_table_statistics(specs, using)
+    fingerprints = compute_fingerprints(specs, stats)
+    stored = {r.table_name: r for r in TableValidationResult.objects.all()}
+
+    to_create, to_update, unchanged = [], [], []
+    for table, spec in specs.items():
+        record = stored.get(table)
+        if (
+            not force
+            and record is not None
+            and record.fingerprint == fingerprints[table]
+        ):
+            unchanged.append(table)
+            continue
+
+        sample = None if full else _sample_for(stats.get(table, (None, 0))[1], connection.vendor)
+        result = validate_table(spec, sample=sample, using=using)
+        if record is None:
+            record = TableValidationResult(table_name=table)
+            to_create.append(record)
+        else:
+            to_update.append(record)
+        record.model_label = spec.model_label
+        # Failed scans keep no fingerprint so they are retried on the next run
+        record.fingerprint = fingerprints[table] if result["row_count"] is not None else ""
+        record.checked_at = record.confirmed_at = now
+        for key, value in result.items():
+            setattr(record, key, value)
+
+    TableValidationResult.objects.bulk_create(to_create)
+    TableValidationResult.objects.bulk_update(
+        to_update,
+        [
+            "model_label", "status", "issues", "fingerprint", "row_count",
+            "sampled", "duration_ms", "checked_at", "confirmed_at",
+        ],
+    )
+    if unchanged:
+        TableValidationResult.objects.filter(table_name__in=unchanged).update(
+            confirmed_at=now
+        )
+    # Tables that were dropped or excluded since the last run
+    TableValidationResult.objects.exclude(table_name__in=list(specs)).delete()
+
+    records = [stored[t] for t in unchanged] + to_create + to_update
+    issues = [issue for record in records for issue in record.issues]
+    return {
+        "tables": len(specs),
+        "checked": len(to_create) + len(to_update),
+        "skipped": len(unchanged),
+        "sampled": sum(1 for record in records if record.sampled),
+        "status": worst_status(record.status for record in records),
+        "errors": sum(1 for issue in issues if issue["level"] == STATUS_ERROR),
+        "warnings": sum(1 for issue in issues if issue["level"] == STATUS_WARNING),
+        "duration_ms": (time.perf_counter() - start) * 1000,
+    }
@@ -29,13 +29,20 @@ class Command(BaseCommand):
             default=False,
             help=_("Output results in JSON format"),
         )
+        parser.add_argument(
+            "--store",
+            action="store_true",
+            dest="store",
+            default=False,
+            help=_("Save the results as the latest health check results"),
+        )
 
     def handle(self, *args, **options):
         """Run the command."""
         self.stdout.write(self.style.NOTICE(_("Running system health checks...")))
 
         # Run all health checks
-        results = run_all_health_checks()
+        results = run_all_health_checks(store=options["store"])
 
         # Output in JSON format if requested
         if options["json"]:
@@ -0,0 +1,73 @@
+"""
+Management command to run the database validation.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from pyerp.monitoring.db_validation import validate_tables
+from pyerp.monitoring.services import get_table_validation_results
+
+
+class Command(BaseCommand):
+    """
+    Validate the database tables and store the per-table results.
+
+    By default only tables that changed since the last run are scanned and
+    very large tables are sampled, like the scheduled health check does.
+    """
+
+    help = _("Validate database tables and store the per-table results")
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            default=False,
+            help=_("Scan all tables, including those unchanged since the last run"),
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            default=False,
+            help=_("Scan large tables completely instead of sampling them"),
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            default=False,
+            help=_("Output the summary and failing tables in JSON format"),
+        )
+
+    def handle(self, *args, **options):
+        """Run the command."""
+        summary = validate_tables(force=options["force"], full=options["full"])
+        failing = [
+            result
+            for result in get_table_validation_results()
+            if result["status"] != "success"
+        ]
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps({**summary, "failing": failing}, indent=2, default=str)
+            )
+            return
+
+        for result in failing:
+            style = self.style.ERROR if result["status"] == "error" else self.style.WARNING
+            self.stdout.write(style(result["table_name"]))
+            for issue in result["issues"]:
+                self.stdout.write(f"  - {issue['message']}")
+
+        self.stdout.write(
+            f"Validated {summary['tables']} tables in {summary['duration_ms']:.0f} ms: "
+            f"{summary['checked']} scanned, {summary['skipped']} unchanged, "
+            f"{summary['sampled']} sampled"
+        )
+        self.stdout.write(
+            f"Issues found: {summary['errors']}, warnings found: {summary['warnings']}"
+        )
@@ -0,0 +1,315 @@
+"""
+Continuous memory telemetry for Celery tasks and HTTP requests.
+
+Every task run records the resident set size before and after it and how
+far it raised the process peak (``ru_maxrss``), which costs two cheap
+system calls instead of a tracemalloc snapshot. Results are stored in
+``TaskMemoryUsage`` so they survive the worker being killed. HTTP requests
+are aggregated per route in-process by ``PerformanceMonitoringMiddleware``.
+
+When a task exceeds ``MEMORY_TELEMETRY_THRESHOLD_MB`` and the process runs
+with tracemalloc enabled (``python -X tracemalloc``), a snapshot is taken
+and compared with the previous one, and the top growing allocation sites
+are stored with the task run.
+
+Settings:
+    MEMORY_TELEMETRY_ENABLED: Turn telemetry on (default False)
+    MEMORY_TELEMETRY_THRESHOLD_MB: Task growth that triggers a snapshot diff
+    MEMORY_TELEMETRY_TOP_GROWERS: Allocation sites kept per diff
+    MEMORY_TELEMETRY_RETENTION_DAYS: Age after which task rows are deleted
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from pyerp.utils.logging import get_logger
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is a hard dependency in production
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = get_logger(__name__)
+
+DEFAULT_THRESHOLD_MB = 200
+DEFAULT_TOP_GROWERS = 15
+DEFAULT_RETENTION_DAYS = 14
+PRUNE_INTERVAL = 3600  # seconds between retention runs per process
+
+MB = 1024 * 1024
+
+
+def telemetry_enabled():
+    """Return whether memory telemetry is switched on."""
+    return getattr(settings, "MEMORY_TELEMETRY_ENABLED", False)
+
+
+_process = None
+_process_pid = None
+
+
+def current_rss():
+    """Return the resident set size of this process in bytes, if known."""
+    global _process, _process_pid
+    if psutil is None:
+        return None
+    pid = os.getpid()
+    if _process is None or _process_pid != pid:
+        # Re-create after fork so prefork workers report their own memory
+        _process = psutil.Process(pid)
+        _process_pid = pid
+    return _process.memory_info().rss
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, if known."""
+    if resource is None:
+        return None
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return value if sys.platform == "darwin" else value * 1024
+
+
+class MemorySample:
+    """Memory readings taken at the start of a unit of work."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rss_before = current_rss()
+        self.peak_before = peak_rss()
+        self.record_id = None
+
+    def finish(self):
+        """
+        Take the closing readings.
+
+        Returns:
+            dict: ``duration_ms``, ``rss_before``, ``rss_after``,
+            ``rss_delta`` and ``peak_delta``; unknown values are None
+        """
+        rss_after = current_rss()
+        peak_after = peak_rss()
+        return {
+            "duration_ms": (time.perf_counter() - self.started) * 1000,
+            "rss_before": self.rss_before,
+            "rss_after": rss_after,
+            "rss_delta": _delta(self.rss_before, rss_after),
+            "peak_delta": _delta(self.peak_before, peak_after),
+        }
+
+
+def _delta(before, after):
+    if before is None or after is None:
+        return None
+    return after - before
+
+
+def exceeds_threshold(readings):
+    """Return whether readings grew beyond the snapshot threshold."""
+    threshold = getattr(settings, "MEMORY_TELEMETRY_THRESHOLD_MB", DEFAULT_THRESHOLD_MB) * MB
+    growth = max(readings.get("rss_delta") or 0, readings.get("peak_delta") or 0)
+    return growth >= threshold
+
+
+_snapshot_lock = threading.Lock()
+_previous_snapshot = None
+
+
+def diff_snapshots(limit=None):
+    """
+    Take a tracemalloc snapshot and compare it with the previous one.
+
+    Only the previous snapshot is kept in memory, so storage stays bounded
+    no matter how often this runs.
+
+    Returns:
+        list: Top growing allocation sites, or None if tracemalloc is off
+    """
+    global _previous_snapshot
+    if not tracemalloc.is_tracing():
+        return None
+    if limit is None:
+        limit = getattr(settings, "MEMORY_TELEMETRY_TOP_GROWERS", DEFAULT_TOP_GROWERS)
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    with _snapshot_lock:
+        previous, _previous_snapshot = _previous_snapshot, snapshot
+
+    if previous is None:
+        stats = snapshot.statistics("lineno")
+    else:
+        stats = snapshot.compare_to(previous, "lineno")
+
+    growers = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        growers.append(
+            {
+                "location": f"{frame.filename}:{frame.lineno}",
+                "size_kib": round(stat.size / 1024, 1),
+                "size_diff_kib": round(getattr(stat, "size_diff", stat.size) / 1024, 1),
+                "count_diff": getattr(stat, "count_diff", stat.count),
+            }
+        )
+    return growers
+
+
+class RouteMemoryStats:
+    """
+    Thread-safe per-route aggregation of request memory readings.
+
+    RSS is per process, so deltas of concurrent requests in threaded
+    servers overlap; the maxima still point at the routes that grow memory.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, readings):
+        rss_delta = readings.get("rss_delta") or 0
+        peak_delta = readings.get("peak_delta") or 0
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "requests": 0,
+                    "total_rss_delta": 0,
+                    "max_rss_delta": 0,
+                    "max_peak_delta": 0,
+                    "peak_raises": 0,
+                }
+            stats["requests"] += 1
+            stats["total_rss_delta"] += rss_delta
+            stats["max_rss_delta"] = max(stats["max_rss_delta"], rss_delta)
+            stats["max_peak_delta"] = max(stats["max_peak_delta"], peak_delta)
+            if peak_delta > 0:
+                stats["peak_raises"] += 1
+
+    def snapshot(self, limit=None):
+        """
+        Return routes ordered by the largest peak raise.
+
+        Returns:
+            list: One dict per route with counters in bytes
+        """
+        with self._lock:
+            rows = [{"route": route, **stats} for route, stats in self._routes.items()]
+        rows.sort(key=lambda row: (row["max_peak_delta"], row["max_rss_delta"]), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_memory_stats = RouteMemoryStats()
+
+# Samples of the tasks currently running in this process, by task ID
+_task_samples = {}
+_last_prune = 0.0
+
+
+def task_started(task_id, task_name):
+    """Record the memory state before a task runs."""
+    from pyerp.monitoring.models import TaskMemoryUsage
+
+    sample = MemorySample()
+    _task_samples[task_id] = sample
+    try:
+        record = TaskMemoryUsage.objects.create(
+            name=task_name,
+            task_id=task_id or "",
+            hostname=socket.gethostname(),
+            pid=os.getpid(),
+            rss_before=sample.rss_before,
+        )
+        sample.record_id = record.pk
+    except Exception as e:
+        logger.warning(f"Could not record memory usage for task {task_name}: {e}")
+
+
+def task_finished(task_id, task_name, state=""):
+    """Record the memory used by a task and diff snapshots if it was heavy."""
+    from pyerp.monitoring.models import TaskMemoryUsage
+
+    sample = _task_samples.pop(task_id, None)
+    if sample is None:
+        return None
+    readings = sample.finish()
+    readings["top_growers"] = None
+    if exceeds_threshold(readings):
+        readings["top_growers"] = diff_snapshots()
+        logger.warning(
+            f"Task {task_name} grew memory by "
+            f"{max(readings['rss_delta'] or 0, readings['peak_delta'] or 0) / MB:.1f} MiB",
+            extra={"task_name": task_name, "task_id": task_id},
+        )
+    if sample.record_id is not None:
+        try:
+            TaskMemoryUsage.objects.filter(pk=sample.record_id).update(
+                state=state or "",
+                finished_at=timezone.now(),
+                **readings,
+            )
+        except Exception as e:
+            logger.warning(f"Could not record memory usage for task {task_name}: {e}")
+    prune_if_due()
+    return readings
+
+
+def prune_if_due():
+    """Delete task rows past the retention period, at most once an hour."""
+    global _last_prune
+    now = time.monotonic()
+    if _last_prune and now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+
+    from pyerp.monitoring.models import TaskMemoryUsage
+
+    days = getattr(settings, "MEMORY_TELEMETRY_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    try:
+        TaskMemoryUsage.objects.filter(
+            started_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+    except Exception as e:
+        logger.warning(f"Could not prune task memory usage: {e}")
+
+
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    task_started(task_id, getattr(task, "name", "unknown_task"))
+
+
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    task_finished(task_id, getattr(task, "name", "unknown_task"), state)
+
+
+def connect_signals():
+    """Record memory usage around every Celery task run."""
+    if not telemetry_enabled():
+        return
+    try:
+        from celery.signals import task_postrun, task_prerun
+    except ImportError:
+        return
+    task_prerun.connect(_on_task_prerun, dispatch_uid="memory_telemetry_prerun")
+    task_postrun.connect(_on_task_postrun, dispatch_uid="memory_telemetry_postrun")
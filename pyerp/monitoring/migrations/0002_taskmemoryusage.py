@@ -0,0 +1,39 @@
+# Generated by Django 5.1.8 on 2026-10-18 22:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskMemoryUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Registered name of the Celery task', max_length=255, verbose_name='Task Name')),
+                ('task_id', models.CharField(blank=True, help_text='Celery task ID', max_length=255, verbose_name='Task ID')),
+                ('hostname', models.CharField(blank=True, help_text='Host the worker process ran on', max_length=255, verbose_name='Hostname')),
+                ('pid', models.IntegerField(blank=True, help_text='Worker process ID', null=True, verbose_name='Process ID')),
+                ('state', models.CharField(blank=True, help_text='Final Celery task state', max_length=20, verbose_name='State')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the task started', verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, help_text='When the task finished', null=True, verbose_name='Finished At')),
+                ('duration_ms', models.FloatField(blank=True, help_text='Task run time in milliseconds', null=True, verbose_name='Duration (ms)')),
+                ('rss_before', models.BigIntegerField(blank=True, help_text='Resident set size in bytes when the task started', null=True, verbose_name='RSS Before')),
+                ('rss_after', models.BigIntegerField(blank=True, help_text='Resident set size in bytes when the task finished', null=True, verbose_name='RSS After')),
+                ('rss_delta', models.BigIntegerField(blank=True, help_text='Change of the resident set size in bytes', null=True, verbose_name='RSS Delta')),
+                ('peak_delta', models.BigIntegerField(blank=True, help_text='How far the task raised the process memory peak, in bytes', null=True, verbose_name='Peak Delta')),
+                ('top_growers', models.JSONField(blank=True, help_text='Allocation sites that grew most since the previous snapshot, recorded when the task exceeded the memory threshold', null=True, verbose_name='Top Growers')),
+            ],
+            options={
+                'verbose_name': 'Task Memory Usage',
+                'verbose_name_plural': 'Task Memory Usage',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['name', '-started_at'], name='monitoring__name_edc854_idx'), models.Index(fields=['started_at'], name='monitoring__started_edd6af_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.8 on 2026-10-18 22:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0002_taskmemoryusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableValidationResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(help_text='Database table that was validated', max_length=255, unique=True, verbose_name='Table Name')),
+                ('model_label', models.CharField(blank=True, help_text='Django model the table belongs to', max_length=255, verbose_name='Model')),
+                ('status', models.CharField(choices=[('success', 'Success'), ('warning', 'Warning'), ('error', 'Error')], help_text='Validation result status', max_length=20, verbose_name='Status')),
+                ('issues', models.JSONField(blank=True, default=list, help_text='Errors and warnings found in the table', verbose_name='Issues')),
+                ('fingerprint', models.CharField(blank=True, help_text='Change fingerprint of the table when it was last scanned', max_length=64, verbose_name='Fingerprint')),
+                ('row_count', models.BigIntegerField(blank=True, help_text='Number of rows scanned', null=True, verbose_name='Row Count')),
+                ('sampled', models.BooleanField(default=False, help_text='Whether only a sample of the table was scanned', verbose_name='Sampled')),
+                ('duration_ms', models.FloatField(blank=True, help_text='Time taken to scan the table in milliseconds', null=True, verbose_name='Duration (ms)')),
+                ('checked_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the table was last scanned', verbose_name='Checked At')),
+                ('confirmed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the result was last confirmed to be current', verbose_name='Confirmed At')),
+            ],
+            options={
+                'verbose_name': 'Table Validation Result',
+                'verbose_name_plural': 'Table Validation Results',
+                'ordering': ['table_name'],
+            },
+        ),
+    ]
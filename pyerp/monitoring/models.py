@@ -98,3 +98,203 @@ class HealthCheckResult(models.Model):
             return cls.objects.filter(component=component).latest("timestamp")
         except cls.DoesNotExist:
             return None
+
+
+class TaskMemoryUsage(models.Model):
+    """
+    Memory used by one Celery task run.
+
+    A row is created when the task starts and completed when it finishes,
+    so rows without ``finished_at`` point at tasks whose worker died.
+    """
+
+    name = models.CharField(
+        _("Task Name"),
+        max_length=255,
+        help_text=_("Registered name of the Celery task"),
+    )
+
+    task_id = models.CharField(
+        _("Task ID"),
+        max_length=255,
+        blank=True,
+        help_text=_("Celery task ID"),
+    )
+
+    hostname = models.CharField(
+        _("Hostname"),
+        max_length=255,
+        blank=True,
+        help_text=_("Host the worker process ran on"),
+    )
+
+    pid = models.IntegerField(
+        _("Process ID"),
+        null=True,
+        blank=True,
+        help_text=_("Worker process ID"),
+    )
+
+    state = models.CharField(
+        _("State"),
+        max_length=20,
+        blank=True,
+        help_text=_("Final Celery task state"),
+    )
+
+    started_at = models.DateTimeField(
+        _("Started At"),
+        default=timezone.now,
+        help_text=_("When the task started"),
+    )
+
+    finished_at = models.DateTimeField(
+        _("Finished At"),
+        null=True,
+        blank=True,
+        help_text=_("When the task finished"),
+    )
+
+    duration_ms = models.FloatField(
+        _("Duration (ms)"),
+        null=True,
+        blank=True,
+        help_text=_("Task run time in milliseconds"),
+    )
+
+    rss_before = models.BigIntegerField(
+        _("RSS Before"),
+        null=True,
+        blank=True,
+        help_text=_("Resident set size in bytes when the task started"),
+    )
+
+    rss_after = models.BigIntegerField(
+        _("RSS After"),
+        null=True,
+        blank=True,
+        help_text=_("Resident set size in bytes when the task finished"),
+    )
+
+    rss_delta = models.BigIntegerField(
+        _("RSS Delta"),
+        null=True,
+        blank=True,
+        help_text=_("Change of the resident set size in bytes"),
+    )
+
+    peak_delta = models.BigIntegerField(
+        _("Peak Delta"),
+        null=True,
+        blank=True,
+        help_text=_("How far the task raised the process memory peak, in bytes"),
+    )
+
+    top_growers = models.JSONField(
+        _("Top Growers"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "Allocation sites that grew most since the previous snapshot, "
+            "recorded when the task exceeded the memory threshold"
+        ),
+    )
+
+    class Meta:
+        verbose_name = _("Task Memory Usage")
+        verbose_name_plural = _("Task Memory Usage")
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["name", "-started_at"]),
+            models.Index(fields=["started_at"]),
+        ]
+        app_label = "monitoring"
+
+    def __str__(self):
+        return f"{self.name} - {self.started_at}"
+
+
+class TableValidationResult(models.Model):
+    """
+    Latest validation result of one database table.
+
+    Written by the in-process validation engine in
+    ``pyerp.monitoring.db_validation``; a table is only scanned again once
+    its fingerprint, or that of a table it references, has changed.
+    """
+
+    table_name = models.CharField(
+        _("Table Name"),
+        max_length=255,
+        unique=True,
+        help_text=_("Database table that was validated"),
+    )
+
+    model_label = models.CharField(
+        _("Model"),
+        max_length=255,
+        blank=True,
+        help_text=_("Django model the table belongs to"),
+    )
+
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=HealthCheckResult.STATUS_CHOICES,
+        help_text=_("Validation result status"),
+    )
+
+    issues = models.JSONField(
+        _("Issues"),
+        default=list,
+        blank=True,
+        help_text=_("Errors and warnings found in the table"),
+    )
+
+    fingerprint = models.CharField(
+        _("Fingerprint"),
+        max_length=64,
+        blank=True,
+        help_text=_("Change fingerprint of the table when it was last scanned"),
+    )
+
+    row_count = models.BigIntegerField(
+        _("Row Count"),
+        null=True,
+        blank=True,
+        help_text=_("Number of rows scanned"),
+    )
+
+    sampled = models.BooleanField(
+        _("Sampled"),
+        default=False,
+        help_text=_("Whether only a sample of the table was scanned"),
+    )
+
+    duration_ms = models.FloatField(
+        _("Duration (ms)"),
+        null=True,
+        blank=True,
+        help_text=_("Time taken to scan the table in milliseconds"),
+    )
+
+    checked_at = models.DateTimeField(
+        _("Checked At"),
+        default=timezone.now,
+        help_text=_("When the table was last scanned"),
+    )
+
+    confirmed_at = models.DateTimeField(
+        _("Confirmed At"),
+        default=timezone.now,
+        help_text=_("When the result was last confirmed to be current"),
+    )
+
+    class Meta:
+        verbose_name = _("Table Validation Result")
+        verbose_name_plural = _("Table Validation Results")
+        ordering = ["table_name"]
+        app_label = "monitoring"
+
+    def __str__(self):
+        return f"{self.table_name} - {self.get_status_display()}"
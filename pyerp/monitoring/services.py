@@ -6,21 +6,24 @@ that monitor critical system components such as database connections,
 legacy ERP API integration, and the pictures API.
 """
 
-import json
 import logging
-import subprocess
-import sys
 import time
 import requests
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
-from pathlib import Path
+from datetime import timedelta
 
 from django.conf import settings
 from django.db import OperationalError, connections
+from django.db.models import Avg, Count, Max, Q
 from django.utils import timezone
 
-from pyerp.monitoring.models import HealthCheckResult
+from pyerp.monitoring.db_validation import validate_tables
+from pyerp.monitoring.models import (
+    HealthCheckResult,
+    TableValidationResult,
+    TaskMemoryUsage,
+)
 from pyerp.external_api import connection_manager
 
 # Import the API clients from the new structure
@@ -55,6 +58,24 @@ COMPONENT_KIBANA_ELASTIC = "Kibana/Elastic Monitoring"
 COMPONENT_BUCHHALTUNGSBUTTLER = "Buchhaltungsbutler API"
 COMPONENT_FRANKFURTER_API = "Frankfurter API"
 
+# Seconds between background checks per component, overridable with the
+# HEALTH_CHECK_INTERVALS setting
+DEFAULT_CHECK_INTERVALS = {
+    COMPONENT_DATABASE: 60,
+    COMPONENT_LEGACY_ERP: 120,
+    COMPONENT_IMAGES_CMS: 300,
+    COMPONENT_DATABASE_VALIDATION: 3600,
+    COMPONENT_ZEBRA_DAY: 300,
+    COMPONENT_KIBANA_ELASTIC: 300,
+    COMPONENT_BUCHHALTUNGSBUTTLER: 600,
+    COMPONENT_FRANKFURTER_API: 3600,
+}
+# A stored result is stale once it is older than this many intervals
+STALE_AFTER_INTERVALS = 2
+DEFAULT_RETENTION_DAYS = 30
+# Tables whose issues are listed in the database validation details
+MAX_REPORTED_TABLES = 20
+
 
 def check_database_connection():
     """
@@ -204,75 +225,38 @@ def check_images_cms_connection():
     }
 
 
-def validate_database():
+def validate_database(force=False, full=False):
     """
-    Run the comprehensive database validation script and return the results.
+    Validate the tables that changed since the last run, in-process.
+
+    Per-table results are stored in ``TableValidationResult`` by
+    ``pyerp.monitoring.db_validation``; this summarizes them.
+
+    Args:
+        force: Scan all tables, even unchanged ones
+        full: Scan large tables completely instead of sampling them
 
     Returns:
         dict: Validation result with status, details, and response time
     """
     start_time = time.time()
-    status = HealthCheckResult.STATUS_SUCCESS
-    details = "Database validation completed successfully. No issues found."
 
     try:
-        script_path = Path(settings.BASE_DIR) / "scripts" / "db_validation.py"
-
-        if not script_path.exists():
-            status = HealthCheckResult.STATUS_ERROR
-            details = f"Database validation script not found at {script_path}"
-            logger.error(details)
-        else:
-            cmd = [sys.executable, str(script_path), "--json"]
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, check=False
-            )
-
-            # Check if the script ran successfully
-            if result.returncode != 0:
-                status = HealthCheckResult.STATUS_ERROR
-                details = f"Database validation failed with exit code {result.returncode}.\n\n"
-                details += f"Error: {result.stderr}\n\n"
-                details += f"Output: {result.stdout}"
-                logger.error(f"Database validation failed: {result.stderr}")
-            else:
-                try:
-                    json_start = result.stdout.find("{")
-                    if json_start >= 0:
-                        json_output = result.stdout[json_start:]
-                        validation_results = json.loads(json_output)
-
-                        # Check for issues
-                        issues_found = validation_results.get("issues_found", 0)
-                        warnings_found = validation_results.get("warnings_found", 0)
-
-                        if issues_found > 0:
-                            status = HealthCheckResult.STATUS_ERROR
-                            details = (
-                                f"Database validation found {issues_found} issues.\n\n"
-                            )
-                            details += validation_results.get("summary", "")
-                        elif warnings_found > 0:
-                            status = HealthCheckResult.STATUS_WARNING
-                            details = f"Database validation found {warnings_found} warnings.\n\n"
-                            details += validation_results.get("summary", "")
-                        else:
-                            details = "Database validation completed successfully. No issues found.\n\n"
-                            details += validation_results.get("summary", "")
-                    else:
-                        details = f"Database validation completed, but output format is not recognized:\n\n{result.stdout}"
-                except json.JSONDecodeError:
-                    if "Issues found: 0" in result.stdout:
-                        details = f"Database validation completed successfully. Raw output:\n\n{result.stdout}"
-                    else:
-                        status = HealthCheckResult.STATUS_WARNING
-                        details = f"Database validation completed with possible issues. Raw output:\n\n{result.stdout}"
-                except Exception as e:
-                    status = HealthCheckResult.STATUS_ERROR
-                    details = f"Error running database validation: {e!s}"
-                    logger.error(
-                        f"Database validation failed with unexpected error: {e!s}",
-                    )
+        summary = validate_tables(force=force, full=full)
+        status = summary["status"]
+        details = (
+            f"Validated {summary['tables']} tables: {summary['checked']} scanned, "
+            f"{summary['skipped']} unchanged since the last run, "
+            f"{summary['sampled']} sampled.\n"
+            f"Issues found: {summary['errors']}\n"
+            f"Warnings found: {summary['warnings']}"
+        )
+        failing = TableValidationResult.objects.exclude(
+            status=HealthCheckResult.STATUS_SUCCESS
+        )[:MAX_REPORTED_TABLES]
+        for result in failing:
+            for issue in result.issues:
+                details += f"\n- {issue['message']}"
     except Exception as e:
         status = HealthCheckResult.STATUS_ERROR
         details = f"Error running database validation: {e!s}"
@@ -280,23 +264,44 @@ def validate_database():
 
     response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
 
-    # Create and return the health check result
-    result = HealthCheckResult.objects.create(
-        component=COMPONENT_DATABASE_VALIDATION, # Use defined constant
-        status=status,
-        details=details,
-        response_time=response_time,
-    )
-
+    # Return the health check result; the scheduler stores it
     return {
         "component": COMPONENT_DATABASE_VALIDATION, # Use defined constant
         "status": status,
         "details": details,
         "response_time": response_time,
-        "timestamp": result.timestamp,
+        "timestamp": timezone.now(),
     }
 
 
+def get_table_validation_results(status=None):
+    """
+    Return the stored per-table database validation results.
+
+    Args:
+        status: Only return tables with this status
+
+    Returns:
+        list: One dict per table
+    """
+    queryset = TableValidationResult.objects.all()
+    if status:
+        queryset = queryset.filter(status=status)
+    return list(
+        queryset.values(
+            "table_name",
+            "model_label",
+            "status",
+            "issues",
+            "row_count",
+            "sampled",
+            "duration_ms",
+            "checked_at",
+            "confirmed_at",
+        )
+    )
+
+
 def get_database_statistics():
     """
     Get detailed statistics about database performance and usage.
@@ -450,48 +455,31 @@ def get_database_statistics():
     return stats
 
 
-def run_all_health_checks(as_array=True):
+def _run_checks(checks):
     """
-    Run all health checks concurrently and return the results.
+    Run health check functions concurrently.
 
     Args:
-        as_array (bool): If True, returns results as a list of dictionaries.
-                         If False, returns results as a dictionary keyed by component name.
+        checks (dict): Mapping of component name to check function
 
     Returns:
-        list or dict: List or dictionary containing the results of each health check
+        list: One result dict per component
     """
     start_time = time.time()
-    logger.info("Starting all health checks...")
-
-    # List of functions to call for health checks
-    health_check_functions = [
-        check_database_connection,
-        check_legacy_erp_connection,
-        check_images_cms_connection,
-        validate_database, # Assuming this runs fast enough or handled internally
-        check_zebra_day,
-        check_kibana_elastic,
-        check_buchhaltungsbutler,
-        check_frankfurter_api,
-    ]
-
     results_list = []
     timed_out_checks = []
+    if not checks:
+        return results_list
 
-    with ThreadPoolExecutor(max_workers=len(health_check_functions)) as executor:
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
         # Submit all health check functions to the executor
-        future_to_func = {
-            executor.submit(func): func for func in health_check_functions
+        future_to_component = {
+            executor.submit(func): component for component, func in checks.items()
         }
 
         # Process results as they complete without overall timeout
-        for future in as_completed(future_to_func):
-            func = future_to_func[future]
-            # Derive name for logging
-            component_name = (
-                func.__name__.replace("check_", "").replace("_", " ").title()
-            )
+        for future in as_completed(future_to_component):
+            component_name = future_to_component[future]
 
             try:
                 # Get the result, applying the component check timeout
@@ -506,7 +494,7 @@ def run_all_health_checks(as_array=True):
                 )
                 timed_out_checks.append(component_name)
                 results_list.append({
-                    "component": component_name, # Best guess for component name
+                    "component": component_name,
                     "status": HealthCheckResult.STATUS_ERROR,
                     "details": f"Check timed out after {COMPONENT_CHECK_TIMEOUT} seconds.",
                     "response_time": COMPONENT_CHECK_TIMEOUT * 1000,
@@ -518,38 +506,202 @@ def run_all_health_checks(as_array=True):
                     f"Health check failed with exception for component: {component_name}: {exc!s}"
                 )
                 results_list.append({
-                    "component": component_name, # Best guess for component name
+                    "component": component_name,
                     "status": HealthCheckResult.STATUS_ERROR,
                     "details": f"Check failed with exception: {exc!s}",
                     "response_time": (time.time() - start_time) * 1000, # Time until failure
                     "timestamp": timezone.now(),
                 })
 
-    # Handle checks that might not have completed if the overall timeout was hit
-    # (though as_completed without timeout makes this less likely to be the
-    # primary issue, individual timeouts are handled above)
-    if len(results_list) < len(health_check_functions):
-        logger.warning(
-            "Not all health check futures completed. "
-            f"Completed {len(results_list)} out of "
-            f"{len(health_check_functions)} checks. "
-            "This might indicate an issue beyond individual timeouts."
-        )
-        # Potentially identify which ones are missing if needed
-
     total_duration = (time.time() - start_time) * 1000
     logger.info(
-        f"All health checks finished in {total_duration:.2f} ms. "
+        f"{len(results_list)} health checks finished in {total_duration:.2f} ms. "
         f"Timed out checks: {timed_out_checks if timed_out_checks else 'None'}"
     )
+    return results_list
+
 
-    # Format results based on the 'as_array' parameter
+def _format_results(results_list, as_array):
     if as_array:
         return results_list
-    else:
-        # Convert list of dicts to dict keyed by component name
-        results_dict = {result["component"]: result for result in results_list}
-        return results_dict
+    # Convert list of dicts to dict keyed by component name
+    return {result["component"]: result for result in results_list}
+
+
+def store_health_results(results):
+    """Persist health check results with one bulk insert."""
+    HealthCheckResult.objects.bulk_create(
+        [
+            HealthCheckResult(
+                component=result["component"],
+                status=result["status"],
+                details=result.get("details"),
+                response_time=result.get("response_time"),
+                timestamp=result.get("timestamp") or timezone.now(),
+            )
+            for result in results
+        ]
+    )
+
+
+def run_all_health_checks(as_array=True, store=False):
+    """
+    Run all health checks concurrently and return the results.
+
+    This performs live checks; request handlers should use
+    ``get_latest_health_results`` instead.
+
+    Args:
+        as_array (bool): If True, returns results as a list of dictionaries.
+                         If False, returns results as a dictionary keyed by component name.
+        store (bool): If True, the results are saved as HealthCheckResult rows
+
+    Returns:
+        list or dict: List or dictionary containing the results of each health check
+    """
+    logger.info("Starting all health checks...")
+    results_list = _run_checks(get_health_checks())
+    if store:
+        store_health_results(results_list)
+    return _format_results(results_list, as_array)
+
+
+def run_health_check(component):
+    """
+    Run and store the health check of one component.
+
+    Raises:
+        KeyError: If the component has no health check
+    """
+    results = _run_checks({component: get_health_checks()[component]})
+    store_health_results(results)
+    return results[0]
+
+
+def get_check_intervals():
+    """Return the check interval in seconds per component."""
+    return {
+        **DEFAULT_CHECK_INTERVALS,
+        **getattr(settings, "HEALTH_CHECK_INTERVALS", {}),
+    }
+
+
+def _latest_timestamps(components):
+    rows = (
+        HealthCheckResult.objects.filter(component__in=components)
+        .values("component")
+        .annotate(latest=Max("timestamp"))
+    )
+    return {row["component"]: row["latest"] for row in rows}
+
+
+def run_due_health_checks(now=None):
+    """
+    Run the health checks whose interval has passed and store the results.
+
+    Called periodically by the ``monitoring.run_due_health_checks`` task,
+    so each component is checked on its own interval in the background.
+
+    Returns:
+        list: Results of the checks that were run
+    """
+    now = now or timezone.now()
+    checks = get_health_checks()
+    intervals = get_check_intervals()
+    latest = _latest_timestamps(list(checks))
+    due = {
+        component: func
+        for component, func in checks.items()
+        if latest.get(component) is None
+        or (now - latest[component]).total_seconds() >= intervals[component]
+    }
+    if not due:
+        return []
+    logger.info(f"Running due health checks: {', '.join(due)}")
+    results = _run_checks(due)
+    store_health_results(results)
+    return results
+
+
+def get_latest_health_results(as_array=True, history=0, now=None):
+    """
+    Return the latest stored result of every component.
+
+    Each result carries ``age_seconds`` and a ``stale`` flag, set once a
+    result is older than twice the component's interval. Components that
+    were never checked are reported as warnings.
+
+    Args:
+        as_array (bool): Return a list instead of a dict keyed by component
+        history (int): Number of previous results to include per component
+            as ``history`` with their status and response time
+        now: Reference time for the staleness calculation
+
+    Returns:
+        list or dict: Latest result per component
+    """
+    now = now or timezone.now()
+    intervals = get_check_intervals()
+    components = list(get_health_checks())
+    latest_ids = (
+        HealthCheckResult.objects.filter(component__in=components)
+        .values("component")
+        .annotate(latest_id=Max("id"))
+        .values_list("latest_id", flat=True)
+    )
+    stored = {
+        result.component: result
+        for result in HealthCheckResult.objects.filter(id__in=list(latest_ids))
+    }
+
+    results_list = []
+    for component in components:
+        result = stored.get(component)
+        if result is None:
+            entry = {
+                "component": component,
+                "status": HealthCheckResult.STATUS_WARNING,
+                "details": "No health check result recorded yet.",
+                "response_time": None,
+                "timestamp": None,
+                "age_seconds": None,
+                "stale": True,
+            }
+        else:
+            age = (now - result.timestamp).total_seconds()
+            entry = {
+                "component": component,
+                "status": result.status,
+                "details": result.details,
+                "response_time": result.response_time,
+                "timestamp": result.timestamp,
+                "age_seconds": round(age, 1),
+                "stale": age > STALE_AFTER_INTERVALS * intervals[component],
+            }
+        entry["interval"] = intervals[component]
+        if history:
+            entry["history"] = [
+                {
+                    "status": row["status"],
+                    "response_time": row["response_time"],
+                    "timestamp": row["timestamp"],
+                }
+                for row in HealthCheckResult.objects.filter(component=component)
+                .order_by("-timestamp")
+                .values("status", "response_time", "timestamp")[:history]
+            ]
+        results_list.append(entry)
+    return _format_results(results_list, as_array)
+
+
+def prune_health_results(days=None):
+    """Delete stored health check results older than the retention period."""
+    if days is None:
+        days = getattr(settings, "HEALTH_CHECK_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    deleted, _ = HealthCheckResult.objects.filter(
+        timestamp__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
 
 
 def get_host_resources():
@@ -632,6 +784,42 @@ def get_host_resources():
         return {"error": str(e), "timestamp": datetime.now().isoformat()}
 
 
+def get_heaviest_tasks(days=7, limit=20):
+    """
+    Summarize recorded task memory usage, heaviest tasks first.
+
+    Args:
+        days: Only consider task runs started within this many days
+        limit: Maximum number of tasks and unfinished runs to return
+
+    Returns:
+        dict: ``tasks`` aggregated per task name, ordered by the largest
+        peak raise, and ``unfinished`` runs that have not reported back, which
+        for runs older than the task time limit means the worker was killed
+    """
+    since = timezone.now() - timedelta(days=days)
+    recent = TaskMemoryUsage.objects.filter(started_at__gte=since)
+    tasks = list(
+        recent.values("name")
+        .annotate(
+            runs=Count("id"),
+            unfinished=Count("id", filter=Q(finished_at__isnull=True)),
+            max_peak_delta=Max("peak_delta"),
+            max_rss_delta=Max("rss_delta"),
+            avg_rss_delta=Avg("rss_delta"),
+            max_rss_after=Max("rss_after"),
+            avg_duration_ms=Avg("duration_ms"),
+        )
+        .order_by("-max_peak_delta", "-max_rss_delta")[:limit]
+    )
+    unfinished = list(
+        recent.filter(finished_at__isnull=True)
+        .order_by("-started_at")
+        .values("name", "task_id", "hostname", "pid", "started_at", "rss_before")[:limit]
+    )
+    return {"tasks": tasks, "unfinished": unfinished}
+
+
 def check_zebra_day():
     """
     Check if the connection to the Zebra Day API is working properly.
@@ -1011,3 +1199,17 @@ def check_frankfurter_api():
         "response_time": response_time,
         "timestamp": timezone.now(),
     }
+
+
+def get_health_checks():
+    """Return the health check function per component."""
+    return {
+        COMPONENT_DATABASE: check_database_connection,
+        COMPONENT_LEGACY_ERP: check_legacy_erp_connection,
+        COMPONENT_IMAGES_CMS: check_images_cms_connection,
+        COMPONENT_DATABASE_VALIDATION: validate_database,
+        COMPONENT_ZEBRA_DAY: check_zebra_day,
+        COMPONENT_KIBANA_ELASTIC: check_kibana_elastic,
+        COMPONENT_BUCHHALTUNGSBUTTLER: check_buchhaltungsbutler,
+        COMPONENT_FRANKFURTER_API: check_frankfurter_api,
+    }
@@ -0,0 +1,89 @@
+"""Celery tasks for the monitoring app."""
+
+try:
+    from celery import shared_task
+except ImportError:
+    # Create dummy decorator for testing
+    def shared_task(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+
+from pyerp.core.api_cache import has_shared_cache
+from pyerp.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Prevents overlapping runs when a slow check outlives the beat interval
+RUN_LOCK_KEY = "monitoring:health_checks:lock"
+RUN_LOCK_TIMEOUT = 120  # seconds
+# PostgreSQL advisory lock used when workers do not share a cache
+RUN_LOCK_ID = 0x6865616C7468  # "health"
+PRUNE_KEY = "monitoring:health_checks:pruned"
+PRUNE_INTERVAL = 3600  # seconds
+
+
+@contextmanager
+def _advisory_lock():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [RUN_LOCK_ID])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [RUN_LOCK_ID])
+
+
+@contextmanager
+def _cache_lock():
+    token = uuid.uuid4().hex
+    acquired = cache.add(RUN_LOCK_KEY, token, RUN_LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        # After a run longer than the timeout the lock may belong to
+        # another run
+        if acquired and cache.get(RUN_LOCK_KEY) == token:
+            cache.delete(RUN_LOCK_KEY)
+
+
+def run_lock():
+    """Return the lock that keeps health check runs from overlapping.
+
+    The lock is held in the cache when it is shared between workers and
+    otherwise in PostgreSQL. The context manager yields whether the lock
+    was acquired.
+    """
+    if not has_shared_cache() and connection.vendor == "postgresql":
+        return _advisory_lock()
+    return _cache_lock()
+
+
+@shared_task(name="monitoring.run_due_health_checks", ignore_result=True)
+def run_due_health_checks():
+    """Run the health checks that are due and store their results.
+
+    Scheduled by Celery beat; every component is checked on its own
+    interval, see ``HEALTH_CHECK_INTERVALS``.
+    """
+    from .services import prune_health_results
+    from .services import run_due_health_checks as run_checks
+
+    with run_lock() as acquired:
+        if not acquired:
+            logger.info("Health checks are already running, skipping this run")
+            return 0
+        results = run_checks()
+        if cache.add(PRUNE_KEY, True, PRUNE_INTERVAL):
+            deleted = prune_health_results()
+            if deleted:
+                logger.info(f"Deleted {deleted} old health check results")
+        return len(results)
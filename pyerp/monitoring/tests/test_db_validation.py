@@ -0,0 +1,133 @@
+"""
+Tests for the in-process, incremental database validation.
+"""
+
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from pyerp.business_modules.products.models import ProductCategory
+from pyerp.monitoring import db_validation
+from pyerp.monitoring.models import HealthCheckResult, TableValidationResult
+from pyerp.monitoring.services import validate_database
+from pyerp.monitoring.views import get_database_validation_view
+
+User = get_user_model()
+
+CATEGORY_TABLE = ProductCategory._meta.db_table
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class DatabaseValidationTests(TestCase):
+    """Tests for scanning, skipping and storing table results."""
+
+    def setUp(self):
+        self.root = ProductCategory.objects.create(code="ROOT", name="Root")
+        self.child = ProductCategory.objects.create(
+            code="CHILD", name="Child", parent=self.root
+        )
+
+    def _break_parent_reference(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {CATEGORY_TABLE} SET parent_id = %s WHERE id = %s",
+                [999999, self.child.pk],
+            )
+        # Restore the row so deferred constraint checks pass on teardown
+        self.addCleanup(
+            ProductCategory.objects.filter(pk=self.child.pk).update,
+            parent=self.root,
+        )
+
+    def test_checks_of_a_table_run_in_one_scan(self):
+        """Test that all checks of a table are a single query."""
+        spec = db_validation.get_table_specs()[CATEGORY_TABLE]
+        self.assertIn(("parent_id", CATEGORY_TABLE, "id"), spec.foreign_keys)
+        self.assertIn("code", spec.not_null_columns)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = db_validation.validate_table(spec)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(result["status"], HealthCheckResult.STATUS_SUCCESS)
+        self.assertEqual(result["row_count"], 2)
+
+    def test_broken_foreign_keys_are_stored(self):
+        """Test that issues are stored per table."""
+        self._break_parent_reference()
+
+        summary = db_validation.validate_tables()
+
+        self.assertGreater(summary["tables"], 1)
+        self.assertEqual(summary["checked"], summary["tables"])
+        record = TableValidationResult.objects.get(table_name=CATEGORY_TABLE)
+        self.assertEqual(record.status, HealthCheckResult.STATUS_ERROR)
+        self.assertEqual(record.model_label, "products.ProductCategory")
+        self.assertIn("1 broken foreign key references", record.issues[0]["message"])
+        self.assertGreaterEqual(summary["errors"], 1)
+
+    def test_unchanged_tables_are_skipped(self):
+        """Test that only changed tables are scanned again."""
+        first = db_validation.validate_tables()
+        record = TableValidationResult.objects.get(table_name=CATEGORY_TABLE)
+
+        second = db_validation.validate_tables()
+        self.assertEqual(second["checked"], 0)
+        self.assertEqual(second["skipped"], first["tables"])
+        self.assertEqual(second["status"], first["status"])
+
+        ProductCategory.objects.create(code="NEW", name="New")
+        third = db_validation.validate_tables()
+        self.assertGreaterEqual(third["checked"], 1)
+        updated = TableValidationResult.objects.get(table_name=CATEGORY_TABLE)
+        self.assertGreater(updated.checked_at, record.checked_at)
+        self.assertEqual(updated.row_count, 3)
+
+        forced = db_validation.validate_tables(force=True)
+        self.assertEqual(forced["checked"], forced["tables"])
+
+    @override_settings(DB_VALIDATION_SAMPLE_ROWS=1, DB_VALIDATION_SAMPLE_SIZE=1)
+    def test_large_tables_are_sampled(self):
+        """Test the sampled mode and its full-scan override."""
+        db_validation.validate_tables()
+        record = TableValidationResult.objects.get(table_name=CATEGORY_TABLE)
+        self.assertTrue(record.sampled)
+        self.assertEqual(record.row_count, 1)
+
+        db_validation.validate_tables(force=True, full=True)
+        record.refresh_from_db()
+        self.assertFalse(record.sampled)
+        self.assertEqual(record.row_count, 2)
+
+    def test_health_check_summarizes_tables(self):
+        """Test the Database Validation health check result."""
+        self._break_parent_reference()
+
+        result = validate_database()
+
+        self.assertEqual(result["status"], HealthCheckResult.STATUS_ERROR)
+        self.assertIn("Issues found:", result["details"])
+        self.assertIn(f"{CATEGORY_TABLE}.parent_id", result["details"])
+
+    def test_view_is_staff_only(self):
+        """Test that only staff users can read the table results."""
+        self._break_parent_reference()
+        db_validation.validate_tables()
+
+        user = User.objects.create_user(username="viewer", password="pw")
+        request = RequestFactory().get(
+            "/monitoring/database-validation/", {"status": "error"}
+        )
+        request.user = user
+        self.assertEqual(get_database_validation_view(request).status_code, 403)
+
+        user.is_staff = True
+        response = get_database_validation_view(request)
+        self.assertEqual(response.status_code, 200)
+        tables = [r["table_name"] for r in json.loads(response.content)["data"]]
+        self.assertIn(CATEGORY_TABLE, tables)
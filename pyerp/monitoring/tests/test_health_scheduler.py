@@ -0,0 +1,160 @@
+"""
+Tests for background health checks and the stored-result health API.
+"""
+
+import json
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from pyerp.monitoring import services
+from pyerp.monitoring.models import HealthCheckResult
+from pyerp.monitoring.tasks import RUN_LOCK_ID, RUN_LOCK_KEY, run_due_health_checks
+from pyerp.monitoring.views import run_health_checks
+
+CALLS = []
+
+
+def _check(component, status=HealthCheckResult.STATUS_SUCCESS):
+    def check():
+        CALLS.append(component)
+        return {
+            "component": component,
+            "status": status,
+            "details": f"{component} ok",
+            "response_time": 12.5,
+            "timestamp": timezone.now(),
+        }
+
+    return check
+
+
+def _failing_check():
+    raise RuntimeError("boom")
+
+
+FAKE_CHECKS = {
+    "Fast": _check("Fast"),
+    "Slow": _check("Slow", HealthCheckResult.STATUS_WARNING),
+    "Broken": _failing_check,
+}
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(HEALTH_CHECK_INTERVALS={"Fast": 60, "Slow": 3600, "Broken": 60})
+@patch("pyerp.monitoring.services.get_health_checks", lambda: dict(FAKE_CHECKS))
+class HealthCheckSchedulerTests(TestCase):
+    """Tests for running due checks and serving stored results."""
+
+    def setUp(self):
+        CALLS.clear()
+        cache.clear()
+
+    def test_only_due_checks_run(self):
+        """Test that each component runs on its own interval."""
+        now = timezone.now()
+        results = services.run_due_health_checks(now=now)
+        self.assertEqual(sorted(r["component"] for r in results), ["Broken", "Fast", "Slow"])
+        self.assertEqual(HealthCheckResult.objects.count(), 3)
+        broken = HealthCheckResult.objects.get(component="Broken")
+        self.assertEqual(broken.status, HealthCheckResult.STATUS_ERROR)
+
+        CALLS.clear()
+        services.run_due_health_checks(now=now + timedelta(seconds=30))
+        self.assertEqual(CALLS, [])
+
+        services.run_due_health_checks(now=now + timedelta(seconds=61))
+        self.assertEqual(CALLS, ["Fast"])
+
+    def test_latest_results_report_staleness(self):
+        """Test that stored results carry their age and a stale flag."""
+        old = timezone.now() - timedelta(minutes=5)
+        HealthCheckResult.objects.create(
+            component="Fast", status="success", response_time=10,
+            timestamp=old - timedelta(minutes=1),
+        )
+        HealthCheckResult.objects.create(
+            component="Fast", status="error", response_time=20, timestamp=old
+        )
+        HealthCheckResult.objects.create(component="Slow", status="warning")
+
+        with self.assertNumQueries(2):
+            results = services.get_latest_health_results(as_array=False)
+
+        self.assertEqual(results["Fast"]["status"], "error")
+        self.assertTrue(results["Fast"]["stale"])
+        self.assertFalse(results["Slow"]["stale"])
+        self.assertEqual(results["Broken"]["status"], HealthCheckResult.STATUS_WARNING)
+        self.assertIsNone(results["Broken"]["timestamp"])
+        self.assertEqual(CALLS, [])
+
+        results = services.get_latest_health_results(as_array=False, history=5)
+        self.assertEqual(
+            [h["response_time"] for h in results["Fast"]["history"]], [20, 10]
+        )
+
+    def test_view_serves_stored_results(self):
+        """Test that the health API does not run live checks."""
+        services.run_due_health_checks()
+        CALLS.clear()
+
+        request = RequestFactory().get("/monitoring/health-checks/", {"history": "3"})
+        response = run_health_checks(request)
+
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)["results"]
+        self.assertEqual({r["component"] for r in results}, {"Fast", "Slow", "Broken"})
+        self.assertTrue(all(len(r["history"]) == 1 for r in results))
+        self.assertEqual(CALLS, [])
+
+    @override_settings(API_CACHE={"ENABLED": False, "ALLOW_LOCAL_CACHE": True})
+    def test_task_skips_overlapping_runs(self):
+        """Test that the beat task does not overlap itself."""
+        cache.add(RUN_LOCK_KEY, "other", 60)
+        self.assertEqual(run_due_health_checks(), 0)
+        self.assertEqual(CALLS, [])
+
+        cache.delete(RUN_LOCK_KEY)
+        self.assertEqual(run_due_health_checks(), 3)
+        self.assertIsNone(cache.get(RUN_LOCK_KEY))
+
+    @override_settings(API_CACHE={"ENABLED": False, "ALLOW_LOCAL_CACHE": True})
+    def test_task_keeps_lock_of_another_run(self):
+        """Test that an expired lock taken over by another run is kept."""
+
+        def take_over(*args, **kwargs):
+            cache.set(RUN_LOCK_KEY, "other", 60)
+            return []
+
+        with patch("pyerp.monitoring.services.run_due_health_checks", take_over):
+            run_due_health_checks()
+        self.assertEqual(cache.get(RUN_LOCK_KEY), "other")
+
+    @skipUnless(connection.vendor == "postgresql", "Advisory locks need PostgreSQL")
+    def test_task_locks_in_database_without_shared_cache(self):
+        """Test that runs on workers with local caches do not overlap."""
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with other.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_lock(%s)", [RUN_LOCK_ID])
+            self.assertEqual(run_due_health_checks(), 0)
+            self.assertEqual(CALLS, [])
+        finally:
+            other.close()
+        self.assertEqual(run_due_health_checks(), 3)
+
+    def test_old_results_are_pruned(self):
+        """Test the retention of stored results."""
+        HealthCheckResult.objects.create(
+            component="Fast", status="success",
+            timestamp=timezone.now() - timedelta(days=40),
+        )
+        HealthCheckResult.objects.create(component="Fast", status="success")
+        self.assertEqual(services.prune_health_results(days=30), 1)
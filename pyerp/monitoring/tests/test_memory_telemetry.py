@@ -0,0 +1,137 @@
+"""
+Tests for the memory telemetry of Celery tasks and HTTP routes.
+"""
+
+import json
+import tracemalloc
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from pyerp.middleware.performance import PerformanceMonitoringMiddleware
+from pyerp.monitoring import memory_telemetry
+from pyerp.monitoring.models import TaskMemoryUsage
+from pyerp.monitoring.services import get_heaviest_tasks
+from pyerp.monitoring.views import get_memory_telemetry_view
+
+User = get_user_model()
+
+MB = 1024 * 1024
+
+
+@pytest.mark.unit
+def test_route_memory_stats_orders_by_peak():
+    stats = memory_telemetry.RouteMemoryStats()
+    stats.record("GET /small/", {"rss_delta": MB, "peak_delta": 0})
+    stats.record("GET /big/", {"rss_delta": 2 * MB, "peak_delta": 8 * MB})
+    stats.record("GET /big/", {"rss_delta": -MB, "peak_delta": None})
+
+    rows = stats.snapshot()
+    assert [row["route"] for row in rows] == ["GET /big/", "GET /small/"]
+    assert rows[0]["requests"] == 2
+    assert rows[0]["total_rss_delta"] == MB
+    assert rows[0]["peak_raises"] == 1
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class TaskMemoryTelemetryTests(TestCase):
+    """Tests for recording memory usage around task runs."""
+
+    def test_task_run_is_recorded(self):
+        """Test that a started and finished task is stored with its readings."""
+        memory_telemetry.task_started("task-1", "sync.products")
+        record = TaskMemoryUsage.objects.get(task_id="task-1")
+        self.assertIsNone(record.finished_at)
+
+        readings = memory_telemetry.task_finished("task-1", "sync.products", "SUCCESS")
+
+        record.refresh_from_db()
+        self.assertEqual(record.state, "SUCCESS")
+        self.assertIsNotNone(record.finished_at)
+        self.assertEqual(record.rss_after, readings["rss_after"])
+        self.assertIsNone(record.top_growers)
+        self.assertIsNone(memory_telemetry.task_finished("task-1", "sync.products"))
+
+    @override_settings(MEMORY_TELEMETRY_THRESHOLD_MB=0, MEMORY_TELEMETRY_TOP_GROWERS=5)
+    def test_heavy_task_gets_snapshot_diff(self):
+        """Test that exceeding the threshold stores the top growers."""
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            memory_telemetry.diff_snapshots()
+            memory_telemetry.task_started("task-2", "sync.sales")
+            ballast = [bytearray(1024) for _ in range(2000)]  # noqa: F841
+            memory_telemetry.task_finished("task-2", "sync.sales", "SUCCESS")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        growers = TaskMemoryUsage.objects.get(task_id="task-2").top_growers
+        self.assertEqual(len(growers), 5)
+        self.assertGreater(growers[0]["size_diff_kib"], 0)
+        self.assertIn("test_memory_telemetry.py", growers[0]["location"])
+
+    def test_old_rows_are_pruned(self):
+        """Test that rows past the retention period are deleted."""
+        TaskMemoryUsage.objects.create(
+            name="old", started_at=timezone.now() - timedelta(days=30)
+        )
+        TaskMemoryUsage.objects.create(name="new")
+        with patch.object(memory_telemetry, "_last_prune", 0.0):
+            memory_telemetry.prune_if_due()
+        self.assertEqual(
+            list(TaskMemoryUsage.objects.values_list("name", flat=True)), ["new"]
+        )
+
+    def test_heaviest_tasks(self):
+        """Test the per-task summary and unfinished runs."""
+        TaskMemoryUsage.objects.create(
+            name="sync.products", peak_delta=50 * MB, rss_delta=10 * MB,
+            finished_at=timezone.now(),
+        )
+        TaskMemoryUsage.objects.create(
+            name="sync.sales", peak_delta=900 * MB, rss_delta=400 * MB,
+            finished_at=timezone.now(),
+        )
+        TaskMemoryUsage.objects.create(name="sync.sales", task_id="killed")
+
+        summary = get_heaviest_tasks(days=1)
+
+        self.assertEqual(
+            [(t["name"], t["runs"], t["unfinished"]) for t in summary["tasks"]],
+            [("sync.sales", 2, 1), ("sync.products", 1, 0)],
+        )
+        self.assertEqual([u["task_id"] for u in summary["unfinished"]], ["killed"])
+
+    def test_view_is_staff_only(self):
+        """Test that only staff users can read the telemetry."""
+        user = User.objects.create_user(username="viewer", password="pw")
+        request = RequestFactory().get("/monitoring/memory-telemetry/", {"days": 1})
+        request.user = user
+        self.assertEqual(get_memory_telemetry_view(request).status_code, 403)
+
+        user.is_staff = True
+        response = get_memory_telemetry_view(request)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)["data"]
+        self.assertEqual(set(data), {"tasks", "unfinished", "routes"})
+
+
+@pytest.mark.unit
+@override_settings(MEMORY_TELEMETRY_ENABLED=True, REQUEST_PROFILING_ENABLED=False)
+def test_middleware_records_route_memory():
+    memory_telemetry.route_memory_stats.reset()
+    request = RequestFactory().get("/api/items/")
+    request.resolver_match = MagicMock(route="api/items/")
+    PerformanceMonitoringMiddleware(lambda r: HttpResponse("ok"))(request)
+
+    rows = memory_telemetry.route_memory_stats.snapshot()
+    memory_telemetry.route_memory_stats.reset()
+    assert [(row["route"], row["requests"]) for row in rows] == [("GET /api/items/", 1)]
@@ -0,0 +1,160 @@
+"""
+Tests for the request profiler in PerformanceMonitoringMiddleware.
+"""
+
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from pyerp.core.models import AuditLog
+from pyerp.middleware import profiling
+from pyerp.middleware.performance import PerformanceMonitoringMiddleware
+from pyerp.monitoring.views import get_request_profiles_view
+
+User = get_user_model()
+
+
+def _n_plus_one_view(request):
+    for i in range(6):
+        list(AuditLog.objects.filter(id=i))
+    list(AuditLog.objects.filter(id__in=[1, 2, 3]))
+    list(AuditLog.objects.filter(id__in=[1, 2]))
+    return HttpResponse("ok")
+
+
+@pytest.mark.unit
+def test_normalize_sql_collapses_in_lists():
+    assert profiling.normalize_sql(
+        'SELECT "x" FROM "t"\n  WHERE "id" IN (%s, %s, %s)'
+    ) == profiling.normalize_sql('SELECT "x" FROM "t" WHERE "id" IN (%s)')
+
+
+@pytest.mark.unit
+def test_route_stats_percentiles():
+    stats = profiling.RouteStats(window=100)
+    for i in range(1, 201):
+        profile = profiling.RequestProfile()
+        profile.query_count = i
+        stats.record("GET /items/", float(i), profile)
+
+    snapshot = stats.snapshot()["GET /items/"]
+    assert snapshot["requests"] == 200
+    assert snapshot["samples"] == 100
+    assert snapshot["duration_ms"] == {"p50": 150.0, "p95": 195.0, "p99": 199.0}
+    assert snapshot["query_count"]["p50"] == 150
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(REQUEST_PROFILING_ENABLED=True, REQUEST_PROFILING_SAMPLE_RATE=1)
+class RequestProfilingMiddlewareTests(TestCase):
+    """Tests for profiling requests through the middleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        profiling.route_stats.reset()
+        self.addCleanup(profiling.route_stats.reset)
+
+    def _run(self, view):
+        request = self.factory.get("/api/items/")
+        request.resolver_match = MagicMock(route="api/items/")
+        middleware = PerformanceMonitoringMiddleware(view)
+        with patch.object(middleware, "_log_performance") as log:
+            middleware(request)
+        return log.call_args.kwargs["profile"]
+
+    def test_counts_queries_and_duplicates(self):
+        """Test that repeated query shapes are detected."""
+        profile = self._run(_n_plus_one_view)
+
+        self.assertEqual(profile.query_count, 8)
+        self.assertGreaterEqual(profile.db_time_ms, 0)
+        duplicates = profile.duplicate_queries()
+        self.assertEqual([d["count"] for d in duplicates], [6])
+        self.assertEqual(profile.duplicate_queries(threshold=2)[1]["count"], 2)
+
+        stats = profiling.route_stats.snapshot()["GET /api/items/"]
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["requests_with_duplicate_queries"], 1)
+        self.assertEqual(stats["query_count"]["p99"], 8)
+
+    def test_records_http_calls(self):
+        """Test that outgoing requests calls are timed."""
+        import requests
+        from urllib3.response import HTTPResponse
+
+        def view(request):
+            requests.get("http://legacy.example/api/items?page=2", timeout=1)
+            return HttpResponse("ok")
+
+        raw = HTTPResponse(body=io.BytesIO(b"{}"), status=200, preload_content=False)
+        with patch(
+            "urllib3.connectionpool.HTTPConnectionPool.urlopen", return_value=raw
+        ):
+            profile = self._run(view)
+
+        self.assertEqual(len(profile.http_calls), 1)
+        call = profile.http_calls[0]
+        self.assertEqual(call["url"], "http://legacy.example/api/items")
+        self.assertEqual(call["status_code"], 200)
+        self.assertEqual(profiling.get_current_profile(), None)
+
+    @override_settings(REQUEST_PROFILING_ENABLED=False, PERFORMANCE_LOGGING_ENABLED=True)
+    def test_disabled_profiler_records_nothing(self):
+        """Test that nothing is collected while profiling is off."""
+        self.assertIsNone(self._run(_n_plus_one_view))
+        self.assertEqual(profiling.route_stats.snapshot(), {})
+
+    @override_settings(
+        REQUEST_PROFILING_ENABLED=False,
+        PERFORMANCE_LOGGING_ENABLED=False,
+        MEMORY_TELEMETRY_ENABLED=False,
+    )
+    def test_middleware_unused_when_everything_is_off(self):
+        """Test that the middleware drops out without anything to collect."""
+        with self.assertRaises(MiddlewareNotUsed):
+            PerformanceMonitoringMiddleware(_n_plus_one_view)
+
+    @override_settings(REQUEST_PROFILING_ENABLED=False, MEMORY_TELEMETRY_ENABLED=False)
+    def test_requests_are_logged_by_default(self):
+        """Test that request durations are logged without any profiling."""
+        middleware = PerformanceMonitoringMiddleware(lambda r: HttpResponse("ok"))
+        with patch.object(middleware, "_log_performance") as log:
+            middleware(self.factory.get("/api/items/"))
+        log.assert_called_once()
+
+    @override_settings(
+        REQUEST_PROFILING_ENABLED=False,
+        PERFORMANCE_LOGGING_ENABLED=False,
+        MEMORY_TELEMETRY_ENABLED=True,
+    )
+    def test_no_log_line_without_performance_logging(self):
+        """Test that unprofiled requests are not logged with logging off."""
+        middleware = PerformanceMonitoringMiddleware(lambda r: HttpResponse("ok"))
+        with patch.object(middleware, "_log_performance") as log:
+            middleware(self.factory.get("/api/items/"))
+        log.assert_not_called()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class RequestProfilesViewTests(TestCase):
+    """Tests for the request profile monitoring endpoint."""
+
+    def test_staff_only(self):
+        """Test that only staff users can read the profiles."""
+        user = User.objects.create_user(username="viewer", password="pw")
+        request = RequestFactory().get("/monitoring/request-profiles/")
+        request.user = user
+        self.assertEqual(get_request_profiles_view(request).status_code, 403)
+
+        user.is_staff = True
+        response = get_request_profiles_view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("data", json.loads(response.content))
@@ -13,4 +13,12 @@ urlpatterns = [
     path("health-checks/", views.run_health_checks, name="health_checks"),
     path("db-stats/", views.get_db_statistics, name="db_statistics"),
     path("host-resources/", views.get_host_resources_view, name="host_resources"),
+    path("api-cache-stats/", views.get_api_cache_stats_view, name="api_cache_stats"),
+    path("request-profiles/", views.get_request_profiles_view, name="request_profiles"),
+    path("memory-telemetry/", views.get_memory_telemetry_view, name="memory_telemetry"),
+    path(
+        "database-validation/",
+        views.get_database_validation_view,
+        name="database_validation",
+    ),
 ]
@@ -6,25 +6,37 @@ from datetime import datetime
 
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_GET, require_http_methods
 
+from pyerp.core.api_cache import get_cache_stats
+from pyerp.monitoring.models import HealthCheckResult
+from pyerp.middleware.profiling import profiling_enabled, route_stats
+from pyerp.monitoring.memory_telemetry import route_memory_stats, telemetry_enabled
 from pyerp.monitoring.services import (
     get_database_statistics,
+    get_heaviest_tasks,
     get_host_resources,
-    run_all_health_checks,
+    get_latest_health_results,
+    get_table_validation_results,
 )
 from pyerp.utils.logging import get_logger
 
 
 logger = get_logger(__name__)
 
+# Maximum number of previous results per component in the health API
+MAX_HISTORY = 100
+
 
 # Apply decorators to exempt this view from authentication and CSRF protection
 @require_GET
 @csrf_exempt
 def run_health_checks(request):
     """
-    Run all health checks and return the results as JSON.
+    Return the latest stored health check results as JSON.
+    The checks themselves run in the background on per-component
+    intervals; each result reports its age and whether it is stale.
+    Pass ``history=N`` to include the last N results per component.
     This is a basic API endpoint that can be used by external monitoring tools.
     This view is intentionally not protected by authentication to allow
     external monitoring.
@@ -33,9 +45,13 @@ def run_health_checks(request):
         # Check if the client prefers array or dictionary format
         format_param = request.GET.get("format", "array").lower()
         as_array = format_param != "dict"
+        try:
+            history = min(max(int(request.GET.get("history", 0)), 0), MAX_HISTORY)
+        except ValueError:
+            history = 0
 
-        # Run health checks and get results
-        results = run_all_health_checks(as_array=as_array)
+        # Read the latest stored results
+        results = get_latest_health_results(as_array=as_array, history=history)
 
         # Create response data
         response_data = {
@@ -169,3 +185,116 @@ def get_host_resources_view(request):
             },
             status=500,
         )
+
+
+@require_GET
+def get_api_cache_stats_view(request):
+    """
+    Return per-endpoint API response cache counters and hit rates.
+    Restricted to staff users.
+    """
+    if not (hasattr(request, "user") and request.user.is_staff):
+        return JsonResponse(
+            {"success": False, "error": "Staff access required"},
+            status=403,
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "data": get_cache_stats(),
+            "server_time": datetime.now().isoformat(),
+        }
+    )
+
+
+@require_http_methods(["GET", "DELETE"])
+def get_request_profiles_view(request):
+    """
+    Return per-route query counts, DB time, HTTP time and latency
+    percentiles collected by the request profiler. DELETE clears them.
+    Restricted to staff users.
+    """
+    if not (hasattr(request, "user") and request.user.is_staff):
+        return JsonResponse(
+            {"success": False, "error": "Staff access required"},
+            status=403,
+        )
+
+    if request.method == "DELETE":
+        route_stats.reset()
+
+    return JsonResponse(
+        {
+            "success": True,
+            "enabled": profiling_enabled(),
+            "data": route_stats.snapshot(),
+            "server_time": datetime.now().isoformat(),
+        }
+    )
+
+
+@require_GET
+def get_memory_telemetry_view(request):
+    """
+    Return the tasks that used the most memory, task runs that never
+    finished, and the routes of this process that grew memory the most.
+    Restricted to staff users.
+    """
+    if not (hasattr(request, "user") and request.user.is_staff):
+        return JsonResponse(
+            {"success": False, "error": "Staff access required"},
+            status=403,
+        )
+
+    try:
+        days = int(request.GET.get("days", 7))
+        limit = int(request.GET.get("limit", 20))
+        if days < 1 or limit < 1:
+            raise ValueError
+    except ValueError:
+        return JsonResponse(
+            {"success": False, "error": "days and limit must be positive integers"},
+            status=400,
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "enabled": telemetry_enabled(),
+            "data": {
+                **get_heaviest_tasks(days=days, limit=limit),
+                "routes": route_memory_stats.snapshot(limit=limit),
+            },
+            "server_time": datetime.now().isoformat(),
+        }
+    )
+
+
+@require_GET
+def get_database_validation_view(request):
+    """
+    Return the stored per-table database validation results.
+    Pass ``status=error`` or ``status=warning`` to only list failing tables.
+    Restricted to staff users.
+    """
+    if not (hasattr(request, "user") and request.user.is_staff):
+        return JsonResponse(
+            {"success": False, "error": "Staff access required"},
+            status=403,
+        )
+
+    status = request.GET.get("status")
+    if status and status not in dict(HealthCheckResult.STATUS_CHOICES):
+        return JsonResponse(
+            {"success": False, "error": f"Unknown status: {status}"},
+            status=400,
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "data": get_table_validation_results(status=status),
+            "server_time": datetime.now().isoformat(),
+        }
+    )
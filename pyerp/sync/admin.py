@@ -7,6 +7,7 @@ from .models import (
     SyncSource,
     SyncTarget,
     SyncMapping,
+    SyncRequest,
     SyncState,
     SyncLog,
 )
@@ -39,6 +40,13 @@ class SyncStateInline(admin.TabularInline):
         "last_successful_sync_time",
         "last_sync_id",
         "last_successful_id",
+        "high_watermark",
+        "last_full_sync_time",
+        "last_sync_mode",
+        "last_rows_fetched",
+        "last_rows_changed",
+        "last_reconcile_time",
+        "last_rows_missing",
     )
     extra = 0
 
@@ -139,3 +147,29 @@ class SyncLogAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(SyncRequest)
+class SyncRequestAdmin(admin.ModelAdmin):
+    """Admin interface for queued and running syncs."""
+
+    list_display = (
+        "id",
+        "mapping",
+        "incremental",
+        "status",
+        "priority",
+        "coalesced",
+        "requested_at",
+        "started_at",
+        "finished_at",
+    )
+    list_filter = ("status", "incremental", "mapping__source")
+    search_fields = ("mapping__entity_type", "task_id", "error_message")
+    date_hierarchy = "requested_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
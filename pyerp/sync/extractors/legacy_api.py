@@ -1,14 +1,16 @@
 """Legacy API data extractor implementation."""
 
 import os
-import json
 import logging # Import logging
 from datetime import datetime, time, timezone, date
 from typing import Any, Dict, List, Optional
 import pandas as pd
 
 from pyerp.external_api.legacy_erp import LegacyERPClient
+from pyerp.external_api.legacy_erp.paging import is_timeout
+from pyerp.utils import json_utils
 from pyerp.utils.logging import get_logger, log_data_sync_event
+from pyerp.sync import queue as sync_queue
 from pyerp.sync.exceptions import ExtractError
 from pyerp.utils.date_utils import parse_date_string # Import the new utility
 
@@ -51,6 +53,8 @@ class LegacyAPIExtractor(BaseExtractor):
             config: Configuration dictionary
         """
         super().__init__(config)
+        # Statistics of the last connection, kept after it is closed
+        self._fetch_stats = None
 
     def get_required_config_fields(self) -> List[str]:
         """Get required configuration fields.
@@ -213,6 +217,11 @@ class LegacyAPIExtractor(BaseExtractor):
                             )
                             final_filter_query.extend(date_conditions)
                         break  # Assume only one date filter key is used per query
+
+                # 4. Add the watermark filter of incremental syncs
+                final_filter_query.extend(
+                    self._build_timestamp_filter_query(query_params)
+                )
             else:
                 logger.info(
                     "Skipping date filters as parent ID filter is active."
@@ -230,7 +239,8 @@ class LegacyAPIExtractor(BaseExtractor):
                 all_records=all_records,
                 filter_query=final_filter_query 
                 if final_filter_query else None,
-                top=top
+                top=top,
+                attributes=self._get_attributes(query_params),
             )
 
             # Ensure we have a list of dictionaries before caching
@@ -276,8 +286,13 @@ class LegacyAPIExtractor(BaseExtractor):
         """
         Extract data from the API in batches using pagination.
 
+        Pages are sized by the table's ``AdaptivePager`` unless
+        ``adaptive_paging`` is false in the config; a page that times out
+        is fetched again with a smaller size.
+
         Args:
-            api_page_size: The number of records (page size / $top) to fetch per API call.
+            api_page_size: The number of records (page size / $top) to fetch
+                per API call, or the size to start with when paging adaptively.
             query_params: Additional query parameters, similar to extract(),
                           but $top and $skip will be managed internally based on api_page_size.
 
@@ -406,13 +421,22 @@ class LegacyAPIExtractor(BaseExtractor):
                     final_filter_query.extend(date_conditions)
                     # Removed break to allow multiple date filters if needed
 
+        # 4. Add the watermark filter of incremental syncs
+        final_filter_query.extend(self._build_timestamp_filter_query(query_params))
+
         # --- Log Initial Filter --- 
         logger.info(f"API filter query for batching: {final_filter_query}")
+        attributes = self._get_attributes(query_params)
+
+        pager = None
+        if self.config.get("adaptive_paging", True):
+            pager = client.get_pager(table_name, api_page_size)
 
         # --- Pagination loop ---
         while True:
             # Determine the size for the current API call
-            current_api_page_size = api_page_size
+            page_size = pager.page_size if pager else api_page_size
+            current_api_page_size = page_size
             if top_limit is not None:
                 remaining = top_limit - processed_records
                 if remaining <= 0:
@@ -422,7 +446,7 @@ class LegacyAPIExtractor(BaseExtractor):
                     )
                     break
                 # Request only the remaining number if it's less than the full batch size
-                current_api_page_size = min(api_page_size, remaining)
+                current_api_page_size = min(page_size, remaining)
 
             logger.debug(
                 f"Fetching batch: table={table_name}, skip={skip}, "
@@ -438,13 +462,16 @@ class LegacyAPIExtractor(BaseExtractor):
                     filter_query=final_filter_query 
                     if final_filter_query else None,
                     skip=skip,
-                    top=current_api_page_size
+                    top=current_api_page_size,
+                    attributes=attributes,
                     # Pass other relevant params from query_params if needed,
-                    # e.g., select, orderby
-                    # select=query_params.get('$select'),
+                    # e.g., orderby
                     # orderby=query_params.get('$orderby')
                 )
 
+                # Keep the lock of a long running sync, see pyerp.sync.queue
+                sync_queue.heartbeat()
+
                 # Check if batch is None or empty list/DataFrame
                 if batch is None:
                     logger.warning(
@@ -579,12 +606,18 @@ class LegacyAPIExtractor(BaseExtractor):
                     break
 
                 # Prepare for the next batch
-                skip += api_page_size # Increment skip by the requested API page size
+                skip += current_api_page_size # Increment skip by the requested API page size
 
             except ExtractError as e:
                 logger.error(f"Extraction error during batch fetch: {e}")
                 raise  # Re-raise the specific error
             except Exception as e:
+                if pager and is_timeout(e) and pager.shrink():
+                    logger.warning(
+                        f"Batch of {table_name} at skip={skip} timed out, "
+                        f"retrying with {pager.page_size} records"
+                    )
+                    continue
                 logger.error(
                     f"Unexpected error during batch fetch "
                     f"(table: {table_name}, skip: {skip}): {e}"
@@ -662,6 +695,91 @@ class LegacyAPIExtractor(BaseExtractor):
 
         return filter_query
 
+    def extract_keys(self, key_field: str = "__KEY", page_size: int = 50000, keys=None):
+        """Extract only the record keys of the table, page by page.
+
+        Args:
+            key_field: Field holding the record key, e.g. __KEY or AbsNr
+            page_size: Number of keys to fetch per API call
+            keys: Optional keys to look up instead of listing the whole table
+
+        Yields:
+            Lists with the keys of each page
+        """
+        filter_query = None
+        if keys is not None:
+            if not keys:
+                return
+            filter_query = [[key_field, "=", key] for key in keys]
+        yield from self.connection.fetch_keys(
+            table_name=self.config["table_name"],
+            key_field=key_field,
+            page_size=page_size,
+            filter_query=filter_query,
+        )
+
+    def get_fetch_stats(self) -> Optional[Dict[str, Any]]:
+        """Return the fetch statistics of the table, see BaseAPIClient."""
+        if self.connection is not None:
+            self._fetch_stats = self.connection.get_fetch_stats(
+                self.config["table_name"]
+            )
+        return self._fetch_stats
+
+    def close(self) -> None:
+        """Close the connection, keeping its fetch statistics."""
+        if self.connection is not None:
+            self.get_fetch_stats()
+        super().close()
+
+    def _get_attributes(self, query_params: Dict[str, Any]) -> Optional[List[str]]:
+        """Return the columns to fetch, or None to fetch all columns.
+
+        ``attributes`` in the config lists the source columns the sync
+        needs, ``auto`` is resolved from the transformer config by
+        ``PipelineFactory``. ``extra_attributes`` adds columns only read in
+        code. The record key, the watermark field and the columns filtered
+        on client side are always fetched.
+        """
+        attributes = self.config.get("attributes")
+        if not attributes or attributes == "auto":
+            return None
+        attributes = list(attributes) + list(self.config.get("extra_attributes") or [])
+        attributes.append("__KEY")
+        attributes.append(
+            query_params.get("timestamp_field")
+            or self.config.get("timestamp_field")
+            or "__TIMESTAMP"
+        )
+        if "parent_record_ids" in query_params:
+            attributes.append(query_params.get("parent_field", "AbsNr"))
+        attributes.extend(key for key in self.KNOWN_DATE_KEYS if key in query_params)
+        return list(dict.fromkeys(attributes))
+
+    def _build_timestamp_filter_query(self, query_params: Dict[str, Any]) -> List[List[str]]:
+        """Build the filter of an incremental sync from its watermark.
+
+        ``SyncPipeline`` passes the timestamp to fetch modified records from
+        as ``timestamp_filter`` and the field to compare in
+        ``timestamp_field``, ``__TIMESTAMP`` unless configured otherwise.
+        """
+        since = query_params.get("timestamp_filter")
+        if not since:
+            return []
+        field = (
+            query_params.get("timestamp_field")
+            or self.config.get("timestamp_field")
+            or "__TIMESTAMP"
+        )
+        formatted = self._format_date_for_api(since)
+        if formatted is None:
+            logger.warning(
+                f"Could not format timestamp filter '{since}', fetching all records"
+            )
+            return []
+        logger.info(f"Fetching records with {field} >= {formatted}")
+        return [[field, ">=", formatted]]
+
     def _format_date_for_api(self, date_input: Any, end_of_day: bool = False) -> Optional[str]:
         """
         Format a date input (string, date, datetime) into an ISO 8601 UTC string.
@@ -787,7 +905,7 @@ class LegacyAPIExtractor(BaseExtractor):
             try:
                 # Sort the keys to ensure consistent ordering
                 sorted_params = sorted(query_params.items())
-                params_str = json.dumps(sorted_params)
+                params_str = json_utils.dumps(sorted_params).decode()
             except (TypeError, ValueError):
                 # If we can't serialize the params, use their string representation
                 params_str = str(
@@ -798,6 +916,10 @@ class LegacyAPIExtractor(BaseExtractor):
 
         # Create a unique cache key based on table name and parameters
         table_name = self.config.get('table_name', '')
+        attributes = self._get_attributes(query_params or {})
+        if attributes:
+            # Syncs of the same table may fetch different columns
+            return f"{table_name}_{params_str}_{','.join(attributes)}"
         return f"{table_name}_{params_str}"
 
     @classmethod
@@ -830,7 +952,7 @@ class LegacyAPIExtractor(BaseExtractor):
             try:
                 # Sort the keys to ensure consistent ordering
                 sorted_params = sorted(query_params.items())
-                params_str = json.dumps(sorted_params)
+                params_str = json_utils.dumps(sorted_params).decode()
             except (TypeError, ValueError):
                 # If we can't serialize the params, use their string representation
                 params_str = str(
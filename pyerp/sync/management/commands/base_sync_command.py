@@ -1,5 +1,6 @@
 from argparse import ArgumentParser
 import json
+from contextlib import ExitStack
 from datetime import timedelta
 from typing import Any, Dict, Optional
 
@@ -8,6 +9,7 @@ from django.utils import timezone
 from pyerp.utils.logging import get_logger
 
 from pyerp.sync.models import SyncMapping  # Assuming SyncMapping might be needed
+from pyerp.sync.queue import sync_lock
 
 
 logger = get_logger(__name__)
@@ -171,21 +173,56 @@ class BaseSyncCommand(BaseCommand):
         logger.debug("Built query_params: %s", query_params)
         return query_params
 
+    def execute(self, *args, **options):
+        """Run the command, holding the locks taken by get_mapping."""
+        self._options = options
+        self._mapping_locks = ExitStack()
+        try:
+            with self._mapping_locks:
+                return super().execute(*args, **options)
+        finally:
+            self._mapping_locks = None
+
     def handle(self, *args, **options):
         """Main command handler. Subclasses must implement specific logic."""
         raise NotImplementedError(
             "Subclasses must implement the handle() method."
         )
 
+    def lock_mapping(self, mapping: SyncMapping) -> None:
+        """
+        Hold the sync lock of a mapping until the command ends.
+
+        The command then fails instead of running alongside a queued or
+        scheduled sync of the same mapping, see ``pyerp.sync.queue``.
+        """
+        locks = getattr(self, "_mapping_locks", None)
+        if locks is None:
+            # handle() was called without execute(), e.g. in tests
+            return
+        options = getattr(self, "_options", {})
+        request = locks.enter_context(
+            sync_lock(
+                mapping,
+                incremental=not options.get("full"),
+                batch_size=options.get("batch_size") or 100,
+                query_params={"command": self.__module__.rsplit(".", 1)[-1]},
+            )
+        )
+        if request is None:
+            raise CommandError(
+                f"Mapping '{mapping.entity_type}' (ID: {mapping.id}) is already "
+                f"syncing or its source is at its concurrency limit."
+            )
+
     def get_mapping(self, entity_type: str) -> SyncMapping:
-        """Helper to get the active SyncMapping for a given entity type."""
+        """Helper to get and lock the active SyncMapping for an entity type."""
         try:
             mapping = SyncMapping.objects.get(entity_type=entity_type, active=True)
             logger.info(
                 "Found active mapping for entity_type='%s' (ID: %s)",
                 entity_type, mapping.id
             )
-            return mapping
         except SyncMapping.DoesNotExist:
             msg = (
                 f"No active SyncMapping found for entity_type='{entity_type}'. "
@@ -198,6 +235,8 @@ class BaseSyncCommand(BaseCommand):
                 f"'{entity_type}'. Deactivate duplicates."
             )
             raise CommandError(msg)
+        self.lock_mapping(mapping)
+        return mapping
 
     def run_sync_via_command(
         self,
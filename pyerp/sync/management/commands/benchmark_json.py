@@ -0,0 +1,92 @@
+"""
+Management command to benchmark JSON encoding and decoding.
+
+Builds a synthetic page of legacy ERP sales records, with dates, datetimes
+and decimals like a ``Belege`` page, and times ``json_utils.dumps`` and
+``json_utils.loads`` against the standard library, which needs
+``json_serialize`` to convert the decimals ``DateTimeEncoder`` rejects.
+"""
+
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from pyerp.utils import json_utils
+from pyerp.utils.json_utils import DateTimeEncoder, json_serialize
+
+
+class Command(BaseCommand):
+    help = "Benchmark the fast JSON backend against the standard library"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--records",
+            type=int,
+            default=10000,
+            help="Number of sales records in the page",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs; the fastest is reported",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        record_count = options["records"]
+        repeat = max(1, options["repeat"])
+        page = {"__ENTITIES": self._build_records(record_count)}
+
+        fast = json_utils.dumps(page)
+        stdlib = json.dumps(json_serialize(page), cls=DateTimeEncoder)
+        self.stdout.write(
+            f"{record_count} records, {len(fast) / 1024:.0f} KiB, "
+            f"backend: {json_utils.JSON_BACKEND}"
+        )
+
+        self._report(
+            "encode json_utils", repeat, lambda: json_utils.dumps(page)
+        )
+        self._report(
+            "encode json_serialize + json",
+            repeat,
+            lambda: json.dumps(json_serialize(page), cls=DateTimeEncoder).encode(),
+        )
+        self._report("decode json_utils", repeat, lambda: json_utils.loads(fast))
+        self._report("decode json", repeat, lambda: json.loads(stdlib))
+
+    def _build_records(self, record_count):
+        start = datetime(2025, 1, 1, 8, 0)
+        return [
+            {
+                "__KEY": str(i),
+                "__STAMP": i % 7,
+                "AbsNr": 100000 + i,
+                "PapierNr": f"R{i:07d}",
+                "Papierart": "R" if i % 3 else "L",
+                "KundenNr": 10000 + i % 2500,
+                "Datum": date(2025, 1, 1) + timedelta(days=i % 365),
+                "__TIMESTAMP": start + timedelta(minutes=i),
+                "Netto": Decimal(f"{i % 5000}.{i % 100:02d}"),
+                "MWST_EUR": Decimal(f"{i % 950}.{i % 97:02d}"),
+                "Rabatt": (i % 20) / 100,
+                "bezahlt": bool(i % 2),
+                "Text": f"Bestellung {i} über Webshop" if i % 4 else None,
+            }
+            for i in range(record_count)
+        ]
+
+    def _report(self, label, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{label}: {min(timings) * 1000:.2f} ms")
+        )
@@ -0,0 +1,47 @@
+"""Management command for handling records deleted in the legacy ERP."""
+
+from django.core.management.base import BaseCommand
+
+from pyerp.sync.tasks import reconcile_deletes
+
+
+class Command(BaseCommand):
+    """Find local records whose source record was deleted."""
+
+    help = (
+        "Diff the keys of source tables against local rows and flag or delete "
+        "the rows missing in the source, as set in each mapping's reconcile "
+        "config"
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "--mapping", type=int, help="ID of a specific mapping to reconcile"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows missing in the source",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        results = reconcile_deletes(
+            mapping_id=options["mapping"], dry_run=options["dry_run"]
+        )
+        if not results:
+            self.stdout.write("No mapping with reconcile enabled found")
+            return
+
+        for result in results:
+            line = (
+                f"{result['entity_type']}: {result['status']}, "
+                f"{result.get('missing', 0)} of {result.get('local_rows', 0)} "
+                f"rows missing, {result.get('applied', 0)} handled"
+            )
+            if result["status"] == "completed":
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                error = result.get("error")
+                self.stdout.write(self.style.WARNING(f"{line} {error or ''}".rstrip()))
@@ -9,6 +9,8 @@ from django.utils import timezone
 
 from pyerp.sync.models import SyncMapping
 from pyerp.sync.pipeline import PipelineFactory
+from pyerp.sync.queue import sync_lock
+from pyerp.sync.spill import SpilledRecords
 
 
 logger = logging.getLogger(__name__)
@@ -114,118 +116,146 @@ class Command(BaseCommand):
                 f"Source: {mapping.source.name}, Target: {mapping.target.name})"
             )
 
-            try:
-                # Create pipeline first, handle potential creation errors
-                try:
-                    pipeline = PipelineFactory.create_pipeline(mapping)
-                    self.stdout.write(f"Pipeline created successfully for mapping ID {mapping.id}")
-                except Exception as creation_error:
+            # Take the same per-mapping lock as queued syncs, so a manual
+            # run does not overlap a scheduled one (see pyerp.sync.queue)
+            with sync_lock(
+                mapping,
+                incremental=incremental,
+                batch_size=batch_size,
+                query_params=query_params,
+            ) as request:
+                if request is None:
                     self.stdout.write(
-                        self.style.ERROR(
-                            f"Failed to create pipeline for mapping ID {mapping.id} "
-                            f"({mapping.entity_type} from {mapping.source.name} to {mapping.target.name}): "
-                            f"{str(creation_error)}"
+                        self.style.WARNING(
+                            f"Skipping mapping ID {mapping.id}, it is already "
+                            f"syncing or its source is at its concurrency limit"
                         )
                     )
-                    if debug:
-                        import traceback
-                        traceback.print_exc()
-                    continue # Skip to the next mapping if pipeline creation fails
+                    continue
 
-                # Now run the successfully created pipeline
                 cached_data = None
-                sync_log = None
-                use_cached_data = False
-
-                # 1. Attempt to fetch data using pipeline's fetch_data method
-                if hasattr(pipeline, "fetch_data"):
+                try:
+                    # Create pipeline first, handle potential creation errors
                     try:
-                        self.stdout.write(f"Attempting to pre-fetch data for {mapping.entity_type}...")
-                        cached_data = pipeline.fetch_data(
+                        pipeline = PipelineFactory.create_pipeline(mapping)
+                        self.stdout.write(f"Pipeline created successfully for mapping ID {mapping.id}")
+                    except Exception as creation_error:
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f"Failed to create pipeline for mapping ID {mapping.id} "
+                                f"({mapping.entity_type} from {mapping.source.name} to {mapping.target.name}): "
+                                f"{str(creation_error)}"
+                            )
+                        )
+                        if debug:
+                            import traceback
+                            traceback.print_exc()
+                        continue # Skip to the next mapping if pipeline creation fails
+
+                    # Now run the successfully created pipeline
+                    sync_log = None
+                    use_cached_data = False
+
+                    # 1. Attempt to fetch data using pipeline's fetch_data method
+                    if hasattr(pipeline, "fetch_data"):
+                        try:
+                            self.stdout.write(f"Attempting to pre-fetch data for {mapping.entity_type}...")
+                            # Full loads may be spilled to disk, see SyncPipeline.run
+                            cached_data = pipeline.fetch_data(
+                                query_params=query_params,
+                                fail_on_filter_error=fail_on_filter_error,
+                                spill=not incremental,
+                            )
+                            if cached_data is not None:
+                                self.stdout.write(self.style.SUCCESS(f"Successfully pre-fetched {len(cached_data)} records."))
+                                use_cached_data = True
+                            else:
+                                self.stdout.write(self.style.NOTICE("fetch_data returned None, proceeding without cache."))
+                        except NotImplementedError:
+                            self.stdout.write(self.style.NOTICE(f"Pipeline for {mapping.entity_type} does not implement fetch_data."))
+                        except Exception as fetch_error:
+                            self.stdout.write(self.style.WARNING(f"Pre-fetch failed for {mapping.entity_type}: {fetch_error}. Will attempt standard run."))
+
+                    # 2. Determine execution path (run_with_data or run)
+                    can_run_with_data = hasattr(pipeline, "run_with_data")
+
+                    start_time = timezone.now()
+                    self.stdout.write(f"Starting sync at {start_time}...")
+
+                    if use_cached_data and can_run_with_data:
+                        self.stdout.write(f"Running pipeline {mapping.id} with pre-fetched data...")
+                        sync_log = pipeline.run_with_data(
+                            data=cached_data,
+                            incremental=incremental,
+                            batch_size=batch_size,
                             query_params=query_params,
-                            fail_on_filter_error=fail_on_filter_error
                         )
-                        if cached_data is not None:
-                            self.stdout.write(self.style.SUCCESS(f"Successfully pre-fetched {len(cached_data)} records."))
-                            use_cached_data = True
-                        else:
-                            self.stdout.write(self.style.NOTICE("fetch_data returned None, proceeding without cache."))
-                    except NotImplementedError:
-                        self.stdout.write(self.style.NOTICE(f"Pipeline for {mapping.entity_type} does not implement fetch_data."))
-                    except Exception as fetch_error:
-                        self.stdout.write(self.style.WARNING(f"Pre-fetch failed for {mapping.entity_type}: {fetch_error}. Will attempt standard run."))
-
-                # 2. Determine execution path (run_with_data or run)
-                can_run_with_data = hasattr(pipeline, "run_with_data")
-
-                start_time = timezone.now()
-                self.stdout.write(f"Starting sync at {start_time}...")
-
-                if use_cached_data and can_run_with_data:
-                    self.stdout.write(f"Running pipeline {mapping.id} with pre-fetched data...")
-                    sync_log = pipeline.run_with_data(
-                        data=cached_data,
-                        incremental=incremental,
-                        batch_size=batch_size,
-                        query_params=query_params,
-                    )
-                else:
-                    if use_cached_data and not can_run_with_data:
-                        self.stdout.write(self.style.WARNING(
-                            f"Pipeline {mapping.id} fetched data but does not support run_with_data. "
-                            f"Falling back to standard run() method."
-                        ))
-                    elif not use_cached_data:
-                        self.stdout.write(f"Running pipeline {mapping.id} using standard run() method...")
-
-                    sync_log = pipeline.run(
-                        incremental=incremental,
-                        batch_size=batch_size,
-                        query_params=query_params,
-                        fail_on_filter_error=fail_on_filter_error,
-                    )
+                    else:
+                        if use_cached_data and not can_run_with_data:
+                            self.stdout.write(self.style.WARNING(
+                                f"Pipeline {mapping.id} fetched data but does not support run_with_data. "
+                                f"Falling back to standard run() method."
+                            ))
+                        elif not use_cached_data:
+                            self.stdout.write(f"Running pipeline {mapping.id} using standard run() method...")
+
+                        sync_log = pipeline.run(
+                            incremental=incremental,
+                            batch_size=batch_size,
+                            query_params=query_params,
+                            fail_on_filter_error=fail_on_filter_error,
+                        )
 
-                end_time = timezone.now()
-                duration = (end_time - start_time).total_seconds()
+                    end_time = timezone.now()
+                    duration = (end_time - start_time).total_seconds()
 
-                # Report results
-                if sync_log.status == "completed":
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Sync completed successfully in {duration:.2f} seconds"
+                    # Report results
+                    if sync_log.status == "completed":
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"Sync completed successfully in {duration:.2f} seconds"
+                            )
                         )
-                    )
-                elif sync_log.status == "partial":
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"Sync completed with some errors in {duration:.2f} seconds"
+                    elif sync_log.status == "partial":
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f"Sync completed with some errors in {duration:.2f} seconds"
+                            )
+                        )
+                    else: # failed or other status
+                        self.stdout.write(
+                            self.style.ERROR(f"Sync finished with status '{sync_log.status}' in {duration:.2f} seconds")
                         )
-                    )
-                else: # failed or other status
-                    self.stdout.write(
-                        self.style.ERROR(f"Sync finished with status '{sync_log.status}' in {duration:.2f} seconds")
-                    )
 
-                self.stdout.write("\nStatistics:")
-                self.stdout.write(f"  Processed: {sync_log.records_processed}")
-                self.stdout.write(f"  Created: {sync_log.records_created}")
-                self.stdout.write(f"  Updated: {sync_log.records_updated}")
-                self.stdout.write(f"  Failed: {sync_log.records_failed}")
+                    self.stdout.write("\nStatistics:")
+                    self.stdout.write(f"  Processed: {sync_log.records_processed}")
+                    self.stdout.write(f"  Created: {sync_log.records_created}")
+                    self.stdout.write(f"  Updated: {sync_log.records_updated}")
+                    self.stdout.write(f"  Failed: {sync_log.records_failed}")
+                    request.result = {
+                        "status": sync_log.status,
+                        "records_processed": sync_log.records_processed,
+                        "records_failed": sync_log.records_failed,
+                        "sync_log_id": sync_log.id,
+                    }
+
+                    if sync_log.error_message:
+                        self.stdout.write(
+                            self.style.ERROR(f"\nError details logged: {sync_log.error_message}")
+                        )
 
-                if sync_log.error_message:
+                except Exception as e:
+                    # This catches errors during pipeline.run() or other unexpected issues
                     self.stdout.write(
-                        self.style.ERROR(f"\nError details logged: {sync_log.error_message}")
+                        self.style.ERROR(f"Sync execution failed unexpectedly for mapping ID {mapping.id}: {str(e)}")
                     )
-
-            except Exception as e:
-                # This catches errors during pipeline.run() or other unexpected issues
-                self.stdout.write(
-                    self.style.ERROR(f"Sync execution failed unexpectedly for mapping ID {mapping.id}: {str(e)}")
-                )
-                if debug:
-                    import traceback
-                    traceback.print_exc()
-                # Optionally create a failed SyncLog entry here if needed for tracking
+                    if debug:
+                        import traceback
+                        traceback.print_exc()
+                    # Optionally create a failed SyncLog entry here if needed for tracking
+                finally:
+                    if isinstance(cached_data, SpilledRecords):
+                        cached_data.discard()
 
     def _list_mappings(self, source_name=None, target_name=None, entity_type=None):
         """List available mappings."""
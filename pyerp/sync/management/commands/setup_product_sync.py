@@ -77,6 +77,7 @@ class Command(BaseCommand):
             "transformation": parent_config.get("transformer", {}),
             "scheduling": parent_config.get("schedule", {}),
             "incremental": parent_config.get("incremental", {}),
+            "reconcile": parent_config.get("reconcile", {}),
         }
         mapping, created = SyncMapping.objects.update_or_create(
             source=source,
@@ -134,6 +135,7 @@ class Command(BaseCommand):
                 "transformation": variant_config.get("transformer", {}),
                 "scheduling": variant_config.get("schedule", {}),
                 "incremental": variant_config.get("incremental", {}),
+                "reconcile": variant_config.get("reconcile", {}),
             }
             variant_mapping, created = SyncMapping.objects.update_or_create(
                 source=variant_source,
@@ -163,6 +163,10 @@ class Command(BaseCommand):
                     "table_name": source_config.get("config", {}).get("table_name"),
                     "page_size": source_config.get("config", {}).get("page_size", 100),
                     "extractor_class": source_config.get("extractor_class"),
+                    "attributes": source_config.get("config", {}).get("attributes"),
+                    "extra_attributes": source_config.get("config", {}).get(
+                        "extra_attributes", []
+                    ),
                 },
                 "active": True, # Ensure source is active
             }
@@ -10,14 +10,16 @@ from pyerp.external_api import connection_manager
 from pyerp.external_api.images_cms.extractors import ImageApiExtractor
 from pyerp.external_api.images_cms.transformers import ImageTransformer
 from pyerp.external_api.images_cms.loaders import ProductImageLoader
-from pyerp.business_modules.products.models import ImageSyncLog
+from pyerp.external_api.images_cms.downloader import ImageDownloader
+from pyerp.external_api.images_cms.constants import (
+    DEFAULT_DOWNLOAD_WORKERS,
+    DEFAULT_THUMBNAIL_WORKERS,
+)
+from pyerp.business_modules.products.models import ImageSyncLog, ProductImage
 from pyerp.sync.management.commands.base_sync_command import BaseSyncCommand
 
-import os
 import json
-import requests
 import time
-from urllib.parse import urlparse
 
 
 class Command(BaseSyncCommand):
@@ -54,6 +56,21 @@ class Command(BaseSyncCommand):
             choices=["jpg_k", "jpg_g", "png", "tiff", "psd"],
             help="Preferred image format to sync (default: jpg_k)",
         )
+        parser.add_argument(
+            "--download-workers",
+            type=int,
+            default=DEFAULT_DOWNLOAD_WORKERS,
+            help=f"Number of concurrent image downloads (default: {DEFAULT_DOWNLOAD_WORKERS})",
+        )
+        parser.add_argument(
+            "--thumbnail-workers",
+            type=int,
+            default=DEFAULT_THUMBNAIL_WORKERS,
+            help=(
+                "Number of processes generating thumbnails, 0 to generate them "
+                f"inline (default: {DEFAULT_THUMBNAIL_WORKERS})"
+            ),
+        )
         parser.add_argument(
             "--pause",
             type=float,
@@ -191,8 +208,15 @@ class Command(BaseSyncCommand):
                     break
             
             # Handle downloads if requested
-            if download and all_transformed_data:
-                self._download_images(all_transformed_data, preferred_format, debug)
+            if download and all_transformed_data and not dry_run:
+                self._download_images(
+                    all_transformed_data,
+                    preferred_format,
+                    debug,
+                    workers=options.get("download_workers"),
+                    thumbnail_workers=options.get("thumbnail_workers"),
+                    force=force,
+                )
             
             # Update sync log
             if sync_log:
@@ -233,58 +257,46 @@ class Command(BaseSyncCommand):
             
             raise CommandError(error_msg)
 
-    def _download_images(self, transformed_data, preferred_format, debug=False):
-        """Download images from transformed data."""
-        downloaded_count = 0
-        
-        # Create the media directory if it doesn't exist
-        from django.conf import settings
-        media_root = getattr(settings, 'MEDIA_ROOT', os.path.join(os.getcwd(), 'media'))
-        images_dir = os.path.join(media_root, 'product_images')
-        os.makedirs(images_dir, exist_ok=True)
-        
-        # Process each transformed record
-        for record in transformed_data:
-            try:
-                # Get image URL
-                image_url = record.get('image_url')
-                if not image_url:
-                    continue
-                
-                # Get external ID for filename
-                external_id = record.get('external_id', 'unknown')
-                
-                # Create a sanitized filename
-                extension = self._get_extension_from_format(preferred_format)
-                filename = f"product_{external_id}.{extension}"
-                filepath = os.path.join(images_dir, filename)
-                
-                if debug:
-                    self.stdout.write(f"Downloading {image_url} to {filepath}")
-                
-                # Skip if file already exists (to avoid unnecessary downloads)
-                if os.path.exists(filepath):
-                    if debug:
-                        self.stdout.write(f"File already exists: {filepath}")
-                    downloaded_count += 1
-                    continue
-                
-                # Download the image
-                response = requests.get(image_url, stream=True, timeout=30)
-                if response.status_code == 200:
-                    with open(filepath, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    
-                    downloaded_count += 1
-                    if debug:
-                        self.stdout.write(self.style.SUCCESS(f"Downloaded to {filepath}"))
-            except Exception as e:
-                if debug:
-                    self.stdout.write(self.style.ERROR(f"Download error: {e}"))
-        
-        return downloaded_count
-    
+    def _download_images(
+        self,
+        transformed_data,
+        preferred_format,
+        debug=False,
+        workers=None,
+        thumbnail_workers=None,
+        force=False,
+    ):
+        """Download images for the synced records into local storage."""
+        external_ids = [
+            record['external_id'] for record in transformed_data
+            if record.get('image_url') and record.get('external_id')
+        ]
+        images = ProductImage.objects.filter(external_id__in=external_ids).order_by('content_hash', 'id')
+
+        extension = self._get_extension_from_format(preferred_format)
+        downloader = ImageDownloader(
+            max_workers=workers or DEFAULT_DOWNLOAD_WORKERS,
+            thumbnail_workers=(
+                DEFAULT_THUMBNAIL_WORKERS if thumbnail_workers is None else thumbnail_workers
+            ),
+            default_extension=f".{extension}",
+            force=force,
+        )
+        try:
+            stats = downloader.download(images)
+        finally:
+            downloader.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Downloads: {stats['downloaded']} downloaded "
+            f"({stats['deduplicated']} already stored), "
+            f"{stats['not_modified']} not modified, "
+            f"{stats['skipped']} unchanged in CMS, "
+            f"{stats['thumbnails']} thumbnails generated, "
+            f"{stats['errors']} errors"
+        ))
+        return stats['downloaded']
+
     def _get_extension_from_format(self, format_type):
         """Get file extension based on format type."""
         format_map = {
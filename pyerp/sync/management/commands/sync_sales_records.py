@@ -2,17 +2,23 @@
 
 import traceback
 import datetime  # Use the datetime module directly
-import tempfile
 from pathlib import Path
-import pandas as pd  # Import pandas
-
-import pyarrow.parquet as pq
 
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import CommandError
 from django.utils import timezone
 
+from pyerp.utils.json_utils import json_serialize
 from pyerp.utils.logging import get_logger
+from pyerp.sync import queue as sync_queue
 from pyerp.sync.pipeline import PipelineFactory
+from pyerp.sync.spill import (
+    SpillStore,
+    get_ttl_seconds,
+    purge_expired,
+    spill_extract,
+    to_value_set,
+)
 from .base_sync_command import BaseSyncCommand
 
 
@@ -218,6 +224,11 @@ class Command(BaseSyncCommand):
     # API Page Size for extract_batched
     API_PAGE_SIZE = 100000  # Large page size for full-load fetches
 
+    # Full loads are spilled to a snapshot (pyerp.sync.spill)
+    SNAPSHOT_NAME = "sync_sales_records"
+    PARENTS_TABLE = "parents"
+    CHILDREN_TABLE = "children"
+
     def add_arguments(self, parser):
         """Add command arguments, inheriting from BaseSyncCommand."""
         super().add_arguments(parser)
@@ -227,9 +238,38 @@ class Command(BaseSyncCommand):
             action="store_true",
             help=(
                 "Fetch ALL parent and ALL related child records upfront, "
-                "save them temporarily, then process/load in batches from "
-                "temporary files. Ignores --batch-size during fetch, uses "
-                "large API page size."
+                "spill them to a Parquet snapshot, then process/load in "
+                "batches from the snapshot. Ignores --batch-size during "
+                "fetch, uses large API page size."
+            ),
+        )
+        parser.add_argument(
+            "--replay",
+            action="store_true",
+            help=(
+                "With --full-load, load the latest complete snapshot of an "
+                "earlier run instead of fetching from the legacy ERP."
+            ),
+        )
+        parser.add_argument(
+            "--replay-snapshot",
+            type=str,
+            help="With --full-load, load the snapshot in this directory.",
+        )
+        parser.add_argument(
+            "--keep-snapshot",
+            action="store_true",
+            help=(
+                "Keep the snapshot after a successful load. Snapshots of "
+                "failed loads are always kept."
+            ),
+        )
+        parser.add_argument(
+            "--snapshot-ttl-hours",
+            type=float,
+            help=(
+                "Maximum age of a snapshot for --replay, "
+                "SYNC_SPILL_TTL_HOURS by default."
             ),
         )
         # Base class handles: --full, --batch-size, --top, --filters, --debug,
@@ -357,23 +397,40 @@ class Command(BaseSyncCommand):
         # --- FULL-LOAD MODE ---
         # =====================================================================
         if is_full_load:
-            with tempfile.TemporaryDirectory(
-                prefix="pyerp_sync_"
-            ) as temp_dir_name:
-                temp_dir = Path(temp_dir_name)
-                parents_file = temp_dir / "parents.parquet"
-                children_file = temp_dir / "children.parquet"
-                # Track successful parent loads
-                successfully_loaded_parent_ids = set()
-                parent_record_count = 0
-                child_record_count = 0
+            ttl_hours = options.get("snapshot_ttl_hours")
+            if ttl_hours is None:
+                ttl_hours = get_ttl_seconds() / 3600
+            # Drop snapshots of earlier runs that are past their TTL, but
+            # not those a longer --snapshot-ttl-hours still replays
+            purge_expired(ttl_hours=max(ttl_hours, get_ttl_seconds() / 3600))
+
+            store, replaying = self._get_spill_store(
+                options, initial_query_params, log_prefix
+            )
+            # Track successful parent loads
+            successfully_loaded_parent_ids = set()
+            parent_record_count = 0
+            child_record_count = 0
 
-                try:
+            try:
+                if replaying:
+                    parent_record_count = store.row_count(self.PARENTS_TABLE)
+                    child_record_count = store.row_count(self.CHILDREN_TABLE)
+                    self.stdout.write(
+                        self.style.NOTICE(
+                            f"{log_prefix} === Step 1: Replaying snapshot "
+                            f"{store.path} from {store.manifest['created_at']}: "
+                            f"{parent_record_count} parents, "
+                            f"{child_record_count} children ==="
+                        )
+                    )
+                else:
                     # --- Step 1a: Fetch All Parent Records & Filter ---
                     self.stdout.write(
                         self.style.NOTICE(
                             f"{log_prefix} === Step 1a: Fetching & Filtering "
-                            f"ALL Parent Records ({self.PARENT_LEGACY_KEY_FIELD}) ==="
+                            f"ALL Parent Records ({self.PARENT_LEGACY_KEY_FIELD}) "
+                            f"into {store.path} ==="
                         )
                     )
                     logger.info(
@@ -417,603 +474,447 @@ class Command(BaseSyncCommand):
                         )
                         parent_pipeline.extractor.clear_cache()
 
-                    all_parent_data = []
-                    with parent_pipeline.extractor:
-                        batches = parent_pipeline.extractor.extract_batched(
-                            query_params=id_fetch_params,
-                            api_page_size=self.API_PAGE_SIZE,
-                        )
-                        for i, batch_data in enumerate(batches):
-                            batch_num = i + 1
-                            self.stdout.write(
-                                f"\r{log_prefix} Fetched parent batch {batch_num}...",
-                                ending="",
-                            )
-                            all_parent_data.extend(batch_data)
-                        self.stdout.write( # Overwrite last status message
-                            f"\r{log_prefix} Fetched {len(all_parent_data)} total "
-                            f"raw parent records. Done."
-                        )
-                        # Add a newline after finishing the \r updates
-                        self.stdout.write("")
-                    logger.info(
-                        f"{log_prefix} Extractor finished. Fetched "
-                        f"{len(all_parent_data)} raw parent records."
+                    # Each page is date filtered and appended to the snapshot
+                    # as it arrives; --top applies after filtering
+                    parent_record_count = spill_extract(
+                        parent_pipeline.extractor,
+                        store,
+                        self.PARENTS_TABLE,
+                        query_params=id_fetch_params,
+                        api_page_size=self.API_PAGE_SIZE,
+                        page_filter=lambda page: _apply_date_filter(
+                            page, date_filter_params, self.DATE_FILTER_FIELD
+                        ),
+                        limit=int(options["top"]) if options.get("top") else None,
+                        on_page=lambda number, rows: self.stdout.write(
+                            f"\r{log_prefix} Fetched parent batch {number}, "
+                            f"{rows} parents kept...",
+                            ending="",
+                        ),
                     )
+                    # Add a newline after finishing the \r updates
+                    self.stdout.write("")
 
-                    # --- Assume extractor provides datetime.date objects ---
-                    logger.info(
-                        f"{log_prefix} Skipping date pre-processing."
+                    # --- Step 1b: Collect Parent IDs from the Snapshot ---
+                    parent_ids = store.key_values(
+                        self.PARENTS_TABLE, self.PARENT_LEGACY_KEY_FIELD
                     )
-
-                    # Apply Client-Side Date Filter
-                    filtered_parent_data = _apply_date_filter(
-                        all_parent_data, date_filter_params, self.DATE_FILTER_FIELD
+                    self.stdout.write(
+                        f"{log_prefix} Saved {parent_record_count} "
+                        f"parents. Found {len(parent_ids)} unique parent IDs."
                     )
                     logger.info(
-                        f"{log_prefix} Filtered to {len(filtered_parent_data)} "
-                        f"parent records meeting date criteria."
-                    )
-                    self.stdout.write(
-                        f"{log_prefix} Filtered to {len(filtered_parent_data)} "
-                        f"parent records post-date filter."
+                        "%s Saved %d parents. Found %d unique IDs.",
+                        log_prefix, parent_record_count, len(parent_ids)
                     )
-                    all_parent_data = None  # Free memory
-
-                    # Apply Top Limit (after filtering)
-                    if options.get("top"):
-                        top_limit = int(options["top"])
-                        if len(filtered_parent_data) > top_limit:
-                            self.stdout.write(
-                                f"{log_prefix} Applying --top limit: {top_limit}"
-                            )
-                            filtered_parent_data = filtered_parent_data[:top_limit]
-                            logger.info(
-                                f"{log_prefix} Applied top limit. Now "
-                                f"{len(filtered_parent_data)} parent records."
-                            )
-
-                    # --- Step 1b: Save Filtered Parents to Parquet & Collect IDs ---
-                    parent_ids_to_fetch_children_for = set()
-                    if filtered_parent_data:
-                        self.stdout.write(
-                            f"{log_prefix} Saving {len(filtered_parent_data)} parents "
-                            f"to {parents_file}..."
-                        )
-                        try:
-                            # --- Create Pandas DataFrame ---
-                            parent_df = pd.DataFrame(filtered_parent_data)
-                            parent_record_count = len(parent_df)
-
-                            # --- Explicitly convert problematic columns to string --- # noqa E501
-                            if 'Termin' in parent_df.columns:
-                                logger.debug("%s Converting 'Termin' column to string before saving.", log_prefix) # noqa E501
-                                # Apply conversion row-wise, handle None explicitly
-                                parent_df['Termin'] = parent_df['Termin'].apply(lambda x: x.isoformat() if isinstance(x, (datetime.datetime, datetime.date)) else str(x) if x is not None else None) # noqa E501
-
-                            # --- Write Pandas DataFrame to Parquet ---
-                            logger.info(
-                                "%s Writing parent DataFrame to %s...",
-                                log_prefix, parents_file
-                            )
-                            parent_df.to_parquet(parents_file, index=False)
-                            logger.info("%s Parent data saved to Parquet.", log_prefix) # noqa E501
-
-                            # Extract IDs after saving (using DataFrame)
-                            if self.PARENT_LEGACY_KEY_FIELD in parent_df.columns: # noqa E501
-                                parent_ids_to_fetch_children_for = set(
-                                    parent_df[self.PARENT_LEGACY_KEY_FIELD].dropna().astype(str).unique() # noqa E501
-                                )
-                            else:
-                                logger.warning(
-                                    "%s Parent legacy key field '%s' not found " # noqa E501
-                                    "in DataFrame columns. Cannot fetch children.", # noqa E501
-                                    log_prefix, self.PARENT_LEGACY_KEY_FIELD
-                                )
-                                parent_ids_to_fetch_children_for = set()
-
-                            self.stdout.write(
-                                f"{log_prefix} Saved {parent_record_count} "
-                                f"parents. Found "
-                                f"{len(parent_ids_to_fetch_children_for)} "
-                                f"unique parent IDs."
-                            )
-                            logger.info(
-                                "%s Saved %d parents to Parquet. Found %d "
-                                "unique IDs.", log_prefix, parent_record_count,
-                                len(parent_ids_to_fetch_children_for)
-                            )
-                            # --- End Table/ID code ---
-                        except Exception as e:
-                            # Catch child Parquet errors
-                            error_msg = (
-                                "Failed during child DataFrame processing "
-                                "or Parquet writing"
-                            )
-                            logger.error(
-                                "%s %s: %s", log_prefix, error_msg, e,
-                                exc_info=self.debug,
-                            )
-                            if self.debug:
-                                traceback.print_exc()
-                            raise CommandError(
-                                f"{error_msg}: {e}"
-                            ) from e
-                    else:
-                        self.stdout.write(
-                            f"{log_prefix} No parent records remain after filtering. "
-                            f"Skipping child fetch and processing."
-                        )
-                        parent_ids_to_fetch_children_for = set()
-
-                    filtered_parent_data = None  # Free memory
 
                     # --- Step 1c: Fetch All Child Records ---
-                    if parent_ids_to_fetch_children_for: # Still check if parents were found, even if not filtering by them # noqa E501
-                        num_parents = len(parent_ids_to_fetch_children_for)
-                        step1c_msg = (
-                            f"=== Step 1c: Fetching ALL Child Records ===" # Updated message # noqa E501
-                        )
+                    if len(parent_ids):
                         self.stdout.write(
-                            self.style.NOTICE(f"{log_prefix} {step1c_msg}")
+                            self.style.NOTICE(
+                                f"{log_prefix} === Step 1c: Fetching ALL Child "
+                                f"Records ==="
+                            )
                         )
-                        logger.info(
-                            f"{log_prefix} Starting Step 1c: Fetch ALL Children" # noqa E501
-                        )
-
-                        # Fetch *all* child records without API filtering
-                        child_fetch_params = {}
-
                         logger.info(
                             f"{log_prefix} Querying extractor for ALL child data (no API filters). " # noqa E501
                             f"API page size: {self.API_PAGE_SIZE}" # noqa E501
                         )
-
-                        all_child_data = []
-                        with child_pipeline.extractor:
-                            batches = child_pipeline.extractor.extract_batched(
-                                query_params=child_fetch_params,
-                                api_page_size=self.API_PAGE_SIZE,
-                            )
-                            for i, batch_data in enumerate(batches):
-                                batch_num = i + 1
-                                self.stdout.write(
-                                    f"\r{log_prefix} Fetched child batch {batch_num}...", # noqa E501
-                                    ending="",
-                                )
-                                all_child_data.extend(batch_data)
-                            self.stdout.write( # Overwrite last status
-                                f"\r{log_prefix} Fetched {len(all_child_data)} total " # noqa E501
-                                f"raw child records. Done."
-                            )
-                            # Add a newline after finishing the \r updates
-                            self.stdout.write("")
-
-                        logger.info(
-                            f"{log_prefix} Extractor returned {len(all_child_data)} " # noqa E501
-                            f"raw child records."
+                        # Children are filtered by the loaded parents when
+                        # they are read back
+                        child_record_count = spill_extract(
+                            child_pipeline.extractor,
+                            store,
+                            self.CHILDREN_TABLE,
+                            api_page_size=self.API_PAGE_SIZE,
+                            on_page=lambda number, rows: self.stdout.write(
+                                f"\r{log_prefix} Fetched child batch {number}, "
+                                f"{rows} children...",
+                                ending="",
+                            ),
                         )
-
-                        # --- Assume extractor provides datetime.date objects ---
-                        logger.info(
-                            f"{log_prefix} Skipping child date pre-processing." # noqa E501
+                        self.stdout.write("")
+                        self.stdout.write(
+                            f"{log_prefix} Saved {child_record_count} children."
                         )
-
-                        # Save Children to Parquet
-                        if all_child_data:
-                            self.stdout.write(
-                                f"{log_prefix} Saving {len(all_child_data)} children "
-                                f"to {children_file}..."
-                            )
-                            try:
-                                # --- Create Pandas DataFrame ---
-                                child_df = pd.DataFrame(all_child_data)
-                                child_record_count = len(child_df)
-
-                                # --- Explicitly convert problematic columns to string --- # noqa E501
-                                if 'Termin' in child_df.columns:
-                                    logger.debug("%s Converting child 'Termin' column to string.", log_prefix) # noqa E501
-                                    # Apply conversion row-wise, handle None explicitly
-                                    child_df['Termin'] = child_df['Termin'].apply(lambda x: x.isoformat() if isinstance(x, (datetime.datetime, datetime.date)) else str(x) if x is not None else None) # noqa E501
-                                # Add other potential problematic columns here if needed # noqa E501
-
-                                # --- Write Pandas DataFrame to Parquet ---
-                                logger.info(
-                                    "%s Writing child DataFrame to %s...",
-                                    log_prefix, children_file
-                                )
-                                child_df.to_parquet(children_file, index=False)
-                                logger.info("%s Child data saved to Parquet.", log_prefix) # noqa E501
-
-                                self.stdout.write(
-                                    f"{log_prefix} Saved {child_record_count} "
-                                    f"children."
-                                )
-                            except Exception as e:
-                                # Catch child Parquet errors
-                                error_msg = (
-                                    "Failed during child DataFrame processing "
-                                    "or Parquet writing"
-                                )
-                                logger.error(
-                                    "%s %s: %s", log_prefix, error_msg, e,
-                                    exc_info=self.debug,
-                                )
-                                if self.debug:
-                                    traceback.print_exc()
-                                raise CommandError(
-                                    f"{error_msg}: {e}"
-                                ) from e
-                        else:
-                            self.stdout.write(
-                                f"{log_prefix} No child records found for the "
-                                f"fetched parents."
-                            )
-                            logger.info(
-                                "%s No child records found.", log_prefix
-                            )
                     else:
                         self.stdout.write(
-                            f"{log_prefix} No parent IDs found, skipping child " # noqa E501
-                            f"fetch."
+                            f"{log_prefix} No parent records remain after "
+                            f"filtering. Skipping child fetch and processing."
                         )
+                        store.mark_complete(self.CHILDREN_TABLE)
 
-                    # --- Step 2a: Process Parents from File ---
-                    self.stdout.write(
-                        self.style.NOTICE(
-                            f"{log_prefix} === Step 2a: Processing "
-                            f"{parent_record_count} Parents from {parents_file} ==="
-                        )
+                # --- Step 2a: Process Parents from the Snapshot ---
+                self.stdout.write(
+                    self.style.NOTICE(
+                        f"{log_prefix} === Step 2a: Processing "
+                        f"{parent_record_count} Parents in batches of "
+                        f"{process_batch_size} ==="
                     )
-                    logger.info(
-                        f"{log_prefix} Starting Step 2a: Processing Parents" # noqa E501
+                )
+                logger.info(
+                    f"{log_prefix} Starting Step 2a: Processing Parents" # noqa E501
+                )
+
+                if parent_record_count > 0:
+                    parent_unique_field = parent_pipeline.loader.config.get( # noqa E501
+                        "unique_field", "legacy_id"
                     )
 
-                    if parents_file.exists() and parent_record_count > 0:
-                        parent_pf = pq.ParquetFile(parents_file)
-                        total_parent_batches = (
-                            parent_record_count + process_batch_size - 1
-                        ) // process_batch_size
+                    for i, batch in enumerate(
+                        store.iter_batches(self.PARENTS_TABLE, process_batch_size)
+                    ):
+                        batch_num = i + 1
                         self.stdout.write(
-                            f"{log_prefix} Processing parents in {total_parent_batches} " # noqa E501
-                            f"batches of size {process_batch_size}."
-                        )
-                        parent_unique_field = parent_pipeline.loader.config.get( # noqa E501
-                            "unique_field", "legacy_id"
+                            f"{log_prefix} --- Processing Parent Batch "
+                            f"{batch_num} ---"
                         )
+                        sync_queue.heartbeat()
+                        # Convert Arrow batch to list of dicts
+                        parent_source_data = batch.to_pylist()
 
-                        for i, batch in enumerate(
-                            parent_pf.iter_batches(batch_size=process_batch_size) # noqa E501
-                        ):
-                            batch_num = i + 1
-                            self.stdout.write(
-                                f"{log_prefix} --- Processing Parent Batch "
-                                f"{batch_num}/{total_parent_batches} ---"
+                        self.stdout.write(
+                            f"{log_prefix} Transforming {len(parent_source_data)} "
+                            f"parent records..."
+                        )
+                        transformed_parent_data = (
+                            parent_pipeline.transformer.transform(
+                                parent_source_data
                             )
-                            # Convert Arrow batch to list of dicts
-                            parent_source_data = batch.to_pylist()
-
-                            if not parent_source_data:
-                                self.stdout.write(
-                                    f"{log_prefix} Parent Batch {batch_num} is empty, " # noqa E501
-                                    f"skipping."
-                                )
-                                continue
+                        )
+                        self.stdout.write(
+                            f"{log_prefix} Loading {len(transformed_parent_data)} "
+                            f"transformed parents..."
+                        )
 
-                            self.stdout.write(
-                                f"{log_prefix} Transforming {len(parent_source_data)} "
-                                f"parent records..."
-                            )
-                            transformed_parent_data = (
-                                parent_pipeline.transformer.transform(
-                                    parent_source_data
-                                )
-                            )
-                            self.stdout.write(
-                                f"{log_prefix} Loading {len(transformed_parent_data)} "
-                                f"transformed parents..."
-                            )
+                        parent_load_result = parent_pipeline.loader.load(
+                            transformed_parent_data,
+                            update_existing=(
+                                options.get("force_update") or options.get("full") # noqa E501
+                            ),
+                        )
 
-                            parent_load_result = parent_pipeline.loader.load(
-                                transformed_parent_data,
-                                update_existing=(
-                                    options.get("force_update") or options.get("full") # noqa E501
-                                ),
-                            )
+                        parent_stats["created"] += parent_load_result.created # noqa E501
+                        parent_stats["updated"] += parent_load_result.updated # noqa E501
+                        parent_stats["skipped"] += parent_load_result.skipped # noqa E501
+                        parent_stats["errors"] += parent_load_result.errors
+
+                        # Collect successfully loaded parent IDs
+                        intended_ids = {
+                            str(rec.get(parent_unique_field))
+                            for rec in transformed_parent_data
+                            if rec.get(parent_unique_field) is not None
+                        }
+                        failed_ids = set()
+                        if parent_load_result.error_details:
+                            for err_detail in parent_load_result.error_details: # noqa E501
+                                rec = err_detail.get("record")
+                                if rec and parent_unique_field in rec:
+                                    # Ensure value exists before casting
+                                    rec_id = rec.get(parent_unique_field)
+                                    if rec_id is not None:
+                                        failed_ids.add(str(rec_id))
+                        successful_ids_in_batch = intended_ids - failed_ids
+                        successfully_loaded_parent_ids.update(
+                            successful_ids_in_batch
+                        )
 
-                            parent_stats["created"] += parent_load_result.created # noqa E501
-                            parent_stats["updated"] += parent_load_result.updated # noqa E501
-                            parent_stats["skipped"] += parent_load_result.skipped # noqa E501
-                            parent_stats["errors"] += parent_load_result.errors
-
-                            # Collect successfully loaded parent IDs
-                            intended_ids = {
-                                str(rec.get(parent_unique_field))
-                                for rec in transformed_parent_data
-                                if rec.get(parent_unique_field) is not None
-                            }
-                            failed_ids = set()
-                            if parent_load_result.error_details:
-                                for err_detail in parent_load_result.error_details: # noqa E501
-                                    rec = err_detail.get("record")
-                                    if rec and parent_unique_field in rec:
-                                        # Ensure value exists before casting
-                                        rec_id = rec.get(parent_unique_field)
-                                        if rec_id is not None:
-                                            failed_ids.add(str(rec_id))
-                            successful_ids_in_batch = intended_ids - failed_ids
-                            successfully_loaded_parent_ids.update(
-                                successful_ids_in_batch
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"{log_prefix} Parent Batch {batch_num} finished: " # noqa E501
+                                f"{parent_load_result.created} C, "
+                                f"{parent_load_result.updated} U, "
+                                f"{parent_load_result.skipped} S, "
+                                f"{parent_load_result.errors} E. "
+                                f"({len(successful_ids_in_batch)} successful loads)" # noqa E501
                             )
-
+                        )
+                        if parent_load_result.error_details:
                             self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"{log_prefix} Parent Batch {batch_num} finished: " # noqa E501
-                                    f"{parent_load_result.created} C, "
-                                    f"{parent_load_result.updated} U, "
-                                    f"{parent_load_result.skipped} S, "
-                                    f"{parent_load_result.errors} E. "
-                                    f"({len(successful_ids_in_batch)} successful loads)" # noqa E501
+                                self.style.WARNING(
+                                    f"Parent Errors (Batch {batch_num}): "
+                                    f"{len(parent_load_result.error_details)}" # noqa E501
                                 )
                             )
-                            if parent_load_result.error_details:
+                            # Log first few errors
+                            for k, err in enumerate(
+                                parent_load_result.error_details[:5]
+                            ):
+                                self.stdout.write(f"  - {err}")
+                            if len(parent_load_result.error_details) > 5:
                                 self.stdout.write(
-                                    self.style.WARNING(
-                                        f"Parent Errors (Batch {batch_num}): "
-                                        f"{len(parent_load_result.error_details)}" # noqa E501
-                                    )
+                                    f"  ... and "
+                                    f"{len(parent_load_result.error_details) - 5} " # noqa E501
+                                    f"more."
                                 )
-                                # Log first few errors
-                                for k, err in enumerate(
-                                    parent_load_result.error_details[:5]
-                                ):
-                                    self.stdout.write(f"  - {err}")
-                                if len(parent_load_result.error_details) > 5:
-                                    self.stdout.write(
-                                        f"  ... and "
-                                        f"{len(parent_load_result.error_details) - 5} " # noqa E501
-                                        f"more."
-                                    )
-                            if parent_load_result.errors > 0:
-                                sync_successful = False # Mark sync as failed
+                        if parent_load_result.errors > 0:
+                            sync_successful = False # Mark sync as failed
 
-                        self.stdout.write(
-                            f"{log_prefix} Finished processing all parent batches. " # noqa E501
-                            f"Total successful parent loads: "
-                            f"{len(successfully_loaded_parent_ids)}"
-                        )
-                        logger.info(
-                            f"{log_prefix} Finished parent processing. "
-                            f"{len(successfully_loaded_parent_ids)} successfully loaded." # noqa E501
-                        )
-                    else:
-                        self.stdout.write(
-                            f"{log_prefix} No parent data file found or no records " # noqa E501
-                            f"to process."
-                        )
-                        logger.info(f"{log_prefix} Skipping parent processing step.") # noqa E501
-
-                    # --- Step 2b: Process Children from File ---
                     self.stdout.write(
-                        self.style.NOTICE(
-                            f"{log_prefix} === Step 2b: Processing "
-                            f"{child_record_count} Children from {children_file} ==="
-                        )
+                        f"{log_prefix} Finished processing all parent batches. " # noqa E501
+                        f"Total successful parent loads: "
+                        f"{len(successfully_loaded_parent_ids)}"
                     )
                     logger.info(
-                        f"{log_prefix} Starting Step 2b: Processing Children" # noqa E501
+                        f"{log_prefix} Finished parent processing. "
+                        f"{len(successfully_loaded_parent_ids)} successfully loaded." # noqa E501
+                    )
+                else:
+                    self.stdout.write(
+                        f"{log_prefix} No parent records to process."
+                    )
+                    logger.info(f"{log_prefix} Skipping parent processing step.") # noqa E501
+
+                # --- Step 2b: Process Children from the Snapshot ---
+                self.stdout.write(
+                    self.style.NOTICE(
+                        f"{log_prefix} === Step 2b: Processing "
+                        f"{child_record_count} Children in batches of "
+                        f"{process_batch_size} ==="
                     )
+                )
+                logger.info(
+                    f"{log_prefix} Starting Step 2b: Processing Children" # noqa E501
+                )
 
-                    if (
-                        children_file.exists()
-                        and child_record_count > 0
-                        and successfully_loaded_parent_ids
+                if child_record_count > 0 and successfully_loaded_parent_ids:
+                    # Children of parents that failed to load are dropped
+                    # while reading the columnar data
+                    loaded_parent_ids = to_value_set(successfully_loaded_parent_ids)
+                    children_kept = 0
+
+                    for i, batch in enumerate(
+                        store.iter_batches(
+                            self.CHILDREN_TABLE,
+                            process_batch_size,
+                            filter_field=self.CHILD_PARENT_LINK_FIELD,
+                            filter_values=loaded_parent_ids,
+                        )
                     ):
-                        child_pf = pq.ParquetFile(children_file)
-                        total_child_batches = (
-                            child_record_count + process_batch_size - 1
-                        ) // process_batch_size
+                        batch_num = i + 1
                         self.stdout.write(
-                            f"{log_prefix} Processing children in "
-                            f"{total_child_batches} batches of size "
-                            f"{process_batch_size}."
+                            f"{log_prefix} --- Processing Child Batch "
+                            f"{batch_num} ---"
                         )
-                        child_parent_link_field = self.CHILD_PARENT_LINK_FIELD
-
-                        for i, batch in enumerate(
-                            child_pf.iter_batches(batch_size=process_batch_size) # noqa E501
-                        ):
-                            batch_num = i + 1
-                            self.stdout.write(
-                                f"{log_prefix} --- Processing Child Batch "
-                                f"{batch_num}/{total_child_batches} ---"
-                            )
-                            child_source_data = batch.to_pylist()
+                        sync_queue.heartbeat()
+                        filtered_child_data = batch.to_pylist()
+                        children_kept += len(filtered_child_data)
 
-                            if not child_source_data:
-                                self.stdout.write(
-                                    f"{log_prefix} Child Batch {batch_num} is empty, " # noqa E501
-                                    f"skipping."
-                                )
-                                continue
-
-                            # Filter children based on successfully loaded parents # noqa E501
-                            filtered_child_data = [
-                                rec for rec in child_source_data
-                                if str(rec.get(child_parent_link_field))
-                                in successfully_loaded_parent_ids
-                            ]
-                            skipped_count = len(child_source_data) - len(
+                        self.stdout.write(
+                            f"{log_prefix} Transforming {len(filtered_child_data)} "
+                            f"child records..."
+                        )
+                        transformed_child_data = (
+                            child_pipeline.transformer.transform(
                                 filtered_child_data
                             )
-                            if skipped_count > 0:
-                                logger.info(
-                                    f"{log_prefix} Batch {batch_num}: Filtered out " # noqa E501
-                                    f"{skipped_count} children linked to unloaded parents." # noqa E501
-                                )
+                        )
+                        self.stdout.write(
+                            f"{log_prefix} Loading {len(transformed_child_data)} "
+                            f"transformed children..."
+                        )
 
-                            if not filtered_child_data:
-                                self.stdout.write(
-                                    f"{log_prefix} No children in Batch {batch_num} " # noqa E501
-                                    f"remain after filtering, skipping."
-                                )
-                                continue
+                        child_load_result = child_pipeline.loader.load(
+                            transformed_child_data,
+                            update_existing=(
+                                options.get("force_update") or options.get("full") # noqa E501
+                            ),
+                        )
 
-                            self.stdout.write(
-                                f"{log_prefix} Transforming {len(filtered_child_data)} "
-                                f"child records..."
-                            )
-                            transformed_child_data = (
-                                child_pipeline.transformer.transform(
-                                    filtered_child_data
-                                )
-                            )
-                            self.stdout.write(
-                                f"{log_prefix} Loading {len(transformed_child_data)} "
-                                f"transformed children..."
-                            )
+                        child_stats["created"] += child_load_result.created # noqa E501
+                        child_stats["updated"] += child_load_result.updated # noqa E501
+                        child_stats["skipped"] += child_load_result.skipped # noqa E501
+                        child_stats["errors"] += child_load_result.errors
 
-                            child_load_result = child_pipeline.loader.load(
-                                transformed_child_data,
-                                update_existing=(
-                                    options.get("force_update") or options.get("full") # noqa E501
-                                ),
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"{log_prefix} Child Batch {batch_num} finished: " # noqa E501
+                                f"{child_load_result.created} C, "
+                                f"{child_load_result.updated} U, "
+                                f"{child_load_result.skipped} S, "
+                                f"{child_load_result.errors} E."
                             )
-
-                            child_stats["created"] += child_load_result.created # noqa E501
-                            child_stats["updated"] += child_load_result.updated # noqa E501
-                            child_stats["skipped"] += child_load_result.skipped # noqa E501
-                            child_stats["errors"] += child_load_result.errors
-
+                        )
+                        if child_load_result.error_details:
                             self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"{log_prefix} Child Batch {batch_num} finished: " # noqa E501
-                                    f"{child_load_result.created} C, "
-                                    f"{child_load_result.updated} U, "
-                                    f"{child_load_result.skipped} S, "
-                                    f"{child_load_result.errors} E."
+                                self.style.WARNING(
+                                    f"Child Errors (Batch {batch_num}): "
+                                    f"{len(child_load_result.error_details)}" # noqa E501
                                 )
                             )
-                            if child_load_result.error_details:
-                                self.stdout.write(
-                                    self.style.WARNING(
-                                        f"Child Errors (Batch {batch_num}): "
-                                        f"{len(child_load_result.error_details)}" # noqa E501
-                                    )
+                            # Log first few errors to stdout/log
+                            for k, err in enumerate(
+                                child_load_result.error_details[:5]
+                            ):
+                                err_msg = f"  - {err}"
+                                self.stdout.write(err_msg)
+                                logger.warning(f"{log_prefix} Child Load Error: {err_msg}") # noqa E501
+                            if len(child_load_result.error_details) > 5:
+                                more_msg = (
+                                    f"  ... and "
+                                    f"{len(child_load_result.error_details) - 5} " # noqa E501
+                                    f"more."
                                 )
-                                # Log first few errors to stdout/log
-                                for k, err in enumerate(
-                                    child_load_result.error_details[:5]
-                                ):
-                                    err_msg = f"  - {err}"
-                                    self.stdout.write(err_msg)
-                                    logger.warning(f"{log_prefix} Child Load Error: {err_msg}") # noqa E501
-                                if len(child_load_result.error_details) > 5:
-                                    more_msg = (
-                                        f"  ... and "
-                                        f"{len(child_load_result.error_details) - 5} " # noqa E501
-                                        f"more."
-                                    )
-                                    self.stdout.write(more_msg)
-                                    logger.warning(f"{log_prefix} {more_msg}")
-
-                            if child_load_result.errors > 0:
-                                sync_successful = False # Mark sync as failed
+                                self.stdout.write(more_msg)
+                                logger.warning(f"{log_prefix} {more_msg}")
 
-                        self.stdout.write(
-                            f"{log_prefix} Finished processing all child batches." # noqa E501
-                        )
-                        logger.info(f"{log_prefix} Finished child processing.")
-                    elif not successfully_loaded_parent_ids:
-                        self.stdout.write(
-                            f"{log_prefix} No parents were successfully loaded, " # noqa E501
-                            f"skipping child processing."
-                        )
-                        logger.warning(
-                            f"{log_prefix} Skipping child processing - no parents loaded." # noqa E501
-                        )
-                    else:
-                        self.stdout.write(
-                            f"{log_prefix} No child data file found or no records " # noqa E501
-                            f"to process."
-                        )
-                        logger.info(f"{log_prefix} Skipping child processing step.") # noqa E501
+                        if child_load_result.errors > 0:
+                            sync_successful = False # Mark sync as failed
 
-                except Exception as e:
-                    sync_successful = False
-                    self.stderr.write(
-                        self.style.ERROR(f"{log_prefix} Full-Load mode failed: {e}") # noqa E501
+                    skipped_count = child_record_count - children_kept
+                    if skipped_count > 0:
+                        logger.info(
+                            f"{log_prefix} Filtered out {skipped_count} children " # noqa E501
+                            f"linked to unloaded parents."
+                        )
+                    self.stdout.write(
+                        f"{log_prefix} Finished processing all child batches." # noqa E501
+                    )
+                    logger.info(f"{log_prefix} Finished child processing.")
+                elif not successfully_loaded_parent_ids:
+                    self.stdout.write(
+                        f"{log_prefix} No parents were successfully loaded, " # noqa E501
+                        f"skipping child processing."
                     )
-                    logger.error(
-                        f"{log_prefix} Full-Load mode failed: {e}",
-                        exc_info=self.debug,
+                    logger.warning(
+                        f"{log_prefix} Skipping child processing - no parents loaded." # noqa E501
                     )
-                    if self.debug:
-                        traceback.print_exc()
-                    # Don't re-raise here, allow summary reporting
-
-                # --- Step 3: Report Status ---
-                end_time = timezone.now()
-                duration = (end_time - command_start_time).total_seconds()
-
-                self.stdout.write(
-                    self.style.NOTICE(f"{log_prefix} === Step 3: Sync Summary ===") # noqa E501
-                )
+                else:
+                    self.stdout.write(
+                        f"{log_prefix} No child records to process."
+                    )
+                    logger.info(f"{log_prefix} Skipping child processing step.") # noqa E501
 
-                # Report parent stats
-                parent_summary = (
-                    f"Parent ({self.PARENT_ENTITY_TYPE}) summary: "
-                    f"{parent_stats['created']} C, {parent_stats['updated']} U, " # noqa E501
-                    f"{parent_stats['skipped']} S, {parent_stats['errors']} E." # noqa E501
+            except Exception as e:
+                sync_successful = False
+                self.stderr.write(
+                    self.style.ERROR(f"{log_prefix} Full-Load mode failed: {e}") # noqa E501
                 )
-                self.stdout.write(
-                    self.style.SUCCESS(f"{log_prefix} {parent_summary}")
+                logger.error(
+                    f"{log_prefix} Full-Load mode failed: {e}",
+                    exc_info=self.debug,
                 )
+                if self.debug:
+                    traceback.print_exc()
+                # Don't re-raise here, allow summary reporting
 
-                # Report child stats
-                child_summary = (
-                    f"Child ({self.CHILD_ENTITY_TYPE}) summary: "
-                    f"{child_stats['created']} C, {child_stats['updated']} U, " # noqa E501
-                    f"{child_stats['skipped']} S, {child_stats['errors']} E." # noqa E501
-                )
-                self.stdout.write(
-                    self.style.SUCCESS(f"{log_prefix} {child_summary}")
-                )
+            # --- Step 3: Report Status ---
+            end_time = timezone.now()
+            duration = (end_time - command_start_time).total_seconds()
 
-                log_summary = (
-                    f"{log_prefix} Orchestrator finished in {duration:.2f} " # noqa E501
-                    f"seconds. Mode: Full-Load. "
-                    f"Parents: C={parent_stats['created']}, "
-                    f"U={parent_stats['updated']}, S={parent_stats['skipped']}, " # noqa E501
-                    f"E={parent_stats['errors']}. "
-                    f"Children: C={child_stats['created']}, "
-                    f"U={child_stats['updated']}, S={child_stats['skipped']}, " # noqa E501
-                    f"E={child_stats['errors']}."
-                )
-                logger.info(log_summary)
+            self.stdout.write(
+                self.style.NOTICE(f"{log_prefix} === Step 3: Sync Summary ===") # noqa E501
+            )
+
+            # Report parent stats
+            parent_summary = (
+                f"Parent ({self.PARENT_ENTITY_TYPE}) summary: "
+                f"{parent_stats['created']} C, {parent_stats['updated']} U, " # noqa E501
+                f"{parent_stats['skipped']} S, {parent_stats['errors']} E." # noqa E501
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"{log_prefix} {parent_summary}")
+            )
+
+            # Report child stats
+            child_summary = (
+                f"Child ({self.CHILD_ENTITY_TYPE}) summary: "
+                f"{child_stats['created']} C, {child_stats['updated']} U, " # noqa E501
+                f"{child_stats['skipped']} S, {child_stats['errors']} E." # noqa E501
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"{log_prefix} {child_summary}")
+            )
+
+            log_summary = (
+                f"{log_prefix} Orchestrator finished in {duration:.2f} " # noqa E501
+                f"seconds. Mode: {'Replay' if replaying else 'Full-Load'}. "
+                f"Parents: C={parent_stats['created']}, "
+                f"U={parent_stats['updated']}, S={parent_stats['skipped']}, " # noqa E501
+                f"E={parent_stats['errors']}. "
+                f"Children: C={child_stats['created']}, "
+                f"U={child_stats['updated']}, S={child_stats['skipped']}, " # noqa E501
+                f"E={child_stats['errors']}."
+            )
+            logger.info(log_summary)
+            self.stdout.write(
+                f"{log_prefix} Sales record sync finished in "
+                f"{duration:.2f} seconds"
+            )
+
+            # Determine final status
+            final_success = (
+                sync_successful
+                and parent_stats["errors"] == 0
+                and child_stats["errors"] == 0
+            )
+
+            # Keep the snapshot of a failed load so it can be replayed
+            if final_success and not options.get("keep_snapshot"):
+                store.discard()
+            else:
+                replay_options = "--full-load --replay"
+                if options.get("snapshot_ttl_hours") is not None:
+                    replay_options += f" --snapshot-ttl-hours {ttl_hours:g}"
                 self.stdout.write(
-                    f"{log_prefix} Sales record sync finished in "
-                    f"{duration:.2f} seconds"
+                    f"{log_prefix} Snapshot kept in {store.path} for "
+                    f"{ttl_hours:g} hours. Load it again with "
+                    f"{replay_options}."
                 )
 
-                # Determine final status
-                final_success = (
-                    sync_successful
-                    and parent_stats["errors"] == 0
-                    and child_stats["errors"] == 0
+            if final_success:
+                success_msg = f"{log_prefix} Sync completed successfully."
+                self.stdout.write(self.style.SUCCESS(success_msg))
+                logger.info(success_msg)
+            else:
+                error_msg = (
+                    f"{log_prefix} Sync finished with errors. Check logs "
+                    f"for details."
                 )
-
-                if final_success:
-                    success_msg = f"{log_prefix} Sync completed successfully."
-                    self.stdout.write(self.style.SUCCESS(success_msg))
-                    logger.info(success_msg)
-                else:
-                    error_msg = (
-                        f"{log_prefix} Sync finished with errors. Check logs "
-                        f"for details."
+                logger.error(error_msg)
+                # Raise CommandError to indicate failure to the OS/caller
+                raise CommandError(error_msg)
+
+    def _get_spill_store(self, options, query_params, log_prefix):
+        """Return the snapshot to load and whether it is replayed.
+
+        A new snapshot is created unless --replay or --replay-snapshot asks
+        for the records of an earlier run. Only snapshots extracted with the
+        same query parameters are replayed.
+        """
+        tables = [self.PARENTS_TABLE, self.CHILDREN_TABLE]
+        meta = {
+            "query_params": json_serialize(query_params),
+            "top": options.get("top"),
+        }
+        try:
+            if options.get("replay_snapshot"):
+                store = SpillStore(Path(options["replay_snapshot"]))
+                if not all(store.is_complete(table) for table in tables):
+                    raise CommandError(
+                        f"{log_prefix} Snapshot {store.path} is incomplete, "
+                        f"its extraction did not finish."
                     )
-                    logger.error(error_msg)
-                    # Raise CommandError to indicate failure to the OS/caller
-                    raise CommandError(error_msg)
-
-
+                if not store.matches(meta):
+                    raise CommandError(
+                        f"{log_prefix} Snapshot {store.path} was extracted "
+                        f"with other options: {store.meta}"
+                    )
+                return store, True
+            if options.get("replay"):
+                store = SpillStore.latest(
+                    self.SNAPSHOT_NAME,
+                    tables=tables,
+                    ttl_hours=options.get("snapshot_ttl_hours"),
+                    meta=meta,
+                )
+                if store is None:
+                    raise CommandError(
+                        f"{log_prefix} No complete snapshot extracted with "
+                        f"these options to replay. Run without --replay to "
+                        f"extract again."
+                    )
+                return store, True
+            return SpillStore.create(self.SNAPSHOT_NAME, meta=meta), False
+        except (ImproperlyConfigured, FileNotFoundError) as e:
+            raise CommandError(f"{log_prefix} {e}") from e
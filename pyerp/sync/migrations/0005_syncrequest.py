@@ -0,0 +1,41 @@
+# Generated by Django 5.1.8 on 2026-10-18 22:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0004_alter_synclog_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('incremental', models.BooleanField(default=True)),
+                ('batch_size', models.PositiveIntegerField(default=100)),
+                ('query_params', models.JSONField(blank=True, null=True)),
+                ('dedupe_key', models.CharField(max_length=64)),
+                ('priority', models.PositiveSmallIntegerField(default=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('coalesced', models.PositiveIntegerField(default=0)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('mapping', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests', to='sync.syncmapping')),
+            ],
+            options={
+                'ordering': ['priority', 'requested_at'],
+                'indexes': [models.Index(fields=['status', 'priority', 'requested_at'], name='sync_syncre_status_0e0ad9_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('mapping',), name='sync_request_one_running_per_mapping'), models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('mapping', 'dedupe_key'), name='sync_request_unique_pending')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.8 on 2026-10-18 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0005_syncrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='high_watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_full_sync_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_rows_changed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_rows_fetched',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_sync_mode',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
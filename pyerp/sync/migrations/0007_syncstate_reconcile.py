@@ -0,0 +1,23 @@
+# Generated by Django 5.1.8 on 2026-10-18 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0006_syncstate_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_reconcile_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='last_rows_missing',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
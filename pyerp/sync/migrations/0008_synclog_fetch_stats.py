@@ -0,0 +1,18 @@
+# Generated by Django 5.1.8 on 2026-10-18 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0007_syncstate_reconcile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='fetch_stats',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
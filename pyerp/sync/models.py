@@ -44,6 +44,70 @@ class SyncMapping(models.Model):
         return f"{self.source} → {self.target} ({self.entity_type})"
 
 
+class SyncRequest(models.Model):
+    """A queued or running sync of one mapping, see ``pyerp.sync.queue``."""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    # Lower values are dispatched first
+    PRIORITY_INCREMENTAL = 10
+    PRIORITY_FULL = 20
+
+    mapping = models.ForeignKey(
+        SyncMapping, on_delete=models.CASCADE, related_name="requests"
+    )
+    incremental = models.BooleanField(default=True)
+    batch_size = models.PositiveIntegerField(default=100)
+    query_params = models.JSONField(null=True, blank=True)
+    # Identical pending requests share a key and are coalesced
+    dedupe_key = models.CharField(max_length=64)
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_INCREMENTAL)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    requested_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # A running request whose lease expired is considered lost
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    coalesced = models.PositiveIntegerField(default=0)
+    task_id = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["priority", "requested_at"]
+        indexes = [
+            models.Index(fields=["status", "priority", "requested_at"]),
+        ]
+        constraints = [
+            # The per-mapping lock
+            models.UniqueConstraint(
+                fields=["mapping"],
+                condition=models.Q(status="running"),
+                name="sync_request_one_running_per_mapping",
+            ),
+            models.UniqueConstraint(
+                fields=["mapping", "dedupe_key"],
+                condition=models.Q(status="pending"),
+                name="sync_request_unique_pending",
+            ),
+        ]
+
+    def __str__(self):
+        kind = "incremental" if self.incremental else "full"
+        return f"{self.mapping} {kind} sync ({self.status})"
+
+
 class SyncState(models.Model):
     """Tracks the state of synchronization for incremental syncs."""
 
@@ -52,6 +116,17 @@ class SyncState(models.Model):
     last_successful_sync_time = models.DateTimeField(null=True, blank=True)
     last_sync_id = models.CharField(max_length=100, blank=True)
     last_successful_id = models.CharField(max_length=100, blank=True)
+    # Highest modification timestamp seen in the source; incremental syncs
+    # fetch the records modified since then
+    high_watermark = models.DateTimeField(null=True, blank=True)
+    last_full_sync_time = models.DateTimeField(null=True, blank=True)
+    last_sync_mode = models.CharField(max_length=20, blank=True)
+    last_rows_fetched = models.PositiveIntegerField(default=0)
+    # Fetched rows modified after the previous high watermark
+    last_rows_changed = models.PositiveIntegerField(default=0)
+    # Local rows found deleted in the source, see pyerp.sync.reconcile
+    last_reconcile_time = models.DateTimeField(null=True, blank=True)
+    last_rows_missing = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Sync state for {self.mapping}"
@@ -68,6 +143,35 @@ class SyncState(models.Model):
             self.last_successful_id = self.last_sync_id
             self.save(update_fields=['last_successful_sync_time', 'last_successful_id'])
 
+    def record_extraction(self, mode, rows_fetched, rows_changed):
+        """Store how many rows a sync fetched and how many of them changed."""
+        self.last_sync_mode = mode
+        self.last_rows_fetched = rows_fetched
+        self.last_rows_changed = rows_changed
+        self.save(
+            update_fields=['last_sync_mode', 'last_rows_fetched', 'last_rows_changed']
+        )
+
+    def record_reconcile(self, rows_missing):
+        """Store the result of a delete reconciliation."""
+        self.last_reconcile_time = timezone.now()
+        self.last_rows_missing = rows_missing
+        self.save(update_fields=['last_reconcile_time', 'last_rows_missing'])
+
+    def advance_watermark(self, high_watermark, full_sync=False):
+        """Move the high watermark forward after a successful sync."""
+        update_fields = []
+        if high_watermark is not None and (
+            self.high_watermark is None or high_watermark > self.high_watermark
+        ):
+            self.high_watermark = high_watermark
+            update_fields.append('high_watermark')
+        if full_sync:
+            self.last_full_sync_time = self.last_sync_time
+            update_fields.append('last_full_sync_time')
+        if update_fields:
+            self.save(update_fields=update_fields)
+
 
 class SyncLog(models.Model):
     """Logs synchronization operations (using the legacy structure)."""
@@ -84,6 +188,8 @@ class SyncLog(models.Model):
     records_updated = models.BigIntegerField(default=0)   # New field
     records_failed = models.BigIntegerField(default=0)
     error_message = models.TextField(blank=True)
+    # Requests, rows, bytes, time and page size of the source fetches
+    fetch_stats = models.JSONField(null=True, blank=True)
 
     # Removed fields: mapping, is_full_sync, sync_params, trace, records_succeeded
     # Removed STATUS_CHOICES if they differ significantly from legacy data
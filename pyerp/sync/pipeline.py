@@ -1,13 +1,20 @@
 """Pipeline orchestration for sync operations."""
 
-from typing import Any, Dict, List, Optional, Type
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Type
 
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone
 from django.db import connection
+from pyerp.core.api_cache import bump_model_version
 from pyerp.utils.json_utils import DateTimeEncoder, json_serialize 
 from pyerp.utils.logging import get_logger, log_data_sync_event
 from pyerp.utils.constants import SyncStatus
 
+from . import queue as sync_queue
+from . import reconcile
 from .extractors.base import BaseExtractor
 from .transformers.base import BaseTransformer
 from .loaders.base import BaseLoader 
@@ -17,10 +24,45 @@ from .models import (
     SyncMapping,
     SyncState,
 )
+from .spill import SpilledRecords, SpillStore, spill_extract
 
 
 logger = get_logger(__name__)
 
+# Modification timestamp of the legacy 4D tables, used for incremental syncs
+# unless the "incremental" config of a mapping names another field
+DEFAULT_TIMESTAMP_FIELD = "__TIMESTAMP"
+
+DEFAULT_OVERLAP_SECONDS = 300
+DEFAULT_FULL_RECONCILE_HOURS = 168
+
+SYNC_MODE_FULL = "full"
+SYNC_MODE_INCREMENTAL = "incremental"
+
+# Table of the spill snapshot holding the records of a full load
+SPILL_TABLE = "records"
+# Rows read at a time when scanning spilled timestamps
+SPILL_SCAN_BATCH_SIZE = 50000
+
+
+def parse_source_timestamp(value: Any) -> Optional[datetime]:
+    """Return a source modification timestamp as an aware UTC datetime.
+
+    Naive values are taken as UTC, like the legacy API filters do.
+    Missing or unparseable values return None.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        parsed = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    if pd.isna(parsed):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.tz_localize("UTC")
+    return parsed.tz_convert("UTC").to_pydatetime()
+
 
 class SyncPipeline:
     """
@@ -65,6 +107,10 @@ class SyncPipeline:
     ) -> SyncLog:
         """Run the sync pipeline.
 
+        Full extractions of mappings with ``spill`` in their config (or
+        ``SYNC_SPILL_FULL_LOADS``) are written to a spill snapshot page by
+        page and processed from there, instead of being held in memory.
+
         Args:
             incremental: Whether to perform an incremental sync
             batch_size: Number of records to process in each batch
@@ -97,28 +143,15 @@ class SyncPipeline:
         if self.sync_state:
             self.sync_state.update_sync_started()
 
-        # Build query parameters
-        params = query_params or {}
-        if incremental and self.sync_state and self.sync_state.last_sync_time:
-            params["timestamp_filter"] = self.sync_state.last_sync_time
-
-        log_data_sync_event(
-            source=self.mapping.source.name,
-            destination=self.mapping.target.name,
-            record_count=0,
-            status=SyncStatus.STARTED,
-            details={
-                "entity_type": self.mapping.entity_type,
-                "incremental": incremental,
-                "batch_size": batch_size,
-            },
-        )
-
+        source_data = None
         try:
             # Build query parameters
-            params = query_params or {}
-            if incremental and self.sync_state and self.sync_state.last_sync_time:
-                params["timestamp_filter"] = self.sync_state.last_sync_time
+            params = dict(query_params or {})
+            mode, since = self._plan_extraction(incremental, start_time)
+            timestamp_field = self._get_timestamp_field()
+            if since is not None:
+                params["timestamp_filter"] = since
+                params["timestamp_field"] = timestamp_field
 
             log_data_sync_event(
                 source=self.mapping.source.name,
@@ -128,15 +161,29 @@ class SyncPipeline:
                 details={
                     "entity_type": self.mapping.entity_type,
                     "incremental": incremental,
+                    "mode": mode,
+                    "since": since.isoformat() if since else None,
                     "batch_size": batch_size,
                 },
             )
 
             # Extract data
-            with self.extractor:
-                source_data = self.extractor.extract(
-                    query_params=params,
-                    fail_on_filter_error=fail_on_filter_error
+            if mode == SYNC_MODE_FULL and self._spills_full_loads():
+                source_data = self._spill_extract(params, fail_on_filter_error)
+            if source_data is None:
+                with self.extractor:
+                    source_data = self.extractor.extract(
+                        query_params=params,
+                        fail_on_filter_error=fail_on_filter_error
+                    )
+            self._record_fetch_stats(self.sync_log)
+
+            high_watermark, rows_changed = self._scan_timestamps(
+                source_data, timestamp_field
+            )
+            if self.sync_state:
+                self.sync_state.record_extraction(
+                    mode, len(source_data), rows_changed
                 )
 
             log_data_sync_event(
@@ -147,6 +194,9 @@ class SyncPipeline:
                 details={
                     "entity_type": self.mapping.entity_type,
                     "incremental": incremental,
+                    "mode": mode,
+                    "rows_fetched": len(source_data),
+                    "rows_changed": rows_changed,
                 },
             )
 
@@ -170,13 +220,8 @@ class SyncPipeline:
             total_updated = 0
             total_failed = 0
 
-            # Process all records in a single batch if batch_size is 0
-            if batch_size <= 0:
-                batch_size = len(source_data) if source_data else 0
-
             # Process data in batches
-            for i in range(0, len(source_data), batch_size):
-                batch = source_data[i:i + batch_size]
+            for batch in self._iter_batches(source_data, batch_size):
                 created_count, updated_count, failure_count = self._process_batch(batch)
 
                 total_processed += len(batch)
@@ -202,6 +247,11 @@ class SyncPipeline:
             success = total_failed == 0
             if self.sync_state:
                 self.sync_state.update_sync_completed(success=success)
+                # Failed records are fetched again by the next run
+                if success:
+                    self.sync_state.advance_watermark(
+                        high_watermark, full_sync=mode == SYNC_MODE_FULL
+                    )
 
             # Update final sync log status and completion time
             self.sync_log.status = SyncStatus.COMPLETED if success else SyncStatus.COMPLETED_WITH_ERRORS
@@ -218,6 +268,9 @@ class SyncPipeline:
                     "created_count": total_created,
                     "updated_count": total_updated,
                     "failure_count": total_failed,
+                    "mode": mode,
+                    "rows_fetched": len(source_data),
+                    "rows_changed": rows_changed,
                 },
             )
 
@@ -254,6 +307,172 @@ class SyncPipeline:
             # Return the failed log, don't re-raise
             return self.sync_log
 
+        finally:
+            if isinstance(source_data, SpilledRecords):
+                source_data.discard()
+
+    def _spills_full_loads(self) -> bool:
+        """Whether full extractions are spilled to disk instead of memory."""
+        mapping_config = getattr(self.mapping, "mapping_config", None) or {}
+        return bool(
+            mapping_config.get(
+                "spill", getattr(settings, "SYNC_SPILL_FULL_LOADS", False)
+            )
+        )
+
+    def _spill_extract(
+        self, query_params: Dict[str, Any], fail_on_filter_error: bool
+    ) -> Optional[SpilledRecords]:
+        """Extract the source page by page into a new spill snapshot.
+
+        Returns:
+            The spilled records, or None if pyarrow is not installed
+        """
+        try:
+            store = SpillStore.create(
+                f"pipeline-{self.mapping.entity_type}",
+                meta={"query_params": json_serialize(query_params)},
+            )
+        except ImproperlyConfigured as e:
+            logger.warning(
+                "Holding the full load of %s in memory: %s",
+                self.mapping.entity_type, e,
+            )
+            return None
+        try:
+            spill_extract(
+                self.extractor,
+                store,
+                SPILL_TABLE,
+                query_params=query_params,
+                fail_on_filter_error=fail_on_filter_error,
+            )
+        except Exception:
+            store.discard()
+            raise
+        return SpilledRecords(store, SPILL_TABLE)
+
+    @staticmethod
+    def _iter_batches(records: Any, batch_size: int):
+        """Yield lists of records, all in one list if batch_size is 0."""
+        if batch_size <= 0:
+            batch_size = max(1, len(records))
+        if isinstance(records, SpilledRecords):
+            yield from records.iter_records(batch_size)
+            return
+        for i in range(0, len(records), batch_size):
+            yield records[i:i + batch_size]
+
+    def _record_fetch_stats(self, sync_log: SyncLog) -> None:
+        """Store the fetch statistics of the extractor in the sync log."""
+        get_fetch_stats = getattr(self.extractor, "get_fetch_stats", None)
+        stats = get_fetch_stats() if callable(get_fetch_stats) else None
+        if not isinstance(stats, dict):
+            return
+        table_name = (getattr(self.extractor, "config", None) or {}).get("table_name")
+        sync_log.fetch_stats = {table_name or self.mapping.entity_type: stats}
+        sync_log.save(update_fields=["fetch_stats"])
+        logger.info(
+            f"Fetched {stats['rows']} rows of {table_name} in "
+            f"{stats['requests']} requests, {stats['bytes']} bytes, "
+            f"{stats['seconds']}s, page size {stats['page_size']}"
+        )
+
+    def _get_incremental_config(self) -> Dict[str, Any]:
+        """Return the "incremental" section of the mapping config."""
+        mapping_config = getattr(self.mapping, "mapping_config", None) or {}
+        config = mapping_config.get("incremental") or {}
+        return config if isinstance(config, dict) else {}
+
+    def _get_timestamp_field(self) -> str:
+        """Return the source field holding the modification timestamp."""
+        return (
+            self._get_incremental_config().get("timestamp_field")
+            or DEFAULT_TIMESTAMP_FIELD
+        )
+
+    def _plan_extraction(
+        self, incremental: bool, now: datetime
+    ) -> Tuple[str, Optional[datetime]]:
+        """Decide between an incremental and a full extraction.
+
+        A full sync runs when no high watermark is stored yet, when
+        incremental syncs are disabled for the mapping, and periodically
+        to reconcile the records an incremental sync cannot see.
+
+        Returns:
+            Tuple of (mode, timestamp to fetch modified records from)
+        """
+        config = self._get_incremental_config()
+        state = self.sync_state
+        if not incremental or state is None or not config.get("enabled", True):
+            return SYNC_MODE_FULL, None
+        if state.high_watermark is None:
+            logger.info("No high watermark stored yet, running a full sync")
+            return SYNC_MODE_FULL, None
+
+        reconcile_hours = config.get(
+            "full_reconcile_hours",
+            getattr(settings, "SYNC_FULL_RECONCILE_HOURS", DEFAULT_FULL_RECONCILE_HOURS),
+        )
+        if reconcile_hours and (
+            state.last_full_sync_time is None
+            or now - state.last_full_sync_time >= timedelta(hours=reconcile_hours)
+        ):
+            logger.info("Last full sync is older than %sh, reconciling", reconcile_hours)
+            return SYNC_MODE_FULL, None
+
+        overlap = config.get(
+            "overlap_seconds",
+            getattr(settings, "SYNC_WATERMARK_OVERLAP_SECONDS", DEFAULT_OVERLAP_SECONDS),
+        )
+        return SYNC_MODE_INCREMENTAL, state.high_watermark - timedelta(seconds=overlap)
+
+    def _scan_timestamps(
+        self, records: Any, timestamp_field: str
+    ) -> Tuple[Optional[datetime], int]:
+        """Find the high watermark of fetched records and count changed ones.
+
+        Records are changed if they were modified after the stored high
+        watermark; the rest were fetched again because of the overlap window
+        or a full sync. Records without a timestamp count as changed.
+
+        Returns:
+            Tuple of (highest timestamp or None, number of changed records)
+        """
+        if isinstance(records, SpilledRecords):
+            schema = records.store.schema(records.table)
+            if schema is None or timestamp_field not in schema.names:
+                pages = [[{}] * len(records)]
+            else:
+                # Only the timestamp column is read back
+                pages = records.iter_records(
+                    SPILL_SCAN_BATCH_SIZE, columns=[timestamp_field]
+                )
+        elif isinstance(records, list):
+            pages = [records]
+        else:
+            return None, len(records)
+        previous = self.sync_state.high_watermark if self.sync_state else None
+        high_watermark = None
+        changed = 0
+        for page in pages:
+            for record in page:
+                timestamp = parse_source_timestamp(record.get(timestamp_field))
+                if timestamp is None:
+                    changed += 1
+                    continue
+                if high_watermark is None or timestamp > high_watermark:
+                    high_watermark = timestamp
+                if previous is None or timestamp > previous:
+                    changed += 1
+        if len(records) and high_watermark is None:
+            logger.warning(
+                "Fetched records have no '%s' field, the high watermark is not moved",
+                timestamp_field,
+            )
+        return high_watermark, changed
+
     def _process_batch(self, batch: List[Dict[str, Any]]) -> tuple:
         """Process a batch of records.
 
@@ -263,6 +482,9 @@ class SyncPipeline:
         Returns:
             tuple: (created_count, updated_count, failure_count)
         """
+        # Keep the lock of a long running sync, see pyerp.sync.queue
+        sync_queue.heartbeat()
+
         created_count = 0
         updated_count = 0
         failure_count = 0
@@ -298,6 +520,9 @@ class SyncPipeline:
             logger.debug("==> [_process_batch] Loading %s transformed records...", len(all_transformed_records))
             try:
                 load_result = self.loader.load(all_transformed_records) # Load collected records
+                # Loaders may write via bulk operations that skip model
+                # signals, so invalidate cached API responses explicitly
+                self._bump_target_model_version()
                 # Safely access results from the returned dict
                 created_in_batch = load_result.get('created', 0)  # Default to 0 if key missing
                 updated_in_batch = load_result.get('updated', 0)
@@ -328,6 +553,67 @@ class SyncPipeline:
         logger.debug("<== [_process_batch] Finished processing batch. Result: (Created: %s, Updated: %s, Failed: %s)", created_count, updated_count, failure_count)
         return created_count, updated_count, failure_count
 
+    def _get_target_model(self):
+        """Return the model the loader writes to, if it has one."""
+        model_class = getattr(self.loader, "model", None)
+        if model_class is None and hasattr(self.loader, "_get_model_class"):
+            try:
+                model_class = self.loader._get_model_class()
+            except ValueError:
+                model_class = None
+        return model_class
+
+    def _bump_target_model_version(self):
+        """Bump the API cache version of the model the loader writes to."""
+        model_class = self._get_target_model()
+        if model_class is not None:
+            bump_model_version(model_class)
+
+    def reconcile_deletes(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Handle local records that were deleted in the source.
+
+        Only the keys of the source table are fetched and diffed against the
+        local rows, see ``pyerp.sync.reconcile``. What happens to missing
+        rows is set in the ``reconcile`` section of the mapping config.
+
+        Args:
+            dry_run: Only count the missing rows
+
+        Returns:
+            Dict with the reconcile results
+        """
+        config = reconcile.get_reconcile_config(self.mapping)
+        model_class = self._get_target_model()
+        if model_class is None:
+            raise ValueError(
+                f"Cannot reconcile {self.mapping.entity_type}: "
+                f"the loader has no target model"
+            )
+        if not hasattr(self.extractor, "extract_keys"):
+            raise ValueError(
+                f"Cannot reconcile {self.mapping.entity_type}: "
+                f"{type(self.extractor).__name__} cannot list source keys"
+            )
+
+        with self.extractor:
+            result = reconcile.reconcile_deletes(
+                self.extractor, model_class, config, dry_run=dry_run
+            )
+
+        if result["applied"]:
+            bump_model_version(model_class)
+        if self.sync_state and not dry_run and result["status"] == "completed":
+            self.sync_state.record_reconcile(result["missing"])
+
+        log_data_sync_event(
+            source=self.mapping.source.name,
+            destination=self.mapping.target.name,
+            record_count=result["missing"],
+            status="reconciled" if result["status"] == "completed" else "failed",
+            details={"entity_type": self.mapping.entity_type, **result},
+        )
+        return result
+
     def _clean_for_json(self, data):
         """Clean data recursively to ensure it can be JSON serialized.
 
@@ -340,7 +626,7 @@ class SyncPipeline:
         # Use the utility function which handles recursion and types
         return json_serialize(data)
 
-    def fetch_data(self, query_params=None, fail_on_filter_error=False):
+    def fetch_data(self, query_params=None, fail_on_filter_error=False, spill=False):
         """Fetch data from source without processing it.
         
         This method allows for data to be fetched once and reused across multiple pipelines.
@@ -348,9 +634,11 @@ class SyncPipeline:
         Args:
             query_params: Query parameters for filtering data
             fail_on_filter_error: Whether to fail if filter doesn't work
+            spill: Spill the records to disk if the mapping spills full
+                loads (see run()); the caller discards the result
             
         Returns:
-            List of records fetched from the source
+            List of records fetched from the source, or SpilledRecords
         """
         logger.info("Fetching data in extract-only mode...")
         
@@ -360,6 +648,14 @@ class SyncPipeline:
             if hasattr(self.extractor, 'initialize') and callable(self.extractor.initialize):
                 self.extractor.initialize()
             
+            if spill and self._spills_full_loads():
+                records = self._spill_extract(
+                    dict(query_params or {}), fail_on_filter_error
+                )
+                if records is not None:
+                    logger.info(f"Fetched {len(records)} records into {records.store.path}")
+                    return records
+
             # Use a context manager to ensure proper connection handling
             with self.extractor:
                 # Extract data from source without transforming or loading
@@ -381,7 +677,8 @@ class SyncPipeline:
         This method uses provided data instead of extracting it from source.
         
         Args:
-            data: Pre-fetched data to use
+            data: Pre-fetched data to use, a list or the SpilledRecords of
+                fetch_data
             incremental: Whether to run in incremental mode
             batch_size: Size of batches to process
             query_params: Original query parameters used for extraction
@@ -405,19 +702,17 @@ class SyncPipeline:
         sync_log = self.create_sync_log(incremental=incremental)
         
         # Process in batches
-        total_count = len(data)
         processed_count = 0
         created_count = 0
         updated_count = 0
         failed_count = 0
         
         # Process records in batches
-        for start_idx in range(0, total_count, batch_size):
-            end_idx = min(start_idx + batch_size, total_count)
-            batch = data[start_idx:end_idx]
+        for batch_number, batch in enumerate(self._iter_batches(data, batch_size), start=1):
+            start_idx = processed_count
             batch_size_actual = len(batch)
             
-            logger.info(f"Processing batch {start_idx//batch_size + 1}: {start_idx} to {end_idx-1}")
+            logger.info(f"Processing batch {batch_number}: {start_idx} to {start_idx + batch_size_actual - 1}")
             
             try:
                 # Process this batch
@@ -442,6 +737,8 @@ class SyncPipeline:
         sync_log.status = SyncStatus.COMPLETED
         sync_log.completed_at = timezone.now()
         sync_log.save()
+        # Statistics of the fetches made by the caller with our extractor
+        self._record_fetch_stats(sync_log)
         
         return sync_log
 
@@ -539,8 +836,10 @@ class PipelineFactory:
         loader_config.update(mapping_config.get("loader_config", {}))
 
         # Instantiate components
-        extractor = cls._create_component(extractor_cls, extractor_config)
         transformer = cls._create_component(transformer_cls, transformer_config)
+        extractor = cls._create_component(
+            extractor_cls, cls._resolve_attributes(extractor_config, transformer)
+        )
         loader = cls._create_component(loader_cls, loader_config)
 
         # Create and return pipeline
@@ -606,8 +905,10 @@ class PipelineFactory:
         
         # Instantiate components
         try:
-            extractor = cls._create_component(extractor_cls, extractor_config)
             transformer = cls._create_component(transformer_cls, transformer_config)
+            extractor = cls._create_component(
+                extractor_cls, cls._resolve_attributes(extractor_config, transformer)
+            )
             loader = cls._create_component(loader_cls, loader_config)
         except Exception as e:
             logger.error(f"Failed to instantiate pipeline component: {e}", exc_info=True)
@@ -639,6 +940,25 @@ class PipelineFactory:
             loader=loader
         )
 
+    @staticmethod
+    def _resolve_attributes(
+        extractor_config: Dict[str, Any], transformer: BaseTransformer
+    ) -> Dict[str, Any]:
+        """Resolve ``attributes: auto`` to the source fields of the transformer.
+
+        Args:
+            extractor_config: Extractor configuration
+            transformer: Transformer the extracted records are passed to
+
+        Returns:
+            The extractor configuration, copied if it was changed
+        """
+        if extractor_config.get("attributes") != "auto":
+            return extractor_config
+        if not hasattr(transformer, "get_source_fields"):
+            return {**extractor_config, "attributes": None}
+        return {**extractor_config, "attributes": transformer.get_source_fields()}
+
     @staticmethod
     def _import_class(class_path: str) -> Type:
         """Import a class from its dotted path.
@@ -0,0 +1,457 @@
+"""Durable queue and locks for entity syncs.
+
+Syncs are requested with ``enqueue_sync`` instead of starting
+``run_entity_sync`` directly. Requests are stored as ``SyncRequest`` rows:
+
+- At most one request per mapping runs at a time, enforced by a partial
+  unique constraint on running requests.
+- Identical pending requests for a mapping are coalesced into one.
+- Pending requests are started by ``dispatch`` in priority order
+  (incremental before full) while their source is below its concurrency
+  limit (``SYNC_SOURCE_CONCURRENCY``).
+- A running request whose lease expired, e.g. because its worker was
+  killed, is marked failed so the mapping is unlocked again. Running syncs
+  renew their leases by calling ``heartbeat`` per page or batch.
+
+Syncs that must run inline, such as the sales records followed by their
+line items or the sync management commands, take the same lock with
+``sync_lock``.
+"""
+
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from pyerp.utils.logging import get_logger
+
+from .models import SyncMapping, SyncRequest, SyncSource
+
+logger = get_logger(__name__)
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_LEASE_SECONDS = 3600
+DEFAULT_HEARTBEAT_SECONDS = 60
+DEFAULT_RETENTION_DAYS = 7
+
+# Running requests held by the current task or command, see heartbeat
+_held_requests = ContextVar("held_sync_requests", default=())
+
+
+def get_concurrency_limit(source_name: str) -> int:
+    """Return how many syncs of a source may run at the same time."""
+    limits = getattr(settings, "SYNC_SOURCE_CONCURRENCY", {})
+    return limits.get(
+        source_name, getattr(settings, "SYNC_DEFAULT_CONCURRENCY", DEFAULT_CONCURRENCY)
+    )
+
+
+def make_dedupe_key(
+    incremental: bool, batch_size: int, query_params: Optional[Dict]
+) -> str:
+    """Return the key under which identical requests are coalesced."""
+    payload = json.dumps(
+        [incremental, batch_size, query_params], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _lease_expiry(now):
+    seconds = getattr(settings, "SYNC_REQUEST_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)
+    return now + timedelta(seconds=seconds)
+
+
+def enqueue_sync(
+    mapping: SyncMapping,
+    incremental: bool = True,
+    batch_size: int = 100,
+    query_params: Optional[Dict] = None,
+    priority: Optional[int] = None,
+    dispatch_now: bool = True,
+):
+    """Request a sync of a mapping.
+
+    Args:
+        mapping: Mapping to sync
+        incremental: If True, only sync records modified since last sync
+        batch_size: Number of records to process in each batch
+        query_params: Optional additional query parameters
+        priority: Dispatch priority, lower first; defaults by sync type
+        dispatch_now: Start queued requests once this one is committed
+
+    Returns:
+        Tuple of (SyncRequest, whether it was created); an identical
+        pending request is returned instead of creating a duplicate
+    """
+    if priority is None:
+        priority = (
+            SyncRequest.PRIORITY_INCREMENTAL
+            if incremental
+            else SyncRequest.PRIORITY_FULL
+        )
+    dedupe_key = make_dedupe_key(incremental, batch_size, query_params)
+
+    # A second attempt is needed if the pending request we collided with
+    # was started before we could find it
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                request = SyncRequest.objects.create(
+                    mapping=mapping,
+                    incremental=incremental,
+                    batch_size=batch_size,
+                    query_params=query_params,
+                    dedupe_key=dedupe_key,
+                    priority=priority,
+                )
+            created = True
+            break
+        except IntegrityError:
+            request = SyncRequest.objects.filter(
+                mapping=mapping,
+                dedupe_key=dedupe_key,
+                status=SyncRequest.STATUS_PENDING,
+            ).first()
+            if request is None and attempt == 0:
+                continue
+            if request is None:
+                raise
+            SyncRequest.objects.filter(pk=request.pk).update(
+                coalesced=F("coalesced") + 1, priority=Least(F("priority"), priority)
+            )
+            created = False
+            break
+
+    if dispatch_now:
+        transaction.on_commit(_schedule_dispatch)
+    return request, created
+
+
+def _schedule_dispatch():
+    from .tasks import dispatch_sync_queue
+
+    dispatch_sync_queue.delay()
+
+
+def _lock_sources(source_ids):
+    """Serialize dispatching and inline claims per source."""
+    list(SyncSource.objects.select_for_update().filter(pk__in=source_ids))
+
+
+def _running_counts():
+    running = SyncRequest.objects.filter(status=SyncRequest.STATUS_RUNNING)
+    by_source = {
+        row["mapping__source_id"]: row["count"]
+        for row in running.values("mapping__source_id").annotate(count=Count("id"))
+    }
+    mapping_ids = set(running.values_list("mapping_id", flat=True))
+    return by_source, mapping_ids
+
+
+def expire_lost_requests(now=None) -> int:
+    """Fail running requests whose lease expired and unlock their mappings."""
+    now = now or timezone.now()
+    count = SyncRequest.objects.filter(
+        status=SyncRequest.STATUS_RUNNING, lease_expires_at__lt=now
+    ).update(
+        status=SyncRequest.STATUS_FAILED,
+        finished_at=now,
+        lease_expires_at=None,
+        error_message="Lease expired, the worker running the sync was lost",
+    )
+    if count:
+        logger.warning(f"Released {count} sync requests with expired leases")
+    return count
+
+
+def dispatch(now=None) -> List[SyncRequest]:
+    """Start pending requests that are allowed to run.
+
+    Requests are taken in priority order. A request is skipped while its
+    mapping is running or its source has reached its concurrency limit,
+    and picked up by a later dispatch.
+
+    Returns:
+        List of the requests that were started
+    """
+    from .tasks import run_sync_request
+
+    now = now or timezone.now()
+    started = []
+    with transaction.atomic():
+        expire_lost_requests(now)
+        pending = list(
+            SyncRequest.objects.filter(status=SyncRequest.STATUS_PENDING)
+            .select_related("mapping__source")
+            .order_by("priority", "requested_at")
+        )
+        if not pending:
+            return started
+
+        _lock_sources({request.mapping.source_id for request in pending})
+        running_by_source, running_mappings = _running_counts()
+
+        for request in pending:
+            source = request.mapping.source
+            if request.mapping_id in running_mappings:
+                continue
+            if running_by_source.get(source.pk, 0) >= get_concurrency_limit(source.name):
+                continue
+            # Conditional, in case another dispatcher started it meanwhile
+            if not SyncRequest.objects.filter(
+                pk=request.pk, status=SyncRequest.STATUS_PENDING
+            ).update(
+                status=SyncRequest.STATUS_RUNNING,
+                started_at=now,
+                lease_expires_at=_lease_expiry(now),
+            ):
+                continue
+            request.status = SyncRequest.STATUS_RUNNING
+            running_mappings.add(request.mapping_id)
+            running_by_source[source.pk] = running_by_source.get(source.pk, 0) + 1
+            started.append(request)
+
+        for request in started:
+            transaction.on_commit(
+                lambda request_id=request.pk: run_sync_request.delay(request_id)
+            )
+    return started
+
+
+def claim(
+    mapping: SyncMapping,
+    incremental: bool = True,
+    batch_size: int = 100,
+    query_params: Optional[Dict] = None,
+) -> Optional[SyncRequest]:
+    """Start a sync of a mapping right away, if it may run now.
+
+    Returns:
+        The running SyncRequest, or None if the mapping is already running
+        or its source is at its concurrency limit
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            _lock_sources([mapping.source_id])
+            running_by_source, running_mappings = _running_counts()
+            limit = get_concurrency_limit(mapping.source.name)
+            if mapping.pk in running_mappings:
+                return None
+            if running_by_source.get(mapping.source_id, 0) >= limit:
+                return None
+            return SyncRequest.objects.create(
+                mapping=mapping,
+                incremental=incremental,
+                batch_size=batch_size,
+                query_params=query_params,
+                dedupe_key=make_dedupe_key(incremental, batch_size, query_params),
+                priority=0,
+                status=SyncRequest.STATUS_RUNNING,
+                started_at=now,
+                lease_expires_at=_lease_expiry(now),
+            )
+    except IntegrityError:
+        return None
+
+
+@contextmanager
+def holding(request: SyncRequest):
+    """Renew the lease of a running request through ``heartbeat``."""
+    token = _held_requests.set(_held_requests.get() + (request,))
+    try:
+        yield request
+    finally:
+        _held_requests.reset(token)
+
+
+def get_held_request(mapping: SyncMapping) -> Optional[SyncRequest]:
+    """Return the running request of a mapping held in this context."""
+    for request in _held_requests.get():
+        if request.mapping_id == mapping.pk:
+            return request
+    return None
+
+
+def renew_lease(request: SyncRequest, now=None) -> bool:
+    """Extend the lease of a running request.
+
+    Returns:
+        False if the request is no longer running, e.g. because its lease
+        already expired
+    """
+    now = now or timezone.now()
+    expires_at = _lease_expiry(now)
+    renewed = SyncRequest.objects.filter(
+        pk=request.pk, status=SyncRequest.STATUS_RUNNING
+    ).update(lease_expires_at=expires_at)
+    if renewed:
+        request.lease_expires_at = expires_at
+    return bool(renewed)
+
+
+def heartbeat(now=None) -> int:
+    """Renew the leases of the requests held by the running sync.
+
+    Long running syncs call this per page or batch, so their mappings are
+    not unlocked while they are still working. A lease is renewed at most
+    once per ``SYNC_REQUEST_HEARTBEAT_SECONDS``; outside of a held request
+    this does nothing.
+
+    Returns:
+        Number of leases renewed
+    """
+    held = _held_requests.get()
+    if not held:
+        return 0
+    now = now or timezone.now()
+    interval = timedelta(
+        seconds=getattr(
+            settings, "SYNC_REQUEST_HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS
+        )
+    )
+    renewed = 0
+    for request in held:
+        expires_at = request.lease_expires_at
+        if expires_at is not None and _lease_expiry(now) - expires_at < interval:
+            continue
+        if renew_lease(request, now):
+            renewed += 1
+        else:
+            logger.warning(
+                f"Sync request {request.pk} is no longer running, its lease "
+                f"could not be renewed"
+            )
+    return renewed
+
+
+def finish(
+    request: SyncRequest,
+    result: Optional[Dict] = None,
+    error: Optional[str] = None,
+    dispatch_next: bool = True,
+):
+    """Mark a running request as done and start the next queued ones."""
+    failed = error is not None or (result or {}).get("status") == "failed"
+    finished = SyncRequest.objects.filter(
+        pk=request.pk, status=SyncRequest.STATUS_RUNNING
+    ).update(
+        status=SyncRequest.STATUS_FAILED if failed else SyncRequest.STATUS_COMPLETED,
+        finished_at=timezone.now(),
+        lease_expires_at=None,
+        result=result,
+        error_message=error or (result or {}).get("error", ""),
+    )
+    if not finished:
+        logger.warning(
+            f"Sync request {request.pk} was no longer running when it "
+            f"finished, its result was not stored"
+        )
+    if dispatch_next:
+        transaction.on_commit(_schedule_dispatch)
+
+
+@contextmanager
+def sync_lock(
+    mapping: SyncMapping,
+    incremental: bool = True,
+    batch_size: int = 100,
+    query_params: Optional[Dict] = None,
+):
+    """Hold the lock of a mapping while syncing it inline.
+
+    Yields the running SyncRequest, or None if the sync may not run now.
+    Set ``request.result`` to store the result of the sync. A lock already
+    held in this context, e.g. by a command calling ``run_sync``, is
+    yielded again and released by its holder.
+    """
+    held = get_held_request(mapping)
+    if held is not None:
+        yield held
+        return
+    request = claim(mapping, incremental, batch_size, query_params)
+    if request is None:
+        yield None
+        return
+    try:
+        with holding(request):
+            yield request
+    except Exception as e:
+        finish(request, result=request.result, error=str(e))
+        raise
+    finish(request, result=request.result)
+
+
+def prune_requests(days: Optional[int] = None) -> int:
+    """Delete finished requests older than the retention period."""
+    if days is None:
+        days = getattr(settings, "SYNC_REQUEST_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    deleted, _ = SyncRequest.objects.filter(
+        status__in=[SyncRequest.STATUS_COMPLETED, SyncRequest.STATUS_FAILED],
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
+
+
+def get_queue_depth() -> Dict:
+    """Summarize pending and running requests per source.
+
+    Returns:
+        Dict with ``sources`` (counts, limit and oldest pending request per
+        source) and ``requests`` (the pending and running requests)
+    """
+    now = timezone.now()
+    active = (
+        SyncRequest.objects.filter(
+            status__in=[SyncRequest.STATUS_PENDING, SyncRequest.STATUS_RUNNING]
+        )
+        .select_related("mapping__source")
+        .order_by("status", "priority", "requested_at")
+    )
+
+    sources = {}
+    requests = []
+    for request in active:
+        source_name = request.mapping.source.name
+        source = sources.setdefault(
+            source_name,
+            {
+                "source": source_name,
+                "pending": 0,
+                "running": 0,
+                "limit": get_concurrency_limit(source_name),
+                "oldest_pending_seconds": None,
+            },
+        )
+        source[request.status] += 1
+        if request.status == SyncRequest.STATUS_PENDING:
+            age = (now - request.requested_at).total_seconds()
+            if source["oldest_pending_seconds"] is None or age > source["oldest_pending_seconds"]:
+                source["oldest_pending_seconds"] = age
+        requests.append(
+            {
+                "id": request.pk,
+                "mapping_id": request.mapping_id,
+                "entity_type": request.mapping.entity_type,
+                "source": source_name,
+                "status": request.status,
+                "incremental": request.incremental,
+                "priority": request.priority,
+                "coalesced": request.coalesced,
+                "requested_at": request.requested_at,
+                "started_at": request.started_at,
+            }
+        )
+
+    return {
+        "sources": sorted(sources.values(), key=lambda s: s["source"]),
+        "requests": requests,
+    }
@@ -0,0 +1,214 @@
+"""Detect records deleted in the source by diffing key sets.
+
+The legacy extractors only return existing rows, so a record deleted in the
+legacy ERP is never seen again by a sync and lingers locally. Instead of a
+full re-import, ``reconcile_deletes`` lists only the key column of the
+source table, compares it with the keys stored locally and flags, deletes
+or just reports the local rows whose key is gone.
+
+It is configured per mapping in the ``reconcile`` section of its config::
+
+    reconcile:
+      enabled: true
+      key_field: __KEY           # Source field holding the record key
+      local_field: legacy_id     # Model field holding the same key
+      action: flag               # report, flag or delete
+      flag: {is_active: false}   # Values set on rows missing in the source
+      max_missing_ratio: 0.1     # Abort instead of acting on more rows
+
+The source keys are held in a set and the local keys are streamed against
+it in chunks, so memory is bounded by the key set of the source table.
+Rows found missing are looked up again by key before acting on them, as
+paging through a table that changes can skip rows.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
+
+from pyerp.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+ACTION_REPORT = "report"
+ACTION_FLAG = "flag"
+ACTION_DELETE = "delete"
+ACTIONS = (ACTION_REPORT, ACTION_FLAG, ACTION_DELETE)
+
+DEFAULT_CONFIG = {
+    "enabled": False,
+    "key_field": "__KEY",
+    "local_field": "legacy_id",
+    "action": ACTION_REPORT,
+    "flag": {},
+    "max_missing_ratio": 0.1,
+    "page_size": 50000,
+}
+
+# Local rows read per query, and rows updated or deleted per statement
+CHUNK_SIZE = 5000
+# Keys per lookup when confirming missing rows, bounded by the URL length
+CONFIRM_CHUNK_SIZE = 100
+
+
+def get_reconcile_config(mapping) -> Dict[str, Any]:
+    """Return the reconcile config of a mapping, completed with defaults."""
+    mapping_config = getattr(mapping, "mapping_config", None) or {}
+    config = {**DEFAULT_CONFIG, **(mapping_config.get("reconcile") or {})}
+    if config["action"] not in ACTIONS:
+        raise ValueError(
+            f"Unknown reconcile action '{config['action']}', "
+            f"expected one of {', '.join(ACTIONS)}"
+        )
+    if config["action"] == ACTION_FLAG and not config["flag"]:
+        raise ValueError("The flag action needs the field values to set in 'flag'")
+    return config
+
+
+def normalize_key(value: Any) -> str:
+    """Return a key as a string, so source and local keys compare equal."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _lookup_value(key: str):
+    # Numeric keys are looked up as numbers, the API quotes strings
+    return int(key) if key.isdigit() else key
+
+
+def collect_source_keys(extractor, key_field: str, page_size: int) -> Set[str]:
+    """Return the set of keys of all records in the source table."""
+    keys = set()
+    for page in extractor.extract_keys(key_field=key_field, page_size=page_size):
+        keys.update(normalize_key(key) for key in page)
+    return keys
+
+
+def find_missing(
+    local_rows: Iterable[Tuple[Any, Any]], source_keys: Set[str]
+) -> Tuple[List[Tuple[Any, str]], int]:
+    """Find local rows whose key is not in the source.
+
+    Args:
+        local_rows: Iterable of (pk, key) of the local rows
+        source_keys: Normalized keys of the source records
+
+    Returns:
+        Tuple of (list of (pk, key) of missing rows, number of local rows
+        with a key)
+    """
+    missing = []
+    count = 0
+    for pk, key in local_rows:
+        key = normalize_key(key)
+        if not key:
+            continue
+        count += 1
+        if key not in source_keys:
+            missing.append((pk, key))
+    return missing, count
+
+
+def confirm_missing(
+    extractor, key_field: str, keys: Iterable[str], chunk_size: int = CONFIRM_CHUNK_SIZE
+) -> Set[str]:
+    """Look up missing keys again and return those that are really gone."""
+    keys = list(keys)
+    found = set()
+    for start in range(0, len(keys), chunk_size):
+        chunk = [_lookup_value(key) for key in keys[start:start + chunk_size]]
+        for page in extractor.extract_keys(key_field=key_field, keys=chunk):
+            found.update(normalize_key(key) for key in page)
+    return set(keys) - found
+
+
+def apply_action(queryset, pks: List[Any], action: str, flag: Dict[str, Any]) -> int:
+    """Flag or delete the given rows in chunks.
+
+    Returns:
+        Number of rows flagged or deleted
+    """
+    if action == ACTION_REPORT:
+        return 0
+    count = 0
+    with transaction.atomic():
+        for start in range(0, len(pks), CHUNK_SIZE):
+            rows = queryset.filter(pk__in=pks[start:start + CHUNK_SIZE])
+            if action == ACTION_FLAG:
+                count += rows.update(**flag)
+            else:
+                count += rows.delete()[1].get(queryset.model._meta.label, 0)
+    return count
+
+
+def reconcile_deletes(
+    extractor, model, config: Dict[str, Any], dry_run: bool = False
+) -> Dict[str, Any]:
+    """Find and handle local rows of a model that are gone from the source.
+
+    Args:
+        extractor: Connected extractor providing ``extract_keys``
+        model: Model the mapping loads into
+        config: Reconcile config, see ``get_reconcile_config``
+        dry_run: Only report the missing rows
+
+    Returns:
+        Dict with the status, counts and a sample of the missing keys
+    """
+    started = time.monotonic()
+    key_field = config["key_field"]
+    local_field = config["local_field"]
+    action = ACTION_REPORT if dry_run else config["action"]
+    result = {
+        "status": "completed",
+        "action": action,
+        "source_keys": 0,
+        "local_rows": 0,
+        "missing": 0,
+        "applied": 0,
+        "missing_sample": [],
+        "error": "",
+    }
+
+    source_keys = collect_source_keys(extractor, key_field, config["page_size"])
+    result["source_keys"] = len(source_keys)
+
+    queryset = model.objects.exclude(**{f"{local_field}__isnull": True})
+    if config["action"] == ACTION_FLAG:
+        # Rows flagged by an earlier run are not counted again
+        queryset = queryset.exclude(**config["flag"])
+    missing, result["local_rows"] = find_missing(
+        queryset.values_list("pk", local_field).iterator(chunk_size=CHUNK_SIZE),
+        source_keys,
+    )
+    # Checked before confirming, which costs a request per chunk of keys
+    ratio = len(missing) / result["local_rows"] if result["local_rows"] else 0
+    if ratio > config["max_missing_ratio"]:
+        result["status"] = "aborted"
+        result["missing"] = len(missing)
+        result["error"] = (
+            f"{len(missing)} of {result['local_rows']} rows are missing in the "
+            f"source, more than the allowed ratio of {config['max_missing_ratio']}"
+        )
+        logger.error(f"Not reconciling {model._meta.label}: {result['error']}")
+        result["duration_ms"] = int((time.monotonic() - started) * 1000)
+        return result
+
+    if missing:
+        gone = confirm_missing(extractor, key_field, (key for _, key in missing))
+        missing = [(pk, key) for pk, key in missing if key in gone]
+    result["missing"] = len(missing)
+    result["missing_sample"] = [key for _, key in missing[:20]]
+    result["applied"] = apply_action(
+        queryset, [pk for pk, _ in missing], action, config["flag"]
+    )
+
+    result["duration_ms"] = int((time.monotonic() - started) * 1000)
+    logger.info(
+        f"Reconciled {model._meta.label}: {result['missing']} of "
+        f"{result['local_rows']} rows missing in the source, "
+        f"{result['applied']} handled ({action})"
+    )
+    return result
@@ -0,0 +1,609 @@
+"""Columnar spill store for large extractions.
+
+A full load fetches far more rows than fit comfortably in memory as Python
+dicts. A ``SpillStore`` appends every extracted page to a Parquet dataset on
+disk as it arrives, so only one page is held in memory at a time, and
+transformers read the rows back in record batches::
+
+    store = SpillStore.create("sales_records")
+    spill_extract(parent_pipeline.extractor, store, "parents")
+    parent_ids = store.key_values("parents", "AbsNr")
+    for batch in store.iter_batches(
+        "children", 500, filter_field="AbsNr", filter_values=parent_ids
+    ):
+        records = batch.to_pylist()
+
+A snapshot is a directory below ``SYNC_SPILL_DIR`` with one directory of
+Parquet part files per table and a ``manifest.json``. Tables are marked
+complete once their extraction finished, so a load that failed can be
+replayed from the snapshot (``SpillStore.latest``) without fetching from
+the source again. Snapshots older than ``SYNC_SPILL_TTL_HOURS`` are deleted
+by ``purge_expired``.
+
+The schema of a table is pinned by its first page. Later pages are cast to
+it; a column whose values no longer share one type with it, e.g. a date
+column that turns out to hold text, is widened for the whole table, so
+every batch read back has the same schema.
+
+pyarrow is an optional dependency; ``SpillStore`` raises
+``ImproperlyConfigured`` when it is not installed.
+"""
+
+import base64
+import json
+import shutil
+import tempfile
+import time as time_module
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from pyerp.utils.logging import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL_HOURS = 24
+MANIFEST_NAME = "manifest.json"
+
+
+def get_spill_dir() -> Path:
+    """Return the directory holding the spill snapshots."""
+    directory = getattr(settings, "SYNC_SPILL_DIR", None)
+    if directory:
+        return Path(directory)
+    return Path(tempfile.gettempdir()) / "pyerp_sync_spill"
+
+
+def get_ttl_seconds(ttl_hours: Optional[float] = None) -> float:
+    """Return how long snapshots are kept, in seconds."""
+    if ttl_hours is None:
+        ttl_hours = getattr(settings, "SYNC_SPILL_TTL_HOURS", DEFAULT_TTL_HOURS)
+    return float(ttl_hours) * 3600
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImproperlyConfigured(
+            "pyarrow is required for the sync spill store"
+        )
+
+
+def _as_text(value):
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def records_to_table(records: List[Dict[str, Any]]) -> "pa.Table":
+    """Convert a page of records to an Arrow table.
+
+    Columns whose values do not share one Arrow type, e.g. dates mixed with
+    strings, are stored as text.
+    """
+    _require_pyarrow()
+    names = list(dict.fromkeys(key for record in records for key in record))
+    arrays = []
+    for name in names:
+        values = [record.get(name) for record in records]
+        try:
+            arrays.append(pa.array(values, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            arrays.append(
+                pa.array([_as_text(value) for value in values], type=pa.string())
+            )
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def _unify_types(current: "pa.DataType", new: "pa.DataType") -> "pa.DataType":
+    """Return a type both types can be cast to, text if there is none."""
+    if current.equals(new):
+        return current
+    try:
+        schema = pa.unify_schemas(
+            [pa.schema([("value", current)]), pa.schema([("value", new)])],
+            promote_options="permissive",
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.string()
+    return schema.field("value").type
+
+
+def _cast_column(column, data_type: "pa.DataType"):
+    if column.type.equals(data_type):
+        return column
+    if pa.types.is_string(data_type):
+        # Same text as records_to_table, e.g. ISO dates
+        return pa.array(
+            [_as_text(value) for value in column.to_pylist()], type=pa.string()
+        )
+    return pc.cast(column, data_type)
+
+
+def conform(data, schema: "pa.Schema"):
+    """Cast a table or record batch to schema.
+
+    Columns missing in data are added as nulls, columns not in schema are
+    dropped.
+    """
+    arrays = []
+    for field in schema:
+        if field.name in data.schema.names:
+            arrays.append(_cast_column(data.column(field.name), field.type))
+        else:
+            arrays.append(pa.nulls(data.num_rows, type=field.type))
+    if isinstance(data, pa.RecordBatch):
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _merge_schemas(pinned: Optional["pa.Schema"], new: "pa.Schema") -> "pa.Schema":
+    """Return the pinned schema widened for a new page, new columns last."""
+    if pinned is None:
+        return new
+    fields = []
+    for field in pinned:
+        if field.name in new.names:
+            field = field.with_type(
+                _unify_types(field.type, new.field(field.name).type)
+            )
+        fields.append(field)
+    fields.extend(field for field in new if field.name not in pinned.names)
+    return pa.schema(fields)
+
+
+def _encode_schema(schema: "pa.Schema") -> str:
+    return base64.b64encode(schema.serialize().to_pybytes()).decode("ascii")
+
+
+def _decode_schema(encoded: str) -> "pa.Schema":
+    return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(encoded)))
+
+
+def _as_json(value: Any) -> Any:
+    # Compares like the value read back from the manifest
+    return json.loads(json.dumps(value, default=str))
+
+
+def to_value_set(values: Iterable[Any]) -> "pa.Array":
+    """Return values as an Arrow string array for ``filter_batch``."""
+    _require_pyarrow()
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return pc.cast(values, pa.string())
+    return pa.array([_as_text(value) for value in values], type=pa.string())
+
+
+def filter_batch(
+    batch: "pa.RecordBatch", field: str, values: Iterable[Any]
+) -> "pa.RecordBatch":
+    """Keep the rows of a batch whose field, as text, is one of values."""
+    if field not in batch.schema.names:
+        return batch.slice(0, 0)
+    mask = pc.is_in(
+        pc.cast(batch.column(field), pa.string()),
+        value_set=to_value_set(values),
+    )
+    return batch.filter(mask)
+
+
+def _read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path / MANIFEST_NAME, encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+class SpillStore:
+    """A snapshot of extracted tables stored as Parquet part files."""
+
+    def __init__(self, path: Path, manifest: Optional[Dict[str, Any]] = None):
+        """Open the snapshot in ``path``.
+
+        Use ``create`` for a new snapshot.
+
+        Raises:
+            ImproperlyConfigured: If pyarrow is not installed
+            FileNotFoundError: If ``path`` holds no snapshot
+        """
+        _require_pyarrow()
+        self.path = Path(path)
+        if manifest is None:
+            manifest = _read_manifest(self.path)
+            if manifest is None:
+                raise FileNotFoundError(f"No spill snapshot in {self.path}")
+        self.manifest = manifest
+        self._schemas: Dict[str, "pa.Schema"] = {}
+
+    def __repr__(self):
+        return f"SpillStore({str(self.path)!r})"
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        meta: Optional[Dict[str, Any]] = None,
+        root: Optional[Path] = None,
+    ) -> "SpillStore":
+        """Create an empty snapshot.
+
+        Args:
+            name: Name shared by the snapshots of one sync, used by ``latest``
+            meta: JSON-serializable details of the run, e.g. its query
+                parameters, compared by ``latest``
+            root: Directory to create the snapshot in, ``SYNC_SPILL_DIR`` by
+                default
+        """
+        _require_pyarrow()
+        now = timezone.now()
+        path = Path(root or get_spill_dir()) / f"{name}-{now:%Y%m%dT%H%M%S%f}"
+        path.mkdir(parents=True)
+        store = cls(
+            path,
+            manifest={
+                "name": name,
+                "created_at": now.isoformat(),
+                "created": time_module.time(),
+                "meta": _as_json(meta or {}),
+                "tables": {},
+            },
+        )
+        store._save_manifest()
+        return store
+
+    @classmethod
+    def snapshots(
+        cls, name: Optional[str] = None, root: Optional[Path] = None
+    ) -> List["SpillStore"]:
+        """Return the snapshots, newest first, optionally only those of name."""
+        _require_pyarrow()
+        root = Path(root or get_spill_dir())
+        if not root.is_dir():
+            return []
+        stores = []
+        for path in root.iterdir():
+            manifest = _read_manifest(path) if path.is_dir() else None
+            if manifest is None or (name and manifest.get("name") != name):
+                continue
+            stores.append(cls(path, manifest=manifest))
+        return sorted(stores, key=lambda store: store.created, reverse=True)
+
+    @classmethod
+    def latest(
+        cls,
+        name: str,
+        tables: Optional[Iterable[str]] = None,
+        ttl_hours: Optional[float] = None,
+        root: Optional[Path] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Optional["SpillStore"]:
+        """Return the newest unexpired snapshot that can be replayed.
+
+        Args:
+            name: Name the snapshot was created with
+            tables: Tables whose extraction must have completed; all tables
+                of the snapshot by default
+            ttl_hours: Maximum age, ``SYNC_SPILL_TTL_HOURS`` by default
+            root: Directory holding the snapshots
+            meta: Only return snapshots created with these meta values,
+                e.g. the query parameters of the current run
+        """
+        ttl_seconds = get_ttl_seconds(ttl_hours)
+        for store in cls.snapshots(name, root=root):
+            if store.is_expired(ttl_seconds):
+                continue
+            if meta is not None and not store.matches(meta):
+                logger.info(
+                    f"Not replaying {store.path}, it was created for "
+                    f"another query: {store.meta}"
+                )
+                continue
+            required = list(tables) if tables is not None else store.tables
+            if required and all(store.is_complete(table) for table in required):
+                return store
+        return None
+
+    @property
+    def name(self) -> str:
+        return self.manifest.get("name", "")
+
+    @property
+    def created(self) -> float:
+        return float(self.manifest.get("created", 0))
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.manifest.setdefault("meta", {})
+
+    @property
+    def tables(self) -> List[str]:
+        return list(self.manifest["tables"])
+
+    def matches(self, meta: Dict[str, Any]) -> bool:
+        """Whether the snapshot was created with these meta values."""
+        return all(
+            self.meta.get(key) == _as_json(value) for key, value in meta.items()
+        )
+
+    def schema(self, table: str) -> Optional["pa.Schema"]:
+        """Return the pinned schema of a table, None before its first page.
+
+        Snapshots written before schemas were pinned return None too.
+        """
+        if table not in self._schemas:
+            encoded = self.manifest["tables"].get(table, {}).get("schema")
+            if encoded is None:
+                return None
+            self._schemas[table] = _decode_schema(encoded)
+        return self._schemas[table]
+
+    def is_expired(self, ttl_seconds: Optional[float] = None) -> bool:
+        """Whether the snapshot is older than the TTL."""
+        if ttl_seconds is None:
+            ttl_seconds = get_ttl_seconds()
+        return time_module.time() - self.created > ttl_seconds
+
+    def _table_state(self, table: str) -> Dict[str, Any]:
+        return self.manifest["tables"].setdefault(
+            table, {"rows": 0, "parts": 0, "complete": False}
+        )
+
+    def _save_manifest(self):
+        # Written to a temporary file first, so a crash never leaves a
+        # truncated manifest behind
+        tmp_path = self.path / f"{MANIFEST_NAME}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(self.manifest, manifest_file)
+        tmp_path.replace(self.path / MANIFEST_NAME)
+
+    def _parts(self, table: str) -> List[Path]:
+        state = self.manifest["tables"].get(table)
+        if not state:
+            return []
+        # Part files not yet recorded in the manifest were not fully written
+        return [
+            self.path / table / f"part-{index:05d}.parquet"
+            for index in range(state["parts"])
+        ]
+
+    def append(self, table: str, records: List[Dict[str, Any]]) -> int:
+        """Append a page of records to a table and return its row count.
+
+        The page is cast to the schema of the table, which is widened first
+        if the page does not fit it.
+        """
+        if not records:
+            return 0
+        arrow_table = records_to_table(records)
+        state = self._table_state(table)
+        if state["complete"]:
+            raise ValueError(f"Spill table {table} is already complete")
+        schema = _merge_schemas(self.schema(table), arrow_table.schema)
+        arrow_table = conform(arrow_table, schema)
+        state["schema"] = _encode_schema(schema)
+        self._schemas[table] = schema
+        part_path = self.path / table / f"part-{state['parts']:05d}.parquet"
+        part_path.parent.mkdir(exist_ok=True)
+        pq.write_table(arrow_table, part_path)
+        state["parts"] += 1
+        state["rows"] += arrow_table.num_rows
+        self._save_manifest()
+        return arrow_table.num_rows
+
+    def mark_complete(self, table: str):
+        """Record that the extraction of a table finished."""
+        self._table_state(table)["complete"] = True
+        self._save_manifest()
+
+    def is_complete(self, table: str) -> bool:
+        """Whether the extraction of a table finished."""
+        return bool(self.manifest["tables"].get(table, {}).get("complete"))
+
+    def row_count(self, table: str) -> int:
+        """Return the number of rows stored for a table."""
+        return self.manifest["tables"].get(table, {}).get("rows", 0)
+
+    def iter_batches(
+        self,
+        table: str,
+        batch_size: int,
+        columns: Optional[List[str]] = None,
+        filter_field: Optional[str] = None,
+        filter_values: Optional[Iterable[Any]] = None,
+    ) -> Iterator["pa.RecordBatch"]:
+        """Read a table back lazily in record batches.
+
+        Args:
+            table: Table to read
+            batch_size: Maximum number of rows per batch
+            columns: Columns to read, all by default
+            filter_field: Only yield the rows whose value of this field,
+                as text, is one of ``filter_values``
+            filter_values: Values for ``filter_field``, best passed as the
+                Arrow array returned by ``key_values`` or ``to_value_set``
+
+        Yields:
+            Non-empty ``pyarrow.RecordBatch`` objects with the schema of the
+            table; use ``to_pylist()`` for a list of dicts
+        """
+        value_set = None
+        if filter_field is not None:
+            value_set = to_value_set(filter_values or [])
+        schema = self.schema(table)
+        if schema is not None and columns is not None:
+            schema = pa.schema(
+                [schema.field(column) for column in columns if column in schema.names]
+            )
+        for part_path in self._parts(table):
+            parquet_file = pq.ParquetFile(part_path)
+            part_columns = columns
+            if columns is not None:
+                names = parquet_file.schema_arrow.names
+                part_columns = [column for column in columns if column in names]
+            for batch in parquet_file.iter_batches(
+                batch_size=max(1, batch_size), columns=part_columns
+            ):
+                if schema is not None:
+                    # Parts written before the schema was widened
+                    batch = conform(batch, schema)
+                if value_set is not None:
+                    batch = filter_batch(batch, filter_field, value_set)
+                if batch.num_rows:
+                    yield batch
+
+    def key_values(self, table: str, field: str) -> "pa.Array":
+        """Return the distinct non-null values of a column as text.
+
+        Only this column is read, and the values are never converted to
+        Python objects, so parent-id sets for filtering child tables stay
+        cheap for millions of rows.
+        """
+        schema = self.schema(table)
+        chunks = []
+        for part_path in self._parts(table):
+            if field not in pq.ParquetFile(part_path).schema_arrow.names:
+                continue
+            column = pq.read_table(part_path, columns=[field]).column(field)
+            if schema is not None:
+                column = _cast_column(column, schema.field(field).type)
+            chunks.append(pc.unique(pc.cast(column, pa.string())))
+        if not chunks:
+            return pa.array([], type=pa.string())
+        return pc.drop_null(pc.unique(pa.chunked_array(chunks, type=pa.string())))
+
+    def discard(self):
+        """Delete the snapshot."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class SpilledRecords:
+    """The records of one spilled table, used in place of a list of records.
+
+    Returned by ``SyncPipeline.fetch_data`` for spilled full loads and
+    accepted by ``SyncPipeline.run_with_data``.
+    """
+
+    def __init__(self, store: SpillStore, table: str):
+        self.store = store
+        self.table = table
+
+    def __repr__(self):
+        return f"SpilledRecords({self.store!r}, {self.table!r})"
+
+    def __len__(self):
+        return self.store.row_count(self.table)
+
+    def iter_records(
+        self, batch_size: int, columns: Optional[List[str]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the records in lists of at most batch_size records."""
+        for batch in self.store.iter_batches(self.table, batch_size, columns=columns):
+            yield batch.to_pylist()
+
+    def discard(self):
+        """Delete the snapshot holding the records."""
+        self.store.discard()
+
+
+def spill_extract(
+    extractor,
+    store: SpillStore,
+    table: str,
+    query_params: Optional[Dict[str, Any]] = None,
+    api_page_size: Optional[int] = None,
+    page_filter: Optional[
+        Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+    ] = None,
+    limit: Optional[int] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    fail_on_filter_error: bool = False,
+) -> int:
+    """Extract a source table into a spill store page by page.
+
+    Extractors with ``extract_batched`` are paged; others are extracted in
+    one call. The table is marked complete once the extraction finished.
+
+    Args:
+        extractor: The extractor of the pipeline
+        store: Snapshot to write to
+        table: Name of the table in the snapshot
+        query_params: Query parameters for the extractor
+        api_page_size: Page size for ``extract_batched``
+        page_filter: Function applied to each page before it is stored
+        limit: Stop after storing this many rows
+        on_page: Called with the page number and the rows stored so far
+        fail_on_filter_error: Passed to ``extract`` of extractors without
+            ``extract_batched``
+
+    Returns:
+        Number of rows stored
+    """
+    # extract_batched pops $top
+    query_params = dict(query_params or {})
+    stored = 0
+    with extractor:
+        if hasattr(extractor, "extract_batched"):
+            batch_kwargs = {"query_params": query_params}
+            if api_page_size:
+                batch_kwargs["api_page_size"] = api_page_size
+            pages = extractor.extract_batched(**batch_kwargs)
+        else:
+            pages = [
+                extractor.extract(
+                    query_params=query_params,
+                    fail_on_filter_error=fail_on_filter_error,
+                )
+            ]
+
+        for page_number, page in enumerate(pages, start=1):
+            if page_filter is not None:
+                page = page_filter(page)
+            if limit is not None:
+                page = page[:max(0, limit - stored)]
+            stored += store.append(table, page)
+            if on_page is not None:
+                on_page(page_number, stored)
+            if limit is not None and stored >= limit:
+                break
+
+    store.mark_complete(table)
+    logger.info(f"Spilled {stored} rows of {table} to {store.path}")
+    return stored
+
+
+def purge_expired(
+    ttl_hours: Optional[float] = None, root: Optional[Path] = None
+) -> int:
+    """Delete snapshots older than the TTL and return how many were deleted.
+
+    Does not need pyarrow, so it is safe to call from periodic tasks.
+    """
+    root = Path(root or get_spill_dir())
+    if not root.is_dir():
+        return 0
+    cutoff = time_module.time() - get_ttl_seconds(ttl_hours)
+    deleted = 0
+    for path in root.iterdir():
+        if not path.is_dir():
+            continue
+        manifest = _read_manifest(path)
+        if manifest is not None:
+            created = float(manifest.get("created", 0))
+        else:
+            created = path.stat().st_mtime
+        if created < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            deleted += 1
+    return deleted
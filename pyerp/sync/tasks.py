@@ -1,10 +1,14 @@
 """Celery tasks for scheduled synchronization operations."""
 
+from decimal import Decimal
 from typing import Dict, List, Optional
 import os
 import yaml
 
+import pandas as pd
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Max, Q
 from django.utils import timezone
 from datetime import timedelta
 
@@ -15,10 +19,14 @@ except ImportError:
     def shared_task(func):
         return func
 
+from pyerp.core.api_cache import bump_model_version
 from pyerp.utils.logging import get_logger, log_data_sync_event
 
-from .models import SyncMapping, SyncSource, SyncTarget
+from .models import SyncMapping, SyncRequest, SyncSource, SyncTarget
 from .pipeline import PipelineFactory
+from . import queue as sync_queue
+from . import spill
+from .queue import enqueue_sync, sync_lock
 
 # Import necessary models and client
 from pyerp.business_modules.production.models import Mold, MoldProduct
@@ -30,6 +38,9 @@ logger = get_logger(__name__)
 
 CONFIG_BASE_PATH = os.path.dirname(__file__)
 
+QUEUE_PRUNE_KEY = "sync:queue:pruned"
+QUEUE_PRUNE_INTERVAL = 3600  # seconds
+
 
 def _load_yaml_config(config_filename: str) -> Dict:
     """Load sync configuration from a YAML file.
@@ -269,14 +280,17 @@ def run_entity_sync(
 def run_all_mappings(
     incremental: bool = True, source_name: Optional[str] = None
 ) -> List[Dict]:
-    """Run sync for all active mappings, optionally filtered by source.
+    """Queue a sync of all active mappings, optionally filtered by source.
+
+    Identical requests that are still pending are coalesced, see
+    ``pyerp.sync.queue``.
 
     Args:
         incremental: If True, only sync records modified since last sync
         source_name: Optional source name to filter mappings
 
     Returns:
-        List of dicts with sync results
+        List of dicts with the queued request per mapping
     """
     # Get all active mappings
     mappings = SyncMapping.objects.filter(active=True)
@@ -285,17 +299,17 @@ def run_all_mappings(
     if source_name:
         mappings = mappings.filter(source__name=source_name)
 
-    # Launch a task for each mapping
+    # Queue a request for each mapping; the dispatcher starts them within
+    # the concurrency limits and skips mappings that are already running
     results = []
     for mapping in mappings:
-        task_result = run_entity_sync.delay(
-            mapping.id, incremental=incremental
-        )
+        request, created = enqueue_sync(mapping, incremental=incremental)
         results.append(
             {
                 "mapping_id": mapping.id,
                 "entity_type": mapping.entity_type,
-                "task_id": task_result.id,
+                "request_id": request.id,
+                "coalesced": not created,
             }
         )
 
@@ -310,6 +324,108 @@ def run_all_mappings(
     return results
 
 
+@shared_task(name="sync.dispatch_sync_queue", ignore_result=True)
+def dispatch_sync_queue() -> int:
+    """Start queued sync requests that are allowed to run.
+
+    Triggered whenever a request is queued or finishes, and by Celery beat
+    to pick up requests that were held back by the concurrency limits.
+
+    Returns:
+        Number of requests started
+    """
+    started = sync_queue.dispatch()
+    if cache.add(QUEUE_PRUNE_KEY, True, QUEUE_PRUNE_INTERVAL):
+        deleted = sync_queue.prune_requests()
+        if deleted:
+            logger.info(f"Deleted {deleted} finished sync requests")
+        purged = spill.purge_expired()
+        if purged:
+            logger.info(f"Deleted {purged} expired sync spill snapshots")
+    return len(started)
+
+
+@shared_task(bind=True, name="sync.run_sync_request", ignore_result=True)
+def run_sync_request(self, request_id: int) -> Optional[Dict]:
+    """Run a sync request started by the dispatcher and release its lock.
+
+    Args:
+        request_id: ID of the running SyncRequest
+
+    Returns:
+        Dict with sync results, or None if the request is not running
+    """
+    request = SyncRequest.objects.filter(
+        pk=request_id, status=SyncRequest.STATUS_RUNNING
+    ).first()
+    if request is None:
+        logger.warning(f"Sync request {request_id} is not running, skipping")
+        return None
+    SyncRequest.objects.filter(pk=request_id).update(task_id=self.request.id or "")
+
+    try:
+        with sync_queue.holding(request):
+            result = run_entity_sync(
+                mapping_id=request.mapping_id,
+                incremental=request.incremental,
+                batch_size=request.batch_size,
+                query_params=request.query_params,
+            )
+    except Exception as e:
+        sync_queue.finish(request, error=str(e))
+        logger.error(f"Sync request {request_id} failed: {e}")
+        return {"status": "failed", "error": str(e)}
+    sync_queue.finish(request, result=result)
+    return result
+
+
+@shared_task(name="sync.reconcile_deletes")
+def reconcile_deletes(
+    mapping_id: Optional[int] = None, dry_run: bool = False
+) -> List[Dict]:
+    """Handle records deleted in the source for mappings that enable it.
+
+    Each mapping is reconciled under its sync lock, so it does not race
+    with a sync loading the same rows; mappings that are syncing are
+    skipped until the next run.
+
+    Args:
+        mapping_id: Optional ID of a single mapping to reconcile
+        dry_run: Only count the rows missing in the source
+
+    Returns:
+        List of dicts with the reconcile result per mapping
+    """
+    mappings = SyncMapping.objects.filter(active=True).select_related(
+        "source", "target"
+    )
+    if mapping_id is not None:
+        mappings = mappings.filter(id=mapping_id)
+
+    results = []
+    for mapping in mappings:
+        if not (mapping.mapping_config or {}).get("reconcile", {}).get("enabled"):
+            continue
+        with sync_lock(
+            mapping, incremental=False, query_params={"reconcile": True}
+        ) as request:
+            if request is None:
+                logger.info(f"Skipping reconcile of {mapping}, it is syncing")
+                result = {"status": "skipped"}
+            else:
+                try:
+                    pipeline = PipelineFactory.create_pipeline(mapping)
+                    result = pipeline.reconcile_deletes(dry_run=dry_run)
+                except Exception as e:
+                    logger.exception(f"Reconcile of {mapping} failed")
+                    result = {"status": "failed", "error": str(e)}
+                request.result = result
+        results.append(
+            {"mapping_id": mapping.id, "entity_type": mapping.entity_type, **result}
+        )
+    return results
+
+
 @shared_task(name="sync.run_incremental_sync")
 def run_incremental_sync() -> List[Dict]:
     """Run incremental sync for all active mappings.
@@ -460,36 +576,40 @@ def run_sales_record_sync(
     # --- End Determine Date Filter ---
 
 
-    # Sync sales records
-    if sales_record_mapping:
-        logger.info(
-            f"Running sales record sync (mapping ID: "
-            f"{sales_record_mapping.id})"
-        )
-        record_result = run_entity_sync(
-            mapping_id=sales_record_mapping.id,
-            incremental=incremental,  # Keep for logging/potential future use
-            batch_size=batch_size,
-            query_params=sync_query_params  # Pass the constructed params
-        )
-        results.append(record_result)
-
-    # Sync line items - Reuse the same query params (date filter)
-    # Assumes line items don't have their own date field to filter by directly
-    # and are implicitly filtered by their parent's date.
-    # If items *do* have a filterable date, adjust params here.
-    if sales_record_item_mapping:
-        logger.info(
-            f"Running sales record line item sync "
-            f"(mapping ID: {sales_record_item_mapping.id})"
-        )
-        item_result = run_entity_sync(
-            mapping_id=sales_record_item_mapping.id,
+    # Sync sales records, then their line items. Both run inline because
+    # the items depend on their parents, under the same per-mapping locks
+    # as queued syncs.
+    for label, mapping in (
+        ("sales record", sales_record_mapping),
+        ("sales record line item", sales_record_item_mapping),
+    ):
+        if not mapping:
+            continue
+        with sync_lock(
+            mapping,
             incremental=incremental,
             batch_size=batch_size,
-            query_params=sync_query_params  # Pass the same params
-        )
-        results.append(item_result)
+            query_params=sync_query_params,
+        ) as request:
+            if request is None:
+                logger.warning(
+                    f"Skipping {label} sync (mapping ID: {mapping.id}), it is "
+                    f"already running or its source is at its concurrency limit"
+                )
+                results.append(
+                    {"status": "skipped", "mapping_id": mapping.id, "records_processed": 0}
+                )
+                continue
+            logger.info(f"Running {label} sync (mapping ID: {mapping.id})")
+            # The same query params (date filter) apply to the line items,
+            # which are implicitly filtered by their parent's date
+            request.result = run_entity_sync(
+                mapping_id=mapping.id,
+                incremental=incremental,
+                batch_size=batch_size,
+                query_params=sync_query_params,
+            )
+            results.append(request.result)
 
     # Calculate total records processed
     total_records = sum(
@@ -663,53 +783,54 @@ def run_production_sync(
             ]
         
         results = []
-        
-        # First, sync production orders
-        logger.info("Starting production order sync")
-        log_data_sync_event(
-            source="legacy_erp",
-            destination="pyerp",
-            record_count=0,
-            status="started",
-            details={
-                "entity_type": "production_order",
-                "incremental": incremental,
-                "batch_size": batch_size,
-            },
-        )
-        
-        production_order_result = run_entity_sync(
-            mapping_id=production_order_mapping_id,
-            incremental=incremental,
-            batch_size=batch_size,
-            query_params=query_params,
-        )
-        
-        results.append(production_order_result)
-        
-        # Then, sync production order items
-        logger.info("Starting production order item sync")
-        log_data_sync_event(
-            source="legacy_erp",
-            destination="pyerp",
-            record_count=0,
-            status="started",
-            details={
-                "entity_type": "production_order_item",
-                "incremental": incremental,
-                "batch_size": batch_size,
-            },
-        )
-        
-        production_order_item_result = run_entity_sync(
-            mapping_id=production_order_item_mapping_id,
-            incremental=incremental,
-            batch_size=batch_size,
-            query_params=query_params,
-        )
-        
-        results.append(production_order_item_result)
-        
+
+        # Sync production orders, then their items. Both run inline because
+        # the items depend on their orders, under the same per-mapping locks
+        # as queued syncs.
+        for entity_type, mapping_id in (
+            ("production_order", production_order_mapping_id),
+            ("production_order_item", production_order_item_mapping_id),
+        ):
+            mapping = SyncMapping.objects.select_related("source").get(
+                pk=mapping_id
+            )
+            with sync_lock(
+                mapping,
+                incremental=incremental,
+                batch_size=batch_size,
+                query_params=query_params,
+            ) as request:
+                if request is None:
+                    logger.warning(
+                        f"Skipping {entity_type} sync (mapping ID: {mapping_id}), "
+                        f"it is already running or its source is at its "
+                        f"concurrency limit"
+                    )
+                    results.append(
+                        {"status": "skipped", "mapping_id": mapping_id, "records_processed": 0}
+                    )
+                    continue
+
+                logger.info(f"Starting {entity_type} sync")
+                log_data_sync_event(
+                    source="legacy_erp",
+                    destination="pyerp",
+                    record_count=0,
+                    status="started",
+                    details={
+                        "entity_type": entity_type,
+                        "incremental": incremental,
+                        "batch_size": batch_size,
+                    },
+                )
+                request.result = run_entity_sync(
+                    mapping_id=mapping_id,
+                    incremental=incremental,
+                    batch_size=batch_size,
+                    query_params=query_params,
+                )
+                results.append(request.result)
+
         return results
     except Exception as e:
         logger.error(f"Production sync failed: {e}")
@@ -1128,6 +1249,118 @@ def sync_molds(
     return result
 
 
+# Fields compared when diffing legacy 'Form_Artikel' rows against MoldProduct
+MOLD_PRODUCT_FIELDS = [
+    "mold_id",
+    "parent_product_id",
+    "products_per_mold",
+    "weight_per_product",
+    "legacy_timestamp",
+]
+
+
+def _prepare_mold_product_frame(
+    mold_articles_df: pd.DataFrame,
+    parent_ids: Dict[str, int],
+    mold_ids: Dict[str, int],
+) -> pd.DataFrame:
+    """
+    Resolve foreign keys and normalize values of mold article rows.
+
+    Parents and molds are joined through the given key maps with vectorized
+    lookups. Rows sharing a ``__KEY`` are reduced to the last one.
+
+    Returns:
+        DataFrame with ``legacy_uuid`` and the ``MOLD_PRODUCT_FIELDS``
+        columns; unresolved foreign keys are NaN.
+    """
+    df = mold_articles_df
+
+    def column(name, default=None):
+        if name in df.columns:
+            return df[name]
+        return pd.Series(default, index=df.index, dtype=object)
+
+    frame = pd.DataFrame(
+        {
+            "legacy_uuid": column("__KEY").fillna("").astype(str).str.strip(),
+            "legacy_art_nr": column("Art_Nr", "").astype(str).str.strip(),
+            "legacy_form_nr": column("FormNr", "").astype(str).str.strip(),
+        },
+        index=df.index,
+    )
+    frame["parent_product_id"] = frame["legacy_art_nr"].map(parent_ids)
+    frame["mold_id"] = frame["legacy_form_nr"].map(mold_ids)
+    frame["products_per_mold"] = (
+        pd.to_numeric(column("Anzahl", 1), errors="coerce").fillna(1).astype(int)
+    )
+    weights = pd.to_numeric(column("Gewichtung"), errors="coerce")
+    frame["weight_per_product"] = pd.Series(
+        [
+            None if pd.isna(w) else Decimal(str(w)).quantize(Decimal("0.001"))
+            for w in weights
+        ],
+        index=df.index,
+        dtype=object,
+    )
+    timestamps = pd.to_datetime(
+        column("__TIMESTAMP"),
+        errors="coerce",
+        utc=True,
+        format="ISO8601",
+    )
+    frame["legacy_timestamp"] = pd.Series(
+        [None if pd.isna(t) else t.to_pydatetime() for t in timestamps],
+        index=df.index,
+        dtype=object,
+    )
+    duplicate = frame.duplicated(subset="legacy_uuid", keep="last")
+    return frame[~duplicate | (frame["legacy_uuid"] == "")]
+
+
+def _diff_mold_products(frame: pd.DataFrame, existing: List[Dict]):
+    """
+    Compare resolved rows with existing MoldProduct values in memory.
+
+    Rows are matched by ``legacy_uuid`` first. A new ``legacy_uuid`` whose
+    mold/parent pair already exists under a key that is not in ``frame``
+    takes over that row, so re-created legacy links do not violate the
+    unique constraint on ``(mold, parent_product)``.
+
+    Returns:
+        tuple: ``(to_create, to_update, unchanged, matched_ids)`` where
+        ``to_create`` and ``to_update`` are MoldProduct instances and
+        ``matched_ids`` holds the ids of all existing rows still in use
+    """
+    now = timezone.now()
+    by_uuid = {row["legacy_uuid"]: row for row in existing}
+    source_uuids = set(frame["legacy_uuid"])
+    by_pair = {
+        (row["mold_id"], row["parent_product_id"]): row
+        for row in existing
+        if row["legacy_uuid"] not in source_uuids
+    }
+    to_create = []
+    to_update = []
+    unchanged = 0
+    matched_ids = set()
+    for record in frame[["legacy_uuid", *MOLD_PRODUCT_FIELDS]].to_dict("records"):
+        record["mold_id"] = int(record["mold_id"])
+        record["parent_product_id"] = int(record["parent_product_id"])
+        current = by_uuid.get(record["legacy_uuid"])
+        if current is None:
+            current = by_pair.pop((record["mold_id"], record["parent_product_id"]), None)
+        if current is None:
+            to_create.append(MoldProduct(**record))
+            continue
+        matched_ids.add(current["id"])
+        if any(current[field] != record[field] for field in ["legacy_uuid", *MOLD_PRODUCT_FIELDS]):
+            to_update.append(MoldProduct(id=current["id"], updated_at=now, **record))
+        else:
+            unchanged += 1
+    return to_create, to_update, unchanged, matched_ids
+
+
 @shared_task(name="sync.sync_mold_products")
 def sync_mold_products(
     incremental: bool = True, 
@@ -1139,11 +1372,17 @@ def sync_mold_products(
     'Form_Artikel' table.
     
     This task relies on ParentProduct and Mold data already being synced.
+    Legacy rows are joined against preloaded parent and mold key maps,
+    diffed against existing MoldProduct rows in memory, and only changed
+    links are written with bulk operations.
 
     Args:
-        incremental: If True, only sync records modified since last sync.
-        batch_size: Number of records to fetch per API call.
-        query_params: Optional additional query parameters.
+        incremental: If True, only fetch records whose ``__TIMESTAMP`` is
+            not older than the newest synced ``legacy_timestamp``. A full
+            sync also deletes links that no longer exist in the legacy ERP.
+        batch_size: Number of rows per bulk create/update statement.
+        query_params: Optional additional query parameters; a
+            ``filter_query`` list is passed on to the legacy API.
 
     Returns:
         Dict containing sync results.
@@ -1156,112 +1395,118 @@ def sync_mold_products(
     failed_count = 0
     missing_parent_count = 0
     missing_mold_count = 0
+    created_count = updated_count = unchanged_count = deleted_count = 0
     errors = []
 
-    fetch_all = not incremental  # Simplistic approach for now
-    # TODO: Add timestamp filtering based on last successful sync 
-    # for 'mold_product'
+    filter_query = list((query_params or {}).get("filter_query") or [])
+    watermark = None
+    if incremental:
+        watermark = MoldProduct.objects.aggregate(
+            latest=Max("legacy_timestamp")
+        )["latest"]
+        if watermark is not None:
+            # The legacy API compares dates only; rows are re-checked below
+            filter_query.append(["__TIMESTAMP", ">=", watermark])
 
     try:
-        mold_articles_df = client.fetch_mold_articles(all_records=fetch_all)
-        processed_count = len(mold_articles_df)
+        mold_articles_df = client.fetch_mold_articles(
+            all_records=True, filter_query=filter_query or None
+        )
         logger.info(
-            f"Fetched {processed_count} mold articles from legacy API."
+            f"Fetched {len(mold_articles_df)} mold articles from legacy API."
         )
 
-        # Fetch related objects in bulk for efficiency
-        # We need legacy_base_sku from ParentProduct and legacy_form_nr 
-        # from Mold for mapping
-        parent_products_map = {
-            p.legacy_base_sku: p for p in 
+        # Key maps used to resolve foreign keys in one vectorized lookup
+        parent_ids = dict(
             ParentProduct.objects.filter(legacy_base_sku__isnull=False)
-        }
-        molds_map = {
-            m.legacy_form_nr: m for m in 
+            .values_list("legacy_base_sku", "id")
+        )
+        mold_ids = dict(
             Mold.objects.filter(legacy_form_nr__isnull=False)
-        }
+            .values_list("legacy_form_nr", "id")
+        )
         logger.info(
-            f"Pre-fetched {len(parent_products_map)} parent products "
-            f"and {len(molds_map)} molds."
+            f"Pre-fetched {len(parent_ids)} parent products "
+            f"and {len(mold_ids)} molds."
+        )
+
+        frame = _prepare_mold_product_frame(mold_articles_df, parent_ids, mold_ids)
+        if watermark is not None:
+            frame = frame[
+                frame["legacy_timestamp"].map(
+                    lambda value: value is None or value >= watermark
+                )
+            ]
+        processed_count = len(frame)
+        source_uuids = set(frame["legacy_uuid"])
+
+        missing_key = frame["legacy_uuid"] == ""
+        missing_parent = ~missing_key & frame["parent_product_id"].isna()
+        missing_mold = ~missing_key & ~missing_parent & frame["mold_id"].isna()
+        missing_parent_count = int(missing_parent.sum())
+        missing_mold_count = int(missing_mold.sum())
+        failed_count = int(missing_key.sum()) + missing_parent_count + missing_mold_count
+        if missing_key.any():
+            errors.append(f"Missing __KEY for {int(missing_key.sum())} records")
+        for art_nr in frame.loc[missing_parent, "legacy_art_nr"].unique()[:5]:
+            errors.append(f"Missing ParentProduct for Art_Nr {art_nr}")
+        for form_nr in frame.loc[missing_mold, "legacy_form_nr"].unique()[:5]:
+            errors.append(f"Missing Mold for FormNr {form_nr}")
+        if failed_count:
+            logger.warning(
+                f"Skipping {failed_count} mold articles: "
+                f"{int(missing_key.sum())} without __KEY, "
+                f"{missing_parent_count} with unknown parent, "
+                f"{missing_mold_count} with unknown mold."
+            )
+
+        frame = frame[~(missing_key | missing_parent | missing_mold)]
+        duplicate_pair = frame.duplicated(
+            subset=["mold_id", "parent_product_id"], keep="last"
+        )
+        if duplicate_pair.any():
+            failed_count += int(duplicate_pair.sum())
+            errors.append(
+                f"{int(duplicate_pair.sum())} records repeat a mold/product pair"
+            )
+            frame = frame[~duplicate_pair]
+
+        existing_qs = MoldProduct.objects.values("id", "legacy_uuid", *MOLD_PRODUCT_FIELDS)
+        if incremental:
+            existing_qs = existing_qs.filter(
+                Q(legacy_uuid__in=list(frame["legacy_uuid"]))
+                | Q(parent_product_id__in=list(frame["parent_product_id"].astype(int).unique()))
+            )
+        existing = list(existing_qs)
+
+        to_create, to_update, unchanged_count, matched_ids = _diff_mold_products(
+            frame, existing
         )
+        stale_ids = []
+        if not incremental:
+            stale_ids = [
+                row["id"] for row in existing
+                if row["id"] not in matched_ids and row["legacy_uuid"] not in source_uuids
+            ]
 
         with transaction.atomic():
-            for index, row in mold_articles_df.iterrows():
-                try:
-                    legacy_uuid = row.get("__KEY")
-                    if not legacy_uuid:
-                        logger.warning(
-                            "Skipping mold article record missing __KEY."
-                        )
-                        failed_count += 1
-                        errors.append(
-                            f"Missing __KEY for record index {index}"
-                        )
-                        continue
+            # Delete first so that re-created pairs do not collide
+            if stale_ids:
+                MoldProduct.objects.filter(id__in=stale_ids).delete()
+            MoldProduct.objects.bulk_update(
+                to_update,
+                ["legacy_uuid", *MOLD_PRODUCT_FIELDS, "updated_at"],
+                batch_size=batch_size,
+            )
+            MoldProduct.objects.bulk_create(to_create, batch_size=batch_size)
+        # Bulk writes skip the signals that invalidate cached API responses
+        if stale_ids or to_update or to_create:
+            bump_model_version(MoldProduct)
 
-                    # Find related ParentProduct
-                    legacy_art_nr = str(row.get("Art_Nr", "")).strip()
-                    parent_product = parent_products_map.get(legacy_art_nr)
-                    if not parent_product:
-                        logger.warning(
-                            f"Skipping mold article {legacy_uuid}: "
-                            f"ParentProduct with legacy_base_sku "
-                            f"'{legacy_art_nr}' not found."
-                        )
-                        missing_parent_count += 1
-                        failed_count += 1
-                        errors.append(
-                            f"Missing ParentProduct for Art_Nr {legacy_art_nr}"
-                        )
-                        continue
-                        
-                    # Find related Mold
-                    legacy_form_nr = str(row.get("FormNr", "")).strip()
-                    mold = molds_map.get(legacy_form_nr)
-                    if not mold:
-                        logger.warning(
-                            f"Skipping mold article {legacy_uuid}: Mold with "
-                            f"legacy_form_nr '{legacy_form_nr}' not found."
-                        )
-                        missing_mold_count += 1
-                        failed_count += 1
-                        errors.append(
-                            f"Missing Mold for FormNr {legacy_form_nr}"
-                        )
-                        continue
-                        
-                    # Map legacy data to Django model fields
-                    defaults = {
-                        "parent_product": parent_product,
-                        "mold": mold,
-                        # Default to 1 if missing
-                        "products_per_mold": int(row.get("Anzahl", 1)),  
-                        # Assumes pandas handles type or None
-                        "weight_per_product": row.get("Gewichtung"),  
-                        "legacy_timestamp": row.get("__TIMESTAMP"),
-                    }
-                    
-                    mold_product, created = (
-                        MoldProduct.objects.update_or_create(
-                            legacy_uuid=str(legacy_uuid).strip(),
-                            defaults=defaults
-                        )
-                    )
-                    
-                    succeeded_count += 1
-                    if created:
-                        logger.debug(f"Created MoldProduct: {mold_product}")
-                    else:
-                        logger.debug(f"Updated MoldProduct: {mold_product}")
-                        
-                except Exception as e:
-                    logger.error(
-                        f"Failed to process mold article record "
-                        f"{row.get('__KEY')}: {e}", 
-                        exc_info=True
-                    )
-                    failed_count += 1
-                    errors.append(f"Record {row.get('__KEY')}: {str(e)}")
+        created_count = len(to_create)
+        updated_count = len(to_update)
+        deleted_count = len(stale_ids)
+        succeeded_count = created_count + updated_count + unchanged_count
 
     except LegacyERPError as e:
         logger.error(
@@ -1288,6 +1533,10 @@ def sync_mold_products(
         "records_fetched": processed_count,
         "records_succeeded": succeeded_count,
         "records_failed": failed_count,
+        "records_created": created_count,
+        "records_updated": updated_count,
+        "records_unchanged": unchanged_count,
+        "records_deleted": deleted_count,
         "missing_parents": missing_parent_count,
         "missing_molds": missing_mold_count,
         "duration_seconds": duration,
@@ -1450,8 +1699,8 @@ def run_buchhaltungs_buttler_sync(
     """Run synchronization for BuchhaltungsButler data based on YAML config.
 
     Loads mappings from buchhaltungs_buttler_sync.yaml, ensures corresponding
-    SyncMapping objects exist in the DB, and then triggers the generic
-    run_entity_sync task for each requested entity type.
+    SyncMapping objects exist in the DB, and then queues a sync of each
+    requested entity type (see ``pyerp.sync.queue``).
 
     Args:
         incremental: If True, attempt incremental sync for each mapping.
@@ -1523,31 +1772,32 @@ def run_buchhaltungs_buttler_sync(
             )
             continue
 
-        # Trigger the generic sync task for this mapping
+        # Queue a sync of this mapping, see pyerp.sync.queue
         try:
-            task_result = run_entity_sync.delay(
-                mapping_id=sync_mapping.id,
+            request, created = enqueue_sync(
+                sync_mapping,
                 incremental=incremental,
                 batch_size=batch_size,
                 query_params=query_params # Pass global params if any
             )
             logger.info(
-                f"Triggered run_entity_sync for {entity_type} "
-                f"(Mapping ID: {sync_mapping.id}, Task ID: {task_result.id})"
+                f"Queued sync for {entity_type} "
+                f"(Mapping ID: {sync_mapping.id}, Request ID: {request.id})"
             )
             triggered_tasks.append({
                 "mapping_id": sync_mapping.id,
                 "entity_type": entity_type,
                 "status": "scheduled",
-                "task_id": task_result.id,
+                "request_id": request.id,
+                "coalesced": not created,
             })
         except Exception as e:
             logger.error(
-                f"Failed to trigger run_entity_sync for {entity_type} "
+                f"Failed to queue sync for {entity_type} "
                 f"(Mapping ID: {sync_mapping.id}): {e}",
                 exc_info=True
             )
-            sync_errors.append(f"Task trigger failed for {entity_type}: {e}")
+            sync_errors.append(f"Queueing failed for {entity_type}: {e}")
 
     # Check if any requested entity types were not found in the config
     if entity_types is not None:
@@ -2,6 +2,7 @@
 import pytest
 import json
 from argparse import ArgumentParser
+from contextlib import ExitStack, nullcontext
 from datetime import datetime, timedelta, timezone as dt_timezone
 from unittest.mock import patch, MagicMock
 
@@ -183,6 +184,24 @@ def test_get_mapping_multiple_found(mock_get, test_command):
         test_command.get_mapping("test_entity")
     mock_get.assert_called_once_with(entity_type="test_entity", active=True)
 
+@patch('pyerp.sync.management.commands.base_sync_command.sync_lock')
+@patch('pyerp.sync.models.SyncMapping.objects.get')
+def test_get_mapping_fails_while_mapping_is_syncing(
+    mock_get, mock_sync_lock, test_command, mock_sync_mapping
+):
+    """Test that a command does not sync a mapping locked by another sync."""
+    mock_get.return_value = mock_sync_mapping
+    mock_sync_lock.return_value = nullcontext(None)
+    test_command._mapping_locks = ExitStack()
+    with pytest.raises(CommandError, match="already syncing"):
+        test_command.get_mapping("test_entity")
+    mock_sync_lock.assert_called_once_with(
+        mock_sync_mapping,
+        incremental=True,
+        batch_size=100,
+        query_params={"command": "test_base_sync_command"},
+    )
+
 
 # --- Test run_sync_via_command ---
 
@@ -282,6 +282,25 @@ class TestBaseTransformer:
 
 
     
+    def test_get_source_fields(self):
+        """Test collecting the fields named in the config."""
+        transformer = MockTransformer(
+            {
+                "field_mappings": {
+                    "legacy_id": "AbsNr",
+                    "subtotal": {"field": "Netto", "transform": "to_decimal"},
+                },
+                "lookups": {
+                    "customer": {"fields": {"legacy_id": "KundenNr"}},
+                },
+                "composite_key": ["AbsNr", "PosNr"],
+            }
+        )
+
+        assert transformer.get_source_fields() == [
+            "legacy_id", "AbsNr", "subtotal", "Netto", "KundenNr", "PosNr"
+        ]
+
     def test_apply_field_mappings(self, basic_config):
         """Test applying field mappings to source data."""
         transformer = MockTransformer(basic_config)
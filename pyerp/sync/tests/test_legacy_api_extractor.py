@@ -9,7 +9,7 @@ import pytest
 from unittest import mock
 import pandas as pd
 from typing import Dict, Any, List
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from unittest.mock import patch
 import logging
 
@@ -120,7 +120,8 @@ def test_legacy_api_extractor_extract_basic(mock_client_class):
         table_name="Products",
         all_records=True,  
         filter_query=None, 
-        top=None
+        top=None,
+        attributes=None,
     )
 
 
@@ -160,7 +161,8 @@ def test_legacy_api_extractor_extract_with_pagination(mock_client_class):
         table_name="Products",
         all_records=True, # Default behavior
         filter_query=None,
-        top=None
+        top=None,
+        attributes=None,
     )
     
     # Original assertions for pagination calls removed/commented out:
@@ -200,6 +202,7 @@ def test_legacy_api_extractor_extract_with_top_param(mock_client_class):
         filter_query=None,
         top=1,  # From $top parameter
         all_records=False, # $top makes this False
+        attributes=None,
     )
 
 
@@ -237,9 +240,117 @@ def test_legacy_api_extractor_extract_with_filter_query(mock_client_class):
         filter_query=filter_list, # Expect the list here
         top=None, 
         all_records=True, # Default unless top is specified
+        attributes=None,
     )
 
 
+@pytest.mark.unit
+@mock.patch("pyerp.sync.extractors.legacy_api.LegacyERPClient")
+def test_legacy_api_extractor_extract_with_timestamp_filter(mock_client_class):
+    """Test that the watermark of an incremental sync becomes a 4D filter."""
+    LegacyAPIExtractor.clear_cache()
+    mock_client_instance = mock_client_class.return_value
+    mock_client_instance.fetch_table.return_value = pd.DataFrame([{"id": 1}])
+    extractor = LegacyAPIExtractor({"environment": "test", "table_name": "Kunden"})
+    extractor.connection = mock_client_instance
+    since = datetime(2025, 3, 9, 11, 55, 30, tzinfo=timezone.utc)
+
+    extractor.extract(query_params={"timestamp_filter": since})
+    mock_client_instance.fetch_table.assert_called_once_with(
+        table_name="Kunden",
+        filter_query=[["__TIMESTAMP", ">=", "2025-03-09T11:55:30Z"]],
+        top=None,
+        all_records=True,
+        attributes=None,
+    )
+
+    mock_client_instance.fetch_table.reset_mock()
+    extractor.extract(
+        query_params={
+            "timestamp_filter": since,
+            "timestamp_field": "modified_date",
+            "filter_query": [["aktiv", "=", "1"]],
+        }
+    )
+    assert mock_client_instance.fetch_table.call_args.kwargs["filter_query"] == [
+        ["aktiv", "=", "1"],
+        ["modified_date", ">=", "2025-03-09T11:55:30Z"],
+    ]
+
+
+@pytest.mark.unit
+@mock.patch("pyerp.sync.extractors.legacy_api.LegacyERPClient")
+def test_legacy_api_extractor_extract_with_attributes(mock_client_class):
+    """Test that configured columns are passed on as a projection."""
+    LegacyAPIExtractor.clear_cache()
+    mock_client_instance = mock_client_class.return_value
+    mock_client_instance.fetch_table.return_value = pd.DataFrame([{"AbsNr": 1}])
+    extractor = LegacyAPIExtractor(
+        {
+            "environment": "test",
+            "table_name": "Belege_Pos",
+            "attributes": ["PosNr", "Menge"],
+            "extra_attributes": ["Picking_ok"],
+        }
+    )
+    extractor.connection = mock_client_instance
+
+    extractor.extract(
+        query_params={"parent_record_ids": [1, 2], "timestamp_field": "modified_date"}
+    )
+    assert mock_client_instance.fetch_table.call_args.kwargs["attributes"] == [
+        "PosNr", "Menge", "Picking_ok", "__KEY", "modified_date", "AbsNr"
+    ]
+
+    # Unresolved auto fetches all columns
+    extractor.config["attributes"] = "auto"
+    assert extractor._get_attributes({}) is None
+
+
+@pytest.mark.unit
+def test_legacy_api_extractor_extract_batched_adapts_page_size():
+    """Test that batches follow the pager and shrink after a timeout."""
+    import json
+
+    import requests
+
+    from pyerp.external_api.legacy_erp import LegacyERPClient
+
+    def page(entities):
+        response = mock.MagicMock(status_code=200)
+        response.content = json.dumps({"__ENTITIES": entities}).encode()
+        return response
+
+    LegacyERPClient._pagers.clear()
+    with mock.patch.object(LegacyERPClient, "ensure_session", return_value=True):
+        client = LegacyERPClient(environment="live")
+    pager = client.get_pager("Belege")
+    pager.min_size, pager.page_size = 1, 4
+    # The timeout is wrapped by BaseAPIClient and LegacyERPClient on its way up
+    responses = [
+        page([{"id": i} for i in range(4)]),
+        requests.ReadTimeout("slow"),
+        page([{"id": 4}]),
+    ]
+    extractor = LegacyAPIExtractor({"environment": "live", "table_name": "Belege"})
+    extractor.connection = client
+
+    with mock.patch.object(
+        LegacyERPClient, "ensure_session", return_value=True
+    ), mock.patch.object(
+        client, "_make_request", side_effect=responses
+    ) as request, mock.patch.object(pager, "observe", return_value=4):
+        batches = list(extractor.extract_batched(api_page_size=4))
+    LegacyERPClient._pagers.clear()
+
+    assert [len(batch) for batch in batches] == [4, 1]
+    calls = [
+        (c.kwargs["params"]["$skip"], c.kwargs["params"]["$top"])
+        for c in request.call_args_list
+    ]
+    assert calls == [(0, 4), (4, 4), (4, 2)]
+
+
 @pytest.mark.unit
 @mock.patch("pyerp.sync.extractors.legacy_api.LegacyERPClient")
 def test_legacy_api_extractor_extract_empty_result(mock_client_class):
@@ -268,7 +379,8 @@ def test_legacy_api_extractor_extract_empty_result(mock_client_class):
         table_name="Products", 
         all_records=True,
         filter_query=None, 
-        top=None 
+        top=None,
+        attributes=None,
     )
 
 
@@ -0,0 +1,111 @@
+"""
+Tests for the vectorized MoldProduct sync helpers.
+"""
+
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from pyerp.sync.tasks import _diff_mold_products, _prepare_mold_product_frame
+
+
+def _articles():
+    return pd.DataFrame(
+        [
+            {"__KEY": "K1", "Art_Nr": "1000", "FormNr": "F1", "Anzahl": 4,
+             "Gewichtung": 1.5, "__TIMESTAMP": "2024-05-01T10:00:00.000Z"},
+            {"__KEY": "K2", "Art_Nr": " 2000 ", "FormNr": "F2", "Anzahl": None,
+             "Gewichtung": None, "__TIMESTAMP": None},
+            {"__KEY": "K3", "Art_Nr": "9999", "FormNr": "F1", "Anzahl": 1,
+             "Gewichtung": 0.2, "__TIMESTAMP": "2024-05-02T10:00:00.000Z"},
+            {"__KEY": None, "Art_Nr": "1000", "FormNr": "F1", "Anzahl": 1,
+             "Gewichtung": 0.2, "__TIMESTAMP": None},
+            {"__KEY": "K1", "Art_Nr": "1000", "FormNr": "F1", "Anzahl": 6,
+             "Gewichtung": 1.5, "__TIMESTAMP": "2024-05-03T10:00:00.000Z"},
+        ]
+    )
+
+
+PARENT_IDS = {"1000": 10, "2000": 20}
+MOLD_IDS = {"F1": 1, "F2": 2}
+
+
+@pytest.mark.unit
+def test_prepare_resolves_keys_and_normalizes_values():
+    frame = _prepare_mold_product_frame(_articles(), PARENT_IDS, MOLD_IDS)
+    rows = frame.set_index("legacy_uuid")
+
+    assert list(frame["legacy_uuid"]) == ["K2", "K3", "", "K1"]
+    assert rows.loc["K1", "products_per_mold"] == 6
+    assert rows.loc["K1", "weight_per_product"] == Decimal("1.500")
+    assert rows.loc["K1", "legacy_timestamp"] == datetime(
+        2024, 5, 3, 10, tzinfo=dt_timezone.utc
+    )
+    assert rows.loc["K2", "parent_product_id"] == 20
+    assert rows.loc["K2", "products_per_mold"] == 1
+    assert rows.loc["K2", "weight_per_product"] is None
+    assert rows.loc["K2", "legacy_timestamp"] is None
+    assert pd.isna(rows.loc["K3", "parent_product_id"])
+
+
+@pytest.mark.unit
+def test_diff_only_returns_changed_links():
+    frame = _prepare_mold_product_frame(_articles(), PARENT_IDS, MOLD_IDS)
+    frame = frame[frame["parent_product_id"].notna() & (frame["legacy_uuid"] != "")]
+    existing = [
+        {
+            "id": 100,
+            "legacy_uuid": "K1",
+            "mold_id": 1,
+            "parent_product_id": 10,
+            "products_per_mold": 4,
+            "weight_per_product": Decimal("1.500"),
+            "legacy_timestamp": datetime(2024, 5, 1, 10, tzinfo=dt_timezone.utc),
+        },
+        {
+            "id": 200,
+            "legacy_uuid": "K2",
+            "mold_id": 2,
+            "parent_product_id": 20,
+            "products_per_mold": 1,
+            "weight_per_product": None,
+            "legacy_timestamp": None,
+        },
+    ]
+
+    to_create, to_update, unchanged, matched = _diff_mold_products(frame, existing)
+
+    assert to_create == []
+    assert unchanged == 1
+    assert matched == {100, 200}
+    assert [(m.id, m.products_per_mold) for m in to_update] == [(100, 6)]
+
+    to_create, to_update, unchanged, matched = _diff_mold_products(frame, [])
+    assert sorted(m.legacy_uuid for m in to_create) == ["K1", "K2"]
+    assert to_update == []
+
+
+@pytest.mark.unit
+def test_diff_reuses_row_of_recreated_link():
+    frame = _prepare_mold_product_frame(_articles(), PARENT_IDS, MOLD_IDS)
+    frame = frame[frame["legacy_uuid"] == "K2"]
+    existing = [
+        {
+            "id": 300,
+            "legacy_uuid": "GONE",
+            "mold_id": 2,
+            "parent_product_id": 20,
+            "products_per_mold": 1,
+            "weight_per_product": None,
+            "legacy_timestamp": None,
+        }
+    ]
+
+    to_create, to_update, unchanged, matched = _diff_mold_products(frame, existing)
+
+    assert to_create == []
+    assert [(m.id, m.legacy_uuid) for m in to_update] == [(300, "K2")]
+    assert matched == {300}
@@ -1,16 +1,24 @@
 from collections import namedtuple
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import os
+import tempfile
 import unittest
+from pathlib import Path
 from unittest import mock
+import pandas as pd
 import pytest
-from django.test import TestCase
+import yaml
+from django.test import TestCase, override_settings
 from django.db import connection
 
-from pyerp.sync.pipeline import SyncPipeline
+from pyerp.sync.pipeline import SyncPipeline, parse_source_timestamp
 from pyerp.sync.models import SyncMapping, SyncLog, SyncState
 from pyerp.sync.extractors.base import BaseExtractor
 from pyerp.sync.transformers.base import BaseTransformer
 from pyerp.sync.loaders.base import BaseLoader, LoadResult
+from pyerp.sync.spill import SpilledRecords
+
+WATERMARK = datetime(2025, 3, 9, 12, 0, 0, tzinfo=timezone.utc)
 
 
 class MockExtractor(BaseExtractor):
@@ -120,6 +128,8 @@ class TestSyncPipeline(TestCase):
         # Add _state to the mock_sync_state
         self.mock_sync_state._state = mock.MagicMock()
         self.mock_sync_state._state.db = None
+        self.mock_sync_state.high_watermark = None
+        self.mock_sync_state.last_full_sync_time = None
         
         self.sync_state_patcher = mock.patch("pyerp.sync.pipeline.SyncState")
         self.mock_sync_state_class = self.sync_state_patcher.start()
@@ -480,3 +490,204 @@ class TestSyncPipeline(TestCase):
         
         # Check sync state was marked as failed
         self.mock_sync_state.update_sync_completed.assert_called_once_with(success=False)
+
+
+    def _set_watermark(self, last_full_sync_hours_ago=1):
+        self.mock_sync_state.high_watermark = WATERMARK
+        self.mock_sync_state.last_full_sync_time = datetime.now(timezone.utc) - timedelta(
+            hours=last_full_sync_hours_ago
+        )
+
+    def test_parse_source_timestamp(self):
+        """Test parsing of the timestamp values the legacy API returns."""
+        self.assertEqual(parse_source_timestamp("2025-03-09T12:00:00Z"), WATERMARK)
+        self.assertEqual(parse_source_timestamp(datetime(2025, 3, 9, 12)), WATERMARK)
+        self.assertEqual(parse_source_timestamp(pd.Timestamp("2025-03-09 12:00")), WATERMARK)
+        for value in (None, "", "0!0!0", float("nan"), pd.NaT):
+            self.assertIsNone(parse_source_timestamp(value))
+
+    @override_settings(SYNC_WATERMARK_OVERLAP_SECONDS=300)
+    def test_incremental_run_fetches_from_watermark_minus_overlap(self):
+        """Test the watermark filter passed to the extractor."""
+        self._set_watermark()
+        self.mapping.mapping_config = {
+            "incremental": {"enabled": True, "timestamp_field": "modified_date"}
+        }
+        self.pipeline.run(incremental=True, batch_size=10)
+
+        self.assertEqual(
+            self.extractor.query_params["timestamp_filter"],
+            WATERMARK - timedelta(seconds=300),
+        )
+        self.assertEqual(self.extractor.query_params["timestamp_field"], "modified_date")
+
+        self.mapping.mapping_config = {"incremental": {"overlap_seconds": 60}}
+        self.pipeline.run(incremental=True, batch_size=10)
+        self.assertEqual(
+            self.extractor.query_params["timestamp_filter"],
+            WATERMARK - timedelta(seconds=60),
+        )
+        self.assertEqual(self.extractor.query_params["timestamp_field"], "__TIMESTAMP")
+
+    @override_settings(SYNC_FULL_RECONCILE_HOURS=24)
+    def test_full_run_when_no_watermark_or_reconcile_is_due(self):
+        """Test the cases that fetch all records."""
+        cases = [
+            # (incremental, incremental config, hours since full sync, full)
+            (True, {}, 1, False),
+            (False, {}, 1, True),
+            (True, {"enabled": False}, 1, True),
+            (True, {}, 25, True),
+            (True, {"full_reconcile_hours": 48}, 25, False),
+            (True, {"full_reconcile_hours": 0}, 1000, False),
+        ]
+        for incremental, config, hours, full in cases:
+            with self.subTest(incremental=incremental, config=config, hours=hours):
+                self._set_watermark(last_full_sync_hours_ago=hours)
+                self.mapping.mapping_config = {"incremental": config}
+                self.pipeline.run(incremental=incremental, batch_size=10)
+                self.assertEqual(
+                    "timestamp_filter" not in self.extractor.query_params, full
+                )
+
+        self._set_watermark()
+        self.mock_sync_state.high_watermark = None
+        self.pipeline.run(incremental=True, batch_size=10)
+        self.assertNotIn("timestamp_filter", self.extractor.query_params)
+
+    def test_watermark_advances_on_success_only(self):
+        """Test the stored watermark and the fetched/changed metrics."""
+        self._set_watermark()
+        self.extractor.extract_results = [
+            {"id": 1, "__TIMESTAMP": "2025-03-09T11:58:00Z"},  # Overlap re-read
+            {"id": 2, "__TIMESTAMP": "2025-03-09T12:30:00Z"},
+            {"id": 3, "__TIMESTAMP": pd.Timestamp("2025-03-09 12:10:00")},
+        ]
+        self.pipeline.run(incremental=True, batch_size=10)
+
+        self.mock_sync_state.record_extraction.assert_called_once_with(
+            "incremental", 3, 2
+        )
+        self.mock_sync_state.advance_watermark.assert_called_once_with(
+            datetime(2025, 3, 9, 12, 30, tzinfo=timezone.utc), full_sync=False
+        )
+
+        self.mock_sync_state.advance_watermark.reset_mock()
+        self.pipeline._process_batch.side_effect = lambda batch: (2, 0, 1)
+        self.pipeline.run(incremental=True, batch_size=10)
+        self.mock_sync_state.advance_watermark.assert_not_called()
+
+    def test_full_run_is_stored_as_reconcile(self):
+        """Test that a full run records the last full sync."""
+        self._set_watermark()
+        self.extractor.extract_results = [
+            {"id": 1, "__TIMESTAMP": "2025-03-09T11:00:00Z"},
+            {"id": 2},
+        ]
+        self.pipeline.run(incremental=False, batch_size=10)
+
+        self.mock_sync_state.record_extraction.assert_called_once_with("full", 2, 1)
+        self.mock_sync_state.advance_watermark.assert_called_once_with(
+            datetime(2025, 3, 9, 11, tzinfo=timezone.utc), full_sync=True
+        )
+
+    def test_fetch_stats_are_stored_in_sync_log(self):
+        """Test that the extractor's fetch statistics end up in the sync log."""
+        stats = {
+            "requests": 2, "rows": 3, "bytes": 300, "seconds": 0.5,
+            "timeouts": 0, "page_size": 1000,
+        }
+        self.extractor.config = {"table_name": "Kunden"}
+        self.extractor.get_fetch_stats = mock.MagicMock(return_value=stats)
+        self.extractor.extract_results = [{"id": 1}]
+        self.pipeline.run(incremental=False, batch_size=10)
+
+        self.assertEqual(self.mock_sync_log.fetch_stats, {"Kunden": stats})
+        self.mock_sync_log.save.assert_any_call(update_fields=["fetch_stats"])
+
+    def test_full_run_spills_records(self):
+        """Test that full loads of spilling mappings are processed from disk."""
+        pytest.importorskip("pyarrow")
+        self._set_watermark()
+        self.mapping.mapping_config = {"spill": True}
+        self.extractor.extract_batched = mock.MagicMock(
+            return_value=iter([
+                [
+                    {"id": 1, "__TIMESTAMP": "2025-03-09T11:00:00Z"},
+                    {"id": 2, "__TIMESTAMP": "2025-03-09T13:00:00Z"},
+                ],
+                [{"id": 3, "Termin": "KW 3"}],
+            ])
+        )
+        batches = []
+        self.pipeline._process_batch.side_effect = (
+            lambda batch: batches.append(batch) or (len(batch), 0, 0)
+        )
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            with override_settings(SYNC_SPILL_DIR=spill_dir):
+                self.pipeline.run(incremental=False, batch_size=2)
+            self.assertEqual(os.listdir(spill_dir), [])
+
+        self.assertFalse(self.extractor.extract_called)
+        self.assertEqual(
+            [[record["id"] for record in batch] for batch in batches], [[1, 2], [3]]
+        )
+        self.assertIsNone(batches[0][0]["Termin"])
+        self.mock_sync_state.record_extraction.assert_called_once_with("full", 3, 2)
+        self.mock_sync_state.advance_watermark.assert_called_once_with(
+            datetime(2025, 3, 9, 13, tzinfo=timezone.utc), full_sync=True
+        )
+
+    def test_fetch_data_spills_records_for_run_with_data(self):
+        """Test that fetch_data can hand spilled records to run_with_data."""
+        pytest.importorskip("pyarrow")
+        self.mapping.mapping_config = {"spill": True}
+        self.extractor.extract_results = [{"id": 1}, {"id": 2}, {"id": 3}]
+        batches = []
+        self.pipeline._process_batch.side_effect = (
+            lambda batch: batches.append(batch) or (len(batch), 0, 0)
+        )
+        self.pipeline.create_sync_log = mock.MagicMock(return_value=self.mock_sync_log)
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            with override_settings(SYNC_SPILL_DIR=spill_dir):
+                self.assertIsInstance(self.pipeline.fetch_data(), list)
+                records = self.pipeline.fetch_data(spill=True)
+                self.assertIsInstance(records, SpilledRecords)
+                self.pipeline.run_with_data(data=records, batch_size=2)
+                records.discard()
+            self.assertEqual(os.listdir(spill_dir), [])
+
+        self.assertEqual(batches, [[{"id": 1}, {"id": 2}], [{"id": 3}]])
+        self.assertEqual(self.mock_sync_log.records_processed, 3)
+
+    def test_legacy_mappings_use_the_record_timestamp(self):
+        """Test that the product, inventory and sales configs move the watermark."""
+        config_dir = Path(__file__).resolve().parents[1] / "config"
+        with open(config_dir / "products_sync.yaml", encoding="utf-8") as config_file:
+            products = yaml.safe_load(config_file)
+
+        self._set_watermark()
+        self.mapping.mapping_config = {
+            "incremental": products["parent_products"]["incremental"]
+        }
+        self.extractor.extract_results = [
+            {"__KEY": "1", "__TIMESTAMP": "2025-03-09T12:30:00Z"},
+            {"__KEY": "2", "__TIMESTAMP": "2025-03-09T11:58:00Z"},
+        ]
+        self.pipeline.run(incremental=True, batch_size=10)
+
+        self.assertEqual(self.extractor.query_params["timestamp_field"], "__TIMESTAMP")
+        self.mock_sync_state.advance_watermark.assert_called_once_with(
+            datetime(2025, 3, 9, 12, 30, tzinfo=timezone.utc), full_sync=False
+        )
+
+        for name in ("products_sync", "inventory_sync", "sales_record_sync"):
+            with open(config_dir / f"{name}.yaml", encoding="utf-8") as config_file:
+                config = yaml.safe_load(config_file)
+            for section in config.values():
+                incremental = isinstance(section, dict) and section.get("incremental")
+                if incremental and "timestamp_field" in incremental:
+                    with self.subTest(config=name):
+                        self.assertEqual(incremental["timestamp_field"], "__TIMESTAMP")
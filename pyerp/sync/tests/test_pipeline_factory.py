@@ -200,3 +200,16 @@ class TestPipelineFactory(TestCase):
         # Check that component was created with config
         self.assertIsInstance(component, MockExtractor)
         self.assertEqual(component.config, config)
+
+    def test_resolve_attributes(self):
+        """Test resolving auto attributes from the transformer config."""
+        transformer = MockTransformer({"field_mappings": {"name": "Bezeichnung"}})
+        config = {"table_name": "Artikel", "attributes": "auto"}
+
+        resolved = PipelineFactory._resolve_attributes(config, transformer)
+
+        self.assertEqual(resolved["attributes"], ["name", "Bezeichnung"])
+        # The source config is shared and must not change
+        self.assertEqual(config["attributes"], "auto")
+        explicit = {"attributes": ["Nummer"]}
+        self.assertIs(PipelineFactory._resolve_attributes(explicit, transformer), explicit)
@@ -0,0 +1,153 @@
+"""
+Tests for detecting records deleted in the source by key-set diffing.
+"""
+
+from unittest import mock
+
+import pytest
+
+from pyerp.sync import reconcile
+from pyerp.sync.pipeline import SyncPipeline
+
+
+class KeyExtractor:
+    """Extractor stub serving the keys of a source table."""
+
+    def __init__(self, keys, page_size=2):
+        self.keys = keys
+        self.page_size = page_size
+        self.lookups = []
+
+    def extract_keys(self, key_field="__KEY", page_size=50000, keys=None):
+        if keys is not None:
+            self.lookups.append(keys)
+            yield [key for key in self.keys if key in keys]
+            return
+        for start in range(0, len(self.keys), self.page_size):
+            yield self.keys[start:start + self.page_size]
+
+
+def _model(local_rows):
+    """Mock model whose queryset serves the given (pk, key) rows."""
+    model = mock.MagicMock()
+    model._meta.label = "products.VariantProduct"
+    queryset = model.objects.exclude.return_value
+    queryset.exclude.return_value = queryset
+    queryset.values_list.return_value.iterator.return_value = iter(local_rows)
+    queryset.filter.return_value.update.side_effect = lambda **kwargs: len(
+        queryset.filter.call_args.kwargs["pk__in"]
+    )
+    return model, queryset
+
+
+def _config(**overrides):
+    mapping = mock.MagicMock()
+    mapping.mapping_config = {
+        "reconcile": {"enabled": True, "action": "flag", "flag": {"is_active": False}, **overrides}
+    }
+    return reconcile.get_reconcile_config(mapping)
+
+
+@pytest.mark.unit
+def test_get_reconcile_config():
+    config = _config()
+    assert config["key_field"] == "__KEY"
+    assert config["local_field"] == "legacy_id"
+
+    with pytest.raises(ValueError):
+        _config(action="purge")
+    with pytest.raises(ValueError):
+        _config(flag={})
+
+
+@pytest.mark.unit
+def test_find_missing_normalizes_keys():
+    source_keys = {reconcile.normalize_key(k) for k in [1, 2.0, " 3 "]}
+    missing, count = reconcile.find_missing(
+        [(10, "1"), (11, 2), (12, "3"), (13, "4"), (14, None), (15, "")], source_keys
+    )
+    assert missing == [(13, "4"), (14, "None")]
+    assert count == 5
+
+
+@pytest.mark.unit
+@mock.patch("pyerp.sync.reconcile.transaction")
+def test_reconcile_flags_confirmed_missing_rows(mock_transaction):
+    # Key 3 is skipped by the listing, as if a row moved between pages
+    extractor = KeyExtractor(["1", "2", "3", "5"])
+    extractor.extract_keys = mock.MagicMock(
+        side_effect=lambda key_field="__KEY", page_size=50000, keys=None: iter(
+            [["1", "2"], ["5"]] if keys is None else [[k for k in ["3"] if int(k) in keys]]
+        )
+    )
+    model, queryset = _model([(1, "1"), (2, "2"), (3, "3"), (4, "4"), (5, "5")])
+
+    result = reconcile.reconcile_deletes(extractor, model, _config(max_missing_ratio=0.5))
+
+    assert result["status"] == "completed"
+    assert (result["source_keys"], result["local_rows"]) == (3, 5)
+    assert result["missing"] == 1
+    assert result["missing_sample"] == ["4"]
+    assert result["applied"] == 1
+    queryset.filter.assert_called_once_with(pk__in=[4])
+    queryset.filter.return_value.update.assert_called_once_with(is_active=False)
+    # Lookups use numbers for numeric keys
+    assert extractor.extract_keys.call_args.kwargs["keys"] == [3, 4]
+
+
+@pytest.mark.unit
+def test_reconcile_aborts_when_too_many_rows_are_missing():
+    extractor = KeyExtractor(["1"])
+    model, queryset = _model([(1, "1"), (2, "2"), (3, "3")])
+
+    result = reconcile.reconcile_deletes(extractor, model, _config())
+
+    assert result["status"] == "aborted"
+    assert result["missing"] == 2
+    assert "allowed ratio" in result["error"]
+    assert extractor.lookups == []
+    queryset.filter.assert_not_called()
+
+
+@pytest.mark.unit
+def test_dry_run_only_reports():
+    extractor = KeyExtractor(["1", "2"])
+    model, queryset = _model([(1, "1"), (2, "2"), (3, "3")])
+
+    result = reconcile.reconcile_deletes(
+        extractor, model, _config(max_missing_ratio=0.5), dry_run=True
+    )
+
+    assert (result["action"], result["missing"], result["applied"]) == ("report", 1, 0)
+    queryset.filter.assert_not_called()
+
+
+@pytest.mark.unit
+@mock.patch("pyerp.sync.pipeline.log_data_sync_event")
+@mock.patch("pyerp.sync.pipeline.bump_model_version")
+@mock.patch("pyerp.sync.pipeline.SyncState")
+def test_pipeline_reconcile_records_result(mock_state_class, mock_bump, mock_log):
+    state = mock.MagicMock()
+    mock_state_class.objects.get_or_create.return_value = (state, False)
+    mapping = mock.MagicMock(is_config_based=False)
+    mapping.mapping_config = {
+        "reconcile": {"enabled": True, "action": "flag", "flag": {"is_active": False}}
+    }
+    extractor = mock.MagicMock()
+    model, _ = _model([])
+    loader = mock.MagicMock(model=model)
+    pipeline = SyncPipeline(mapping, extractor, mock.MagicMock(), loader)
+
+    with mock.patch.object(
+        reconcile,
+        "reconcile_deletes",
+        return_value={"status": "completed", "missing": 2, "applied": 2},
+    ) as mock_reconcile:
+        result = pipeline.reconcile_deletes()
+
+    assert result["applied"] == 2
+    mock_reconcile.assert_called_once()
+    extractor.__enter__.assert_called_once()
+    state.record_reconcile.assert_called_once_with(2)
+    mock_bump.assert_called_once_with(model)
+    assert mock_log.call_args.kwargs["status"] == "reconciled"
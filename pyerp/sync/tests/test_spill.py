@@ -0,0 +1,242 @@
+"""
+Tests for the columnar spill store used by full-load syncs.
+"""
+
+import datetime
+import os
+import time
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from pyerp.sync import spill  # noqa: E402
+from pyerp.sync.spill import (  # noqa: E402
+    SpilledRecords,
+    SpillStore,
+    purge_expired,
+    spill_extract,
+)
+
+
+class PagedExtractor:
+    """Extractor stub serving records in pages."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.connected = False
+
+    def __enter__(self):
+        self.connected = True
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connected = False
+
+    def extract_batched(self, api_page_size=10000, query_params=None):
+        yield from self.pages
+
+
+PARENTS = [
+    [
+        {"AbsNr": 1, "Datum": datetime.date(2025, 1, 1), "Netto": Decimal("1.50")},
+        {"AbsNr": 2, "Datum": datetime.date(2025, 2, 1), "Netto": Decimal("2.00")},
+    ],
+    [
+        {"AbsNr": 3, "Datum": None, "Netto": None, "Termin": "sofort"},
+        {"AbsNr": 3, "Datum": datetime.date(2025, 3, 1), "Netto": Decimal("3")},
+    ],
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SpillStore.create("sales_records", meta={"full": True}, root=tmp_path)
+
+
+@pytest.mark.unit
+def test_records_to_table_stores_mixed_columns_as_text():
+    table = spill.records_to_table(
+        [
+            {"Termin": datetime.date(2025, 1, 2), "AbsNr": 1},
+            {"Termin": "KW 3", "AbsNr": None, "Extra": 1.5},
+        ]
+    )
+    assert table.column_names == ["Termin", "AbsNr", "Extra"]
+    assert table.to_pylist() == [
+        {"Termin": "2025-01-02", "AbsNr": 1, "Extra": None},
+        {"Termin": "KW 3", "AbsNr": None, "Extra": 1.5},
+    ]
+
+
+@pytest.mark.unit
+def test_spill_extract_appends_pages(store):
+    extractor = PagedExtractor(PARENTS)
+    pages = []
+
+    stored = spill_extract(
+        extractor, store, "parents",
+        on_page=lambda number, rows: pages.append((number, rows)),
+    )
+
+    assert stored == 4
+    assert pages == [(1, 2), (2, 4)]
+    assert store.row_count("parents") == 4
+    assert store.is_complete("parents")
+    rows = [row for batch in store.iter_batches("parents", 3) for row in batch.to_pylist()]
+    assert [row["AbsNr"] for row in rows] == [1, 2, 3, 3]
+    assert rows[0]["Netto"] == Decimal("1.50")
+    assert rows[2]["Termin"] == "sofort"
+
+
+@pytest.mark.unit
+def test_later_pages_are_cast_to_the_table_schema(store):
+    store.append(
+        "parents",
+        [{"AbsNr": 1, "Termin": datetime.date(2025, 1, 2), "Netto": Decimal("1.50")}],
+    )
+    store.append("parents", [{"AbsNr": 2, "Termin": None, "Netto": Decimal("3")}])
+    store.append("parents", [{"AbsNr": 3, "Termin": "KW 3", "Netto": None, "Neu": 1}])
+
+    schema = store.schema("parents")
+    assert schema.names == ["AbsNr", "Termin", "Netto", "Neu"]
+    assert schema.field("Termin").type == pa.string()
+    batches = list(store.iter_batches("parents", 10))
+    assert all(batch.schema == schema for batch in batches)
+    assert [row for batch in batches for row in batch.to_pylist()] == [
+        {"AbsNr": 1, "Termin": "2025-01-02", "Netto": Decimal("1.50"), "Neu": None},
+        {"AbsNr": 2, "Termin": None, "Netto": Decimal("3.00"), "Neu": None},
+        {"AbsNr": 3, "Termin": "KW 3", "Netto": None, "Neu": 1},
+    ]
+    assert sorted(store.key_values("parents", "Termin").to_pylist()) == [
+        "2025-01-02", "KW 3",
+    ]
+    columns = list(store.iter_batches("parents", 10, columns=["Termin", "Missing"]))
+    assert [batch.schema.names for batch in columns] == [["Termin"]] * 3
+
+    # The schema is kept in the manifest
+    reopened = SpillStore(store.path)
+    assert reopened.schema("parents") == schema
+    assert reopened.schema("children") is None
+
+
+@pytest.mark.unit
+def test_spilled_records(store):
+    spill_extract(PagedExtractor(PARENTS), store, "parents")
+    records = SpilledRecords(store, "parents")
+
+    assert len(records) == 4
+    assert [len(batch) for batch in records.iter_records(3)] == [2, 2]
+    assert list(records.iter_records(10, columns=["AbsNr"])) == [
+        [{"AbsNr": 1}, {"AbsNr": 2}], [{"AbsNr": 3}, {"AbsNr": 3}],
+    ]
+    records.discard()
+    assert not store.path.exists()
+
+
+@pytest.mark.unit
+def test_spill_extract_filters_and_limits(store):
+    stored = spill_extract(
+        PagedExtractor(PARENTS), store, "parents",
+        page_filter=lambda page: [r for r in page if r["Datum"] is not None],
+        limit=2,
+    )
+
+    assert stored == 2
+    rows = [row for batch in store.iter_batches("parents", 10) for row in batch.to_pylist()]
+    assert [row["AbsNr"] for row in rows] == [1, 2]
+
+
+@pytest.mark.unit
+def test_key_values_and_filtered_batches(store):
+    spill_extract(PagedExtractor(PARENTS), store, "parents")
+    spill_extract(
+        PagedExtractor([[{"AbsNr": i, "PosNr": 1} for i in range(1, 6)]]),
+        store, "children",
+    )
+
+    parent_ids = store.key_values("parents", "AbsNr")
+    assert sorted(parent_ids.to_pylist()) == ["1", "2", "3"]
+
+    children = [
+        row
+        for batch in store.iter_batches(
+            "children", 2, filter_field="AbsNr", filter_values=parent_ids
+        )
+        for row in batch.to_pylist()
+    ]
+    assert [row["AbsNr"] for row in children] == [1, 2, 3]
+
+    loaded = list(
+        store.iter_batches("children", 10, filter_field="AbsNr", filter_values={"5"})
+    )
+    assert [batch.to_pylist() for batch in loaded] == [[{"AbsNr": 5, "PosNr": 1}]]
+    assert store.key_values("children", "Missing").to_pylist() == []
+
+
+@pytest.mark.unit
+def test_latest_replays_complete_snapshots(tmp_path):
+    incomplete = SpillStore.create("sales_records", root=tmp_path)
+    incomplete.append("parents", [{"AbsNr": 1}])
+
+    assert SpillStore.latest("sales_records", root=tmp_path) is None
+
+    complete = SpillStore.create("sales_records", root=tmp_path)
+    spill_extract(PagedExtractor(PARENTS), complete, "parents")
+    spill_extract(PagedExtractor([]), complete, "children")
+
+    replay = SpillStore.latest(
+        "sales_records", tables=["parents", "children"], root=tmp_path
+    )
+    assert replay.path == complete.path
+    assert replay.row_count("parents") == 4
+    assert replay.row_count("children") == 0
+    assert list(replay.iter_batches("children", 10)) == []
+    assert SpillStore.latest("other", root=tmp_path) is None
+    assert SpillStore.latest("sales_records", ttl_hours=0, root=tmp_path) is None
+
+    with pytest.raises(ValueError):
+        replay.append("parents", [{"AbsNr": 9}])
+
+
+@pytest.mark.unit
+def test_latest_only_replays_snapshots_of_the_same_query(tmp_path):
+    query_params = {"filter_query": [["Datum", ">=", "2025-01-01"]], "$top": 5}
+    store = SpillStore.create(
+        "sales_records", meta={"query_params": query_params, "top": 5}, root=tmp_path
+    )
+    spill_extract(PagedExtractor(PARENTS), store, "parents")
+
+    assert store.matches({"query_params": dict(query_params), "top": 5})
+    replay = SpillStore.latest(
+        "sales_records", root=tmp_path, meta={"query_params": query_params}
+    )
+    assert replay.path == store.path
+    for meta in (
+        {"query_params": {"filter_query": [["Datum", ">=", "2025-02-01"]]}},
+        {"query_params": query_params, "top": None},
+        {"full": True},
+    ):
+        assert not store.matches(meta)
+        assert SpillStore.latest("sales_records", root=tmp_path, meta=meta) is None
+
+
+@pytest.mark.unit
+def test_purge_expired(tmp_path):
+    old = SpillStore.create("sales_records", root=tmp_path)
+    old.manifest["created"] = time.time() - 7200
+    old._save_manifest()
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    os.utime(broken, (time.time() - 7200, time.time() - 7200))
+    fresh = SpillStore.create("sales_records", root=tmp_path)
+
+    assert purge_expired(ttl_hours=1, root=tmp_path) == 2
+    assert not old.path.exists()
+    assert not broken.exists()
+    assert fresh.path.exists()
+
+    fresh.discard()
+    assert not fresh.path.exists()
+    assert purge_expired(root=tmp_path / "missing") == 0
@@ -125,20 +125,17 @@ class TestSyncTasks(TestCase):
         self.assertEqual(result["records_succeeded"], 8)
         self.assertEqual(result["records_failed"], 2)
 
-    @mock.patch("pyerp.sync.tasks.run_entity_sync")
+    @mock.patch("pyerp.sync.tasks.enqueue_sync")
     @mock.patch("pyerp.sync.tasks.SyncMapping.objects.filter")
     @mock.patch("pyerp.sync.tasks.log_data_sync_event")
-
-
-    def test_run_all_mappings(self, mock_log_event, mock_filter, mock_run_entity_sync):
+    def test_run_all_mappings(self, mock_log_event, mock_filter, mock_enqueue_sync):
         """Test the run_all_mappings task."""
-        # Set up a task result mock for run_entity_sync.delay
-        class MockAsyncResult:
-            def __init__(self):
-                self.id = "async-task-id"
+        # The second mapping already has an identical pending request
+        mock_enqueue_sync.side_effect = [
+            (mock.MagicMock(id=10), True),
+            (mock.MagicMock(id=11), False),
+        ]
 
-        mock_run_entity_sync.delay.return_value = MockAsyncResult()
-        
         # Set up mock for SyncMapping.objects.filter
         mock_queryset = mock.MagicMock()
         mock_queryset.__iter__.return_value = [self.mapping1, self.mapping2]
@@ -150,26 +147,22 @@ class TestSyncTasks(TestCase):
         # Check filter was called correctly
         mock_filter.assert_called_once_with(active=True)
 
-        # Check that run_entity_sync.delay was called for each active mapping
-        self.assertEqual(mock_run_entity_sync.delay.call_count, 2)
-
-        # Check that it was called with the right mapping IDs
-        mapping_ids = [
-            call_args[0][0] for call_args in mock_run_entity_sync.delay.call_args_list
-        ]
-        self.assertIn(self.mapping1.id, mapping_ids)
-        self.assertIn(self.mapping2.id, mapping_ids)
-        self.assertNotIn(self.inactive_mapping.id, mapping_ids)
+        # Check that a sync was queued for each active mapping
+        mock_enqueue_sync.assert_has_calls(
+            [
+                mock.call(self.mapping1, incremental=True),
+                mock.call(self.mapping2, incremental=True),
+            ]
+        )
 
         # Check log event was called
         mock_log_event.assert_called_once()
 
         # Check results
-        self.assertEqual(len(results), 2)
-        for result in results:
-            self.assertEqual(result["task_id"], "async-task-id")
-            # Check that mapping_id is one of our active mappings
-            self.assertIn(result["mapping_id"], [self.mapping1.id, self.mapping2.id])
+        self.assertEqual(
+            [(r["mapping_id"], r["request_id"], r["coalesced"]) for r in results],
+            [(self.mapping1.id, 10, False), (self.mapping2.id, 11, True)],
+        )
 
     @mock.patch("pyerp.sync.tasks.run_all_mappings")
     @mock.patch("pyerp.sync.tasks.log_data_sync_event")
@@ -67,6 +67,36 @@ class BaseTransformer(ABC):
         """Optional method for complex initialization."""
         pass
 
+    def get_source_fields(self) -> List[str]:
+        """Get the source fields referenced by the transformer config.
+
+        Collects the names in ``field_mappings``, ``lookups`` and
+        ``composite_key``. Mappings are written in either direction across
+        the configs, so both sides are returned; names that are not source
+        columns are dropped when the extractor projects its columns.
+        Fields only read in code must be added with ``extra_attributes`` in
+        the source config.
+
+        Returns:
+            Field names in config order
+        """
+        fields = []
+
+        def collect(mappings):
+            for key, value in mappings.items():
+                fields.append(key)
+                if isinstance(value, dict):
+                    value = value.get("field")
+                if isinstance(value, str):
+                    fields.append(value)
+
+        collect(self.field_mappings)
+        for lookup in (self.config.get("lookups") or {}).values():
+            if isinstance(lookup, dict):
+                collect(lookup.get("fields") or {})
+        fields.extend(self.config.get("composite_key") or [])
+        return list(dict.fromkeys(fields))
+
     def register_custom_transformer(
         self, field: str, transformer: Callable[[Any], Any]
     ) -> None:
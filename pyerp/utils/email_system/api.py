@@ -1,8 +1,15 @@
-from rest_framework import viewsets, permissions, filters, serializers
+from rest_framework import viewsets, permissions, filters, serializers, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import EmailLog, EmailEvent
+from .reporting import (
+    DEFERRED_LOG_FIELDS,
+    get_delivery_timeseries,
+    get_email_stats,
+    parse_window,
+)
 
 
 class EmailLogSerializer(serializers.ModelSerializer):
@@ -45,11 +52,23 @@ class EmailEventSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class EmailLogCursorPagination(CursorPagination):
+    """Keyset pagination for email logs, newest first."""
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 class EmailLogViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing email logs."""
 
-    queryset = EmailLog.objects.all().order_by("-created_at")
+    queryset = EmailLog.objects.defer(*DEFERRED_LOG_FIELDS).order_by(
+        "-created_at", "-id"
+    )
     serializer_class = EmailLogSerializer
+    pagination_class = EmailLogCursorPagination
     permission_classes = [permissions.IsAdminUser]
     filter_backends = [
         DjangoFilterBackend,
@@ -70,31 +89,21 @@ class EmailLogViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=["get"])
     def stats(self, request):
-        """Get email statistics."""
-        total = EmailLog.objects.count()
-        sent = EmailLog.objects.filter(status=EmailLog.STATUS_SENT).count()
-        delivered = EmailLog.objects.filter(status=EmailLog.STATUS_DELIVERED).count()
-        opened = EmailLog.objects.filter(status=EmailLog.STATUS_OPENED).count()
-        clicked = EmailLog.objects.filter(status=EmailLog.STATUS_CLICKED).count()
-        bounced = EmailLog.objects.filter(status=EmailLog.STATUS_BOUNCED).count()
-        failed = EmailLog.objects.filter(status=EmailLog.STATUS_FAILED).count()
-
-        return Response(
-            {
-                "total": total,
-                "sent": sent,
-                "delivered": delivered,
-                "opened": opened,
-                "clicked": clicked,
-                "bounced": bounced,
-                "failed": failed,
-                "delivery_rate": (delivered / sent * 100) if sent > 0 else 0,
-                "open_rate": (opened / delivered * 100) if delivered > 0 else 0,
-                "click_rate": (clicked / opened * 100) if opened > 0 else 0,
-                "bounce_rate": (bounced / sent * 100) if sent > 0 else 0,
-                "failure_rate": (failed / total * 100) if total > 0 else 0,
-            }
-        )
+        """
+        Get email statistics.
+
+        Accepts an optional ``days``/``since``/``until`` window and, with
+        ``interval=hour|day``, adds per-bucket counts under ``timeseries``.
+        """
+        try:
+            since, until = parse_window(request.query_params)
+            data = get_email_stats(since, until)
+            interval = request.query_params.get("interval")
+            if interval:
+                data["timeseries"] = get_delivery_timeseries(interval, since, until)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
 
 
 class EmailEventViewSet(viewsets.ReadOnlyModelViewSet):
@@ -1,11 +1,12 @@
-import uuid
 import logging
+from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
 from django.utils import timezone
 from django.conf import settings
 
 # from anymail.backends.smtp import EmailBackend as AnymailSMTPBackend
 from .models import EmailLog
+from .outbox import QueuedMessage, build_email_log, enqueue_messages
 from pyerp.utils.onepassword_connect import get_email_password
 
 logger = logging.getLogger("anymail")
@@ -49,77 +50,23 @@ class LoggingEmailBackend(SMTPBackend):
         if not email_messages:
             return 0
 
-        # Log each message before sending
-        for message in email_messages:
-            self._log_message(message)
+        # Log all messages before sending
+        logs = _log_messages(email_messages, "smtp")
 
         # Send messages using the parent class
         sent_count = super().send_messages(email_messages)
 
         # Update status for sent messages
-        for i, message in enumerate(email_messages):
-            if hasattr(message, "_email_log_id") and i < sent_count:
-                try:
-                    email_log = EmailLog.objects.get(id=message._email_log_id)
-                    email_log.status = EmailLog.STATUS_SENT
-                    email_log.sent_at = timezone.now()
-                    email_log.save(update_fields=["status", "sent_at"])
-                except EmailLog.DoesNotExist:
-                    logger.error(
-                        f"Could not find EmailLog with ID {message._email_log_id}"
-                    )
+        now = timezone.now()
+        sent_logs = logs[:sent_count]
+        for email_log in sent_logs:
+            email_log.status = EmailLog.STATUS_SENT
+            email_log.sent_at = now
+            email_log.updated_at = now
+        EmailLog.objects.bulk_update(sent_logs, ["status", "sent_at", "updated_at"])
 
         return sent_count
 
-    def _log_message(self, message):
-        """
-        Log an email message to the database.
-        """
-        # Generate a unique message ID if not present
-        if not hasattr(message, "message_id") or not message.message_id:
-            message.message_id = f"<{uuid.uuid4()}@pyerp.local>"
-
-        # Extract recipients
-        to_emails = ", ".join(message.to) if hasattr(message, "to") else ""
-        cc_emails = ", ".join(message.cc) if hasattr(message, "cc") else ""
-        bcc_emails = ", ".join(message.bcc) if hasattr(message, "bcc") else ""
-
-        # Extract content
-        if hasattr(message, "body"):
-            body_text = message.body
-        else:
-            body_text = ""
-
-        body_html = None
-        if hasattr(message, "alternatives"):
-            for content, mimetype in message.alternatives:
-                if mimetype == "text/html":
-                    body_html = content
-                    break
-
-        # Create log entry
-        try:
-            email_log = EmailLog.objects.create(
-                message_id=message.message_id,
-                subject=message.subject,
-                from_email=message.from_email,
-                to_email=to_emails,
-                cc_email=cc_emails,
-                bcc_email=bcc_emails,
-                body_text=body_text,
-                body_html=body_html,
-                status=EmailLog.STATUS_QUEUED,
-                esp="smtp",  # Default to SMTP
-            )
-
-            # Store the log ID on the message for later reference
-            message._email_log_id = email_log.id
-
-            logger.info(f"Logged email: {email_log.subject} to {email_log.to_email}")
-
-        except Exception as e:
-            logger.error(f"Error logging email: {str(e)}")
-
 
 class LoggingAnymailBackend(SMTPBackend):
     """
@@ -160,86 +107,84 @@ class LoggingAnymailBackend(SMTPBackend):
         if not email_messages:
             return 0
 
-        # Log each message before sending
-        for message in email_messages:
-            self._log_message(message)
+        # Log all messages before sending
+        logs = _log_messages(
+            email_messages,
+            [getattr(message, "esp_name", "anymail") for message in email_messages],
+        )
 
         # Send messages using the parent class
         sent_count = super().send_messages(email_messages)
 
         # Update status for sent messages
-        for i, message in enumerate(email_messages):
-            if hasattr(message, "_email_log_id") and i < sent_count:
-                try:
-                    email_log = EmailLog.objects.get(id=message._email_log_id)
-                    email_log.status = EmailLog.STATUS_SENT
-                    email_log.sent_at = timezone.now()
-
-                    # If ESP message ID is available from Anymail
-                    if hasattr(message, "anymail_status"):
-                        if message.anymail_status.message_id:
-                            email_log.esp_message_id = message.anymail_status.message_id
-                        if message.anymail_status.esp_name:
-                            email_log.esp = message.anymail_status.esp_name
-
-                    email_log.save()
-                except EmailLog.DoesNotExist:
-                    logger.error(
-                        f"Could not find EmailLog with ID {message._email_log_id}"
-                    )
+        now = timezone.now()
+        sent_logs = logs[:sent_count]
+        for message, email_log in zip(email_messages, sent_logs):
+            email_log.status = EmailLog.STATUS_SENT
+            email_log.sent_at = now
+            email_log.updated_at = now
+
+            # If ESP message ID is available from Anymail
+            if hasattr(message, "anymail_status"):
+                if message.anymail_status.message_id:
+                    email_log.esp_message_id = message.anymail_status.message_id
+                if message.anymail_status.esp_name:
+                    email_log.esp = message.anymail_status.esp_name
+        EmailLog.objects.bulk_update(
+            sent_logs, ["status", "sent_at", "esp_message_id", "esp", "updated_at"]
+        )
 
         return sent_count
 
-    def _log_message(self, message):
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Email backend that queues messages for delivery by a Celery worker.
+
+    ``send_messages`` only stores the messages and returns, so requests that
+    send password-reset or notification emails never wait for SMTP. The
+    worker delivers them through ``EMAIL_QUEUE_DELIVERY_BACKEND``, whose ESP
+    is recorded in the logs.
+    """
+
+    def send_messages(self, email_messages):
         """
-        Log an email message to the database.
+        Queue email messages and log them to the database.
         """
-        # Generate a unique message ID if not present
-        if not hasattr(message, "message_id") or not message.message_id:
-            message.message_id = f"<{uuid.uuid4()}@pyerp.local>"
-
-        # Extract recipients
-        to_emails = ", ".join(message.to) if hasattr(message, "to") else ""
-        cc_emails = ", ".join(message.cc) if hasattr(message, "cc") else ""
-        bcc_emails = ", ".join(message.bcc) if hasattr(message, "bcc") else ""
-
-        # Extract content
-        if hasattr(message, "body"):
-            body_text = message.body
-        else:
-            body_text = ""
-
-        body_html = None
-        if hasattr(message, "alternatives"):
-            for content, mimetype in message.alternatives:
-                if mimetype == "text/html":
-                    body_html = content
-                    break
-
-        # Determine ESP
-        esp = "anymail"
-        if hasattr(message, "esp_name"):
-            esp = message.esp_name
-
-        # Create log entry
+        if not email_messages:
+            return 0
         try:
-            email_log = EmailLog.objects.create(
-                message_id=message.message_id,
-                subject=message.subject,
-                from_email=message.from_email,
-                to_email=to_emails,
-                cc_email=cc_emails,
-                bcc_email=bcc_emails,
-                body_text=body_text,
-                body_html=body_html,
-                status=EmailLog.STATUS_QUEUED,
-                esp=esp,
-            )
-
-            # Store the log ID on the message for later reference
-            message._email_log_id = email_log.id
-
-            logger.info(f"Logged email: {email_log.subject} to {email_log.to_email}")
-
+            enqueue_messages(email_messages)
         except Exception as e:
-            logger.error(f"Error logging email: {str(e)}")
+            logger.error(f"Error queueing emails: {str(e)}")
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(email_messages)
+
+
+def _log_messages(email_messages, esp):
+    """
+    Log email messages to the database with one query.
+
+    Logging failures never prevent sending; messages are then sent unlogged.
+    Queued messages already have a log, which the queue worker updates.
+    """
+    if all(isinstance(message, QueuedMessage) for message in email_messages):
+        return []
+    esps = esp if isinstance(esp, list) else [esp] * len(email_messages)
+    try:
+        logs = [
+            build_email_log(message, message_esp)
+            for message, message_esp in zip(email_messages, esps)
+        ]
+        EmailLog.objects.bulk_create(logs)
+    except Exception as e:
+        logger.error(f"Error logging email: {str(e)}")
+        return []
+
+    for message, email_log in zip(email_messages, logs):
+        # Store the log ID on the message for later reference
+        message._email_log_id = email_log.id
+        logger.info(f"Logged email: {email_log.subject} to {email_log.to_email}")
+    return logs
@@ -0,0 +1,88 @@
+"""
+Management command to enforce the email log retention period.
+
+Email logs older than the retention period are deleted in primary-key
+batches together with their events, optionally after being written to a
+gzipped JSON Lines archive, so that the log table stays small.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pyerp.core.retention import archive_and_delete, to_record
+from pyerp.utils.email_system.models import EmailEvent, EmailLog
+
+
+class Command(BaseCommand):
+    help = "Delete (and optionally archive) email logs older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "EMAIL_LOG_RETENTION_DAYS", 90),
+            help="Keep email logs created within this many days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of email logs to delete per transaction",
+        )
+        parser.add_argument(
+            "--archive",
+            help="Append the deleted logs and their events to this .jsonl.gz file",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many email logs would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        if options["days"] < 1:
+            raise CommandError("--days must be a positive integer")
+        batch_size = max(1, options["batch_size"])
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = EmailLog.objects.filter(created_at__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would delete {expired.count()} email logs created before "
+                f"{cutoff.isoformat()}."
+            )
+            return
+
+        deleted = archive_and_delete(
+            expired,
+            batch_size,
+            options["archive"],
+            records=self._records,
+            delete=self._delete,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} email logs created before {cutoff.isoformat()}."
+            )
+        )
+
+    def _records(self, ids):
+        """Return one record per email log, with its events embedded."""
+        events = {}
+        for event in EmailEvent.objects.filter(email_log_id__in=ids).order_by("id"):
+            events.setdefault(event.email_log_id, []).append(to_record(event))
+        records = []
+        for email_log in EmailLog.objects.filter(id__in=ids).order_by("id"):
+            record = to_record(email_log)
+            record["events"] = events.get(email_log.id, [])
+            records.append(record)
+        return records
+
+    def _delete(self, ids):
+        """Delete the email logs together with their events."""
+        EmailEvent.objects.filter(email_log_id__in=ids).delete()
+        EmailLog.objects.filter(id__in=ids).delete()
@@ -101,6 +101,23 @@ class EmailLog(models.Model):
         help_text=_("Message ID assigned by the ESP"),
     )
 
+    # Queued delivery
+    raw_message = models.BinaryField(
+        _("Raw Message"),
+        blank=True,
+        null=True,
+        help_text=_("Serialized MIME message awaiting queued delivery"),
+    )
+    attempts = models.PositiveIntegerField(
+        _("Attempts"), default=0, help_text=_("Number of delivery attempts")
+    )
+    next_attempt_at = models.DateTimeField(
+        _("Next Attempt At"),
+        blank=True,
+        null=True,
+        help_text=_("Earliest time of the next queued delivery attempt"),
+    )
+
     # Tracking information
     opens = models.IntegerField(
         _("Opens"), default=0, help_text=_("Number of times the email was opened")
@@ -138,7 +155,9 @@ class EmailLog(models.Model):
             models.Index(fields=["message_id"]),
             models.Index(fields=["status"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["from_email"]),
+            models.Index(fields=["status", "next_attempt_at"]),
         ]
 
     def __str__(self):
@@ -183,6 +202,14 @@ class EmailEvent(models.Model):
         null=True,
         help_text=_("IP address of the client that triggered the event"),
     )
+    idempotency_key = models.CharField(
+        _("Idempotency Key"),
+        max_length=64,
+        unique=True,
+        blank=True,
+        null=True,
+        help_text=_("Hash identifying the provider event, used to drop webhook retries"),
+    )
 
     class Meta:
         verbose_name = _("Email Event")
@@ -0,0 +1,342 @@
+"""
+Queued outbound email delivery.
+
+``QueuedEmailBackend`` only serializes messages into ``EmailLog`` rows, so
+sending an email from a web request costs one ``INSERT``. A Celery worker
+then drains the queue in batches over a single connection of
+``EMAIL_QUEUE_DELIVERY_BACKEND``, the backend the queue replaced, retrying
+failed messages with exponential backoff until ``EMAIL_QUEUE_MAX_ATTEMPTS``
+is reached.
+"""
+
+import uuid
+from datetime import timedelta
+from email import message_from_bytes, policy
+from email.utils import formataddr, getaddresses
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection
+from django.db import transaction
+from django.utils import timezone
+
+from pyerp.utils.logging import get_logger
+
+from .models import EmailLog
+
+logger = get_logger(__name__)
+
+DEFAULT_DELIVERY_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# ESP recorded for delivery backends that are not anymail ESP backends
+DELIVERY_BACKEND_ESPS = {
+    "pyerp.utils.email_system.backends.LoggingAnymailBackend": "anymail",
+}
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+
+# How long a claimed batch is hidden from other workers
+CLAIM_LEASE = timedelta(minutes=10)
+
+DELIVERY_UPDATE_FIELDS = [
+    "status",
+    "sent_at",
+    "error_message",
+    "attempts",
+    "next_attempt_at",
+    "raw_message",
+    "esp_message_id",
+    "updated_at",
+]
+
+
+def get_delivery_backend():
+    """Return the import path of the backend that sends queued emails."""
+    return (
+        getattr(settings, "EMAIL_QUEUE_DELIVERY_BACKEND", None)
+        or DEFAULT_DELIVERY_BACKEND
+    )
+
+
+def get_delivery_esp(backend=None):
+    """Return the ESP recorded for emails sent through a delivery backend."""
+    backend = backend or get_delivery_backend()
+    if backend.startswith("anymail.backends."):
+        # e.g. anymail.backends.sendgrid.EmailBackend
+        return backend.split(".")[2]
+    return DELIVERY_BACKEND_ESPS.get(backend, "smtp")
+
+
+def _addresses(value):
+    return [formataddr(pair) for pair in getaddresses([value or ""]) if pair[1]]
+
+
+def build_email_log(message, esp):
+    """
+    Build an unsaved ``EmailLog`` for an email message.
+
+    Assigns a message ID to the message if it has none.
+    """
+    if not getattr(message, "message_id", None):
+        message.message_id = f"<{uuid.uuid4()}@pyerp.local>"
+
+    body_html = None
+    for content, mimetype in getattr(message, "alternatives", []):
+        if mimetype == "text/html":
+            body_html = content
+            break
+
+    return EmailLog(
+        message_id=message.message_id,
+        subject=message.subject,
+        from_email=message.from_email,
+        to_email=", ".join(message.to),
+        cc_email=", ".join(message.cc),
+        bcc_email=", ".join(message.bcc),
+        body_text=message.body or "",
+        body_html=body_html,
+        status=EmailLog.STATUS_QUEUED,
+        esp=esp,
+    )
+
+
+class QueuedMessage:
+    """
+    Minimal email message wrapper around a stored MIME message.
+
+    Provides what Django's mail backends read from an ``EmailMessage``, so
+    the serialized message is sent byte for byte as it was queued.
+    """
+
+    encoding = None
+
+    def __init__(self, email_log):
+        self.email_log = email_log
+        self.from_email = email_log.from_email
+        self.raw_message = bytes(email_log.raw_message)
+
+    def recipients(self):
+        """Return all envelope recipients, including Bcc."""
+        fields = [
+            self.email_log.to_email or "",
+            self.email_log.cc_email or "",
+            self.email_log.bcc_email or "",
+        ]
+        return [address for _, address in getaddresses(fields) if address]
+
+    def message(self):
+        return self
+
+    def get_charset(self):
+        return None
+
+    def as_bytes(self, unixfrom=False, linesep="\n"):
+        return self.raw_message
+
+    def to_email_message(self):
+        """
+        Rebuild an email message from the stored MIME message.
+
+        For backends that send through an API instead of raw MIME, such as
+        the anymail ESP backends.
+        """
+        parsed = message_from_bytes(self.raw_message, policy=policy.default)
+        text = parsed.get_body(preferencelist=("plain",))
+        html = parsed.get_body(preferencelist=("html",))
+        message = EmailMultiAlternatives(
+            subject=self.email_log.subject,
+            body=text.get_content() if text is not None else "",
+            from_email=self.from_email,
+            to=_addresses(self.email_log.to_email),
+            cc=_addresses(self.email_log.cc_email),
+            bcc=_addresses(self.email_log.bcc_email),
+            headers={
+                name: str(parsed[name])
+                for name in ("Message-ID", "Reply-To")
+                if parsed[name]
+            },
+        )
+        if html is not None:
+            message.attach_alternative(html.get_content(), "text/html")
+        for part in parsed.iter_attachments():
+            message.attach(
+                part.get_filename(), part.get_content(), part.get_content_type()
+            )
+        return message
+
+
+def enqueue_messages(email_messages, esp=None):
+    """
+    Persist messages for queued delivery and schedule the worker.
+
+    Messages are rendered to MIME immediately, so attachments and headers
+    are preserved, and stored with one ``bulk_create``. The worker is only
+    triggered once the surrounding transaction commits.
+
+    Args:
+        email_messages: Messages to queue
+        esp: ESP recorded in the logs, by default that of the delivery
+            backend
+
+    Returns:
+        list: The created email logs
+    """
+    esp = esp or get_delivery_esp()
+    logs = []
+    for message in email_messages:
+        email_log = build_email_log(message, esp)
+        message.extra_headers.setdefault("Message-ID", email_log.message_id)
+        email_log.raw_message = message.message().as_bytes(linesep="\r\n")
+        logs.append(email_log)
+    EmailLog.objects.bulk_create(logs)
+    transaction.on_commit(_schedule_delivery)
+    return logs
+
+
+def _schedule_delivery():
+    """Trigger the worker; the periodic task picks the queue up otherwise."""
+    from .tasks import send_queued_emails
+
+    try:
+        send_queued_emails.delay()
+    except Exception as e:
+        logger.warning(f"Could not schedule queued email delivery: {e}")
+
+
+def _claim_batch(batch_size, now):
+    """Lease the next due batch so concurrent workers do not send it twice."""
+    with transaction.atomic():
+        queryset = EmailLog.objects.filter(
+            status=EmailLog.STATUS_QUEUED, raw_message__isnull=False
+        ).exclude(next_attempt_at__gt=now)
+        if db_connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        logs = list(queryset.order_by("created_at", "id")[:batch_size])
+        if logs:
+            EmailLog.objects.filter(id__in=[log.id for log in logs]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return logs
+
+
+def _get_delivery_connection():
+    """Return a connection of the backend that actually sends queued emails."""
+    from .utils import _ensure_password_from_1password
+
+    _ensure_password_from_1password()
+    return get_connection(get_delivery_backend(), fail_silently=False)
+
+
+def deliver_queued(batch_size=None, max_attempts=None, retry_delay=None, limit=None):
+    """
+    Send queued emails in batches over one persistent connection.
+
+    Args:
+        batch_size: Number of emails claimed and updated per batch
+        max_attempts: Attempts after which an email is marked failed
+        retry_delay: Base delay in seconds for the exponential backoff
+        limit: Stop after this many emails; None drains all due emails
+
+    Returns:
+        dict: Counters for ``sent``, ``retried`` and ``failed`` emails
+    """
+    batch_size = batch_size or getattr(settings, "EMAIL_QUEUE_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    max_attempts = max_attempts or getattr(
+        settings, "EMAIL_QUEUE_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS
+    )
+    retry_delay = retry_delay or getattr(settings, "EMAIL_QUEUE_RETRY_DELAY", DEFAULT_RETRY_DELAY)
+    stats = {"sent": 0, "retried": 0, "failed": 0}
+
+    connection = None
+    processed = 0
+    try:
+        while limit is None or processed < limit:
+            now = timezone.now()
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            logs = _claim_batch(size, now)
+            if not logs:
+                break
+            if connection is None:
+                # Only fetch the SMTP password and connect when there is mail
+                connection = _get_delivery_connection()
+            _send_batch(connection, logs, max_attempts, retry_delay, stats)
+            processed += len(logs)
+    finally:
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing email connection: {e}")
+
+    if processed:
+        logger.info(
+            f"Queued email delivery: {stats['sent']} sent, "
+            f"{stats['retried']} retried, {stats['failed']} failed"
+        )
+    return stats
+
+
+def _record_failure(email_log, error, now, max_attempts, retry_delay, stats):
+    """Schedule a retry with exponential backoff or give up."""
+    email_log.error_message = str(error)
+    if email_log.attempts >= max_attempts:
+        email_log.status = EmailLog.STATUS_FAILED
+        email_log.next_attempt_at = None
+        stats["failed"] += 1
+        logger.error(f"Giving up on email {email_log.message_id}: {error}")
+        return
+    delay = retry_delay * 2 ** (email_log.attempts - 1)
+    email_log.next_attempt_at = now + timedelta(seconds=delay)
+    stats["retried"] += 1
+    logger.warning(
+        f"Email {email_log.message_id} failed (attempt {email_log.attempts}), "
+        f"retrying in {delay}s: {error}"
+    )
+
+
+def _send_batch(connection, logs, max_attempts, retry_delay, stats):
+    """Send one claimed batch and record the outcome with one bulk update."""
+    now = timezone.now()
+    for email_log in logs:
+        email_log.attempts += 1
+        email_log.updated_at = now
+
+    try:
+        # Backends reuse an already open connection in send_messages()
+        connection.open()
+    except Exception as e:
+        for email_log in logs:
+            _record_failure(email_log, e, now, max_attempts, retry_delay, stats)
+        EmailLog.objects.bulk_update(logs, DELIVERY_UPDATE_FIELDS)
+        return
+
+    # API backends cannot send the stored MIME message as it is
+    rebuild = type(connection).__module__.startswith("anymail.")
+    for email_log in logs:
+        message = QueuedMessage(email_log)
+        if rebuild:
+            message = message.to_email_message()
+        try:
+            if not connection.send_messages([message]):
+                raise RuntimeError("Message was not accepted by the mail backend")
+        except Exception as e:
+            _record_failure(email_log, e, now, max_attempts, retry_delay, stats)
+            # Start a fresh session for the next message
+            try:
+                connection.close()
+                connection.open()
+            except Exception:
+                pass
+            continue
+
+        email_log.status = EmailLog.STATUS_SENT
+        email_log.sent_at = timezone.now()
+        email_log.error_message = None
+        email_log.next_attempt_at = None
+        email_log.raw_message = None
+        anymail_status = getattr(message, "anymail_status", None)
+        if anymail_status is not None and anymail_status.message_id:
+            email_log.esp_message_id = anymail_status.message_id
+        stats["sent"] += 1
+
+    EmailLog.objects.bulk_update(logs, DELIVERY_UPDATE_FIELDS)
@@ -0,0 +1,216 @@
+"""
+Read-side queries for the email log: statistics and keyset pagination.
+
+All status counts are computed with a single conditional aggregation, and
+the log list is paged on ``(created_at, id)`` so that later pages cost the
+same as the first one regardless of the table size.
+"""
+
+import base64
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import EmailLog
+
+# Statuses reported by the stats endpoints
+STAT_STATUSES = {
+    "sent": EmailLog.STATUS_SENT,
+    "delivered": EmailLog.STATUS_DELIVERED,
+    "opened": EmailLog.STATUS_OPENED,
+    "clicked": EmailLog.STATUS_CLICKED,
+    "bounced": EmailLog.STATUS_BOUNCED,
+    "failed": EmailLog.STATUS_FAILED,
+}
+
+BUCKET_FUNCTIONS = {"hour": TruncHour, "day": TruncDay}
+
+# Columns never needed by list views
+DEFERRED_LOG_FIELDS = ("body_text", "body_html", "raw_message")
+
+DEFAULT_LOG_LIMIT = 50
+MAX_LOG_LIMIT = 500
+
+
+def _status_aggregates():
+    aggregates = {"total": Count("id")}
+    for name, value in STAT_STATUSES.items():
+        aggregates[name] = Count("id", filter=Q(status=value))
+    return aggregates
+
+
+def _rates(counts):
+    total = counts["total"]
+    sent = counts["sent"]
+    delivered = counts["delivered"]
+    opened = counts["opened"]
+    return {
+        "delivery_rate": (delivered / sent * 100) if sent > 0 else 0,
+        "open_rate": (opened / delivered * 100) if delivered > 0 else 0,
+        "click_rate": (counts["clicked"] / opened * 100) if opened > 0 else 0,
+        "bounce_rate": (counts["bounced"] / sent * 100) if sent > 0 else 0,
+        "failure_rate": (counts["failed"] / total * 100) if total > 0 else 0,
+    }
+
+
+def parse_window(params):
+    """
+    Read an optional date window from query parameters.
+
+    ``days`` selects the last N days; ``since`` and ``until`` take ISO 8601
+    timestamps and override it.
+
+    Returns:
+        tuple: ``(since, until)``, either of which may be None
+
+    Raises:
+        ValueError: If a parameter cannot be parsed
+    """
+    since = until = None
+    if params.get("days"):
+        days = int(params["days"])
+        if days < 1:
+            raise ValueError("days must be a positive integer")
+        since = timezone.now() - timedelta(days=days)
+    for name in ("since", "until"):
+        if params.get(name):
+            value = parse_datetime(params[name])
+            if value is None:
+                raise ValueError(f"Invalid {name} timestamp: {params[name]}")
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            if name == "since":
+                since = value
+            else:
+                until = value
+    return since, until
+
+
+def _window(queryset, since=None, until=None):
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset
+
+
+def get_email_stats(since=None, until=None):
+    """
+    Count emails per status with one query.
+
+    Args:
+        since: Only count emails created at or after this time
+        until: Only count emails created before this time
+
+    Returns:
+        dict: Counts per status plus delivery, open, click, bounce and
+        failure rates in percent
+    """
+    counts = _window(EmailLog.objects.all(), since, until).aggregate(
+        **_status_aggregates()
+    )
+    counts.update(_rates(counts))
+    return counts
+
+
+def get_delivery_timeseries(interval="day", since=None, until=None):
+    """
+    Count emails per status for each hour or day with one grouped query.
+
+    Args:
+        interval: ``"hour"`` or ``"day"``
+        since: Only count emails created at or after this time
+        until: Only count emails created before this time
+
+    Returns:
+        list: One dict per bucket with a ``bucket`` ISO timestamp, the
+        status counts and rates, oldest bucket first
+
+    Raises:
+        ValueError: If the interval is not supported
+    """
+    if interval not in BUCKET_FUNCTIONS:
+        raise ValueError(
+            f"Invalid interval: {interval}. Use one of {', '.join(BUCKET_FUNCTIONS)}"
+        )
+    rows = (
+        _window(EmailLog.objects.all(), since, until)
+        .annotate(bucket=BUCKET_FUNCTIONS[interval]("created_at"))
+        .order_by()
+        .values("bucket")
+        .annotate(**_status_aggregates())
+        .order_by("bucket")
+    )
+    series = []
+    for row in rows:
+        row.update(_rates(row))
+        row["bucket"] = row["bucket"].isoformat()
+        series.append(row)
+    return series
+
+
+def encode_cursor(email_log):
+    """Encode the position after ``email_log`` as an opaque cursor."""
+    raw = f"{email_log.created_at.isoformat()}|{email_log.pk}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, pk = raw.rsplit("|", 1)
+        value = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if value is None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return value, pk
+
+
+def get_log_page(queryset=None, cursor=None, limit=DEFAULT_LOG_LIMIT):
+    """
+    Return one page of email logs, newest first, using keyset pagination.
+
+    Body columns are deferred, and one extra row is fetched to tell whether
+    another page exists, so no ``COUNT`` or ``OFFSET`` is needed.
+
+    Args:
+        queryset: EmailLog queryset with filters applied, defaults to all
+        cursor: Cursor returned as ``next_cursor`` by the previous page
+        limit: Page size, capped at ``MAX_LOG_LIMIT``
+
+    Returns:
+        tuple: ``(logs, next_cursor)``; ``next_cursor`` is None on the last
+        page
+
+    Raises:
+        ValueError: If the cursor or limit is invalid
+    """
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, MAX_LOG_LIMIT)
+    if queryset is None:
+        queryset = EmailLog.objects.all()
+    queryset = queryset.defer(*DEFERRED_LOG_FIELDS).order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    logs = list(queryset[: limit + 1])
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1])
+    return logs, next_cursor
@@ -0,0 +1,45 @@
+"""Celery tasks for the email system."""
+
+try:
+    from celery import shared_task
+except ImportError:
+    # Create dummy decorator for testing
+    def shared_task(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+from pyerp.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@shared_task(
+    name="email_system.process_webhook_payload",
+    max_retries=3,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+)
+def process_webhook_payload(esp, payload):
+    """Ingest a webhook payload that was acknowledged before processing.
+
+    Events are stored with idempotency keys, so retrying the task after a
+    partial failure does not duplicate them.
+    """
+    from .webhooks import EVENT_PARSERS, ingest_events
+
+    stats = ingest_events(esp, EVENT_PARSERS[esp](payload))
+    logger.info(f"Processed {esp} webhook payload: {stats}")
+    return stats
+
+
+@shared_task(name="email_system.send_queued_emails", ignore_result=True)
+def send_queued_emails(limit=None):
+    """Deliver queued outbound emails over one SMTP connection.
+
+    Triggered after emails are queued and periodically by Celery beat, which
+    also picks up emails whose retry backoff has expired.
+    """
+    from .outbox import deliver_queued
+
+    return deliver_queued(limit=limit)
@@ -0,0 +1,202 @@
+"""
+Tests for queued outbound email delivery.
+"""
+
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pyerp.utils.email_system.models import EmailLog
+from pyerp.utils.email_system.outbox import deliver_queued
+
+
+def _messages(count):
+    messages = []
+    for i in range(count):
+        message = EmailMultiAlternatives(
+            subject=f"Subject {i}",
+            body="Plain body",
+            from_email="noreply@example.com",
+            to=[f"user{i}@example.com"],
+            bcc=["audit@example.com"],
+        )
+        message.attach_alternative("<p>HTML body</p>", "text/html")
+        messages.append(message)
+    return messages
+
+
+class FlakyBackend(LocmemBackend):
+    """Locmem backend that rejects recipients listed in ``failing``."""
+
+    failing = set()
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.recipients()) & self.failing:
+                raise ConnectionError("Recipient refused")
+        return super().send_messages(messages)
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(
+    EMAIL_BACKEND="pyerp.utils.email_system.backends.QueuedEmailBackend",
+    EMAIL_QUEUE_DELIVERY_BACKEND=f"{__name__}.FlakyBackend",
+    EMAIL_QUEUE_RETRY_DELAY=60,
+    EMAIL_QUEUE_MAX_ATTEMPTS=2,
+)
+class QueuedEmailBackendTestCase(TestCase):
+    """Test queueing, batched delivery and retries."""
+
+    def setUp(self):
+        FlakyBackend.failing = set()
+        FlakyBackend.opened = 0
+
+    def test_send_only_queues(self):
+        """Test that sending stores the messages without delivering them."""
+        with self.assertNumQueries(1):
+            sent = get_connection().send_messages(_messages(5))
+        self.assertEqual(sent, 5)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            EmailLog.objects.filter(status=EmailLog.STATUS_QUEUED).count(), 5
+        )
+
+    def test_worker_is_triggered_on_commit(self):
+        """Test that the Celery task runs once the transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            get_connection().send_messages(_messages(3))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            EmailLog.objects.filter(status=EmailLog.STATUS_SENT).count(), 3
+        )
+
+    def test_empty_queue_does_not_connect(self):
+        """Test that nothing is fetched or opened when no email is due."""
+        with mock.patch(
+            "pyerp.utils.email_system.utils._ensure_password_from_1password"
+        ) as ensure_password:
+            stats = deliver_queued()
+        self.assertEqual(stats, {"sent": 0, "retried": 0, "failed": 0})
+        ensure_password.assert_not_called()
+        self.assertEqual(FlakyBackend.opened, 0)
+
+    def test_delivery_reuses_connection(self):
+        """Test that a batch is sent over one connection with bulk updates."""
+        get_connection().send_messages(_messages(10))
+        # Claim + lease, one bulk update, and an empty claim, each claim
+        # wrapped in a savepoint
+        with self.assertNumQueries(8):
+            stats = deliver_queued(batch_size=10)
+        self.assertEqual(stats, {"sent": 10, "retried": 0, "failed": 0})
+        self.assertEqual(FlakyBackend.opened, 1)
+
+        message = mail.outbox[0]
+        self.assertIn("audit@example.com", message.recipients())
+        self.assertIn(b"HTML body", message.message().as_bytes())
+        log = EmailLog.objects.get(subject="Subject 0")
+        self.assertIn(log.message_id.encode(), message.message().as_bytes())
+        self.assertIsNone(log.raw_message)
+        self.assertIsNotNone(log.sent_at)
+
+    def test_failed_messages_back_off_then_fail(self):
+        """Test exponential backoff and giving up after max attempts."""
+        FlakyBackend.failing = {"user1@example.com"}
+        get_connection().send_messages(_messages(3))
+
+        stats = deliver_queued()
+        self.assertEqual(stats, {"sent": 2, "retried": 1, "failed": 0})
+        log = EmailLog.objects.get(subject="Subject 1")
+        self.assertEqual(log.status, EmailLog.STATUS_QUEUED)
+        self.assertEqual(log.attempts, 1)
+        self.assertEqual(log.error_message, "Recipient refused")
+        self.assertGreater(log.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.assertEqual(deliver_queued(), {"sent": 0, "retried": 0, "failed": 0})
+
+        EmailLog.objects.filter(id=log.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_queued(), {"sent": 0, "retried": 0, "failed": 1})
+        log.refresh_from_db()
+        self.assertEqual(log.status, EmailLog.STATUS_FAILED)
+
+    def test_connection_failure_reschedules_batch(self):
+        """Test that an unreachable server defers the whole batch."""
+        get_connection().send_messages(_messages(3))
+        with mock.patch.object(FlakyBackend, "open", side_effect=OSError("down")):
+            stats = deliver_queued()
+        self.assertEqual(stats["retried"], 3)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(
+        EMAIL_QUEUE_DELIVERY_BACKEND="anymail.backends.test.EmailBackend"
+    )
+    def test_esp_follows_delivery_backend(self):
+        """Test that ESP backends get a rebuilt message and set the ESP."""
+        get_connection().send_messages(_messages(2))
+        stats = deliver_queued()
+        self.assertEqual(stats, {"sent": 2, "retried": 0, "failed": 0})
+
+        log = EmailLog.objects.get(subject="Subject 1")
+        self.assertEqual(log.esp, "test")
+        # The test ESP uses the outbox index as message ID
+        self.assertEqual(log.esp_message_id, "1")
+        message = mail.outbox[1]
+        self.assertEqual(message.body, "Plain body")
+        self.assertEqual(message.alternatives[0][0], "<p>HTML body</p>")
+        self.assertEqual(message.bcc, ["audit@example.com"])
+        self.assertEqual(message.extra_headers["Message-ID"], log.message_id)
+
+    @override_settings(
+        EMAIL_QUEUE_DELIVERY_BACKEND=(
+            "pyerp.utils.email_system.backends.LoggingEmailBackend"
+        ),
+        EMAIL_HOST="localhost",
+        EMAIL_PORT=2525,
+    )
+    def test_logging_delivery_backend_reuses_logs(self):
+        """Test that delivering through a logging backend logs nothing twice."""
+        get_connection().send_messages(_messages(2))
+        with mock.patch("django.core.mail.backends.smtp.EmailBackend.open"), mock.patch(
+            "django.core.mail.backends.smtp.EmailBackend.send_messages",
+            side_effect=lambda messages: len(messages),
+        ):
+            stats = deliver_queued()
+        self.assertEqual(stats, {"sent": 2, "retried": 0, "failed": 0})
+        self.assertEqual(EmailLog.objects.count(), 2)
+        self.assertEqual(
+            EmailLog.objects.filter(status=EmailLog.STATUS_SENT, esp="smtp").count(),
+            2,
+        )
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(EMAIL_HOST="localhost", EMAIL_PORT=2525)
+class LoggingEmailBackendTestCase(TestCase):
+    """Test bulk logging in the synchronous backend."""
+
+    def test_logs_are_written_in_bulk(self):
+        """Test that logging and status updates do not scale with messages."""
+        from pyerp.utils.email_system.backends import LoggingEmailBackend
+
+        backend = LoggingEmailBackend()
+        with mock.patch(
+            "django.core.mail.backends.smtp.EmailBackend.send_messages",
+            side_effect=lambda messages: len(messages),
+        ):
+            with self.assertNumQueries(2):
+                self.assertEqual(backend.send_messages(_messages(5)), 5)
+        self.assertEqual(
+            EmailLog.objects.filter(status=EmailLog.STATUS_SENT).count(), 5
+        )
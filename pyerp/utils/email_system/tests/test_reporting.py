@@ -0,0 +1,189 @@
+"""
+Tests for email statistics, keyset pagination and log retention.
+"""
+
+import gzip
+import itertools
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from pyerp.utils.email_system.models import EmailEvent, EmailLog
+from pyerp.utils.email_system.reporting import (
+    get_delivery_timeseries,
+    get_email_stats,
+    get_log_page,
+)
+
+STATUSES = [
+    EmailLog.STATUS_SENT,
+    EmailLog.STATUS_DELIVERED,
+    EmailLog.STATUS_DELIVERED,
+    EmailLog.STATUS_OPENED,
+    EmailLog.STATUS_BOUNCED,
+    EmailLog.STATUS_FAILED,
+]
+
+_message_ids = itertools.count()
+
+
+def _create_logs(statuses, created_at=None):
+    logs = [
+        EmailLog.objects.create(
+            message_id=f"<msg{next(_message_ids)}@example.com>",
+            subject=f"Subject {i}",
+            from_email="noreply@example.com",
+            to_email="user@example.com",
+            body_html="<p>" + "x" * 1000 + "</p>",
+            status=status,
+        )
+        for i, status in enumerate(statuses)
+    ]
+    if created_at is not None:
+        EmailLog.objects.filter(id__in=[log.id for log in logs]).update(
+            created_at=created_at
+        )
+    return logs
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(ROOT_URLCONF="pyerp.urls")
+class EmailReportingTestCase(TestCase):
+    """Test stats aggregation and log pagination."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.old_logs = _create_logs(
+            [EmailLog.STATUS_SENT] * 3, created_at=timezone.now() - timedelta(days=10)
+        )
+        self.logs = _create_logs(STATUSES)
+        self.admin = get_user_model().objects.create_superuser(
+            username="admin", email="admin@example.com", password="password"
+        )
+
+    def test_stats_single_query(self):
+        """Test that all status counts come from one query."""
+        with self.assertNumQueries(1):
+            stats = get_email_stats()
+        self.assertEqual(stats["total"], 9)
+        self.assertEqual(stats["sent"], 4)
+        self.assertEqual(stats["delivered"], 2)
+        self.assertEqual(stats["bounced"], 1)
+        self.assertEqual(stats["delivery_rate"], 50.0)
+
+    def test_stats_window(self):
+        """Test that the date window restricts the counts."""
+        stats = get_email_stats(since=timezone.now() - timedelta(days=1))
+        self.assertEqual(stats["total"], 6)
+        self.assertEqual(stats["sent"], 1)
+
+    def test_timeseries(self):
+        """Test daily buckets, oldest first."""
+        with self.assertNumQueries(1):
+            series = get_delivery_timeseries("day")
+        self.assertEqual([bucket["total"] for bucket in series], [3, 6])
+        self.assertEqual(series[1]["delivered"], 2)
+        with self.assertRaises(ValueError):
+            get_delivery_timeseries("week")
+
+    def test_keyset_pages_cover_all_logs(self):
+        """Test that walking the cursor returns every log once, newest first."""
+        EmailLog.objects.update(created_at=timezone.now())
+        seen, cursor = [], None
+        while True:
+            logs, cursor = get_log_page(cursor=cursor, limit=4)
+            seen.extend(log.id for log in logs)
+            if cursor is None:
+                break
+        expected = list(
+            EmailLog.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_log_page_defers_bodies(self):
+        """Test that list queries do not select the body columns."""
+        with CaptureQueriesContext(connection) as queries:
+            get_log_page(limit=5)
+        self.assertNotIn("body_html", queries.captured_queries[0]["sql"])
+
+    def test_stats_endpoint(self):
+        """Test the stats endpoint with a window and an interval."""
+        self.client.force_login(self.admin)
+        response = self.client.get("/api/email/email-stats/?days=1&interval=hour")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["total"], 6)
+        self.assertEqual(sum(bucket["total"] for bucket in data["timeseries"]), 6)
+
+        response = self.client.get("/api/email/email-stats/?interval=week")
+        self.assertEqual(response.status_code, 400)
+
+    def test_logs_endpoint_cursor(self):
+        """Test cursor pagination on the email log endpoint."""
+        self.client.force_login(self.admin)
+        response = self.client.get("/api/email/email-logs/?limit=5")
+        data = response.json()["data"]
+        self.assertEqual(len(data["logs"]), 5)
+        self.assertIsNotNone(data["next_cursor"])
+
+        response = self.client.get(
+            f"/api/email/email-logs/?limit=5&cursor={data['next_cursor']}"
+        )
+        data = response.json()["data"]
+        self.assertEqual(len(data["logs"]), 4)
+        self.assertIsNone(data["next_cursor"])
+
+        response = self.client.get("/api/email/email-logs/?cursor=bogus")
+        self.assertEqual(response.status_code, 400)
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class PruneEmailLogsCommandTestCase(TestCase):
+    """Test the retention command."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.old_logs = _create_logs(
+            [EmailLog.STATUS_SENT] * 5, created_at=timezone.now() - timedelta(days=100)
+        )
+        self.recent_logs = _create_logs([EmailLog.STATUS_SENT] * 2)
+        EmailEvent.objects.create(email_log=self.old_logs[0], event_type="delivered")
+
+    def test_dry_run_keeps_logs(self):
+        """Test that a dry run deletes nothing."""
+        call_command("prune_email_logs", "--days=30", "--dry-run", stdout=StringIO())
+        self.assertEqual(EmailLog.objects.count(), 7)
+
+    def test_prunes_and_archives_in_batches(self):
+        """Test that old logs and their events are archived and deleted."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "email_logs.jsonl.gz")
+            call_command(
+                "prune_email_logs",
+                "--days=30",
+                "--batch-size=2",
+                f"--archive={path}",
+                stdout=StringIO(),
+            )
+            with gzip.open(path, "rt") as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]["events"][0]["event_type"], "delivered")
+        self.assertEqual(
+            set(EmailLog.objects.values_list("id", flat=True)),
+            {log.id for log in self.recent_logs},
+        )
+        self.assertEqual(EmailEvent.objects.count(), 0)
@@ -0,0 +1,124 @@
+"""
+Tests for bulk ingestion of anymail webhook events.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from pyerp.utils.email_system.models import EmailEvent, EmailLog
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(ROOT_URLCONF="pyerp.urls")
+class AnymailWebhookTestCase(TestCase):
+    """Test batched webhook processing."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.logs = [
+            EmailLog.objects.create(
+                message_id=f"<msg{i}@example.com>",
+                esp_message_id=f"esp{i}",
+                subject=f"Subject {i}",
+                from_email="noreply@example.com",
+                to_email="user@example.com",
+                status=EmailLog.STATUS_SENT,
+            )
+            for i in range(20)
+        ]
+
+    def _post(self, esp, payload):
+        return self.client.post(
+            f"/api/email/webhooks/anymail/?esp={esp}",
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+    def _sendgrid_payload(self):
+        payload = []
+        for i, log in enumerate(self.logs):
+            for n, event in enumerate(("delivered", "open", "open")):
+                payload.append({
+                    "event": event,
+                    "sg_message_id": f"{log.esp_message_id}.filter0001",
+                    "sg_event_id": f"evt-{i}-{n}",
+                })
+        payload.append({"event": "open", "sg_message_id": "unknown.filter", "sg_event_id": "x"})
+        return payload
+
+    def test_sendgrid_batch(self):
+        """Test that a batch updates statuses and counters."""
+        response = self._post("sendgrid", self._sendgrid_payload())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(EmailEvent.objects.count(), 60)
+        log = EmailLog.objects.get(pk=self.logs[0].pk)
+        self.assertEqual(log.status, EmailLog.STATUS_OPENED)
+        self.assertEqual(log.opens, 2)
+        self.assertIsNotNone(log.delivered_at)
+
+    def test_retry_is_idempotent(self):
+        """Test that a redelivered payload does not duplicate events."""
+        payload = self._sendgrid_payload()
+        self._post("sendgrid", payload)
+        self._post("sendgrid", payload)
+        self.assertEqual(EmailEvent.objects.count(), 60)
+        self.assertEqual(EmailLog.objects.get(pk=self.logs[0].pk).opens, 2)
+
+    def test_email_logs_are_locked(self):
+        """Test that concurrent deliveries serialize on the email log rows."""
+        from django.db.models.query import QuerySet
+
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def record(queryset, *args, **kwargs):
+            self.assertTrue(connection.in_atomic_block)
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with patch.object(QuerySet, "select_for_update", autospec=True, side_effect=record):
+            self._post("sendgrid", self._sendgrid_payload())
+        self.assertEqual(locked, [EmailLog])
+
+    def test_constant_query_count(self):
+        """Test that the number of queries does not grow with the batch."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self._post("sendgrid", self._sendgrid_payload())
+        self.assertLess(len(queries), 10)
+
+    def test_mailgun(self):
+        """Test single-event Mailgun payloads and their error responses."""
+        payload = {
+            "event-data": {
+                "id": "mg-1",
+                "event": "clicked",
+                "message": {"headers": {"message-id": self.logs[0].message_id}},
+            }
+        }
+        self.assertEqual(self._post("mailgun", payload).status_code, 200)
+        log = EmailLog.objects.get(pk=self.logs[0].pk)
+        self.assertEqual(log.status, EmailLog.STATUS_CLICKED)
+        self.assertEqual(log.clicks, 1)
+
+        payload["event-data"]["message"]["headers"]["message-id"] = "<missing@example.com>"
+        self.assertEqual(self._post("mailgun", payload).status_code, 404)
+        payload["event-data"]["message"]["headers"] = {}
+        self.assertEqual(self._post("mailgun", payload).status_code, 400)
+
+    def test_mailjet_without_event_ids(self):
+        """Test that events without provider ids are deduplicated by content."""
+        payload = {"Events": [{"event": "bounce", "MessageID": "esp1", "time": 1}]}
+        self._post("mailjet", payload)
+        self._post("mailjet", payload)
+        self.assertEqual(EmailEvent.objects.count(), 1)
+        self.assertEqual(
+            EmailLog.objects.get(pk=self.logs[1].pk).status, EmailLog.STATUS_BOUNCED
+        )
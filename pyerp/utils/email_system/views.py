@@ -14,6 +14,13 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.decorators import api_view, permission_classes
 from .utils import send_test_email
 from .models import EmailLog
+from .reporting import (
+    DEFAULT_LOG_LIMIT,
+    get_delivery_timeseries,
+    get_email_stats,
+    get_log_page,
+    parse_window,
+)
 from pyerp.utils.onepassword_connect import get_email_password
 
 logger = logging.getLogger("anymail")
@@ -279,23 +286,23 @@ class EmailLogAPIView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        """Get email logs."""
+        """
+        Get email logs, newest first.
+
+        Pages are addressed with the opaque ``cursor`` returned as
+        ``next_cursor`` by the previous page instead of an offset.
+        """
         try:
-            # Get query parameters
-            limit = int(request.GET.get("limit", 50))
-            offset = int(request.GET.get("offset", 0))
+            limit = int(request.GET.get("limit", DEFAULT_LOG_LIMIT))
             status_filter = request.GET.get("status")
 
-            # Query logs
-            queryset = EmailLog.objects.all().order_by("-created_at")
-
-            # Apply filters
+            queryset = EmailLog.objects.all()
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
 
-            # Apply pagination
-            total = queryset.count()
-            logs = queryset[offset : offset + limit]
+            logs, next_cursor = get_log_page(
+                queryset, cursor=request.GET.get("cursor"), limit=limit
+            )
 
             # Serialize logs
             log_data = []
@@ -319,12 +326,16 @@ class EmailLogAPIView(APIView):
                     "success": True,
                     "data": {
                         "logs": log_data,
-                        "total": total,
                         "limit": limit,
-                        "offset": offset,
+                        "next_cursor": next_cursor,
                     },
                 }
             )
+        except ValueError as e:
+            return Response(
+                {"success": False, "error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except Exception as e:
             logger.error(f"Error getting email logs: {str(e)}")
             return Response(
@@ -350,34 +361,23 @@ class EmailLogAPIView(APIView):
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def email_stats(request):
-    """Get email statistics."""
-    try:
-        total = EmailLog.objects.count()
-        sent = EmailLog.objects.filter(status=EmailLog.STATUS_SENT).count()
-        delivered = EmailLog.objects.filter(status=EmailLog.STATUS_DELIVERED).count()
-        opened = EmailLog.objects.filter(status=EmailLog.STATUS_OPENED).count()
-        clicked = EmailLog.objects.filter(status=EmailLog.STATUS_CLICKED).count()
-        bounced = EmailLog.objects.filter(status=EmailLog.STATUS_BOUNCED).count()
-        failed = EmailLog.objects.filter(status=EmailLog.STATUS_FAILED).count()
+    """
+    Get email statistics.
 
+    Accepts an optional ``days``/``since``/``until`` window and, with
+    ``interval=hour|day``, adds per-bucket counts under ``timeseries``.
+    """
+    try:
+        since, until = parse_window(request.GET)
+        data = get_email_stats(since, until)
+        interval = request.GET.get("interval")
+        if interval:
+            data["timeseries"] = get_delivery_timeseries(interval, since, until)
+        return Response({"success": True, "data": data})
+    except ValueError as e:
         return Response(
-            {
-                "success": True,
-                "data": {
-                    "total": total,
-                    "sent": sent,
-                    "delivered": delivered,
-                    "opened": opened,
-                    "clicked": clicked,
-                    "bounced": bounced,
-                    "failed": failed,
-                    "delivery_rate": (delivered / sent * 100) if sent > 0 else 0,
-                    "open_rate": (opened / delivered * 100) if delivered > 0 else 0,
-                    "click_rate": (clicked / opened * 100) if opened > 0 else 0,
-                    "bounce_rate": (bounced / sent * 100) if sent > 0 else 0,
-                    "failure_rate": (failed / total * 100) if total > 0 else 0,
-                },
-            }
+            {"success": False, "error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
         )
     except Exception as e:
         logger.error(f"Error getting email stats: {str(e)}")
@@ -1,5 +1,8 @@
+import hashlib
 import json
 import logging
+from django.conf import settings
+from django.db import transaction
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
@@ -8,6 +11,9 @@ from .models import EmailLog, EmailEvent
 
 logger = logging.getLogger("anymail")
 
+# Fields written when applying events to email logs in bulk
+STATUS_UPDATE_FIELDS = ["status", "delivered_at", "opens", "clicks", "updated_at"]
+
 
 @csrf_exempt
 @require_POST
@@ -15,6 +21,10 @@ def anymail_webhook(request):
     """
     Webhook handler for Anymail events.
     This endpoint receives webhook notifications from email service providers.
+
+    With ``EMAIL_WEBHOOK_ASYNC`` enabled, batch payloads are handed to a
+    Celery task and acknowledged immediately so that large batches cannot
+    time out and be retried by the provider.
     """
     try:
         # Parse the webhook data
@@ -26,6 +36,14 @@ def anymail_webhook(request):
         # Process the event based on the ESP
         esp = request.GET.get("esp", "unknown")
 
+        if esp in ("sendgrid", "mailjet") and getattr(
+            settings, "EMAIL_WEBHOOK_ASYNC", False
+        ):
+            from .tasks import process_webhook_payload
+
+            process_webhook_payload.delay(esp, payload)
+            return HttpResponse("Accepted")
+
         if esp == "sendgrid":
             return _process_sendgrid_webhook(payload)
         elif esp == "mailgun":
@@ -41,37 +59,161 @@ def anymail_webhook(request):
         return HttpResponse(f"Error: {str(e)}", status=500)
 
 
-def _process_sendgrid_webhook(payload):
-    """Process SendGrid webhook events."""
-    try:
-        for event in payload:
-            # Extract data from the event
-            event_type = event.get("event")
-            message_id = event.get("sg_message_id", "").split(".")[0]
-            # Either use the timestamp or remove it if not needed
-            # timestamp = event.get("timestamp")
-
-            # Find the corresponding email log
-            try:
-                email_log = EmailLog.objects.get(esp_message_id=message_id)
-            except EmailLog.DoesNotExist:
+def _sendgrid_events(payload):
+    """Normalize a SendGrid batch payload."""
+    return [
+        {
+            "lookup": "esp_message_id",
+            "message_id": event.get("sg_message_id", "").split(".")[0],
+            "event_id": event.get("sg_event_id"),
+            "event_type": event.get("event"),
+            "data": event,
+            "ip_address": event.get("ip"),
+            "user_agent": event.get("useragent"),
+        }
+        for event in payload
+    ]
+
+
+def _mailgun_events(payload):
+    """Normalize a Mailgun payload, which carries a single event."""
+    event_data = payload.get("event-data", {})
+    return [
+        {
+            "lookup": "message_id",
+            "message_id": event_data.get("message", {})
+            .get("headers", {})
+            .get("message-id"),
+            "event_id": event_data.get("id"),
+            "event_type": event_data.get("event"),
+            "data": event_data,
+            "ip_address": event_data.get("ip"),
+            "user_agent": event_data.get("client-info", {}).get("user-agent"),
+        }
+    ]
+
+
+def _mailjet_events(payload):
+    """Normalize a Mailjet batch payload."""
+    return [
+        {
+            "lookup": "esp_message_id",
+            "message_id": str(event.get("MessageID")),
+            "event_id": None,
+            "event_type": event.get("event"),
+            "data": event,
+            "ip_address": event.get("ip"),
+            "user_agent": event.get("useragent"),
+        }
+        for event in payload.get("Events", [])
+    ]
+
+
+EVENT_PARSERS = {
+    "sendgrid": _sendgrid_events,
+    "mailgun": _mailgun_events,
+    "mailjet": _mailjet_events,
+}
+
+
+def _idempotency_key(esp, event):
+    """Derive a stable key so that redelivered events can be dropped."""
+    if event["event_id"]:
+        source = f"{esp}:{event['event_id']}"
+    else:
+        source = f"{esp}:" + json.dumps(event["data"], sort_keys=True, default=str)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def ingest_events(esp, events):
+    """
+    Store webhook events and update email statuses in bulk.
+
+    Email logs are resolved with one query per lookup field, already stored
+    events are dropped by idempotency key, and the resulting status of each
+    email log is computed in memory in event order before being written with
+    a single ``bulk_update``.
+
+    The email logs are locked with ``select_for_update`` for the whole
+    ingestion, so a concurrent delivery of the same payload waits, then sees
+    the events stored by the first one and drops them as duplicates instead
+    of overwriting the counters with stale values.
+
+    Args:
+        esp: Name of the email service provider
+        events: Normalized events (see ``EVENT_PARSERS``)
+
+    Returns:
+        dict: Counters for ``received``, ``created``, ``duplicates`` and
+        ``unmatched`` events
+    """
+    stats = {"received": len(events), "created": 0, "duplicates": 0, "unmatched": 0}
+    with transaction.atomic():
+        logs = {}
+        for lookup in sorted({event["lookup"] for event in events}):
+            message_ids = {
+                event["message_id"]
+                for event in events
+                if event["lookup"] == lookup and event["message_id"]
+            }
+            # Locked in primary key order so concurrent deliveries cannot deadlock
+            email_logs = (
+                EmailLog.objects.select_for_update()
+                .filter(**{f"{lookup}__in": message_ids})
+                .order_by("pk")
+            )
+            for email_log in email_logs:
+                logs[(lookup, getattr(email_log, lookup))] = email_log
+
+        for event in events:
+            event["key"] = _idempotency_key(esp, event)
+        existing_keys = set(
+            EmailEvent.objects.filter(
+                idempotency_key__in=[event["key"] for event in events]
+            ).values_list("idempotency_key", flat=True)
+        )
+
+        now = timezone.now()
+        new_events = []
+        changed_logs = {}
+        for event in events:
+            email_log = logs.get((event["lookup"], event["message_id"]))
+            if email_log is None:
                 logger.warning(
-                    f"Could not find email with ESP message ID: {message_id}"
+                    f"Could not find email with {event['lookup']}: {event['message_id']}"
                 )
+                stats["unmatched"] += 1
                 continue
+            if event["key"] in existing_keys:
+                stats["duplicates"] += 1
+                continue
+            existing_keys.add(event["key"])
+
+            _apply_event(email_log, event["event_type"], now)
+            email_log.updated_at = now
+            changed_logs[email_log.pk] = email_log
+            new_events.append(
+                EmailEvent(
+                    email_log=email_log,
+                    event_type=event["event_type"],
+                    data=event["data"],
+                    ip_address=event["ip_address"],
+                    user_agent=event["user_agent"],
+                    idempotency_key=event["key"],
+                )
+            )
 
-            # Update email status based on event type
-            _update_email_status(email_log, event_type)
+        EmailEvent.objects.bulk_create(new_events, ignore_conflicts=True)
+        EmailLog.objects.bulk_update(changed_logs.values(), STATUS_UPDATE_FIELDS)
+
+    stats["created"] = len(new_events)
+    return stats
 
-            # Create an event record
-            EmailEvent.objects.create(
-                email_log=email_log,
-                event_type=event_type,
-                data=event,
-                ip_address=event.get("ip"),
-                user_agent=event.get("useragent"),
-            )
 
+def _process_sendgrid_webhook(payload):
+    """Process SendGrid webhook events."""
+    try:
+        ingest_events("sendgrid", _sendgrid_events(payload))
         return HttpResponse("OK")
     except Exception as e:
         logger.error(f"Error processing SendGrid webhook: {str(e)}")
@@ -81,33 +223,16 @@ def _process_sendgrid_webhook(payload):
 def _process_mailgun_webhook(payload):
     """Process Mailgun webhook events."""
     try:
-        event_data = payload.get("event-data", {})
-        event_type = event_data.get("event")
-        message_id = event_data.get("message", {}).get("headers", {}).get("message-id")
+        events = _mailgun_events(payload)
 
-        if not message_id:
+        if not events[0]["message_id"]:
             logger.warning("No message ID in Mailgun webhook")
             return HttpResponse("No message ID", status=400)
 
-        # Find the corresponding email log
-        try:
-            email_log = EmailLog.objects.get(message_id=message_id)
-        except EmailLog.DoesNotExist:
-            logger.warning(f"Could not find email with message ID: {message_id}")
+        stats = ingest_events("mailgun", events)
+        if stats["unmatched"]:
             return HttpResponse("Email not found", status=404)
 
-        # Update email status based on event type
-        _update_email_status(email_log, event_type)
-
-        # Create an event record
-        EmailEvent.objects.create(
-            email_log=email_log,
-            event_type=event_type,
-            data=event_data,
-            ip_address=event_data.get("ip"),
-            user_agent=event_data.get("client-info", {}).get("user-agent"),
-        )
-
         return HttpResponse("OK")
     except Exception as e:
         logger.error(f"Error processing Mailgun webhook: {str(e)}")
@@ -117,31 +242,7 @@ def _process_mailgun_webhook(payload):
 def _process_mailjet_webhook(payload):
     """Process Mailjet webhook events."""
     try:
-        for event in payload.get("Events", []):
-            event_type = event.get("event")
-            message_id = event.get("MessageID")
-
-            # Find the corresponding email log
-            try:
-                email_log = EmailLog.objects.get(esp_message_id=str(message_id))
-            except EmailLog.DoesNotExist:
-                logger.warning(
-                    f"Could not find email with ESP message ID: {message_id}"
-                )
-                continue
-
-            # Update email status based on event type
-            _update_email_status(email_log, event_type)
-
-            # Create an event record
-            EmailEvent.objects.create(
-                email_log=email_log,
-                event_type=event_type,
-                data=event,
-                ip_address=event.get("ip"),
-                user_agent=event.get("useragent"),
-            )
-
+        ingest_events("mailjet", _mailjet_events(payload))
         return HttpResponse("OK")
     except Exception as e:
         logger.error(f"Error processing Mailjet webhook: {str(e)}")
@@ -155,10 +256,8 @@ def _process_generic_webhook(payload, esp):
     return HttpResponse("OK")
 
 
-def _update_email_status(email_log, event_type):
-    """Update email status based on event type."""
-    now = timezone.now()
-
+def _apply_event(email_log, event_type, now):
+    """Apply the status change of an event to an email log without saving."""
     # Map event types to status
     if event_type in ["delivered", "delivery"]:
         email_log.status = EmailLog.STATUS_DELIVERED
@@ -177,5 +276,3 @@ def _update_email_status(email_log, event_type):
         email_log.status = EmailLog.STATUS_COMPLAINED
     elif event_type in ["unsubscribe", "unsubscribed"]:
         email_log.status = EmailLog.STATUS_UNSUBSCRIBED
-
-    email_log.save()
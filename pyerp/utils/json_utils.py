@@ -1,10 +1,107 @@
-"""JSON utilities for handling serialization and deserialization."""
+"""JSON utilities for handling serialization and deserialization.
+
+``dumps`` and ``loads`` are the fast path for hot code such as decoding
+legacy ERP pages and rendering API responses. They use orjson when it is
+installed and the standard library otherwise, with the same output:
+compact UTF-8 bytes, dates and datetimes in ISO 8601 as ``DateTimeEncoder``
+writes them, Decimal and UUID as strings and NaT as null.
+"""
 
 import json
-from datetime import date, datetime
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
 
 import pandas as pd
 from django.utils import timezone
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """Convert the types neither JSON backend encodes natively."""
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat() if pd.notna(obj) else None
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, uuid.UUID, Promise)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, "tolist"):
+        # numpy scalars and arrays
+        return obj.tolist()
+    if pd.isna(obj):
+        return None
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, sort_keys: bool = False, default=None) -> bytes:
+    """Serialize an object to compact UTF-8 encoded JSON.
+
+    Args:
+        obj: Object to serialize
+        sort_keys: Whether to sort the keys of dicts
+        default: Optional function converting the types the backend does
+            not encode, including dates and datetimes, e.g. to match the
+            formatting of another encoder
+
+    Returns:
+        The JSON document as bytes
+
+    Raises:
+        TypeError: If the object contains a type that cannot be serialized
+    """
+    if orjson is not None:
+        option = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        if default is not None:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(obj, default=default or _default, option=option)
+    return json.dumps(
+        obj,
+        default=default or _default,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=sort_keys,
+    ).encode()
+
+
+def _reject_constant(name):
+    raise ValueError(f"Out of range float value {name} is not allowed")
+
+
+def loads(data, allow_nan: bool = True):
+    """Deserialize a JSON document from bytes or str.
+
+    Args:
+        data: The JSON document
+        allow_nan: Whether to accept NaN and Infinity, which are not JSON
+
+    Raises:
+        ValueError: If the document is not valid JSON; a
+            ``json.JSONDecodeError`` for syntax errors
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            if not allow_nan:
+                raise
+            # Retried as the standard library accepts NaN and Infinity
+    return json.loads(data, parse_constant=None if allow_nan else _reject_constant)
 
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -0,0 +1,98 @@
+"""
+Tests for the fast JSON helpers.
+"""
+
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyerp.utils import json_utils
+from pyerp.utils.json_utils import DateTimeEncoder
+
+RECORD = {
+    "AbsNr": 1,
+    "Datum": date(2025, 3, 1),
+    "Geaendert": datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc),
+    "Erfasst": pd.Timestamp("2025-03-01 08:00:00"),
+    "Netto": Decimal("10.50"),
+    "Id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "Menge": np.int64(3),
+    "Storno": pd.NaT,
+    "Text": "Grüße",
+}
+
+EXPECTED = {
+    "AbsNr": 1,
+    "Datum": "2025-03-01",
+    "Geaendert": "2025-03-01T12:30:05.123456+00:00",
+    "Erfasst": "2025-03-01T08:00:00",
+    "Netto": "10.50",
+    "Id": "12345678-1234-5678-1234-567812345678",
+    "Menge": 3,
+    "Storno": None,
+    "Text": "Grüße",
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request):
+    """Run a test with orjson and with the standard library fallback."""
+    if request.param == "orjson":
+        if json_utils.orjson is None:
+            pytest.skip("orjson is not installed")
+        yield request.param
+    else:
+        with patch.object(json_utils, "orjson", None):
+            yield request.param
+
+
+@pytest.mark.unit
+class TestFastJson:
+    """Tests for dumps and loads."""
+
+    def test_dumps_types(self, backend):
+        data = json_utils.dumps(RECORD)
+        assert isinstance(data, bytes)
+        assert json.loads(data) == EXPECTED
+
+    def test_dates_match_datetime_encoder(self, backend):
+        values = {key: RECORD[key] for key in ("Datum", "Geaendert", "Erfasst")}
+        assert json.loads(json_utils.dumps(values)) == json.loads(
+            json.dumps(values, cls=DateTimeEncoder)
+        )
+
+    def test_dumps_is_compact_and_sorts_keys(self, backend):
+        assert json_utils.dumps({"b": 1, "a": [1, 2]}, sort_keys=True) == (
+            b'{"a":[1,2],"b":1}'
+        )
+
+    def test_dumps_custom_default(self, backend):
+        data = json_utils.dumps(
+            {"d": date(2025, 3, 1)}, default=lambda obj: "custom"
+        )
+        assert json.loads(data) == {"d": "custom"}
+
+    def test_dumps_unsupported_type(self, backend):
+        with pytest.raises(TypeError):
+            json_utils.dumps({"value": object()})
+
+    def test_loads(self, backend):
+        assert json_utils.loads(b'{"__ENTITIES": [{"a": 1}]}') == {
+            "__ENTITIES": [{"a": 1}]
+        }
+        assert json_utils.loads('{"a": "Grüße"}') == {"a": "Grüße"}
+
+    def test_loads_nan(self, backend):
+        assert np.isnan(json_utils.loads(b'{"a": NaN}')["a"])
+        with pytest.raises(ValueError):
+            json_utils.loads(b'{"a": NaN}', allow_nan=False)
+
+    def test_loads_invalid(self, backend):
+        with pytest.raises(ValueError):
+            json_utils.loads(b'{"a": ')
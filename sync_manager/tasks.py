@@ -54,6 +54,11 @@ def build_command_args(workflow: SyncWorkflow, parameters: dict) -> list[str]:
 def run_sync_workflow_task(self, sync_job_id: int):
     """
     Celery task to execute a synchronization workflow management command.
+
+    The sync commands take the per-mapping locks of ``pyerp.sync.queue``
+    (see ``BaseSyncCommand.get_mapping`` and ``run_sync``), so a workflow
+    fails or skips a mapping instead of syncing it alongside a queued or
+    scheduled sync.
     """
     try:
         job = SyncJob.objects.select_related('workflow').get(pk=sync_job_id)
@@ -0,0 +1 @@
+"""Tests for the sync manager app."""
@@ -0,0 +1,253 @@
+"""
+Tests for the sync queue and its queue-depth endpoint.
+"""
+
+import io
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pyerp.sync import queue
+from pyerp.sync.models import SyncMapping, SyncRequest, SyncSource, SyncTarget
+from pyerp.sync.tasks import (
+    reconcile_deletes,
+    run_buchhaltungs_buttler_sync,
+    run_production_sync,
+    run_sync_request,
+)
+from sync_manager.views import get_sync_queue
+
+User = get_user_model()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(SYNC_SOURCE_CONCURRENCY={"legacy_erp": 2}, SYNC_DEFAULT_CONCURRENCY=1)
+class SyncQueueTests(TestCase):
+    """Tests for queueing, coalescing and dispatching entity syncs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.legacy = SyncSource.objects.create(name="legacy_erp")
+        cls.other = SyncSource.objects.create(name="images_cms")
+        target = SyncTarget.objects.create(name="pyerp")
+        cls.products, cls.customers, cls.orders = [
+            SyncMapping.objects.create(
+                source=cls.legacy, target=target, entity_type=entity, mapping_config={}
+            )
+            for entity in ("products", "customers", "orders")
+        ]
+        cls.images = SyncMapping.objects.create(
+            source=cls.other, target=target, entity_type="images", mapping_config={}
+        )
+
+    def test_identical_pending_requests_are_coalesced(self):
+        """Test that duplicate requests do not queue a second sync."""
+        first, created = queue.enqueue_sync(self.products)
+        again, created_again = queue.enqueue_sync(self.products)
+        full, _ = queue.enqueue_sync(self.products, incremental=False)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, first.pk)
+        first.refresh_from_db()
+        self.assertEqual(first.coalesced, 1)
+        self.assertNotEqual(full.pk, first.pk)
+        self.assertEqual(full.priority, SyncRequest.PRIORITY_FULL)
+
+    def test_dispatch_respects_limits_locks_and_priorities(self):
+        """Test per-source caps, one run per mapping and incremental first."""
+        full, _ = queue.enqueue_sync(self.products, incremental=False)
+        queue.enqueue_sync(self.products)
+        queue.enqueue_sync(self.customers)
+        waiting, _ = queue.enqueue_sync(self.orders)
+        queue.enqueue_sync(self.images)
+
+        started = queue.dispatch()
+
+        self.assertEqual(
+            sorted((r.mapping.entity_type, r.incremental) for r in started),
+            [("customers", True), ("images", True), ("products", True)],
+        )
+        full.refresh_from_db()
+        waiting.refresh_from_db()
+        self.assertEqual(full.status, SyncRequest.STATUS_PENDING)
+        self.assertEqual(waiting.status, SyncRequest.STATUS_PENDING)
+        self.assertEqual(queue.dispatch(), [])
+
+    @mock.patch("pyerp.sync.tasks.run_entity_sync")
+    def test_finished_request_releases_its_mapping(self, mock_run_entity_sync):
+        """Test that a finished run unlocks the mapping for the next request."""
+        mock_run_entity_sync.return_value = {"status": "completed", "records_processed": 5}
+        queue.enqueue_sync(self.products)
+        full, _ = queue.enqueue_sync(self.products, incremental=False)
+        (request,) = queue.dispatch()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            run_sync_request(request.pk)
+
+        request.refresh_from_db()
+        self.assertEqual(request.status, SyncRequest.STATUS_COMPLETED)
+        self.assertEqual(request.result["records_processed"], 5)
+        mock_run_entity_sync.assert_called_once_with(
+            mapping_id=self.products.pk, incremental=True, batch_size=100, query_params=None
+        )
+        self.assertEqual(len(callbacks), 1)  # Dispatches the next request
+        self.assertEqual([r.pk for r in queue.dispatch()], [full.pk])
+
+    def test_inline_lock_and_lease_expiry(self):
+        """Test the lock of inline syncs and releasing lost runs."""
+        with queue.sync_lock(self.products) as request:
+            self.assertIsNotNone(request)
+            self.assertIsNone(queue.claim(self.products))
+            # A lock held in this context is reused, e.g. by run_sync
+            with queue.sync_lock(self.products) as nested:
+                self.assertEqual(nested.pk, request.pk)
+            request.refresh_from_db()
+            self.assertEqual(request.status, SyncRequest.STATUS_RUNNING)
+            request.result = {"status": "completed"}
+        request.refresh_from_db()
+        self.assertEqual(request.status, SyncRequest.STATUS_COMPLETED)
+
+        lost = queue.claim(self.products)
+        self.assertIsNone(queue.claim(self.products))
+        queue.expire_lost_requests(now=timezone.now() + timedelta(hours=2))
+        lost.refresh_from_db()
+        self.assertEqual(lost.status, SyncRequest.STATUS_FAILED)
+        self.assertIsNotNone(queue.claim(self.products))
+
+    @override_settings(SYNC_REQUEST_LEASE_SECONDS=600, SYNC_REQUEST_HEARTBEAT_SECONDS=60)
+    def test_heartbeat_renews_held_leases(self):
+        """Test that a running sync keeps its lock past the first lease."""
+        now = timezone.now()
+        self.assertEqual(queue.heartbeat(now), 0)
+
+        with queue.sync_lock(self.products) as request:
+            started_lease = request.lease_expires_at
+            self.assertEqual(queue.heartbeat(now + timedelta(seconds=30)), 0)
+            for minutes in range(5, 30, 5):
+                self.assertEqual(queue.heartbeat(now + timedelta(minutes=minutes)), 1)
+            request.refresh_from_db()
+            self.assertGreater(request.lease_expires_at, started_lease)
+
+            self.assertEqual(
+                queue.expire_lost_requests(now=now + timedelta(minutes=30)), 0
+            )
+            queue.expire_lost_requests(now=now + timedelta(hours=1))
+            # The lease was lost, so it can no longer be renewed
+            self.assertEqual(queue.heartbeat(now + timedelta(hours=1)), 0)
+            request.result = {"status": "completed"}
+
+        request.refresh_from_db()
+        self.assertEqual(request.status, SyncRequest.STATUS_FAILED)
+        self.assertIsNone(request.result)
+
+    @mock.patch("pyerp.sync.tasks.run_entity_sync")
+    @mock.patch("pyerp.sync.tasks.create_production_mappings")
+    def test_production_sync_runs_under_the_mapping_locks(
+        self, mock_create_mappings, mock_run_entity_sync
+    ):
+        """Test that production orders and items skip mappings that are syncing."""
+        mock_create_mappings.return_value = (self.orders.pk, self.customers.pk)
+        mock_run_entity_sync.return_value = {"status": "completed", "records_processed": 2}
+        queue.claim(self.customers)
+
+        with self.captureOnCommitCallbacks():
+            orders, items = run_production_sync()
+
+        self.assertEqual(orders["records_processed"], 2)
+        self.assertEqual(items["status"], "skipped")
+        mock_run_entity_sync.assert_called_once_with(
+            mapping_id=self.orders.pk, incremental=True, batch_size=100, query_params=None
+        )
+        lock = SyncRequest.objects.get(mapping=self.orders)
+        self.assertEqual(lock.status, SyncRequest.STATUS_COMPLETED)
+
+    @mock.patch("pyerp.sync.tasks.log_data_sync_event")
+    @mock.patch("pyerp.sync.tasks._get_or_create_mapping")
+    @mock.patch("pyerp.sync.tasks._load_yaml_config")
+    def test_buchhaltungs_buttler_sync_is_queued(
+        self, mock_config, mock_get_mapping, mock_log_event
+    ):
+        """Test that the BuchhaltungsButler syncs go through the queue."""
+        mock_config.return_value = {
+            "mappings": [
+                {"entity_type": "images", "source": "images_cms", "target": "pyerp"}
+            ]
+        }
+        mock_get_mapping.return_value = self.images
+
+        with self.captureOnCommitCallbacks():
+            (result,) = run_buchhaltungs_buttler_sync()
+            (again,) = run_buchhaltungs_buttler_sync()
+
+        request = SyncRequest.objects.get(mapping=self.images)
+        self.assertEqual(request.status, SyncRequest.STATUS_PENDING)
+        self.assertEqual(result["request_id"], request.pk)
+        self.assertTrue(again["coalesced"])
+
+    @mock.patch("pyerp.sync.management.commands.run_sync.PipelineFactory")
+    def test_run_sync_command_skips_locked_mappings(self, mock_factory):
+        """Test that manual syncs do not overlap a running sync."""
+        queue.claim(self.products)
+        out = io.StringIO()
+
+        with self.captureOnCommitCallbacks():
+            call_command("run_sync", mapping=self.products.pk, stdout=out)
+
+        self.assertIn("Skipping mapping ID", out.getvalue())
+        mock_factory.create_pipeline.assert_not_called()
+
+    @mock.patch("pyerp.sync.tasks.PipelineFactory")
+    def test_reconcile_runs_under_the_mapping_lock(self, mock_factory):
+        """Test that reconciling skips mappings that are syncing."""
+        self.products.mapping_config = {"reconcile": {"enabled": True}}
+        self.products.save()
+        mock_factory.create_pipeline.return_value.reconcile_deletes.return_value = {
+            "status": "completed",
+            "missing": 1,
+        }
+
+        with self.captureOnCommitCallbacks():
+            (result,) = reconcile_deletes()
+        self.assertEqual(result["status"], "completed")
+        lock = SyncRequest.objects.get(mapping=self.products)
+        self.assertEqual(lock.status, SyncRequest.STATUS_COMPLETED)
+        self.assertEqual(lock.query_params, {"reconcile": True})
+
+        queue.claim(self.products)
+        (result,) = reconcile_deletes()
+        self.assertEqual(result["status"], "skipped")
+        mock_factory.create_pipeline.return_value.reconcile_deletes.assert_called_once_with(
+            dry_run=False
+        )
+
+    def test_queue_depth_view(self):
+        """Test the queue summary served to staff users."""
+        queue.enqueue_sync(self.products)
+        queue.enqueue_sync(self.customers)
+        queue.enqueue_sync(self.orders)
+        queue.dispatch()
+
+        request = APIRequestFactory().get("/api/sync/queue/")
+        force_authenticate(request, user=User.objects.create_user("user", password="pw"))
+        self.assertEqual(get_sync_queue(request).status_code, 403)
+
+        request = APIRequestFactory().get("/api/sync/queue/")
+        force_authenticate(
+            request, user=User.objects.create_user("staff", password="pw", is_staff=True)
+        )
+        response = get_sync_queue(request)
+        self.assertEqual(response.status_code, 200)
+        (source,) = response.data["sources"]
+        self.assertEqual(
+            (source["source"], source["running"], source["pending"], source["limit"]),
+            ("legacy_erp", 2, 1, 2),
+        )
+        self.assertEqual(len(response.data["requests"]), 3)
@@ -1,7 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    SyncWorkflowViewSet, SyncJobViewSet, get_system_integration_data
+    SyncWorkflowViewSet, SyncJobViewSet, get_system_integration_data,
+    get_sync_queue
 )
 
 router = DefaultRouter()
@@ -17,4 +18,5 @@ urlpatterns = [
         get_system_integration_data, 
         name='system_integration_data'
     ),
+    path('queue/', get_sync_queue, name='sync_queue'),
 ] 
\ No newline at end of file
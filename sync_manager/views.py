@@ -11,6 +11,7 @@ from .models import SyncWorkflow, SyncJob
 from .serializers import (SyncWorkflowSerializer, SyncJobSerializer, 
                         TriggerSyncJobSerializer)
 from .tasks import run_sync_workflow_task
+from pyerp.sync.queue import get_queue_depth
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
@@ -49,6 +50,15 @@ def get_system_integration_data(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_sync_queue(request):
+    """
+    Get the pending and running entity syncs per source, with the
+    concurrency limit of each source.
+    """
+    return Response(get_queue_depth())
+
 class SyncWorkflowViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows viewing Sync Workflows.
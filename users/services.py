@@ -2,10 +2,15 @@
 Service layer for user, role, and permission management.
 """
 
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from pyerp.core.api_cache import has_shared_cache
 
 from .models import (
     UserProfile,
@@ -17,6 +22,9 @@ from .models import (
 
 User = get_user_model()
 
+PERMISSION_CACHE_VERSION_KEY = "users:permissions:version"
+PERMISSION_CACHE_TIMEOUT = 3600
+
 
 class UserService:
     """
@@ -234,6 +242,58 @@ class RoleService:
         """
         return User.objects.filter(groups=role.group)
 
+    @staticmethod
+    def get_role_closure():
+        """
+        Get the descendant role ids of every role.
+
+        The closure is built from a single query over the role table and,
+        with a shared cache, cached until the next role or permission change.
+        Cycles introduced through ``parent_role`` are tolerated: every role is
+        visited at most once and never counts as its own descendant.
+
+        Returns:
+            Dict mapping role id to a frozenset of descendant role ids
+        """
+        return PermissionService._get_cached(
+            "role_closure", RoleService._build_role_closure
+        )
+
+    @staticmethod
+    def _build_role_closure():
+        children = defaultdict(list)
+        role_ids = []
+        for role_id, parent_id in Role.objects.values_list("id", "parent_role_id"):
+            role_ids.append(role_id)
+            if parent_id is not None:
+                children[parent_id].append(role_id)
+
+        closure = {}
+        for role_id in role_ids:
+            descendants = set()
+            stack = list(children[role_id])
+            while stack:
+                child_id = stack.pop()
+                if child_id == role_id or child_id in descendants:
+                    continue
+                descendants.add(child_id)
+                stack.extend(children[child_id])
+            closure[role_id] = frozenset(descendants)
+        return closure
+
+    @staticmethod
+    def get_descendant_role_ids(role):
+        """
+        Get the ids of all descendant roles for a given role.
+
+        Args:
+            role: Role instance
+
+        Returns:
+            frozenset of Role ids
+        """
+        return RoleService.get_role_closure().get(role.pk, frozenset())
+
     @staticmethod
     def get_all_child_roles(role):
         """
@@ -245,12 +305,157 @@ class RoleService:
         Returns:
             List of Role objects
         """
-        children = list(role.child_roles.all())
-        for child in list(
-            children
-        ):  # Create a copy to avoid modifying during iteration
-            children.extend(RoleService.get_all_child_roles(child))
-        return children
+        descendant_ids = RoleService.get_descendant_role_ids(role)
+        if not descendant_ids:
+            return []
+        return list(Role.objects.filter(id__in=descendant_ids))
+
+    @staticmethod
+    def get_role_permission_ids(role_id):
+        """
+        Get the effective permission ids of a role.
+
+        A role grants the permissions of its own group and of the groups of
+        all its descendant roles. With a shared cache the result is cached
+        until the next role or permission change.
+
+        Args:
+            role_id: Role id
+
+        Returns:
+            frozenset of Permission ids
+        """
+
+        def build():
+            role_ids = {role_id} | RoleService.get_role_closure().get(
+                role_id, frozenset()
+            )
+            return frozenset(
+                Permission.objects.filter(group__role__id__in=role_ids)
+                .values_list("id", flat=True)
+                .distinct()
+            )
+
+        return PermissionService._get_cached("role_permissions", build, role_id)
+
+
+class PermissionContext:
+    """
+    Effective permissions of one user, loaded once and reused for many checks.
+
+    Group ids are loaded on first use and data permissions are loaded once per
+    content type, so checking a whole page of objects costs at most one query
+    per model instead of two per object.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.is_superuser = bool(getattr(user, "is_superuser", False))
+        self._group_ids = None
+        self._permission_ids = None
+        self._data_permissions = {}
+
+    @property
+    def group_ids(self):
+        """Return the ids of the user's groups."""
+        if self._group_ids is None:
+            if self.user.pk is None:
+                self._group_ids = frozenset()
+            else:
+                self._group_ids = frozenset(
+                    self.user.groups.values_list("id", flat=True)
+                )
+        return self._group_ids
+
+    @property
+    def permission_ids(self):
+        """Return the ids of the user's model permissions (cached)."""
+        if self._permission_ids is None:
+            self._permission_ids = PermissionService.get_user_permission_ids(
+                self.user
+            )
+        return self._permission_ids
+
+    def _owner_filter(self):
+        owner = Q(user_id=self.user.pk)
+        if self.group_ids:
+            owner |= Q(group_id__in=self.group_ids)
+        return owner
+
+    def _data_permission_filter(self, content_type, permission_type):
+        return DataPermission.objects.filter(
+            self._owner_filter(),
+            content_type=content_type,
+            permission_type__in=[permission_type, "full"],
+        )
+
+    def _get_data_permissions(self, content_type):
+        """Return a mapping of object id to granted permission types."""
+        permissions = self._data_permissions.get(content_type.pk)
+        if permissions is None:
+            permissions = defaultdict(set)
+            rows = DataPermission.objects.filter(
+                self._owner_filter(), content_type=content_type
+            ).values_list("object_id", "permission_type")
+            for object_id, permission_type in rows:
+                permissions[object_id].add(permission_type)
+            self._data_permissions[content_type.pk] = permissions
+        return permissions
+
+    def has_object_permission(self, obj, permission_type):
+        """
+        Check if the user has permission for a specific object.
+
+        Args:
+            obj: Model instance
+            permission_type: Type of permission ('view', 'edit', 'delete', 'full')
+
+        Returns:
+            Boolean indicating if user has permission
+        """
+        if self.is_superuser:
+            return True
+        content_type = ContentType.objects.get_for_model(obj)
+        granted = self._get_data_permissions(content_type).get(obj.pk, ())
+        return permission_type in granted or "full" in granted
+
+    def filter_permitted(self, objects, permission_type):
+        """
+        Return the objects the user has permission for, preserving order.
+
+        Args:
+            objects: Iterable of model instances, possibly of different models
+            permission_type: Type of permission ('view', 'edit', 'delete', 'full')
+
+        Returns:
+            List of permitted model instances
+        """
+        objects = list(objects)
+        if self.is_superuser:
+            return objects
+        return [
+            obj for obj in objects if self.has_object_permission(obj, permission_type)
+        ]
+
+    def filter_queryset(self, queryset, permission_type):
+        """
+        Restrict a queryset to objects the user has permission for.
+
+        The check is a correlated ``EXISTS`` subquery, so it stays a single
+        query regardless of how many objects the user can access.
+
+        Args:
+            queryset: QuerySet to restrict
+            permission_type: Type of permission ('view', 'edit', 'delete', 'full')
+
+        Returns:
+            Filtered QuerySet
+        """
+        if self.is_superuser:
+            return queryset
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        permitted = self._data_permission_filter(content_type, permission_type)
+        return queryset.filter(Exists(permitted.filter(object_id=OuterRef("pk"))))
 
 
 class PermissionService:
@@ -258,6 +463,80 @@ class PermissionService:
     Service for permission management.
     """
 
+    @staticmethod
+    def _get_cache_version():
+        version = cache.get(PERMISSION_CACHE_VERSION_KEY)
+        if version is None:
+            cache.add(PERMISSION_CACHE_VERSION_KEY, 1, None)
+            version = cache.get(PERMISSION_CACHE_VERSION_KEY, 1)
+        return version
+
+    @staticmethod
+    def _get_cached(name, build, *key_parts):
+        """
+        Return ``build()``, cached until the next permission change.
+
+        Invalidation bumps a version in the cache, which the other workers
+        only see with a shared cache backend. With a per-process cache a
+        revoked permission would stay granted elsewhere, so the value is
+        built on every call instead.
+        """
+        if not has_shared_cache():
+            return build()
+        key = ":".join(
+            ["users", name, str(PermissionService._get_cache_version())]
+            + [str(part) for part in key_parts]
+        )
+        value = cache.get(key)
+        if value is None:
+            value = build()
+            cache.set(key, value, PERMISSION_CACHE_TIMEOUT)
+        return value
+
+    @staticmethod
+    def invalidate_permission_cache():
+        """
+        Invalidate cached user permissions, role closure and role permissions.
+
+        Called from signal handlers whenever roles, group memberships, group
+        permissions or user permissions change.
+        """
+        try:
+            cache.incr(PERMISSION_CACHE_VERSION_KEY)
+        except ValueError:
+            cache.set(PERMISSION_CACHE_VERSION_KEY, 1, None)
+
+    @staticmethod
+    def get_user_permission_ids(user):
+        """
+        Get the ids of all permissions for a user.
+
+        Includes direct and group permissions as well as the permissions
+        inherited through the descendants of the user's roles. With a shared
+        cache the result is cached until the next role, group or permission
+        change.
+
+        Args:
+            user: User instance
+
+        Returns:
+            frozenset of Permission ids
+        """
+
+        def build():
+            permission_ids = set(
+                Permission.objects.filter(Q(user=user) | Q(group__user=user))
+                .values_list("id", flat=True)
+                .distinct()
+            )
+            for role_id in Role.objects.filter(group__user=user).values_list(
+                "id", flat=True
+            ):
+                permission_ids |= RoleService.get_role_permission_ids(role_id)
+            return frozenset(permission_ids)
+
+        return PermissionService._get_cached("permissions", build, user.pk)
+
     @staticmethod
     def get_user_permissions(user):
         """
@@ -272,52 +551,57 @@ class PermissionService:
         if user.is_superuser:
             return Permission.objects.all()
 
-        # Get permissions from user and groups
-        return Permission.objects.filter(Q(user=user) | Q(group__user=user)).distinct()
+        return Permission.objects.filter(
+            id__in=PermissionService.get_user_permission_ids(user)
+        )
 
     @staticmethod
-    def check_object_permission(user, obj, permission_type):
+    def check_object_permission(user, obj, permission_type, context=None):
         """
         Check if user has permission for a specific object.
 
+        A single check runs one ``EXISTS`` query. Pass a shared
+        ``PermissionContext`` when checking many objects.
+
         Args:
             user: User instance
             obj: Model instance
             permission_type: Type of permission ('view', 'edit', 'delete', 'full')
+            context: Optional PermissionContext for ``user``
 
         Returns:
             Boolean indicating if user has permission
         """
-        # Superusers have all permissions
+        if context is not None:
+            return context.has_object_permission(obj, permission_type)
         if user.is_superuser:
             return True
-
-        # Get content type for the object
-        content_type = ContentType.objects.get_for_model(obj)
-
-        # Check for direct user permission
-        user_has_perm = DataPermission.objects.filter(
-            user=user,
-            content_type=content_type,
+        return DataPermission.objects.filter(
+            Q(user_id=user.pk) | Q(group__in=user.groups.all()),
+            content_type=ContentType.objects.get_for_model(obj),
             object_id=obj.pk,
             permission_type__in=[permission_type, "full"],
         ).exists()
 
-        if user_has_perm:
-            return True
+    @staticmethod
+    def filter_permitted(user, objects, permission_type, context=None):
+        """
+        Return the objects a user has permission for.
 
-        # Check for group permission
-        group_has_perm = DataPermission.objects.filter(
-            group__in=user.groups.all(),
-            content_type=content_type,
-            object_id=obj.pk,
-            permission_type__in=[permission_type, "full"],
-        ).exists()
+        Args:
+            user: User instance
+            objects: Iterable of model instances
+            permission_type: Type of permission ('view', 'edit', 'delete', 'full')
+            context: Optional PermissionContext for ``user``
 
-        return group_has_perm
+        Returns:
+            List of permitted model instances
+        """
+        context = context or PermissionContext(user)
+        return context.filter_permitted(objects, permission_type)
 
     @staticmethod
-    def get_objects_with_permission(user, model_class, permission_type):
+    def get_objects_with_permission(user, model_class, permission_type, context=None):
         """
         Get all objects of a given model that user has permission for.
 
@@ -325,35 +609,13 @@ class PermissionService:
             user: User instance
             model_class: Model class
             permission_type: Type of permission ('view', 'edit', 'delete', 'full')
+            context: Optional PermissionContext for ``user``
 
         Returns:
             QuerySet of model instances
         """
-        # Superusers can access all objects
-        if user.is_superuser:
-            return model_class.objects.all()
-
-        content_type = ContentType.objects.get_for_model(model_class)
-
-        # Get object IDs from user permissions
-        user_object_ids = DataPermission.objects.filter(
-            user=user,
-            content_type=content_type,
-            permission_type__in=[permission_type, "full"],
-        ).values_list("object_id", flat=True)
-
-        # Get object IDs from group permissions
-        group_object_ids = DataPermission.objects.filter(
-            group__in=user.groups.all(),
-            content_type=content_type,
-            permission_type__in=[permission_type, "full"],
-        ).values_list("object_id", flat=True)
-
-        # Combine object IDs
-        object_ids = list(user_object_ids) + list(group_object_ids)
-
-        # Return objects with those IDs
-        return model_class.objects.filter(pk__in=object_ids)
+        context = context or PermissionContext(user)
+        return context.filter_queryset(model_class.objects.all(), permission_type)
 
     @staticmethod
     def organize_permissions_by_category():
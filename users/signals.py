@@ -3,17 +3,21 @@ Signal handlers for user-related events.
 """
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
 from django.contrib.auth.signals import (
     user_logged_in,
     user_logged_out,
     user_login_failed,
 )
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from pyerp.utils.logging import get_category_logger
 
+from .models import Role
+from .services import PermissionService
+
 # Set up logger for security events
 logger = get_category_logger("security")
 
@@ -79,3 +83,21 @@ def handle_user_save(sender, instance, created, **kwargs):
         # Handle status changes or other important updates
 
     # You can add additional user setup tasks here
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def handle_permissions_changed(sender, action, **kwargs):
+    """Invalidate cached user permissions when memberships or grants change."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        PermissionService.invalidate_permission_cache()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def handle_permission_source_changed(sender, instance, **kwargs):
+    """Invalidate cached permissions when a role, group or permission changes."""
+    PermissionService.invalidate_permission_cache()
@@ -1,11 +0,0 @@
-"""
-Tests for the users app.
-
-This file is left as a stub for Django's test discovery.
-Actual tests are organized in the tests directory:
-
-- tests/unit/users/ - Unit tests for models, serializers, and services
-- tests/api/users/ - API tests for views and endpoints
-"""
-
-# Create your tests here.
@@ -0,0 +1,194 @@
+"""
+Tests for object-level permission checks in PermissionService.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from users.models import DataPermission
+from users.services import PermissionContext, PermissionService
+
+User = get_user_model()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class PermissionContextTestCase(TestCase):
+    """Test set-based object permission checks."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(username="perm_user", password="password123")
+        self.other = User.objects.create_user(username="other_user", password="password123")
+        self.group = Group.objects.create(name="Editors")
+        self.user.groups.add(self.group)
+        self.groups = [Group.objects.create(name=f"Target {i}") for i in range(5)]
+        self.group_ct = ContentType.objects.get_for_model(Group)
+
+        # Direct view permission on target 0, group edit on 1, full on 2,
+        # a permission for another user on 3 and nothing on 4
+        self._grant(self.user, self.groups[0], "view")
+        self._grant(self.other, self.groups[1], "edit", group=self.group)
+        self._grant(self.user, self.groups[2], "full")
+        self._grant(self.other, self.groups[3], "view")
+
+    def _grant(self, user, obj, permission_type, group=None):
+        return DataPermission.objects.create(
+            user=user,
+            group=group,
+            content_type=self.group_ct,
+            object_id=obj.pk,
+            permission_type=permission_type,
+        )
+
+    def _expected(self, permission_type):
+        return [
+            obj
+            for obj in self.groups
+            if DataPermission.objects.filter(
+                content_type=self.group_ct,
+                object_id=obj.pk,
+                permission_type__in=[permission_type, "full"],
+            )
+            .filter(user=self.user)
+            .exists()
+            or DataPermission.objects.filter(
+                content_type=self.group_ct,
+                object_id=obj.pk,
+                permission_type__in=[permission_type, "full"],
+                group__in=self.user.groups.all(),
+            ).exists()
+        ]
+
+    def test_check_object_permission(self):
+        """Test direct, group and full-access grants."""
+        self.assertTrue(PermissionService.check_object_permission(self.user, self.groups[0], "view"))
+        self.assertFalse(PermissionService.check_object_permission(self.user, self.groups[0], "edit"))
+        self.assertTrue(PermissionService.check_object_permission(self.user, self.groups[1], "edit"))
+        self.assertTrue(PermissionService.check_object_permission(self.user, self.groups[2], "delete"))
+        self.assertFalse(PermissionService.check_object_permission(self.user, self.groups[3], "view"))
+        self.assertFalse(PermissionService.check_object_permission(self.user, self.groups[4], "view"))
+
+    def test_queryset_filter_matches_object_checks(self):
+        """Test that the queryset filter and filter_permitted agree."""
+        context = PermissionContext(self.user)
+        for permission_type in ("view", "edit", "delete"):
+            expected = self._expected(permission_type)
+            queryset = PermissionService.get_objects_with_permission(
+                self.user, Group, permission_type, context=context
+            )
+            self.assertEqual(
+                set(queryset.filter(name__startswith="Target")), set(expected)
+            )
+            self.assertEqual(context.filter_permitted(self.groups, permission_type), expected)
+
+    def test_queryset_filter_uses_subquery(self):
+        """Test that the filter is a single query without materialised ids."""
+        queryset = PermissionService.get_objects_with_permission(self.user, Group, "view")
+        self.assertIn("EXISTS", str(queryset.query).upper())
+        with self.assertNumQueries(1):
+            list(queryset)
+
+    def test_filter_permitted_constant_queries(self):
+        """Test that bulk checks load data permissions once per content type."""
+        context = PermissionContext(self.user)
+        with self.assertNumQueries(2):
+            context.filter_permitted(self.groups, "view")
+            context.filter_permitted(self.groups, "edit")
+
+    def test_superuser(self):
+        """Test that superusers are permitted everything without queries."""
+        admin = User.objects.create_superuser(username="admin", password="password123")
+        context = PermissionContext(admin)
+        with self.assertNumQueries(0):
+            self.assertEqual(context.filter_permitted(self.groups, "delete"), self.groups)
+
+    def test_check_object_permission_single_query(self):
+        """Test that a check without a context is one EXISTS query."""
+        ContentType.objects.get_for_model(Group)
+        with self.assertNumQueries(1):
+            PermissionService.check_object_permission(self.user, self.groups[1], "edit")
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(API_CACHE={"ENABLED": False, "ALLOW_LOCAL_CACHE": True})
+class UserPermissionCacheTestCase(TestCase):
+    """Test caching of get_user_permissions."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(username="cache_user", password="password123")
+        self.group = Group.objects.create(name="Staff")
+        self.permission = Permission.objects.get(codename="view_group")
+
+    def _codenames(self):
+        return set(
+            PermissionService.get_user_permissions(self.user).values_list("codename", flat=True)
+        )
+
+    def test_cached(self):
+        """Test that repeated lookups hit the cache."""
+        PermissionService.get_user_permission_ids(self.user)
+        with self.assertNumQueries(0):
+            PermissionService.get_user_permission_ids(self.user)
+
+    def test_invalidated_on_group_membership(self):
+        """Test that adding a user to a group invalidates the cache."""
+        self.group.permissions.add(self.permission)
+        self.assertEqual(self._codenames(), set())
+        self.user.groups.add(self.group)
+        self.assertEqual(self._codenames(), {"view_group"})
+
+    def test_invalidated_on_group_permissions(self):
+        """Test that changing group permissions invalidates the cache."""
+        self.user.groups.add(self.group)
+        self.assertEqual(self._codenames(), set())
+        self.group.permissions.add(self.permission)
+        self.assertEqual(self._codenames(), {"view_group"})
+        self.group.permissions.remove(self.permission)
+        self.assertEqual(self._codenames(), set())
+
+    def test_invalidated_on_user_permissions(self):
+        """Test that changing direct user permissions invalidates the cache."""
+        self.assertEqual(self._codenames(), set())
+        self.user.user_permissions.add(self.permission)
+        self.assertEqual(self._codenames(), {"view_group"})
+
+    def test_invalidated_on_group_delete(self):
+        """Test that deleting a group invalidates the cache."""
+        self.group.permissions.add(self.permission)
+        self.user.groups.add(self.group)
+        self.assertEqual(self._codenames(), {"view_group"})
+        self.group.delete()
+        self.assertEqual(self._codenames(), set())
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class UserPermissionLocalCacheTestCase(TestCase):
+    """Test that permissions are not cached in a per-process cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(username="local_user", password="password123")
+        self.group = Group.objects.create(name="Staff")
+        self.user.groups.add(self.group)
+        self.permission = Permission.objects.get(codename="view_group")
+        self.group.permissions.add(self.permission)
+
+    def test_not_cached(self):
+        """Test that a change made by another process is seen at once."""
+        self.assertEqual(
+            PermissionService.get_user_permission_ids(self.user), {self.permission.id}
+        )
+        # Like a change in another process, this does not invalidate here
+        User.groups.through.objects.filter(user=self.user).delete()
+        self.assertEqual(PermissionService.get_user_permission_ids(self.user), set())
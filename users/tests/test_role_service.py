@@ -0,0 +1,121 @@
+"""
+Tests for role hierarchy resolution in RoleService.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from users.models import Role
+from users.services import PermissionService, RoleService
+
+User = get_user_model()
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+@override_settings(API_CACHE={"ENABLED": False, "ALLOW_LOCAL_CACHE": True})
+class RoleHierarchyTestCase(TestCase):
+    """Test the cached role closure and effective role permissions."""
+
+    def setUp(self):
+        """Set up a three-level role tree: admin > manager > staff."""
+        cache.clear()
+        self.view_perm = Permission.objects.get(codename="view_group")
+        self.change_perm = Permission.objects.get(codename="change_group")
+        self.delete_perm = Permission.objects.get(codename="delete_group")
+
+        self.admin = RoleService.create_role(name="Admin", permissions=[self.delete_perm])
+        self.manager = RoleService.create_role(
+            name="Manager", permissions=[self.change_perm], parent_role=self.admin
+        )
+        self.staff = RoleService.create_role(
+            name="Staff", permissions=[self.view_perm], parent_role=self.manager
+        )
+        self.sibling = RoleService.create_role(name="Sibling", parent_role=self.admin)
+
+    def test_get_all_child_roles(self):
+        """Test that all descendants are returned."""
+        self.assertEqual(
+            set(RoleService.get_all_child_roles(self.admin)),
+            {self.manager, self.staff, self.sibling},
+        )
+        self.assertEqual(RoleService.get_all_child_roles(self.manager), [self.staff])
+        self.assertEqual(RoleService.get_all_child_roles(self.staff), [])
+
+    def test_descendants_single_query(self):
+        """Test that descendants are resolved with at most one query."""
+        RoleService.get_role_closure()
+        with self.assertNumQueries(1):
+            RoleService.get_all_child_roles(self.admin)
+        with self.assertNumQueries(0):
+            RoleService.get_descendant_role_ids(self.manager)
+
+    def test_closure_invalidated_on_role_change(self):
+        """Test that moving a role updates the closure."""
+        self.assertNotIn(self.staff.id, RoleService.get_descendant_role_ids(self.sibling))
+        self.staff.parent_role = self.sibling
+        self.staff.save()
+        self.assertIn(self.staff.id, RoleService.get_descendant_role_ids(self.sibling))
+        self.assertNotIn(self.staff.id, RoleService.get_descendant_role_ids(self.manager))
+
+    def test_cycle_safe(self):
+        """Test that a parent_role cycle does not recurse forever."""
+        Role.objects.filter(pk=self.admin.pk).update(parent_role=self.staff)
+        PermissionService.invalidate_permission_cache()
+        self.assertEqual(
+            RoleService.get_descendant_role_ids(self.admin),
+            {self.manager.id, self.staff.id, self.sibling.id},
+        )
+        self.assertNotIn(self.staff.id, RoleService.get_descendant_role_ids(self.staff))
+
+    def test_role_permissions_include_descendants(self):
+        """Test effective permissions of each role."""
+        self.assertEqual(
+            RoleService.get_role_permission_ids(self.admin.id),
+            {self.view_perm.id, self.change_perm.id, self.delete_perm.id},
+        )
+        self.assertEqual(
+            RoleService.get_role_permission_ids(self.staff.id), {self.view_perm.id}
+        )
+
+    def test_user_permissions_include_role_hierarchy(self):
+        """Test that PermissionService uses the effective role permissions."""
+        user = User.objects.create_user(username="manager_user", password="password123")
+        user.groups.add(self.manager.group)
+        self.assertEqual(
+            set(PermissionService.get_user_permissions(user)),
+            {self.view_perm, self.change_perm},
+        )
+        with self.assertNumQueries(0):
+            PermissionService.get_user_permission_ids(user)
+
+
+@pytest.mark.backend
+@pytest.mark.unit
+class RoleHierarchyLocalCacheTestCase(TestCase):
+    """Test that the role hierarchy is not cached in a per-process cache."""
+
+    def setUp(self):
+        """Set up a manager role above a staff role."""
+        cache.clear()
+        self.view_perm = Permission.objects.get(codename="view_group")
+        self.manager = RoleService.create_role(name="Manager")
+        self.staff = RoleService.create_role(
+            name="Staff", permissions=[self.view_perm], parent_role=self.manager
+        )
+
+    def test_hierarchy_change_seen_at_once(self):
+        """Test that a change made by another process is seen at once."""
+        self.assertEqual(
+            RoleService.get_descendant_role_ids(self.manager), {self.staff.id}
+        )
+        self.assertEqual(
+            RoleService.get_role_permission_ids(self.manager.id), {self.view_perm.id}
+        )
+        # Like a change in another process, this does not invalidate here
+        Role.objects.filter(pk=self.staff.pk).update(parent_role=None)
+        self.assertEqual(RoleService.get_descendant_role_ids(self.manager), set())
+        self.assertEqual(RoleService.get_role_permission_ids(self.manager.id), set())
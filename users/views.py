@@ -442,7 +442,7 @@ class RoleViewSet(viewsets.ModelViewSet):
                     )
 
                 # Check if this would create a cycle
-                if parent_role in RoleService.get_all_child_roles(child_role):
+                if parent_role.id in RoleService.get_descendant_role_ids(child_role):
                     return Response(
                         {
                             "detail": "Cannot add role as child because it would create a cycle"